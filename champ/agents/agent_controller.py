@@ -1,6 +1,7 @@
 # champ/agents/agent_controller.py
 from typing import Dict, Any
 from champ.agents import tools
+from champ.agents.executor import Step, run_steps
 from champ.llm.provider import safe_call_llm
 
 FORMAT_SYSTEM = (
@@ -15,50 +16,58 @@ def _fmt_answer(context: Dict[str, Any], question: str) -> str:
         return "AI is temporarily unavailable. Here are key figures:\n" + str(context.get("aggregates") or context)[:800]
     return txt or "No response."
 
+def _aggregates(overview: Dict[str, Any]) -> Dict[str, Any]:
+    rows = overview["data"]["rows"]
+    return rows[0] if rows else {}
+
+def _declines(ag: Dict[str, Any]) -> list:
+    declines = []
+    try:
+        if ag.get("avg_balance_10", 0) + 2 < ag.get("avg_balance_all", 0):
+            declines.append("balance")
+        if ag.get("avg_gait_10", 0) + 2 < ag.get("avg_gait_all", 0):
+            declines.append("gait")
+        if ag.get("avg_posture_10", 0) + 2 < ag.get("avg_posture_all", 0):
+            declines.append("posture")
+    except Exception:
+        pass
+    return declines
+
+def _profile(ag: Dict[str, Any]) -> Dict[str, Any]:
+    fatigue = (ag.get("short_sessions_10") or 0) >= 3
+    return {"declines": _declines(ag), "fatigue": fatigue}
+
+def _knowledge_query(ag: Dict[str, Any]) -> str:
+    return "beginner balance drills" if "balance" in _declines(ag) else "adherence tips"
+
 def run(user_id: str, question: str, intent: str, meta: Dict[str, Any]) -> Dict[str, Any]:
     """
     Simple, guarded agent:
     - Cap at 3 tool calls.
-    - Allowed sequences per intent.
+    - Allowed sequences per intent; independent calls run concurrently (executor.run_steps).
     """
     trace = []
     context: Dict[str, Any] = {}
 
     try:
         if intent in ("health_summary", "open_personal_analysis", "trend_analysis"):
-            # 1) Get aggregates
-            r1 = tools.get_overview(user_id)
-            trace.append({"tool": "get_overview", "ok": r1["ok"]})
+            # 1) aggregates, then 2) exercise recommendations and 3) knowledge retrieval,
+            # which both depend only on the aggregates and run concurrently
+            results = run_steps([
+                Step("overview", lambda _: tools.get_overview(user_id), tool="get_overview"),
+                Step("recs", lambda r: tools.recommend_exercises(_profile(_aggregates(r["overview"]))),
+                     deps=["overview"], tool="recommend_exercises"),
+                Step("docs", lambda r: tools.retrieve_knowledge(_knowledge_query(_aggregates(r["overview"])),
+                                                                k=3, tags=["patient_edu"]),
+                     deps=["overview"], tool="retrieve_knowledge"),
+            ], trace)
+            r1 = results["overview"]
             if not r1["ok"]:
                 return {"ok": False, "answer": f"Could not load data: {r1['error']}", "trace": trace}
 
-            rows = r1["data"]["rows"]
-            ag = rows[0] if rows else {}
-            context["aggregates"] = ag
-
-            # 2) Optional: retrieve knowledge based on issues
-            declines = []
-            try:
-                if ag.get("avg_balance_10", 0) + 2 < ag.get("avg_balance_all", 0):
-                    declines.append("balance")
-                if ag.get("avg_gait_10", 0) + 2 < ag.get("avg_gait_all", 0):
-                    declines.append("gait")
-                if ag.get("avg_posture_10", 0) + 2 < ag.get("avg_posture_all", 0):
-                    declines.append("posture")
-            except Exception:
-                pass
-
-            fatigue = (ag.get("short_sessions_10") or 0) >= 3
-            profile = {"declines": declines, "fatigue": fatigue}
-
-            r2 = tools.recommend_exercises(profile)
-            trace.append({"tool": "recommend_exercises", "ok": r2["ok"]})
+            context["aggregates"] = _aggregates(r1)
+            r2, r3 = results["recs"], results["docs"]
             context["exercise_recs"] = (r2["data"]["exercises"] if r2["ok"] else [])
-
-            # 3) Optional RAG
-            rq = "beginner balance drills" if "balance" in declines else "adherence tips"
-            r3 = tools.retrieve_knowledge(rq, k=3, tags=["patient_edu"])
-            trace.append({"tool": "retrieve_knowledge", "ok": r3["ok"]})
             context["docs"] = (r3["data"]["docs"] if r3["ok"] else [])
 
             answer = _fmt_answer(context, question)
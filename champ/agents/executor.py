@@ -0,0 +1,112 @@
+# champ/agents/executor.py
+"""
+Dependency-aware step runner for agent tool calls.
+
+Each Step names the steps it depends on; a step starts as soon as all of its
+dependencies have finished, on a shared thread pool, so independent DB/retrieval
+calls overlap and the wall time is roughly the longest dependency chain instead of
+the sum of all steps.
+
+- A step receives {dep name: dep result} and returns a tool response (tools.resp).
+- A step that raises or runs past its timeout yields resp(False, error=...); waiting
+  stops there, the worker thread finishes in the background and its result is dropped.
+- Steps whose dependencies did not succeed are skipped and left out of the trace,
+  like the early returns of the sequential controller.
+- Timeouts are capped by the request's latency budget (champ.llm.deadline).
+"""
+import os
+import time
+import contextvars
+from concurrent.futures import ThreadPoolExecutor, wait, FIRST_COMPLETED
+from typing import Any, Callable, Dict, List, Optional, Sequence
+
+from champ.agents.tools import resp
+from champ.llm.deadline import bounded
+
+AGENT_STEP_WORKERS = int(os.getenv("AGENT_STEP_WORKERS", "8"))
+AGENT_STEP_TIMEOUT_S = float(os.getenv("AGENT_STEP_TIMEOUT_S", "5"))
+
+_pool = ThreadPoolExecutor(max_workers=AGENT_STEP_WORKERS, thread_name_prefix="agent-step")
+
+class Step:
+    __slots__ = ("name", "fn", "deps", "timeout_s", "tool")
+
+    def __init__(self, name: str, fn: Callable[[Dict[str, Any]], Dict[str, Any]], deps: Sequence[str] = (),
+                 timeout_s: float = None, tool: str = None):
+        self.name = name
+        self.fn = fn
+        self.deps = tuple(deps)
+        self.timeout_s = AGENT_STEP_TIMEOUT_S if timeout_s is None else timeout_s
+        self.tool = tool or name  # name shown in the trace
+
+def _ok(result) -> bool:
+    return bool(result.get("ok")) if isinstance(result, dict) else result is not None
+
+def _check(steps: List[Step]):
+    names = [s.name for s in steps]
+    if len(set(names)) != len(names):
+        raise ValueError("Duplicate step names")
+    done = set()
+    remaining = list(steps)
+    while remaining:
+        ready = [s for s in remaining if all(d in done for d in s.deps)]
+        if not ready:
+            missing = sorted({d for s in remaining for d in s.deps if d not in names})
+            raise ValueError(f"Unknown step dependencies: {missing}" if missing else "Step dependencies form a cycle")
+        done.update(s.name for s in ready)
+        remaining = [s for s in remaining if s not in ready]
+
+def run_steps(steps: List[Step], trace: Optional[list] = None) -> Dict[str, Any]:
+    """Run the steps; returns {step name: result}. Trace entries are appended in step order."""
+    _check(steps)
+    t0 = time.perf_counter()
+    results: Dict[str, Any] = {}
+    elapsed_ms: Dict[str, float] = {}
+    skipped = set()
+    pending = list(steps)
+    running = {}  # future -> (step, started, timeout)
+
+    while pending or running:
+        launched = True
+        while launched:
+            launched = False
+            for step in [s for s in pending if all(d in results for d in s.deps)]:
+                pending.remove(step)
+                launched = True
+                failed = [d for d in step.deps if not _ok(results[d])]
+                if failed:
+                    skipped.add(step.name)
+                    results[step.name] = resp(False, error=f"skipped: {failed[0]} failed")
+                    continue
+                ctx = contextvars.copy_context()  # carries the request deadline into the worker
+                fut = _pool.submit(ctx.run, step.fn, {d: results[d] for d in step.deps})
+                running[fut] = (step, time.perf_counter(), bounded(step.timeout_s))
+        if not running:
+            break
+
+        now = time.perf_counter()
+        nearest = min(started + timeout - now for _, started, timeout in running.values())
+        done, _ = wait(list(running), timeout=max(0.0, nearest), return_when=FIRST_COMPLETED)
+        now = time.perf_counter()
+        for fut in list(running):
+            step, started, timeout = running[fut]
+            if fut in done:
+                try:
+                    results[step.name] = fut.result()
+                except Exception as e:
+                    results[step.name] = resp(False, error=str(e))
+            elif now - started >= timeout:
+                fut.cancel()
+                results[step.name] = resp(False, error=f"timeout after {timeout:.2f}s")
+            else:
+                continue
+            elapsed_ms[step.name] = (now - started) * 1000
+            del running[fut]
+
+    if trace is not None:
+        for step in steps:
+            if step.name not in skipped:
+                trace.append({"tool": step.tool, "ok": _ok(results[step.name])})
+    wall_ms = (time.perf_counter() - t0) * 1000
+    print(f"[AGENT] steps={len(steps) - len(skipped)} wall_ms={wall_ms:.1f} sum_ms={sum(elapsed_ms.values()):.1f}")
+    return results
@@ -0,0 +1,179 @@
+# champ/agents/intent_classifier.py
+"""
+Second-stage intent classifier for questions the keyword router sends to ("llm", "general").
+
+The question embedding is compared (cosine) with labelled exemplar questions per intent
+(champ/data/intent_exemplars.json), held as one normalized NumPy matrix. The best intent
+is taken when its top exemplar score clears INTENT_CLASSIFIER_THRESHOLD and beats the
+runner-up intent by INTENT_CLASSIFIER_MARGIN; otherwise the router's decision stands.
+"general" has exemplars too, so small talk can win and stay on the LLM path.
+
+Classification itself is a single matrix-vector product (microseconds); the cost is the
+question embedding, which goes through the embedding cache and is reused by the semantic
+cache lookup that follows on the freehand path.
+
+Off unless INTENT_CLASSIFIER_ENABLED=1. Evaluate with scripts/eval_intent_classifier.py.
+"""
+import os
+import json
+import time
+import threading
+from typing import Dict, List, Optional, Tuple
+
+import numpy as np
+
+from champ.agents.router import make_decision
+
+INTENT_CLASSIFIER_ENABLED = os.getenv("INTENT_CLASSIFIER_ENABLED", "0") == "1"
+INTENT_CLASSIFIER_THRESHOLD = float(os.getenv("INTENT_CLASSIFIER_THRESHOLD", "0.75"))
+INTENT_CLASSIFIER_MARGIN = float(os.getenv("INTENT_CLASSIFIER_MARGIN", "0.02"))
+INTENT_CLASSIFIER_RETRY_S = float(os.getenv("INTENT_CLASSIFIER_RETRY_S", "60"))
+INTENT_EXEMPLARS_PATH = os.getenv(
+    "INTENT_EXEMPLARS_PATH", os.path.join(os.path.dirname(__file__), "..", "data", "intent_exemplars.json"))
+
+def load_exemplars(path: str = None) -> List[Tuple[str, str, str]]:
+    """[(mode, intent, example question)] from the exemplar file."""
+    with open(path or INTENT_EXEMPLARS_PATH, "r", encoding="utf-8") as f:
+        data = json.load(f)
+    return [(g["mode"], g["intent"], q) for g in data["intents"] for q in g["examples"]]
+
+class IntentClassifier:
+    def __init__(self, labels: List[Tuple[str, str]], vectors, threshold: float = None, margin: float = None):
+        """labels[i] = (mode, intent) of exemplar vectors[i]."""
+        if len(labels) != len(vectors) or not labels:
+            raise ValueError("labels and vectors must be non-empty and aligned")
+        # Group rows by intent so per-intent maxima are one reduceat over contiguous runs
+        order = sorted(range(len(labels)), key=lambda i: labels[i])
+        matrix = np.asarray([vectors[i] for i in order], dtype="float32")
+        matrix /= np.linalg.norm(matrix, axis=1, keepdims=True) + 1e-12
+        self.matrix = np.ascontiguousarray(matrix)
+        sorted_labels = [labels[i] for i in order]
+        self.intents: List[Tuple[str, str]] = []
+        starts = []
+        for i, label in enumerate(sorted_labels):
+            if not self.intents or self.intents[-1] != label:
+                self.intents.append(label)
+                starts.append(i)
+        self._starts = np.asarray(starts, dtype=np.intp)
+        self.threshold = INTENT_CLASSIFIER_THRESHOLD if threshold is None else threshold
+        self.margin = INTENT_CLASSIFIER_MARGIN if margin is None else margin
+
+    @classmethod
+    def from_exemplars(cls, embedder, path: str = None, **kw) -> "IntentClassifier":
+        exemplars = load_exemplars(path)
+        vectors = embedder.embed_texts([q for _, _, q in exemplars])
+        return cls([(mode, intent) for mode, intent, _ in exemplars], vectors, **kw)
+
+    def scores(self, vector) -> np.ndarray:
+        """Best exemplar cosine per intent (aligned with self.intents)."""
+        q = np.asarray(vector, dtype="float32")
+        q = q / (np.linalg.norm(q) + 1e-12)
+        return np.maximum.reduceat(self.matrix @ q, self._starts)
+
+    def classify(self, vector) -> Optional[Dict]:
+        """{mode, intent, score, margin} for a confident match, else None."""
+        per_intent = self.scores(vector)
+        if len(per_intent) == 1:
+            best, second = 0, None
+        else:
+            second, best = np.argpartition(per_intent, -2)[-2:]
+            if per_intent[second] > per_intent[best]:
+                best, second = second, best
+        score = float(per_intent[best])
+        margin = score - float(per_intent[second]) if second is not None else score
+        if score < self.threshold or margin < self.margin:
+            return None
+        mode, intent = self.intents[best]
+        return {"mode": mode, "intent": intent, "score": round(score, 4), "margin": round(margin, 4)}
+
+# ---------- process-wide instance ----------
+# Embedding the exemplars takes one batch of embedding calls, so it runs in a background
+# thread (started with the app, see start()); until it is ready, or while a failed build
+# waits INTENT_CLASSIFIER_RETRY_S for its retry, refine() leaves decisions unchanged.
+_classifier: Optional[IntentClassifier] = None
+_embedder = None
+_building_pid: Optional[int] = None   # pid of the process whose build thread is running
+_failed_at: Optional[float] = None
+_lock = threading.Lock()
+_stats = {"consulted": 0, "promoted": 0, "kept": 0, "errors": 0, "build_failures": 0, "classify_us": 0.0}
+
+def _build():
+    global _classifier, _embedder, _building_pid, _failed_at
+    try:
+        from champ.rag.embeddings import GeminiEmbedder
+        embedder = GeminiEmbedder()
+        classifier = IntentClassifier.from_exemplars(embedder)
+    except Exception as e:
+        print(f"[ROUTER] intent classifier build failed, retrying in {INTENT_CLASSIFIER_RETRY_S:.0f}s: {e}")
+        with _lock:
+            _stats["build_failures"] += 1
+            _failed_at = time.monotonic()
+            _building_pid = None
+        return
+    with _lock:
+        _classifier, _embedder = classifier, embedder
+        _failed_at = None
+        _building_pid = None
+
+def start():
+    """Build the classifier in a background thread unless it is ready, building, or cooling down."""
+    global _building_pid
+    if not INTENT_CLASSIFIER_ENABLED:
+        return
+    with _lock:
+        # A build thread started before a fork does not exist in the child
+        if _classifier is not None or _building_pid == os.getpid():
+            return
+        if _failed_at is not None and time.monotonic() - _failed_at < INTENT_CLASSIFIER_RETRY_S:
+            return
+        _building_pid = os.getpid()
+    threading.Thread(target=_build, name="intent-classifier-build", daemon=True).start()
+
+def _get():
+    if not INTENT_CLASSIFIER_ENABLED:
+        return None, None
+    with _lock:
+        classifier, embedder = _classifier, _embedder
+    if classifier is None:
+        start()
+    return classifier, embedder
+
+def refine(question: str, decision: Dict) -> Dict:
+    """
+    Route fallback: promote a ("llm", "general") decision to a confidently matched intent.
+    Any other decision, or any classifier problem, returns the decision unchanged.
+    """
+    if decision.get("mode") != "llm" or decision.get("intent") != "general":
+        return decision
+    classifier, embedder = _get()
+    if classifier is None:
+        return decision
+    try:
+        vec = embedder.embed_text(question)
+        t0 = time.perf_counter()
+        match = classifier.classify(vec)
+        us = (time.perf_counter() - t0) * 1e6
+    except Exception as e:
+        print(f"[ROUTER] intent classifier failed: {e}")
+        with _lock:
+            _stats["errors"] += 1
+        return decision
+    with _lock:
+        _stats["consulted"] += 1
+        _stats["classify_us"] += us
+        _stats["promoted" if match and match["intent"] != "general" else "kept"] += 1
+    if not match or match["intent"] == "general":
+        return decision
+    print(f"[ROUTER] classifier promoted general -> {match['intent']} score={match['score']} us={us:.0f}")
+    promoted = make_decision(match["mode"], match["intent"], question)
+    promoted["classifier"] = {"score": match["score"], "margin": match["margin"]}
+    return promoted
+
+def classifier_stats() -> Dict:
+    with _lock:
+        out = dict(_stats)
+    us = out.pop("classify_us")
+    out["avg_classify_us"] = round(us / out["consulted"], 1) if out["consulted"] else 0.0
+    out["enabled"] = INTENT_CLASSIFIER_ENABLED
+    out["ready"] = _classifier is not None
+    return out
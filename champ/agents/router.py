@@ -3,65 +3,201 @@ import re
 
 def route(question: str) -> Dict[str, Any]:
     q = normalize(question)
+    f = _scan(q)
     meta: Dict[str, Any] = {}
 
     # 1) Specific session by ID
-    sid = _extract_session_id(q)
-    if sid is not None:
-        meta["session_id"] = sid
+    if f.session_id is not None:
+        meta["session_id"] = f.session_id
         return _make("db", "session_detail", meta)
 
     # 2) Latest / previous / most recent session
-    if _asks_for_last_session(q):
+    if f.last_session:
         meta["latest"] = True
         return _make("db", "session_detail", meta)
 
     # 3) Session listing (optionally last N)
-    if _mentions_list_sessions(q) or _asks_for_last_n_sessions(q):
-        n = _extract_last_n(q)
-        if n:
-            meta["last_n"] = n
+    if f.any(LIST_PHRASES) or f.last_n is not None:
+        if f.last_n:
+            meta["last_n"] = f.last_n
         return _make("db", "session_listing", meta)
 
     # 4) Health overview/summary -> hybrid (DB + LLM)
-    if _asks_health_overview(q):
-        n = _extract_last_n(q)
-        if n:
-            meta["last_n"] = n
+    if f.any(HEALTH_PHRASES) or ("describe" in f.phrases and "session" in f.phrases):
+        if f.last_n:
+            meta["last_n"] = f.last_n
         return _make("hybrid", "health_summary", meta)
 
     # 4.5) Personalized exercise plan -> hybrid (must come before analysis/general)
-    if _asks_for_plan(q):
-        goal = _extract_goal(q)
-        meta["goal"] = goal
-        n = _extract_last_n(q)
-        if n:
-            meta["last_n"] = n
+    if f.any(PLAN_PHRASES):
+        meta["goal"] = next((goal for term, goal in GOALS if term in f.phrases), "core strength")
+        if f.last_n:
+            meta["last_n"] = f.last_n
         return _make("hybrid", "generate_personal_plan", meta)
 
     # 4.6) Knowledge/How-to/FAQ -> RAG (must come before general help)
-    if _asks_knowledge(q):
+    if f.any(KNOWLEDGE_PHRASES):
         return _make("rag", "knowledge_answer", {})
 
     # 5) Open personal analysis / insights / recommendations -> hybrid
-    if _asks_open_personal_analysis(q):
-        sid2 = _extract_session_id(q)
-        if sid2 is not None:
-            meta["session_id"] = sid2
-        elif "last" in q or "previous" in q or "recent" in q:
+    if f.any(ANALYSIS_TERMS) and f.any(DATA_TERMS):
+        # (a session id would have been routed by rule 1)
+        if f.any(LATEST_TERMS):
             meta["latest"] = True
-        n = _extract_last_n(q)
-        if n:
-            meta["last_n"] = n
+        if f.last_n:
+            meta["last_n"] = f.last_n
         return _make("hybrid", "open_personal_analysis", meta)
 
     # 6) General help -> LLM
-    if _asks_general_help(q):
+    if f.any(HELP_PHRASES):
         return _make("llm", "general_help", meta)
 
     # Default: general LLM response
     return _make("llm", "general", meta)
 
+# ----------------- Rule set -----------------
+# Substring triggers, checked with `in` semantics (no word boundaries)
+LIST_PHRASES = frozenset([
+    "list sessions", "show sessions", "sessions list", "session list",
+    "show my sessions", "display sessions", "view sessions", "last 10 sessions"
+])
+HEALTH_PHRASES = frozenset([
+    "describe my health", "health overview", "health summary",
+    "overall health", "summarize my health", "summarise my health",
+    "health status", "my health summary", "health report", "health analysis"
+])
+PLAN_PHRASES = frozenset([
+    "exercise plan",
+    "personalized exercise plan",
+    "personalised exercise plan",
+    "my personalized exercise plan",
+    "create my personalized exercise plan",
+    "create my exercise plan",
+    "workout plan",
+    "training plan",
+    "plan for core",
+    "plan for balance",
+    "plan for posture",
+    "plan for gait",
+])
+# (term, goal) in priority order
+GOALS = [("core", "core strength"), ("balance", "balance"), ("posture", "posture"), ("gait", "gait efficiency")]
+KNOWLEDGE_PHRASES = frozenset([
+    "what is", "how to", "how do i", "benefits of",
+    "exercises for", "tips for", "explain cadence",
+    "stride time", "wear insoles", "care for insoles"
+])
+ANALYSIS_TERMS = frozenset([
+    "insight", "insights", "analyze", "analyse", "analysis",
+    "explain", "interpret", "comment", "opinion",
+    "recommendation", "recommendations", "tips", "advice", "coach",
+    "trend", "trends", "compare", "comparison", "improvement", "improvements"
+])
+DATA_TERMS = frozenset([
+    "my session", "my sessions", "my data", "from my",
+    "last session", "previous session", "gait", "posture", "balance"
+])
+LATEST_TERMS = frozenset(["last", "previous", "recent"])
+HELP_PHRASES = frozenset([
+    "how to", "how do i", "what is", "explain", "help", "guide",
+    "instructions", "steps to", "best way to", "tips for", "benefits of", "why does",
+    "how can i use", "how to use", "what is physiochamp", "who are you"
+])
+_ALL_PHRASES = (LIST_PHRASES | HEALTH_PHRASES | PLAN_PHRASES | KNOWLEDGE_PHRASES | ANALYSIS_TERMS | DATA_TERMS
+                | LATEST_TERMS | HELP_PHRASES | {g for g, _ in GOALS} | {"describe", "session"})
+
+# Word-boundary rules with numeric captures. Every alternative starts with a different
+# word (or excludes the others at the same position), so one scan finds all of them.
+#  - session id: "session id 7" (preferred anywhere in the text), else the first "session 7"
+#    (also covers "get my session 7", "show session 7", "data of session 7")
+#  - last N: "last 5 sessions"
+#  - latest: "last/previous/recent session" (also "most recent", "my last", "the last"), "previous one"
+_RULES = re.compile(
+    r"(?=[slpr])\b"  # cheap first-character filter before the alternatives
+    r"(?=session\s*(?:(?P<with_id>id)\s*)?[:#]?\s*(?P<sid>\d+)\b"
+    r"|last\s+(?P<last_n>\d+)\s+sessions?\b"
+    r"|(?P<latest>(?:last|previous|recent)\s+session\b|previous\s+one\b))"
+)
+
+def _trie_pattern(words) -> str:
+    """Alternation regex over a character trie of `words`: at each position the longest word wins."""
+    trie: Dict[str, Any] = {}
+    for w in words:
+        node = trie
+        for ch in w:
+            node = node.setdefault(ch, {})
+        node[""] = {}
+
+    def emit(node) -> str:
+        end = "" in node
+        branches = [re.escape(ch) + emit(child) for ch, child in sorted(node.items()) if ch]
+        if not branches:
+            return ""
+        body = branches[0] if len(branches) == 1 else "(?:" + "|".join(branches) + ")"
+        if end:
+            return f"(?:{body})?"
+        return body
+
+    return emit(trie)
+
+# Phrase automaton: one zero-width match per start position, capturing the longest phrase
+# there; shorter phrases starting at the same position are exactly its phrase prefixes.
+_PHRASES = re.compile(f"(?=({_trie_pattern(_ALL_PHRASES)}))")
+_PREFIXES = {p: frozenset(x for x in _ALL_PHRASES if p.startswith(x)) for p in _ALL_PHRASES}
+
+class _Features:
+    __slots__ = ("phrases", "session_id", "last_n", "last_session")
+
+    def __init__(self):
+        self.phrases = set()
+        self.session_id: Optional[int] = None
+        self.last_n: Optional[int] = None
+        self.last_session = False
+
+    def any(self, terms: frozenset) -> bool:
+        return not self.phrases.isdisjoint(terms)
+
+def _scan(q: str) -> _Features:
+    f = _Features()
+    for p in set(_PHRASES.findall(q)):
+        f.phrases |= _PREFIXES[p]
+    # Every rule mentions "session" or "previous one"
+    if "session" not in f.phrases and "previous" not in f.phrases:
+        return f
+
+    first_sid = None
+    for with_id, sid, last_n, latest in _RULES.findall(q):
+        if sid:
+            if with_id and f.session_id is None:
+                f.session_id = int(sid)
+            elif first_sid is None:
+                first_sid = int(sid)
+        elif last_n:
+            if f.last_n is None:
+                f.last_n = int(last_n)
+        else:
+            f.last_session = True
+    if f.session_id is None:
+        f.session_id = first_sid
+    return f
+
+def make_decision(mode: str, intent: str, question: str) -> Dict[str, Any]:
+    """
+    Decision for an intent chosen by something other than the rules above (the embedding
+    classifier), with the meta the rules would extract from the question.
+    """
+    f = _scan(normalize(question))
+    meta: Dict[str, Any] = {}
+    if intent == "session_detail":
+        meta["latest"] = True
+    elif intent == "generate_personal_plan":
+        meta["goal"] = next((goal for term, goal in GOALS if term in f.phrases), "core strength")
+    elif intent == "open_personal_analysis" and f.any(LATEST_TERMS):
+        meta["latest"] = True
+    if f.last_n and intent in ("session_listing", "health_summary", "generate_personal_plan", "open_personal_analysis"):
+        meta["last_n"] = f.last_n
+    return _make(mode, intent, meta)
+
 # ----------------- Helpers -----------------
 
 def normalize(text: Optional[str]) -> str:
@@ -69,121 +205,3 @@ def normalize(text: Optional[str]) -> str:
 
 def _make(mode: str, intent: str, meta: Dict[str, Any]) -> Dict[str, Any]:
     return {"mode": mode, "intent": intent, "meta": meta}
-
-def _extract_session_id(q: str) -> Optional[int]:
-    patterns = [
-        r"\bsession\s*id\s*[:#]?\s*(\d+)\b",
-        r"\bsession\s*[:#]?\s*(\d+)\b",
-        r"\bget\s+my\s+session\s+(\d+)\b",
-        r"\bshow\s+session\s+(\d+)\b",
-        r"\bgive\s+me\s+data\s+of\s+session\s+(\d+)\b",
-        r"\bdata\s+of\s+session\s+(\d+)\b",
-    ]
-    for pat in patterns:
-        m = re.search(pat, q)
-        if m:
-            try:
-                return int(m.group(1))
-            except ValueError:
-                pass
-    return None
-
-def _asks_for_last_session(q: str) -> bool:
-    keywords = [
-        r"\blast\s+session\b",
-        r"\bprevious\s+session\b",
-        r"\bmost\s+recent\s+session\b",
-        r"\brecent\s+session\b",
-        r"\bmy\s+last\s+session\b",
-        r"\bthe\s+last\s+session\b",
-        r"\bprevious\s+one\b",
-    ]
-    return any(re.search(kw, q) for kw in keywords)
-
-def _mentions_list_sessions(q: str) -> bool:
-    return any(k in q for k in [
-        "list sessions", "show sessions", "sessions list", "session list",
-        "show my sessions", "display sessions", "view sessions", "last 10 sessions"
-    ])
-
-def _asks_for_last_n_sessions(q: str) -> bool:
-    return bool(re.search(r"\blast\s+(\d+)\s+sessions?\b", q))
-
-def _extract_last_n(q: str) -> Optional[int]:
-    m = re.search(r"\blast\s+(\d+)\s+sessions?\b", q)
-    if m:
-        try:
-            return int(m.group(1))
-        except ValueError:
-            return None
-    return None
-
-def _asks_health_overview(q: str) -> bool:
-    trigger_any = [
-        "describe my health", "health overview", "health summary",
-        "overall health", "summarize my health", "summarise my health",
-        "health status", "my health summary", "health report", "health analysis"
-    ]
-    if any(k in q for k in trigger_any):
-        return True
-    return ("describe" in q and ("session" in q or "sessions" in q))
-
-def _asks_open_personal_analysis(q: str) -> bool:
-    analysis_terms = [
-        "insight", "insights", "analyze", "analyse", "analysis",
-        "explain", "interpret", "comment", "opinion",
-        "recommendation", "recommendations", "tips", "advice", "coach",
-        "trend", "trends", "compare", "comparison", "improvement", "improvements"
-    ]
-    data_terms = [
-        "my session", "my sessions", "my data", "from my",
-        "last session", "previous session", "gait", "posture", "balance"
-    ]
-    return any(t in q for t in analysis_terms) and any(d in q for d in data_terms)
-
-def _asks_general_help(q: str) -> bool:
-    help_triggers = [
-        "how to", "how do i", "what is", "explain", "help", "guide",
-        "instructions", "steps to", "best way to", "tips for", "benefits of", "why does",
-        "how can i use", "how to use", "what is physiochamp", "who are you"
-    ]
-    return any(k in q for k in help_triggers)
-
-# --------- Plan detectors ---------
-def _asks_for_plan(q: str) -> bool:
-    terms = [
-        "exercise plan",
-        "personalized exercise plan",
-        "personalised exercise plan",
-        "my personalized exercise plan",
-        "create my personalized exercise plan",
-        "create my exercise plan",
-        "workout plan",
-        "training plan",
-        "plan for core",
-        "plan for balance",
-        "plan for posture",
-        "plan for gait",
-    ]
-    return any(t in q for t in terms)
-
-def _extract_goal(q: str) -> str:
-    q = q.lower()
-    if "core" in q:
-        return "core strength"
-    if "balance" in q:
-        return "balance"
-    if "posture" in q:
-        return "posture"
-    if "gait" in q:
-        return "gait efficiency"
-    return "core strength"
-
-# --------- RAG (knowledge) detector ---------
-def _asks_knowledge(q: str) -> bool:
-    terms = [
-        "what is", "how to", "how do i", "benefits of",
-        "exercises for", "tips for", "explain cadence",
-        "stride time", "wear insoles", "care for insoles"
-    ]
-    return any(t in q for t in terms)
@@ -6,7 +6,11 @@ def resp(ok: bool, data: Any = None, error: str | None = None) -> Dict[str, Any]
     return {"ok": ok, "data": data, "error": error}
 
 def get_overview(user_id: str) -> Dict[str, Any]:
-    # Use your deterministic broad health SQL
+    # Prefer the maintained aggregate store; fall back to the deterministic broad health SQL
+    from champ.db.aggregates import read_user_aggregates
+    stored = read_user_aggregates(int(user_id), include_counts=True)
+    if stored is not None:
+        return resp(True, {"rows": [stored]})
     from champ.agents.sql_agent import _deterministic_broad_health_sql
     sql = _deterministic_broad_health_sql()
     try:
@@ -0,0 +1,244 @@
+# champ/analytics/frame_store.py
+"""
+Binary columnar storage for a session's insole frames, as an alternative to the JSON
+left_foot/right_foot columns of sensor_data. One file per session:
+
+  b"CHFRAMES" | u32 header length | JSON header | column blocks (each 64-byte aligned)
+
+The header records the frame count, the encoding and, for each block ("t", "left",
+"right"), its offset, size and dtype. Pressure blocks are channel-major, (SENSORS, n):
+every sensor channel is one contiguous array. Two encodings:
+
+  raw     t float64, pressure float32. The reader memory-maps the file and returns views
+          into it, so opening a session copies nothing and the OS pages in what is used.
+  packed  t as int32 microsecond deltas; pressure quantized to int16 steps of
+          FRAME_STORE_SCALE, delta-coded along time per channel; every block compressed
+          (zstd when the zstandard package is installed, zlib otherwise). Decoding costs
+          one pass per block. Use it for cold storage.
+
+Both readers return champ.analytics.gait.SessionFrames; the (n, SENSORS) pressure arrays
+are transposed views of the channel-major blocks.
+
+The container itself (write_blocks / map_blocks / block_view) is not specific to frames:
+header["kind"] says what a file holds ("frames" here, "pyramid" for
+champ/analytics/pyramid.py).
+
+Every file records the frame count and highest sensor_data id it was built from ("frames",
+"last_id", plus "skipped" rows with NULL columns); readers compare them with sensor_data and
+ignore a file that has fallen behind.
+
+Convert with scripts/convert_frames.py; compare with JSON with scripts/bench_frame_store.py.
+"""
+import os
+import json
+import mmap
+import struct
+import tempfile
+import threading
+import zlib
+from typing import Dict
+
+import numpy as np
+
+try:
+    import zstandard  # optional: better ratio and faster decode than zlib
+except ImportError:
+    zstandard = None
+
+from champ.analytics.gait import SENSORS, SessionFrames, load_json_frames
+
+FRAME_STORE_DIR = os.getenv("FRAME_STORE_DIR", ".frame_store")
+FRAME_STORE_SCALE = float(os.getenv("FRAME_STORE_SCALE", "0.001"))
+
+MAGIC = b"CHFRAMES"
+VERSION = 1
+_ALIGN = 64
+_LEN = struct.Struct("<I")
+
+
+def session_path(session_id: int, root: str = None) -> str:
+    return os.path.join(root or FRAME_STORE_DIR, f"session_{int(session_id)}.chf")
+
+def _pad(n: int) -> int:
+    return -n % _ALIGN
+
+
+# ---------------- Codecs ----------------
+def _compress(data: bytes, codec: str) -> bytes:
+    if codec == "zstd":
+        return zstandard.ZstdCompressor(level=3).compress(data)
+    return zlib.compress(data, 3)
+
+def _decompress(data, codec: str) -> bytes:
+    if codec == "zstd":
+        if zstandard is None:
+            raise RuntimeError("this frame file is zstd-compressed; install zstandard to read it")
+        return zstandard.ZstdDecompressor().decompress(bytes(data))
+    return zlib.decompress(data)
+
+def _pack_pressure(p: np.ndarray, scale: float) -> np.ndarray:
+    q = np.rint(p.T / scale)   # (SENSORS, n)
+    if q.size and (q.min() < -32768 or q.max() > 32767):
+        raise ValueError(f"pressure beyond ±{32767 * scale:g} does not fit the packed encoding at scale "
+                         f"{scale:g}; use a larger FRAME_STORE_SCALE or raw")
+    q = q.astype(np.int16)
+    d = q.copy()
+    d[:, 1:] = np.diff(q, axis=1)   # int16 wrap-around is undone by the int16 cumsum on read
+    return d
+
+def _unpack_pressure(d: np.ndarray, scale: float) -> np.ndarray:
+    return (np.cumsum(d, axis=1, dtype=np.int16) * np.float32(scale)).astype(np.float32)
+
+def _pack_time(t: np.ndarray):
+    us = np.rint((t - t[0]) * 1e6).astype(np.int64) if len(t) else np.empty(0, np.int64)
+    d = np.diff(us, prepend=0)
+    if len(d) and (d.min() < np.iinfo(np.int32).min or d.max() > np.iinfo(np.int32).max):
+        raise ValueError("frame gap too large for the packed encoding; use raw")
+    return d.astype(np.int32)
+
+
+# ---------------- Container ----------------
+def write_blocks(path: str, header: Dict, blocks: Dict[str, np.ndarray], codec: str = None) -> Dict:
+    """
+    Write named arrays after the header, atomically. header["blocks"] is filled in with each
+    block's offset, stored size, dtype and shape; the completed header is returned.
+    """
+    payloads = {k: (_compress(v.tobytes(), codec) if codec else np.ascontiguousarray(v)) for k, v in blocks.items()}
+    header = {"version": VERSION, **header, "blocks": {}}
+    # Offsets depend on the header length, which depends on the offsets: settle on a fixed point
+    head_len = 0
+    while True:
+        offset = len(MAGIC) + _LEN.size + head_len
+        offset += _pad(offset)
+        for name, arr in blocks.items():
+            nbytes = len(payloads[name]) if codec else arr.nbytes
+            header["blocks"][name] = {"offset": offset, "nbytes": nbytes, "dtype": arr.dtype.str,
+                                      "shape": list(arr.shape)}
+            offset += nbytes + _pad(nbytes)
+        raw_header = json.dumps(header, separators=(",", ":")).encode("utf-8")
+        if len(raw_header) == head_len:
+            break
+        head_len = len(raw_header)
+
+    directory = os.path.dirname(os.path.abspath(path))
+    os.makedirs(directory, exist_ok=True)
+    # A unique temp file per writer: concurrent builds of the same file must not share one
+    fd, tmp = tempfile.mkstemp(dir=directory, prefix=os.path.basename(path) + ".", suffix=".tmp")
+    try:
+        with os.fdopen(fd, "wb") as f:
+            f.write(MAGIC + _LEN.pack(head_len) + raw_header)
+            for name in blocks:
+                f.write(b"\0" * (header["blocks"][name]["offset"] - f.tell()))
+                payload = payloads[name]
+                f.write(payload if codec else payload.data)
+            f.write(b"\0" * _pad(f.tell()))
+        os.replace(tmp, path)
+    except BaseException:
+        if os.path.exists(tmp):
+            os.remove(tmp)
+        raise
+    return header
+
+def read_header(buf) -> Dict:
+    if bytes(buf[:len(MAGIC)]) != MAGIC:
+        raise ValueError("not a frame store file")
+    (head_len,) = _LEN.unpack_from(buf, len(MAGIC))
+    start = len(MAGIC) + _LEN.size
+    header = json.loads(bytes(buf[start:start + head_len]))
+    if header.get("version") != VERSION:
+        raise ValueError(f"unsupported frame store version {header.get('version')}")
+    return header
+
+def map_blocks(path: str):
+    """(header, mmap) for a file written by write_blocks."""
+    with open(path, "rb") as f:
+        mm = mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
+    try:
+        return read_header(mm), mm
+    except Exception:
+        mm.close()
+        raise
+
+def block_view(mm, header: Dict, name: str) -> np.ndarray:
+    """Read-only array over an uncompressed block; the view keeps the map alive."""
+    b = header["blocks"][name]
+    return np.ndarray(tuple(b["shape"]), dtype=np.dtype(b["dtype"]), buffer=mm, offset=b["offset"])
+
+def _decoded_block(mm, header: Dict, name: str) -> np.ndarray:
+    b = header["blocks"][name]
+    raw = _decompress(mm[b["offset"]:b["offset"] + b["nbytes"]], header["codec"])
+    return np.frombuffer(raw, dtype=np.dtype(b["dtype"])).reshape(b["shape"])
+
+
+# ---------------- Freshness ----------------
+def source_fields(frames: SessionFrames) -> Dict:
+    """Header fields recording which sensor_data rows a file was built from."""
+    return {"frames": len(frames), "skipped": frames.skipped, "last_id": frames.last_id}
+
+def is_current(header: Dict, state) -> bool:
+    """state: (rows, last_id) of sensor_data now (gait.source_state)."""
+    rows, last_id = state
+    if header.get("frames", 0) + header.get("skipped", 0) != rows:
+        return False
+    built = header.get("last_id")
+    return built is None or last_id is None or built == last_id
+
+_session_locks = [threading.Lock() for _ in range(64)]
+
+def session_lock(session_id: int) -> threading.Lock:
+    """Lock serializing builds of one session's derived files within this process (striped)."""
+    return _session_locks[int(session_id) % len(_session_locks)]
+
+def file_is_current(path: str, state) -> bool:
+    header, mm = map_blocks(path)
+    mm.close()
+    return is_current(header, state)
+
+
+# ---------------- Frames ----------------
+def write_frames(path: str, frames: SessionFrames, encoding: str = "raw", codec: str = None,
+                 scale: float = None, session_id: int = None) -> Dict:
+    """Write frames atomically; returns the header."""
+    if encoding == "raw":
+        codec = None
+        blocks = {
+            "t": np.asarray(frames.t, dtype=np.float64),
+            "left": np.ascontiguousarray(frames.left.T, dtype=np.float32),
+            "right": np.ascontiguousarray(frames.right.T, dtype=np.float32),
+        }
+    elif encoding == "packed":
+        codec = codec or ("zstd" if zstandard is not None else "zlib")
+        scale = scale or FRAME_STORE_SCALE
+        blocks = {"t": _pack_time(frames.t),
+                  "left": _pack_pressure(frames.left, scale),
+                  "right": _pack_pressure(frames.right, scale)}
+    else:
+        raise ValueError(f"unknown encoding {encoding!r}")
+    header = {"kind": "frames", "session_id": session_id, **source_fields(frames), "sensors": SENSORS,
+              "encoding": encoding, "codec": codec, "scale": scale,
+              "t0": float(frames.t[0]) if len(frames) else None}
+    return write_blocks(path, header, blocks, codec)
+
+def open_frames(path: str) -> SessionFrames:
+    """
+    SessionFrames for a stored session. For "raw" files the arrays are read-only views
+    into a shared memory map (no copy); "packed" files are decoded into new arrays.
+    """
+    header, mm = map_blocks(path)
+    if header["encoding"] == "raw":
+        return SessionFrames(block_view(mm, header, "t"), block_view(mm, header, "left").T,
+                             block_view(mm, header, "right").T, header.get("last_id"), header.get("skipped", 0))
+    try:
+        n = header["frames"]
+        t = header["t0"] + np.cumsum(_decoded_block(mm, header, "t"), dtype=np.int64) / 1e6 if n else np.empty(0)
+        left = _unpack_pressure(_decoded_block(mm, header, "left"), header["scale"]).T
+        right = _unpack_pressure(_decoded_block(mm, header, "right"), header["scale"]).T
+    finally:
+        mm.close()
+    return SessionFrames(t, left, right, header.get("last_id"), header.get("skipped", 0))
+
+def convert_session(session_id: int, encoding: str = "raw", root: str = None) -> Dict:
+    """Read a session's JSON rows from sensor_data and store them; returns the header plus file size."""
+    path = session_path(session_id, root)
+    header = write_frames(path, load_json_frames(session_id), encoding=encoding, session_id=int(session_id))
+    return {**header, "path": path, "bytes": os.path.getsize(path)}
@@ -0,0 +1,270 @@
+# champ/analytics/gait.py
+"""
+Gait metrics from the raw insole frames in sensor_data.
+
+Each sensor_data row is one frame: `timestamp` (epoch seconds) plus `left_foot` /
+`right_foot`, JSON arrays of SENSORS pressure readings ordered heel (index 0) to toe.
+A session's frames are loaded into arrays (t: float64 (n,), left/right: float32
+(n, SENSORS)), from its binary frame file (champ/analytics/frame_store.py) when one
+exists, else from the JSON rows. Everything below is whole-array NumPy; there is no
+Python loop over frames or steps.
+
+Per foot, the total load is thresholded at GAIT_CONTACT_FRACTION of its 95th
+percentile. Rising crossings are heel strikes and falling crossings are toe-offs, with
+the crossing time interpolated between frames. Contacts separated by less than
+GAIT_MIN_SWING_S are merged; contacts shorter than GAIT_MIN_CONTACT_S are dropped.
+Strides longer than GAIT_MAX_STRIDE_S (pauses) and stances longer than
+GAIT_MAX_STANCE_S (standing) are left out of the averages.
+
+Session metrics use the same names as the summary columns on `sessions`:
+  step_count          heel strikes, both feet
+  stride_time_s       mean strike-to-strike time of the same foot
+  cadence_spm         steps per minute while walking (120 / stride_time_s)
+  contact_time_s      mean stance (strike to toe-off)
+  swing_stance_ratio  mean swing / mean stance
+  gait_symmetry       100 * (1 - |stance_L - stance_R| / mean(stance_L, stance_R)), 0..100
+  heel_toe_timing     {"left_s", "right_s"}: strike to the first frame where the toe
+                      region carries more load than the heel region
+
+Benchmark: scripts/bench_gait.py (synthetic walking signal with known parameters).
+"""
+import os
+import json
+from dataclasses import dataclass
+from typing import Any, Dict, List, Optional, Tuple
+
+import numpy as np
+
+from champ.db.connection import pooled_connection
+from champ.db.fetch import run_query
+
+SENSORS = 10
+HEEL = slice(0, 3)
+MID = slice(3, SENSORS - 3)
+TOE = slice(SENSORS - 3, SENSORS)
+
+GAIT_CONTACT_FRACTION = float(os.getenv("GAIT_CONTACT_FRACTION", "0.2"))
+GAIT_MIN_CONTACT_S = float(os.getenv("GAIT_MIN_CONTACT_S", "0.1"))
+GAIT_MIN_SWING_S = float(os.getenv("GAIT_MIN_SWING_S", "0.1"))
+GAIT_MAX_STRIDE_S = float(os.getenv("GAIT_MAX_STRIDE_S", "2.5"))
+GAIT_MAX_STANCE_S = float(os.getenv("GAIT_MAX_STANCE_S", "2.0"))
+
+# Columns on `sessions` written by write_session_metrics
+SESSION_COLUMNS = ("step_count", "gait_symmetry", "cadence_spm", "stride_time_s", "contact_time_s",
+                   "swing_stance_ratio", "heel_toe_timing")
+
+FRAMES_SQL = "SELECT id, timestamp, left_foot, right_foot FROM sensor_data WHERE session_id = %s ORDER BY timestamp, id"
+# Answered from the session_id index alone (InnoDB secondary indexes carry the primary key)
+SOURCE_SQL = "SELECT COUNT(*) AS frames, MAX(id) AS last_id FROM sensor_data WHERE session_id = %s"
+
+
+@dataclass
+class SessionFrames:
+    t: np.ndarray       # float64 (n,), seconds
+    left: np.ndarray    # float32 (n, SENSORS)
+    right: np.ndarray   # float32 (n, SENSORS)
+    last_id: Optional[int] = None   # highest sensor_data.id read, when known
+    skipped: int = 0                # rows read but dropped (NULL timestamp or foot column)
+
+    def __len__(self) -> int:
+        return len(self.t)
+
+
+@dataclass
+class FootEvents:
+    strike_t: np.ndarray    # heel strike times (s), ascending
+    toe_off_t: np.ndarray   # matching toe-off times, toe_off_t[i] > strike_t[i]
+    strike_idx: np.ndarray  # first frame of each contact
+    toe_off_idx: np.ndarray # first frame after each contact
+
+
+# ---------------- Loading ----------------
+def _matrix(values: List[Any]) -> np.ndarray:
+    """(n, SENSORS) float32 from JSON column values (str/bytes, or already-decoded lists)."""
+    if not values:
+        return np.empty((0, SENSORS), dtype=np.float32)
+    if isinstance(values[0], (bytes, bytearray)):
+        values = [v.decode("utf-8") for v in values]
+    if isinstance(values[0], str):
+        # One parse for the whole column instead of one json.loads per frame
+        values = json.loads("[" + ",".join(values) + "]")
+    m = np.asarray(values, dtype=np.float32)
+    if m.ndim != 2 or m.shape[1] != SENSORS:
+        raise ValueError(f"expected {SENSORS} readings per foot, got shape {m.shape}")
+    return m
+
+def frames_from_rows(rows) -> SessionFrames:
+    """
+    rows: (timestamp, left_foot, right_foot) tuples or dicts with those keys, in time order.
+    Rows with a NULL column are dropped and counted in `skipped`.
+    """
+    if rows and isinstance(rows[0], dict):
+        rows = [(r["timestamp"], r["left_foot"], r["right_foot"]) for r in rows]
+    valid = [r for r in rows if None not in r]
+    ts, left, right = zip(*valid) if valid else ((), [], [])
+    return SessionFrames(np.asarray(ts, dtype=np.float64), _matrix(list(left)), _matrix(list(right)),
+                         skipped=len(rows) - len(valid))
+
+def load_json_frames(session_id: int) -> SessionFrames:
+    """Frames from the JSON rows in sensor_data."""
+    with pooled_connection() as conn:
+        cur = conn.cursor()
+        try:
+            cur.execute(FRAMES_SQL, [int(session_id)])
+            rows = cur.fetchall()
+        finally:
+            cur.close()
+    # NULL rows are dropped here rather than in SQL: the file header then records every row
+    # read, which is what the index-only COUNT(*) in source_state compares against
+    frames = frames_from_rows([r[1:] for r in rows])
+    frames.last_id = max(int(r[0]) for r in rows) if rows else None
+    if frames.skipped:
+        print(f"[GAIT] session {session_id}: skipped {frames.skipped} sensor_data rows with NULL columns")
+    return frames
+
+def source_state(session_id: int) -> Tuple[int, Optional[int]]:
+    """(row count, highest id) of the session's rows in sensor_data, NULL rows included."""
+    rows = run_query(SOURCE_SQL, [int(session_id)])
+    row = rows[0] if rows else {}
+    last_id = row.get("last_id")
+    return int(row.get("frames") or 0), int(last_id) if last_id is not None else None
+
+def load_session_frames(session_id: int) -> SessionFrames:
+    """
+    The session's binary frame file (memory-mapped) when it is current, else its JSON rows.
+    A file converted while the session was still ingesting is behind sensor_data and is not used.
+    """
+    from champ.analytics import frame_store  # frame_store builds on this module
+    path = frame_store.session_path(session_id)
+    if os.path.exists(path):
+        try:
+            state = source_state(session_id)
+        except Exception as e:
+            # sensor_data unreachable: the file is the best copy there is
+            print(f"[GAIT] could not check sensor_data for session {session_id}: {e}")
+            return frame_store.open_frames(path)
+        if frame_store.file_is_current(path, state):
+            return frame_store.open_frames(path)
+        print(f"[GAIT] frame file for session {session_id} is behind sensor_data; reading rows")
+    return load_json_frames(session_id)
+
+
+# ---------------- Events ----------------
+def _crossing_times(t: np.ndarray, load: np.ndarray, idx: np.ndarray, thr: float) -> np.ndarray:
+    """Time at which load crosses thr between frames idx-1 and idx (linear interpolation)."""
+    a, b = load[idx - 1], load[idx]
+    span = np.where(b != a, b - a, 1.0)
+    frac = np.clip((thr - a) / span, 0.0, 1.0)
+    return t[idx - 1] + frac * (t[idx] - t[idx - 1])
+
+def detect_events(t: np.ndarray, pressure: np.ndarray, load: np.ndarray = None) -> FootEvents:
+    """Heel strikes and toe-offs of one foot; contacts cut off at either end of the session are ignored."""
+    empty = np.empty(0)
+    if load is None:
+        load = pressure.sum(axis=1, dtype=np.float32)
+    if len(load) < 3:
+        return FootEvents(empty, empty, empty.astype(np.intp), empty.astype(np.intp))
+    peak = float(np.percentile(load, 95))
+    if peak <= 0:
+        return FootEvents(empty, empty, empty.astype(np.intp), empty.astype(np.intp))
+    thr = GAIT_CONTACT_FRACTION * peak
+
+    contact = load > thr
+    rising = np.flatnonzero(~contact[:-1] & contact[1:]) + 1
+    falling = np.flatnonzero(contact[:-1] & ~contact[1:]) + 1
+    if contact[0]:
+        falling = falling[1:]
+    if contact[-1]:
+        rising = rising[:-1]
+    if not len(rising):
+        # No complete contact (standing only, or one contact still open at the end)
+        return FootEvents(empty, empty, empty.astype(np.intp), empty.astype(np.intp))
+    start_t = _crossing_times(t, load, rising, thr)
+    end_t = _crossing_times(t, load, falling, thr)
+
+    # Bridge short dropouts inside one contact, then drop blips
+    keep = (start_t[1:] - end_t[:-1]) >= GAIT_MIN_SWING_S
+    first, last = np.r_[True, keep], np.r_[keep, True]
+    rising, start_t = rising[first], start_t[first]
+    falling, end_t = falling[last], end_t[last]
+    real = (end_t - start_t) >= GAIT_MIN_CONTACT_S
+    return FootEvents(start_t[real], end_t[real], rising[real], falling[real])
+
+def _heel_to_toe(t: np.ndarray, pressure: np.ndarray, ev: FootEvents) -> np.ndarray:
+    """Per contact: strike to the first frame of that contact where the toe region outweighs the heel."""
+    toe_first = np.flatnonzero(pressure[:, TOE].sum(axis=1) > pressure[:, HEEL].sum(axis=1))
+    if not len(toe_first) or not len(ev.strike_idx):
+        return np.empty(0)
+    j = np.searchsorted(toe_first, ev.strike_idx)
+    frame = toe_first[np.minimum(j, len(toe_first) - 1)]
+    inside = (j < len(toe_first)) & (frame < ev.toe_off_idx)
+    return t[frame[inside]] - ev.strike_t[inside]
+
+
+# ---------------- Metrics ----------------
+def _mean(x: np.ndarray) -> Optional[float]:
+    return float(x.mean()) if len(x) else None
+
+def _round(v: Optional[float], n: int = 3) -> Optional[float]:
+    return round(v, n) if v is not None else None
+
+def foot_metrics(t: np.ndarray, pressure: np.ndarray) -> Dict[str, Any]:
+    ev = detect_events(t, pressure)
+    stride = np.diff(ev.strike_t)
+    walking = stride <= GAIT_MAX_STRIDE_S
+    swing = ev.strike_t[1:] - ev.toe_off_t[:-1]
+    stance = ev.toe_off_t - ev.strike_t
+    return {
+        "steps": int(len(ev.strike_t)),
+        "strides": stride[walking],
+        "stances": stance[stance <= GAIT_MAX_STANCE_S],
+        "swings": swing[walking],
+        "heel_to_toe": _heel_to_toe(t, pressure, ev),
+    }
+
+def compute_metrics(frames: SessionFrames) -> Dict[str, Any]:
+    """Session summary metrics (SESSION_COLUMNS) plus per-foot detail under "feet"."""
+    feet = {"left": foot_metrics(frames.t, frames.left), "right": foot_metrics(frames.t, frames.right)}
+    strides = np.concatenate([f["strides"] for f in feet.values()])
+    stances = np.concatenate([f["stances"] for f in feet.values()])
+    swings = np.concatenate([f["swings"] for f in feet.values()])
+
+    stride_time = _mean(strides)
+    contact_time = _mean(stances)
+    swing_time = _mean(swings)
+    stance_l, stance_r = _mean(feet["left"]["stances"]), _mean(feet["right"]["stances"])
+    symmetry = None
+    if stance_l and stance_r:
+        symmetry = max(0.0, 100.0 * (1.0 - abs(stance_l - stance_r) / ((stance_l + stance_r) / 2)))
+
+    return {
+        "step_count": feet["left"]["steps"] + feet["right"]["steps"],
+        "gait_symmetry": _round(symmetry, 2),
+        "cadence_spm": _round(120.0 / stride_time if stride_time else None, 2),
+        "stride_time_s": _round(stride_time),
+        "contact_time_s": _round(contact_time),
+        "swing_stance_ratio": _round(swing_time / contact_time if swing_time and contact_time else None),
+        "heel_toe_timing": {side: _round(_mean(f["heel_to_toe"])) for side, f in
+                            (("left_s", feet["left"]), ("right_s", feet["right"]))},
+        "frames": len(frames),
+        "duration_s": _round(float(frames.t[-1] - frames.t[0]) if len(frames) else 0.0),
+        "feet": {side: {"steps": f["steps"], "stride_time_s": _round(_mean(f["strides"])),
+                        "contact_time_s": _round(_mean(f["stances"])), "swing_time_s": _round(_mean(f["swings"]))}
+                 for side, f in feet.items()},
+    }
+
+def session_metrics(session_id: int) -> Dict[str, Any]:
+    return compute_metrics(load_session_frames(session_id))
+
+def write_session_metrics(session_id: int, metrics: Dict[str, Any]) -> int:
+    """Store the summary columns on the sessions row; returns the affected row count."""
+    values = [json.dumps(metrics[c]) if c == "heel_toe_timing" else metrics[c] for c in SESSION_COLUMNS]
+    sql = f"UPDATE sessions SET {', '.join(f'{c} = %s' for c in SESSION_COLUMNS)} WHERE id = %s"
+    with pooled_connection() as conn:
+        cur = conn.cursor()
+        try:
+            cur.execute(sql, values + [int(session_id)])
+            conn.commit()
+            return cur.rowcount
+        finally:
+            cur.close()
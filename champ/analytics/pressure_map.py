@@ -0,0 +1,341 @@
+# champ/analytics/pressure_map.py
+"""
+Per-session pressure heatmaps and center-of-pressure (COP) trajectories, precomputed
+from a session's frames so that charts and the analysis prompt never touch raw frames.
+
+Sensor positions come from SENSOR_LAYOUT. It describes a reference right insole in mm:
+x runs medial (-) to lateral (+) and y runs from heel to toe. The left foot is its mirror
+image. Per-foot values are reported in the foot's own frame, so +x means lateral on both
+feet. The two-foot COP uses body coordinates: x runs to the subject's right, and the
+insole centres are PRESSURE_FOOT_SPACING_MM apart.
+
+A foot is loaded when its total exceeds the gait contact threshold
+(champ/analytics/gait.py). Per foot:
+  mean   per-sensor mean pressure over loaded frames (the heatmap)
+  peak   per-sensor maximum over the session
+  share  per-sensor fraction of the foot's summed load; heel/mid/toe shares add these up
+  cop    ML offset and ML/AP range (5th-95th percentile) of the COP while loaded
+
+Sway is taken from the two-foot COP during quiet standing: runs of frames where both feet
+are loaded for at least PRESSURE_STANDING_S. Walking double support is much shorter, so
+it is left out. Sway stats are path length, mean velocity, RMS and range along ML and AP,
+and the area of the 95% confidence ellipse.
+
+The trajectories (left, right, two-foot) are averaged into 1/PRESSURE_COP_HZ buckets and
+stored as float16 in the frame store container (kind "pressure"), next to the frame files.
+Summary numbers go in the header, with the frames the map was built from; a map that
+sensor_data has moved past (a live session) is recomputed. Build ahead with
+scripts/compute_pressure_maps.py; otherwise the first request builds it. Open maps are
+cached per process and checked against sensor_data at most every PRESSURE_RECHECK_S.
+"""
+import os
+import time
+import threading
+from collections import OrderedDict
+from typing import Dict, Optional
+
+import numpy as np
+
+from champ.analytics import frame_store
+from champ.analytics.gait import (GAIT_CONTACT_FRACTION, HEEL, MID, SENSORS, TOE, SessionFrames,
+                                  load_session_frames, source_state)
+
+PRESSURE_COP_HZ = float(os.getenv("PRESSURE_COP_HZ", "10"))
+PRESSURE_FOOT_SPACING_MM = float(os.getenv("PRESSURE_FOOT_SPACING_MM", "200"))
+PRESSURE_STANDING_S = float(os.getenv("PRESSURE_STANDING_S", "1.0"))
+PRESSURE_CONTEXT_ENABLED = os.getenv("PRESSURE_CONTEXT_ENABLED", "1") == "1"
+PRESSURE_CACHE_SESSIONS = int(os.getenv("PRESSURE_CACHE_SESSIONS", "32"))
+PRESSURE_RECHECK_S = float(os.getenv("PRESSURE_RECHECK_S", "10"))
+MAX_POINTS = 5000
+
+# Reference right insole, index order as in sensor_data (heel 0 .. toe 9); (x, y) in mm
+SENSOR_NAMES = ("heel_center", "heel_medial", "heel_lateral", "midfoot_lateral", "arch_medial",
+                "met5", "met3", "met1", "hallux", "lesser_toes")
+SENSOR_LAYOUT = np.array([(0, 15), (-15, 40), (15, 40), (20, 85), (-15, 110),
+                          (25, 150), (0, 170), (-25, 180), (-25, 230), (10, 220)], dtype=np.float64)
+_REGIONS = {"heel": HEEL, "mid": MID, "toe": TOE}
+_CHI2_95_2DOF = 5.991
+
+_lock = threading.Lock()
+_stats = {"built": 0, "served": 0, "hits": 0, "stale": 0}
+
+
+def pressure_path(session_id: int, root: str = None) -> str:
+    return os.path.join(root or frame_store.FRAME_STORE_DIR, f"session_{int(session_id)}.pmap")
+
+
+# ---------------- Compute ----------------
+def _loaded(load: np.ndarray) -> np.ndarray:
+    if not len(load):
+        return np.zeros(0, dtype=bool)
+    peak = float(np.percentile(load, 95))
+    return load > GAIT_CONTACT_FRACTION * peak if peak > 0 else np.zeros(len(load), dtype=bool)
+
+def _runs(mask: np.ndarray):
+    """Start and end (exclusive) indices of the True runs in mask."""
+    edges = np.diff(np.r_[0, mask.astype(np.int8), 0])
+    return np.flatnonzero(edges == 1), np.flatnonzero(edges == -1)
+
+def _standing(t: np.ndarray, both: np.ndarray) -> np.ndarray:
+    """both, keeping only runs that last at least PRESSURE_STANDING_S."""
+    starts, ends = _runs(both)
+    keep = (t[ends - 1] - t[starts]) >= PRESSURE_STANDING_S
+    out = np.zeros(len(both), dtype=bool)
+    if keep.any():
+        # Mark kept runs with +1/-1 at their edges and integrate
+        marks = np.zeros(len(both) + 1, dtype=np.int8)
+        marks[starts[keep]] += 1
+        marks[ends[keep]] -= 1
+        out = np.cumsum(marks[:-1]) > 0
+    return out
+
+def sway_stats(t: np.ndarray, xy: np.ndarray, mask: np.ndarray) -> Optional[Dict]:
+    """Sway of the (n, 2) COP over the frames in mask; steps across a gap between runs are not counted."""
+    idx = np.flatnonzero(mask)
+    if len(idx) < 3:
+        return None
+    x, y = xy[idx, 0], xy[idx, 1]
+    dt = np.diff(t)
+    step = mask[:-1] & mask[1:] & (dt <= 3 * np.median(dt))
+    dist = np.hypot(np.diff(xy[:, 0]), np.diff(xy[:, 1]))[step]
+    duration = float(dt[step].sum())
+    path = float(dist.sum())
+    cx, cy = x - x.mean(), y - y.mean()
+    det = float(np.linalg.det(np.cov(x, y)))
+    return {
+        "frames": int(len(idx)),
+        "duration_s": round(duration, 2),
+        "path_mm": round(path, 1),
+        "velocity_mm_s": round(path / duration, 2) if duration else None,
+        "rms_ml_mm": round(float(np.sqrt(np.mean(cx * cx))), 2),
+        "rms_ap_mm": round(float(np.sqrt(np.mean(cy * cy))), 2),
+        "range_ml_mm": round(float(np.ptp(x)), 2),
+        "range_ap_mm": round(float(np.ptp(y)), 2),
+        "ellipse95_mm2": round(float(np.pi * _CHI2_95_2DOF * np.sqrt(max(det, 0.0))), 1),
+    }
+
+def _bucket_means(ids: np.ndarray, values: np.ndarray):
+    """NaN-aware mean of values (k, n) over runs of equal ids; returns (first id per run, (k, runs))."""
+    starts = np.flatnonzero(np.r_[True, ids[1:] != ids[:-1]])
+    valid = ~np.isnan(values)
+    sums = np.add.reduceat(np.where(valid, values, 0.0), starts, axis=1)
+    counts = np.add.reduceat(valid, starts, axis=1)
+    with np.errstate(invalid="ignore", divide="ignore"):
+        return ids[starts], sums / counts
+
+def _foot(p: np.ndarray, load: np.ndarray, loaded: np.ndarray, moments: np.ndarray, frame_s: float) -> Dict:
+    with np.errstate(invalid="ignore", divide="ignore"):
+        cop = moments / load[:, None]
+    cop[~loaded] = np.nan
+    total = float(load.sum(dtype=np.float64))
+    share = p.sum(axis=0, dtype=np.float64) / total if total > 0 else np.zeros(SENSORS)
+    summary = {f"{name}_pct": round(100.0 * float(share[region].sum()), 1) for name, region in _REGIONS.items()}
+    summary["peak_sensor"] = SENSOR_NAMES[int(np.argmax(p.max(axis=0)))] if total > 0 else None
+    summary["loaded_s"] = round(float(loaded.sum()) * frame_s, 1)
+    if loaded.any():
+        x, y = cop[loaded, 0], cop[loaded, 1]
+        x5, x95, y5, y95 = *np.percentile(x, (5, 95)), *np.percentile(y, (5, 95))
+        summary.update({"cop_ml_mean_mm": round(float(x.mean()), 1), "cop_ml_range_mm": round(float(x95 - x5), 1),
+                        "cop_ap_range_mm": round(float(y95 - y5), 1)})
+    return {
+        "mean": p[loaded].mean(axis=0) if loaded.any() else np.zeros(SENSORS),
+        "peak": p.max(axis=0) if len(p) else np.zeros(SENSORS),
+        "share": share,
+        "cop": cop,
+        "summary": summary,
+    }
+
+def compute_pressure(frames: SessionFrames) -> Dict:
+    """Heatmaps, COP trajectories and summary for one session (arrays at full frame rate)."""
+    t = np.asarray(frames.t, dtype=np.float64)
+    load_l = frames.left.sum(axis=1, dtype=np.float64)
+    load_r = frames.right.sum(axis=1, dtype=np.float64)
+    loaded_l, loaded_r = _loaded(load_l), _loaded(load_r)
+    # First moments in each foot's own frame; the left foot is mirrored so +x is lateral on both
+    mom_l = frames.left.astype(np.float64) @ SENSOR_LAYOUT
+    mom_r = frames.right.astype(np.float64) @ SENSOR_LAYOUT
+    frame_s = float(np.median(np.diff(t))) if len(t) > 1 else 0.0
+    left = _foot(frames.left, load_l, loaded_l, mom_l, frame_s)
+    right = _foot(frames.right, load_r, loaded_r, mom_r, frame_s)
+
+    # Two-foot COP in body coordinates (x to the subject's right)
+    half = PRESSURE_FOOT_SPACING_MM / 2
+    both = loaded_l & loaded_r
+    with np.errstate(invalid="ignore", divide="ignore"):
+        total = load_l + load_r
+        body = np.stack([(load_r * half + mom_r[:, 0] - load_l * half - mom_l[:, 0]) / total,
+                         (mom_l[:, 1] + mom_r[:, 1]) / total], axis=1)
+    body[~both] = np.nan
+    standing = _standing(t, both) if len(t) else both
+
+    grand = float(total.sum())
+    return {
+        "t": t,
+        "left": left,
+        "right": right,
+        "cop_body": body,
+        "summary": {
+            "load_left_pct": round(100.0 * float(load_l.sum()) / grand, 1) if grand > 0 else None,
+            "feet": {"left": left["summary"], "right": right["summary"]},
+            "sway": sway_stats(t, body, standing),
+        },
+    }
+
+def write_pressure(path: str, frames: SessionFrames, session_id: int = None) -> Dict:
+    res = compute_pressure(frames)
+    t = res["t"]
+    cop = np.vstack([res["left"]["cop"].T, res["right"]["cop"].T, res["cop_body"].T])   # (6, n)
+    if len(t):
+        ids = np.floor((t - t[0]) * PRESSURE_COP_HZ).astype(np.int64)
+        ids, cop = _bucket_means(ids, cop)
+        cop_t = (ids / PRESSURE_COP_HZ).astype(np.float32)
+    else:
+        cop_t = np.empty(0, dtype=np.float32)
+    blocks = {
+        "mean": np.stack([res["left"]["mean"], res["right"]["mean"]]).astype(np.float32),
+        "peak": np.stack([res["left"]["peak"], res["right"]["peak"]]).astype(np.float32),
+        "share": np.stack([res["left"]["share"], res["right"]["share"]]).astype(np.float32),
+        "cop_t": cop_t,
+        "cop": cop.astype(np.float16),
+    }
+    header = {"kind": "pressure", "session_id": session_id, **frame_store.source_fields(frames),
+              "t0": float(t[0]) if len(t) else None, "cop_hz": PRESSURE_COP_HZ, "sensors": list(SENSOR_NAMES),
+              "layout_mm": SENSOR_LAYOUT.tolist(), "foot_spacing_mm": PRESSURE_FOOT_SPACING_MM,
+              "summary": res["summary"]}
+    return frame_store.write_blocks(path, header, blocks)
+
+
+# ---------------- Read ----------------
+def _values(a: np.ndarray, n: int = 2):
+    # NaN (foot not loaded) -> None, so the JSON stays valid
+    a = np.round(a.astype(np.float64), n)
+    return [None if v != v else v for v in a.tolist()]
+
+class PressureMap:
+    def __init__(self, path: str):
+        header, mm = frame_store.map_blocks(path)
+        if header.get("kind") != "pressure":
+            raise ValueError(f"{path} is not a pressure map file")
+        self.header = header
+        self.summary = header["summary"]
+        view = lambda name: frame_store.block_view(mm, header, name)
+        self.mean, self.peak, self.share = view("mean"), view("peak"), view("share")
+        self.cop_t, self.cop = view("cop_t"), view("cop")
+
+    def heatmap(self) -> Dict:
+        return {side: {"mean": _values(self.mean[i], 3), "peak": _values(self.peak[i], 3),
+                       "share": _values(self.share[i], 4)}
+                for i, side in enumerate(("left", "right"))}
+
+    def trajectory(self, points: int = 500) -> Dict:
+        """COP tracks (mm) averaged down to at most `points` samples; t in seconds from the first frame."""
+        points = max(1, min(int(points), MAX_POINTS))
+        t, cop = self.cop_t, self.cop.astype(np.float64)
+        if len(t) > points:
+            ids = (np.arange(len(t)) * points) // len(t)
+            first, cop = _bucket_means(ids, cop)
+            t = t[np.searchsorted(ids, first)]
+        tracks = {name: {"x": _values(cop[2 * i]), "y": _values(cop[2 * i + 1])}
+                  for i, name in enumerate(("left", "right", "body"))}
+        return {"t": _values(t, 3), **tracks}
+
+
+def build_session_pressure(session_id: int) -> Optional[Dict]:
+    """Compute and store from the session's frames; None (nothing written) when it has no frames yet."""
+    frames = load_session_frames(session_id)
+    if not len(frames):
+        return None
+    path = pressure_path(session_id)
+    header = write_pressure(path, frames, session_id=int(session_id))
+    with _lock:
+        _stats["built"] += 1
+    return {**header, "path": path, "bytes": os.path.getsize(path)}
+
+# ---------- per-process cache of open maps ----------
+_cache: "OrderedDict[int, tuple]" = OrderedDict()   # session_id -> (mtime, PressureMap, checked_at)
+
+def _cached(session_id: int, path: str, max_age: float) -> Optional[PressureMap]:
+    with _lock:
+        hit = _cache.get(session_id)
+        if hit and time.monotonic() - hit[2] < max_age and os.path.exists(path) and hit[0] == os.path.getmtime(path):
+            _cache.move_to_end(session_id)
+            _stats["hits"] += 1
+            return hit[1]
+    return None
+
+def _remember(session_id: int, path: str) -> PressureMap:
+    pm = PressureMap(path)
+    with _lock:
+        _cache[session_id] = (os.path.getmtime(path), pm, time.monotonic())
+        _cache.move_to_end(session_id)
+        while len(_cache) > PRESSURE_CACHE_SESSIONS:
+            _cache.popitem(last=False)
+    return pm
+
+def _current(session_id: int, path: str) -> bool:
+    try:
+        state = source_state(session_id)
+    except Exception as e:
+        # sensor_data unreachable: the file is the best copy there is
+        print(f"[PRESSURE] could not check sensor_data for session {session_id}: {e}")
+        return True
+    if frame_store.file_is_current(path, state):
+        return True
+    with _lock:
+        _stats["stale"] += 1
+    return False
+
+def session_pressure(session_id: int, build: bool = True) -> Optional[PressureMap]:
+    """
+    The session's pressure map, or None when the session has no frames. A missing map, or one
+    that sensor_data has moved past (a live session), is recomputed when build=True and is
+    None otherwise. Freshness is checked at most every PRESSURE_RECHECK_S per session.
+    build=False never waits for a build in progress: it serves whatever current map exists.
+    """
+    session_id = int(session_id)
+    path = pressure_path(session_id)
+    pm = _cached(session_id, path, PRESSURE_RECHECK_S)
+    if pm is None and not build:
+        if not (os.path.exists(path) and _current(session_id, path)):
+            return None
+        pm = _remember(session_id, path)
+    if pm is None:
+        with frame_store.session_lock(session_id):
+            # Another thread may have checked or built it while we waited
+            pm = _cached(session_id, path, PRESSURE_RECHECK_S)
+            if pm is None:
+                if not (os.path.exists(path) and _current(session_id, path)):
+                    if build_session_pressure(session_id) is None:
+                        return None
+                pm = _remember(session_id, path)
+    with _lock:
+        _stats["served"] += 1
+    return pm
+
+def pressure_context(session_id: int) -> Dict:
+    """
+    Flat summary for the analysis prompt, from a precomputed, current map only ({} when there
+    is none), so building chat context never reads frames.
+    """
+    if not PRESSURE_CONTEXT_ENABLED or session_id is None:
+        return {}
+    try:
+        pm = session_pressure(int(session_id), build=False)
+    except (OSError, ValueError) as e:
+        print(f"[PRESSURE] unreadable map for session {session_id}: {e}")
+        return {}
+    if pm is None:
+        return {}
+    s = pm.summary
+    out = {"load_left_pct": s.get("load_left_pct")}
+    for side, f in s["feet"].items():
+        for k in ("heel_pct", "mid_pct", "toe_pct", "peak_sensor", "cop_ml_mean_mm"):
+            out[f"{side}_{k}"] = f.get(k)
+    sway = s.get("sway") or {}
+    for k in ("duration_s", "velocity_mm_s", "rms_ml_mm", "rms_ap_mm", "ellipse95_mm2"):
+        out[f"standing_sway_{k}"] = sway.get(k)
+    return {k: v for k, v in out.items() if v is not None}
+
+def pressure_map_stats() -> Dict:
+    with _lock:
+        return {**_stats, "open": len(_cache)}
@@ -0,0 +1,225 @@
+# champ/analytics/pyramid.py
+"""
+Min/max pyramids over a session's pressure channels, for charting any time window at a
+given pixel width without sending raw frames to the browser.
+
+Channels (CHANNELS) are per-foot totals and heel/mid/toe region sums. Level 0 holds
+every frame; level L holds the min and max of PYRAMID_FACTOR**L consecutive frames,
+built from level L-1 with one reduceat per level. Levels stop once a level has fewer
+than PYRAMID_MIN_BUCKETS buckets. Values are stored as float16, which is enough for a
+chart: a file is about 37 bytes per frame, levels and timestamps included.
+
+Pyramids live next to the frame files (FRAME_STORE_DIR, same container format) and are
+memory-mapped. A query picks the finest level with at most PYRAMID_OVERSAMPLE buckets
+per requested pixel inside the window and folds those into exactly `width` min/max
+buckets. The work grows with the width, not with the session length. When the window
+holds no more frames than pixels, the frames themselves are returned (min == max).
+
+Build ahead with scripts/build_pyramids.py; otherwise the first request builds it. The header
+records the frames it was built from, and a pyramid that sensor_data has moved past (a live
+session) is rebuilt. Sessions without frames get no file.
+"""
+import os
+import time
+import threading
+from collections import OrderedDict
+from typing import Dict, Optional, Sequence
+
+import numpy as np
+
+from champ.analytics import frame_store
+from champ.analytics.gait import HEEL, MID, SENSORS, TOE, SessionFrames, load_session_frames, source_state
+
+PYRAMID_FACTOR = int(os.getenv("PYRAMID_FACTOR", "4"))
+PYRAMID_MIN_BUCKETS = int(os.getenv("PYRAMID_MIN_BUCKETS", "256"))
+PYRAMID_OVERSAMPLE = int(os.getenv("PYRAMID_OVERSAMPLE", "4"))
+PYRAMID_CACHE_SESSIONS = int(os.getenv("PYRAMID_CACHE_SESSIONS", "32"))
+PYRAMID_RECHECK_S = float(os.getenv("PYRAMID_RECHECK_S", "10"))
+MAX_WIDTH = 4000
+
+# name -> (foot, sensor slice); sensors run heel (0) to toe (9)
+_REGIONS = {"": slice(0, SENSORS), "_heel": HEEL, "_mid": MID, "_toe": TOE}
+CHANNELS = tuple(f"{foot}{region}" for foot in ("left", "right") for region in _REGIONS)
+
+
+def pyramid_path(session_id: int, root: str = None) -> str:
+    return os.path.join(root or frame_store.FRAME_STORE_DIR, f"session_{int(session_id)}.pyr")
+
+def channel_values(frames: SessionFrames) -> np.ndarray:
+    """(len(CHANNELS), n) float32."""
+    out = np.empty((len(CHANNELS), len(frames)), dtype=np.float32)
+    i = 0
+    for foot in (frames.left, frames.right):
+        for region in _REGIONS.values():
+            foot[:, region].sum(axis=1, dtype=np.float32, out=out[i])
+            i += 1
+    return out
+
+def build_pyramid(frames: SessionFrames) -> Dict[str, np.ndarray]:
+    """Blocks: t0/v0 (every frame), then tL/minL/maxL per level (bucket start times)."""
+    values = channel_values(frames)
+    blocks = {"t0": np.asarray(frames.t, dtype=np.float64), "v0": values.astype(np.float16)}
+    t, lo, hi = blocks["t0"], values, values
+    level = 0
+    while len(t) >= PYRAMID_MIN_BUCKETS * PYRAMID_FACTOR:
+        level += 1
+        starts = np.arange(0, len(t), PYRAMID_FACTOR)
+        t = t[starts]
+        lo = np.minimum.reduceat(lo, starts, axis=1)
+        hi = np.maximum.reduceat(hi, starts, axis=1)
+        blocks[f"t{level}"] = t
+        blocks[f"min{level}"] = lo.astype(np.float16)
+        blocks[f"max{level}"] = hi.astype(np.float16)
+    return blocks
+
+def write_pyramid(path: str, frames: SessionFrames, session_id: int = None) -> Dict:
+    blocks = build_pyramid(frames)
+    levels = sum(1 for k in blocks if k.startswith("t")) - 1
+    header = {"kind": "pyramid", "session_id": session_id, **frame_store.source_fields(frames), "channels": list(CHANNELS),
+              "factor": PYRAMID_FACTOR, "levels": levels}
+    return frame_store.write_blocks(path, header, blocks)
+
+
+def _values(a: np.ndarray):
+    # float16 -> 3 decimals: short JSON numbers, still finer than the stored precision
+    return np.round(a.astype(np.float64), 3).tolist()
+
+
+class Pyramid:
+    def __init__(self, path: str):
+        header, mm = frame_store.map_blocks(path)
+        if header.get("kind") != "pyramid":
+            raise ValueError(f"{path} is not a pyramid file")
+        self.header = header
+        self.factor = header["factor"]
+        self.channels = header["channels"]
+        view = lambda name: frame_store.block_view(mm, header, name)
+        self.t = [view("t0")] + [view(f"t{L}") for L in range(1, header["levels"] + 1)]
+        self.v0 = view("v0")
+        self.lo = [None] + [view(f"min{L}") for L in range(1, header["levels"] + 1)]
+        self.hi = [None] + [view(f"max{L}") for L in range(1, header["levels"] + 1)]
+
+    def __len__(self) -> int:
+        return len(self.t[0])
+
+    def query(self, start: float = None, end: float = None, width: int = 800,
+              channels: Optional[Sequence[str]] = None) -> Dict:
+        """
+        Min/max series for [start, end] (seconds from the first frame; None = session edge)
+        at `width` buckets. Buckets are labelled with their start offset in seconds.
+        """
+        width = max(1, min(int(width), MAX_WIDTH))
+        names = list(channels or self.channels)
+        unknown = [c for c in names if c not in self.channels]
+        if unknown:
+            raise ValueError(f"unknown channels: {', '.join(unknown)}")
+        rows = [self.channels.index(c) for c in names]
+        if not len(self):
+            return {"level": 0, "bucket_frames": 1, "t": [], "series": {c: {"min": [], "max": []} for c in names}}
+
+        origin = float(self.t[0][0])
+        lo_t = origin + (start or 0.0)
+        hi_t = origin + end if end is not None else float(self.t[0][-1])
+
+        i0 = int(np.searchsorted(self.t[0], lo_t, "left"))
+        i1 = int(np.searchsorted(self.t[0], hi_t, "right"))
+        if i1 - i0 <= width:
+            v = _values(self.v0[rows, i0:i1])
+            series = {c: {"min": v[k], "max": v[k]} for k, c in enumerate(names)}
+            return {"level": 0, "bucket_frames": 1, "t": (self.t[0][i0:i1] - origin).round(4).tolist(),
+                    "series": series}
+        if len(self.t) == 1:
+            # Too short for any coarser level: fold the frames themselves into width buckets
+            edges = np.unique(np.linspace(0, i1 - i0, width + 1).astype(np.intp)[:-1])
+            lo = _values(np.minimum.reduceat(self.v0[rows, i0:i1], edges, axis=1))
+            hi = _values(np.maximum.reduceat(self.v0[rows, i0:i1], edges, axis=1))
+            series = {c: {"min": lo[k], "max": hi[k]} for k, c in enumerate(names)}
+            return {"level": 0, "bucket_frames": 1, "t": (self.t[0][i0 + edges] - origin).round(4).tolist(),
+                    "series": series}
+
+        # Finest level with at most PYRAMID_OVERSAMPLE buckets per pixel in the window
+        level = 1
+        while level < len(self.t) - 1 and (i1 - i0) / self.factor ** level > PYRAMID_OVERSAMPLE * width:
+            level += 1
+        t = self.t[level]
+        j0 = max(int(np.searchsorted(t, lo_t, "right")) - 1, 0)
+        j1 = int(np.searchsorted(t, hi_t, "right"))
+        edges = np.unique(np.linspace(0, j1 - j0, min(width, j1 - j0) + 1).astype(np.intp)[:-1])
+        lo = _values(np.minimum.reduceat(self.lo[level][rows, j0:j1], edges, axis=1))
+        hi = _values(np.maximum.reduceat(self.hi[level][rows, j0:j1], edges, axis=1))
+        series = {c: {"min": lo[k], "max": hi[k]} for k, c in enumerate(names)}
+        return {"level": level, "bucket_frames": self.factor ** level,
+                "t": (t[j0 + edges] - origin).round(4).tolist(), "series": series}
+
+
+# ---------- per-process cache of open pyramids ----------
+_cache: "OrderedDict[int, tuple]" = OrderedDict()   # session_id -> (mtime, Pyramid, checked_at)
+_lock = threading.Lock()
+_stats = {"hits": 0, "opened": 0, "built": 0, "stale": 0}
+
+def build_session_pyramid(session_id: int) -> Optional[Dict]:
+    """Build from the session's frames; None (nothing written) when it has no frames yet."""
+    frames = load_session_frames(session_id)
+    if not len(frames):
+        return None
+    path = pyramid_path(session_id)
+    header = write_pyramid(path, frames, session_id=int(session_id))
+    with _lock:
+        _stats["built"] += 1
+    return {**header, "path": path, "bytes": os.path.getsize(path)}
+
+def _cached(session_id: int, path: str, max_age: float) -> Optional[Pyramid]:
+    with _lock:
+        hit = _cache.get(session_id)
+        if hit and time.monotonic() - hit[2] < max_age and os.path.exists(path) and hit[0] == os.path.getmtime(path):
+            _cache.move_to_end(session_id)
+            _stats["hits"] += 1
+            return hit[1]
+    return None
+
+def _current(session_id: int, path: str) -> bool:
+    try:
+        state = source_state(session_id)
+    except Exception as e:
+        # sensor_data unreachable: the file is the best copy there is
+        print(f"[PYRAMID] could not check sensor_data for session {session_id}: {e}")
+        return True
+    header, mm = frame_store.map_blocks(path)
+    mm.close()
+    if frame_store.is_current(header, state):
+        return True
+    with _lock:
+        _stats["stale"] += 1
+    return False
+
+def session_pyramid(session_id: int, build: bool = True) -> Optional[Pyramid]:
+    """
+    The session's pyramid, or None when the session has no frames. Built from its frames on
+    first use when build=True, and rebuilt once sensor_data has moved past it (checked at
+    most every PYRAMID_RECHECK_S per session, so a live session's chart lags by that much).
+    """
+    session_id = int(session_id)
+    path = pyramid_path(session_id)
+    pyr = _cached(session_id, path, PYRAMID_RECHECK_S)
+    if pyr is not None:
+        return pyr
+    with frame_store.session_lock(session_id):
+        # Another thread may have checked or built it while we waited
+        pyr = _cached(session_id, path, PYRAMID_RECHECK_S)
+        if pyr is not None:
+            return pyr
+        if not (os.path.exists(path) and _current(session_id, path)):
+            if not build or build_session_pyramid(session_id) is None:
+                return None
+        pyr = Pyramid(path)
+        with _lock:
+            _cache[session_id] = (os.path.getmtime(path), pyr, time.monotonic())
+            _cache.move_to_end(session_id)
+            while len(_cache) > PYRAMID_CACHE_SESSIONS:
+                _cache.popitem(last=False)
+            _stats["opened"] += 1
+    return pyr
+
+def pyramid_stats() -> Dict:
+    with _lock:
+        return {**_stats, "open": len(_cache)}
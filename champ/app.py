@@ -6,6 +6,8 @@ from champ.routes.dashboard import dashboard_bp
 from champ.routes.metrics import metrics_bp
 # app.py (or wherever you init Flask)
 from champ.routes.insights import insights_bp
+from champ.routes.ingest import ingest_bp
+from champ.agents import intent_classifier
 
 
 
@@ -24,6 +26,10 @@ def create_app():
     app.register_blueprint(champ_bp, url_prefix="/api/champ")
     app.register_blueprint(metrics_bp, url_prefix="/api/metrics")
     app.register_blueprint(insights_bp, url_prefix="/api")
+    app.register_blueprint(ingest_bp, url_prefix="/api/ingest")
+
+    # Embed the intent classifier's exemplars in the background, off the request path
+    intent_classifier.start()
     
     return app
 
@@ -0,0 +1,165 @@
+# champ/asgi.py
+"""
+ASGI entry point (async execution mode).
+
+/api/champ/chat and the insights routes run as coroutines (routes/aio.py), so a request waiting
+on MySQL or Gemini holds no thread and one process can keep hundreds of chats in flight.
+Every other route is served by the Flask app from create_app() on a bounded thread pool,
+streaming responses (e.g. /api/champ/chat/stream) chunk by chunk.
+
+  uvicorn champ.asgi:app --host 0.0.0.0 --port 8080
+
+The threaded Flask server (champ/app.py) is unchanged and remains the default.
+"""
+import io
+import os
+import sys
+import json
+import asyncio
+from concurrent.futures import ThreadPoolExecutor
+
+from champ.app import create_app
+
+ASGI_WSGI_THREADS = int(os.getenv("ASGI_WSGI_THREADS", "16"))
+
+_END = object()
+
+async def _read_body(receive) -> bytes:
+    chunks = []
+    while True:
+        message = await receive()
+        if message["type"] == "http.disconnect":
+            break
+        chunks.append(message.get("body", b""))
+        if not message.get("more_body"):
+            break
+    return b"".join(chunks)
+
+async def _send_json(send, status: int, payload):
+    body = json.dumps(payload, ensure_ascii=False, default=str).encode("utf-8")
+    await send({
+        "type": "http.response.start",
+        "status": status,
+        "headers": [(b"content-type", b"application/json"), (b"content-length", str(len(body)).encode())],
+    })
+    await send({"type": "http.response.body", "body": body})
+
+def _environ(scope: dict, body: bytes) -> dict:
+    server = scope.get("server") or ("localhost", 80)
+    client = scope.get("client") or ("", 0)
+    environ = {
+        "REQUEST_METHOD": scope["method"],
+        "SCRIPT_NAME": scope.get("root_path", "").encode("utf-8").decode("latin-1"),
+        "PATH_INFO": scope["path"].encode("utf-8").decode("latin-1"),
+        "QUERY_STRING": scope.get("query_string", b"").decode("latin-1"),
+        "SERVER_NAME": str(server[0]),
+        "SERVER_PORT": str(server[1]),
+        "SERVER_PROTOCOL": f"HTTP/{scope.get('http_version', '1.1')}",
+        "REMOTE_ADDR": str(client[0]),
+        "wsgi.version": (1, 0),
+        "wsgi.url_scheme": scope.get("scheme", "http"),
+        "wsgi.input": io.BytesIO(body),
+        "wsgi.errors": sys.stderr,
+        "wsgi.multithread": True,
+        "wsgi.multiprocess": True,
+        "wsgi.run_once": False,
+    }
+    for name, value in scope.get("headers", []):
+        key = name.decode("latin-1").upper().replace("-", "_")
+        value = value.decode("latin-1")
+        if key in ("CONTENT_TYPE", "CONTENT_LENGTH"):
+            environ[key] = value
+            continue
+        key = f"HTTP_{key}"
+        environ[key] = f"{environ[key]},{value}" if key in environ else value
+    return environ
+
+class WSGIBridge:
+    """Runs a WSGI app on a thread pool; the response iterable is drained one chunk per hop."""
+
+    def __init__(self, wsgi_app, threads: int = ASGI_WSGI_THREADS):
+        self.wsgi_app = wsgi_app
+        self._pool = ThreadPoolExecutor(max_workers=max(1, threads), thread_name_prefix="asgi-wsgi")
+
+    async def __call__(self, scope: dict, body: bytes, send):
+        loop = asyncio.get_running_loop()
+        started = {}
+
+        def start_response(status, headers, exc_info=None):
+            started["status"] = int(status.split(" ", 1)[0])
+            started["headers"] = [(k.lower().encode("latin-1"), v.encode("latin-1")) for k, v in headers]
+            return lambda data: None  # write() is not supported
+
+        result = await loop.run_in_executor(self._pool, self.wsgi_app, _environ(scope, body), start_response)
+        chunks = iter(result)
+        try:
+            first = await loop.run_in_executor(self._pool, next, chunks, _END)
+            await send({"type": "http.response.start", "status": started["status"], "headers": started["headers"]})
+            chunk = first
+            while chunk is not _END:
+                if chunk:
+                    await send({"type": "http.response.body", "body": chunk, "more_body": True})
+                chunk = await loop.run_in_executor(self._pool, next, chunks, _END)
+            await send({"type": "http.response.body", "body": b""})
+        finally:
+            close = getattr(result, "close", None)
+            if close is not None:
+                await loop.run_in_executor(self._pool, close)
+
+class ChampASGI:
+    def __init__(self, flask_app=None, routes: dict = None):
+        self.flask_app = flask_app or create_app()
+        self.wsgi = WSGIBridge(self.flask_app.wsgi_app)
+        self._routes = routes
+
+    @property
+    def routes(self) -> dict:
+        # Imported on first request: the async handlers need httpx, the Flask fallback does not
+        if self._routes is None:
+            from champ.routes.aio import ROUTES
+            self._routes = ROUTES
+        return self._routes
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] == "lifespan":
+            return await self._lifespan(receive, send)
+        if scope["type"] != "http":
+            return
+        body = await _read_body(receive)
+        handler = self.routes.get((scope["method"], scope["path"]))
+        if handler is None:
+            return await self.wsgi(scope, body, send)
+
+        try:
+            data = json.loads(body or b"{}")
+        except ValueError:
+            return await _send_json(send, 400, {"error": "Invalid JSON body"})
+        if not isinstance(data, dict):
+            return await _send_json(send, 400, {"error": "Expected a JSON object"})
+        try:
+            payload, status = await handler(data)
+        except Exception as e:
+            print(f"[ASGI] {scope['method']} {scope['path']} failed: {e!r}")
+            payload, status = {"error": "Internal server error"}, 500
+        await _send_json(send, status, payload)
+
+    async def _lifespan(self, receive, send):
+        while True:
+            message = await receive()
+            if message["type"] == "lifespan.startup":
+                await send({"type": "lifespan.startup.complete"})
+            elif message["type"] == "lifespan.shutdown":
+                await self._close()
+                await send({"type": "lifespan.shutdown.complete"})
+                return
+
+    async def _close(self):
+        from champ.db.aio import close_async_pool
+        await close_async_pool()
+        try:
+            from champ.llm.aio import close_client
+        except ImportError:
+            return
+        await close_client()
+
+app = ChampASGI()
@@ -0,0 +1,58 @@
+# champ/brand/fast_path.py
+"""
+Pre-router stage for questions about PhysioChamp itself ("what is PhysioChamp", pricing,
+contact, roadmap, ...). They are answered from the canned texts in champ/brand/profile.py
+instead of going to Gemini with the full BRAND_CONTEXT prompt.
+
+A question only takes this path when detect_brand_intent matches it and the keyword
+router would not send it to the user's data (db/hybrid); everything it answers would
+otherwise have been an LLM call (freehand or RAG), which is what llm_calls_avoided counts.
+
+On unless BRAND_FAST_PATH_ENABLED=0.
+"""
+import os
+import time
+import threading
+from collections import Counter
+from typing import Dict, Optional
+
+from champ.agents.router import route
+from champ.brand.profile import detect_brand_intent, reply_for_intent
+
+BRAND_FAST_PATH_ENABLED = os.getenv("BRAND_FAST_PATH_ENABLED", "1") == "1"
+
+_lock = threading.Lock()
+_stats = {"checked": 0, "answered": 0, "deferred": 0, "llm_calls_avoided": 0, "match_us": 0.0}
+_by_intent = Counter()
+
+def brand_route(question: str) -> Optional[Dict]:
+    """
+    A ("brand", <intent>) decision carrying the canned "answer", or None to route normally.
+    """
+    if not BRAND_FAST_PATH_ENABLED:
+        return None
+    t0 = time.perf_counter()
+    intent = detect_brand_intent(question)
+    deferred = intent is not None and route(question)["mode"] in ("db", "hybrid")
+    us = (time.perf_counter() - t0) * 1e6
+    with _lock:
+        _stats["checked"] += 1
+        _stats["match_us"] += us
+        if deferred:
+            _stats["deferred"] += 1
+        elif intent:
+            _stats["answered"] += 1
+            _stats["llm_calls_avoided"] += 1
+            _by_intent[intent] += 1
+    if intent is None or deferred:
+        return None
+    return {"mode": "brand", "intent": intent, "meta": {}, "answer": reply_for_intent(intent)}
+
+def brand_fast_path_stats() -> Dict:
+    with _lock:
+        out = dict(_stats)
+        out["by_intent"] = dict(_by_intent)
+    us = out.pop("match_us")
+    out["avg_match_us"] = round(us / out["checked"], 1) if out["checked"] else 0.0
+    out["enabled"] = BRAND_FAST_PATH_ENABLED
+    return out
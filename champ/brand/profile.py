@@ -1,4 +1,5 @@
 # champ/brand/profile.py
+import re
 
 PRODUCT_NAME = "PhysioChamp"
 ASSISTANT_NAME = "Champ"
@@ -97,27 +98,46 @@ def answer_pitch():
 def answer_roadmap():
     return "Roadmap:\n- " + "\n- ".join(ROADMAP_SHORT)
 
-# Simple matcher
+# Matcher: whole-phrase patterns, checked in order. Questions that mention the user's own
+# data (my/our, session words, metrics, numbers) are never brand questions, whatever else
+# they contain ("email me my report", "what plan fits my balance", "session 12 features").
+_BRAND_RULES = [
+    ("about", r"\bwhat(?:'s| is) (?:physio ?champ|champ)\b|\babout physio ?champ\b|\bwho are you\b"
+              r"|\bwho is champ\b|\bassistant(?:'s)? name\b|\byour name\b"),
+    ("howto", r"\bhow (?:do i|to|can i) (?:use|start using|set up) (?:physio ?champ|champ|the app|this app|it)\b"
+              r"|\bgetting started\b|\bget started with (?:physio ?champ|the app)\b"),
+    ("roadmap", r"\broadmap\b|\bfuture plans\b|\bupcoming features\b"
+                r"|\bwhat(?:'s| is) next for (?:physio ?champ|champ|the app)\b"),
+    ("features", r"\bfeatures\b|\bcapabilities\b|\bwhat can (?:you|champ|physio ?champ|the app) do\b"),
+    ("tech", r"\btech(?:nology)? stack\b|\bbuilt with\b"
+             r"|\bwhat tech(?:nology|nologies)? (?:do you|does (?:it|champ|physio ?champ|the app)) use\b"),
+    # Price/subscription words only count when they are about the product (or asked bare):
+    # "what is the price of knee surgery" and "a subscription to a gym" are not brand questions
+    ("business", r"\bbusiness model\b"
+                 r"|\b(?:physio ?champ|champ|the app|this app|premium|pro|your)(?:'s)? (?:pric(?:e|es|ing)|subscriptions?)\b"
+                 r"|\b(?:pric(?:e|es|ing)|subscriptions?)(?: plans?)? (?:of|for|to) (?:physio ?champ|champ|the app|this app|it|premium|pro)\b"
+                 r"|\bdo you (?:have|offer|sell) (?:a )?(?:subscriptions?|pricing)\b"
+                 r"|^(?:what(?:'s| is) (?:the )?)?pric(?:e|es|ing)(?: please)?\W*$"
+                 r"|\bhow much (?:does|is) (?:it|physio ?champ|the app|premium|pro)\b"
+                 r"|\b(?:premium|pro|paid|free) (?:plan|tier|version)s?\b"),
+    ("contact", r"\b(?:contact|reach|email|call) (?:you|us|the team|team physio ?champ|physio ?champ|support)\b"
+                r"|\bcontact (?:details|info(?:rmation)?)\b|\byour (?:email|phone|contact)\b|\bget in touch\b"),
+    ("pitch", r"\belevator pitch\b|\bpitch (?:physio ?champ|the app|me)\b|\bwhy (?:use |choose )?physio ?champ\b"),
+]
+_BRAND_PATTERNS = [(intent, re.compile(rx)) for intent, rx in _BRAND_RULES]
+_PERSONAL = re.compile(
+    r"\d|\b(?:my|mine|our|ours|am i|did i|have i|was i)\b"
+    r"|\b(?:sessions?|scores?|steps?|posture|gait|balance|cadence|strides?|progress|history|results?|"
+    r"readings?|trends?|metrics|health|workouts?|walks?|walking|data|exercises?|routine|insights?|analy[sz]e|analysis|report)\b"
+)
+
 def detect_brand_intent(q: str) -> str | None:
-    t = (q or "").strip().lower()
-    if not t:
+    t = (q or "").strip().lower().replace("\u2019", "'")
+    if not t or _PERSONAL.search(t):
         return None
-    if any(k in t for k in ["what is physiochamp", "about physiochamp", "what is physio champ", "who are you", "who is champ", "assistant name", "your name"]):
-        return "about"
-    if any(k in t for k in ["how to use physiochamp", "how do i use", "getting started", "how to use"]):
-        return "howto"
-    if any(k in t for k in ["features", "capabilities", "what can you do"]):
-        return "features"
-    if any(k in t for k in ["tech stack", "technology", "stack"]):
-        return "tech"
-    if any(k in t for k in ["business model", "pricing", "plans", "subscription"]):
-        return "business"
-    if any(k in t for k in ["contact", "email", "phone"]):
-        return "contact"
-    if any(k in t for k in ["pitch", "elevator", "why physiochamp"]):
-        return "pitch"
-    if any(k in t for k in ["roadmap", "future", "plan"]):
-        return "roadmap"
+    for intent, pattern in _BRAND_PATTERNS:
+        if pattern.search(t):
+            return intent
     return None
 
 def reply_for_intent(intent: str) -> str:
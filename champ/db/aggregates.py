@@ -0,0 +1,370 @@
+# champ/db/aggregates.py
+"""
+Incrementally maintained per-user session aggregates.
+
+user_session_aggregates keeps, per user, the session count, per-metric
+(count, sum) pairs and the last-N sessions as JSON, so overview reads are a
+primary-key lookup instead of an AVG over the whole history.
+user_session_aggregate_log records which sessions are already folded in, so
+reporting the same completed session twice is harmless.
+"""
+import json
+import os
+from typing import Any, Dict, List, Optional
+
+from .connection import pooled_connection
+from .fetch import run_query
+
+AGG_STORE_ENABLED = os.getenv("AGG_STORE_ENABLED", "1") == "1"
+AGG_WINDOW_N = int(os.getenv("AGG_WINDOW_N", "10"))
+
+# (metric key, sessions column expression)
+METRICS = [
+    ("posture", "posture_score"),
+    ("gait", "gait_symmetry"),
+    ("balance", "balance_score"),
+    ("steps", "step_count"),
+    ("duration", "TIMESTAMPDIFF(SECOND, start_time, end_time)"),
+]
+
+SCHEMA_SQL = [
+    """
+CREATE TABLE IF NOT EXISTS user_session_aggregates (
+  user_id INT NOT NULL PRIMARY KEY,
+  total_sessions INT NOT NULL DEFAULT 0,
+  n_posture INT NOT NULL DEFAULT 0,  sum_posture DOUBLE NOT NULL DEFAULT 0,
+  n_gait INT NOT NULL DEFAULT 0,     sum_gait DOUBLE NOT NULL DEFAULT 0,
+  n_balance INT NOT NULL DEFAULT 0,  sum_balance DOUBLE NOT NULL DEFAULT 0,
+  n_steps INT NOT NULL DEFAULT 0,    sum_steps DOUBLE NOT NULL DEFAULT 0,
+  n_duration INT NOT NULL DEFAULT 0, sum_duration DOUBLE NOT NULL DEFAULT 0,
+  recent_json JSON NOT NULL,
+  updated_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP ON UPDATE CURRENT_TIMESTAMP
+)""",
+    """
+CREATE TABLE IF NOT EXISTS user_session_aggregate_log (
+  session_id INT NOT NULL PRIMARY KEY,
+  user_id INT NOT NULL,
+  applied_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
+  KEY user_id (user_id)
+)""",
+]
+
+_WINDOW_COLUMNS = """
+  id, start_time, end_time,
+  TIMESTAMPDIFF(SECOND, start_time, end_time) AS duration,
+  posture_score AS posture, gait_symmetry AS gait, balance_score AS balance, step_count AS steps
+"""
+
+# What the raw sessions table holds for this user right now vs what has been folded in.
+# Both sessions lookups are covered by the user_id index.
+_FRESHNESS_COLUMNS = """
+  (SELECT COUNT(*) FROM sessions WHERE user_id = a.user_id) AS live_sessions,
+  (SELECT MAX(id) FROM sessions WHERE user_id = a.user_id) AS live_max_id,
+  (SELECT MAX(session_id) FROM user_session_aggregate_log WHERE user_id = a.user_id) AS applied_max_id
+"""
+
+_READ_SQL = f"SELECT a.*, {_FRESHNESS_COLUMNS} FROM user_session_aggregates a WHERE a.user_id = %s"
+
+# Alert/recommendation counts for the start_time window (the first AGG_WINDOW_N
+# entries of recent_json), resolved in the same round trip
+_WINDOW_IDS_SQL = f"""SELECT w.id FROM JSON_TABLE(a.recent_json, '$[*]' COLUMNS (rn FOR ORDINALITY, id INT PATH '$.id')) w
+      WHERE w.rn <= {AGG_WINDOW_N}"""
+
+_READ_WITH_COUNTS_SQL = f"""
+SELECT
+  a.*,
+  {_FRESHNESS_COLUMNS},
+  (SELECT COUNT(*) FROM alerts
+    WHERE session_id IN ({_WINDOW_IDS_SQL})
+  ) AS recent_alerts,
+  (SELECT COUNT(*) FROM recommendations
+    WHERE session_id IN ({_WINDOW_IDS_SQL})
+  ) AS recent_recs
+FROM user_session_aggregates a
+WHERE a.user_id = %s
+"""
+
+
+def ensure_schema():
+    for ddl in SCHEMA_SQL:
+        run_query(ddl, [])
+
+
+# ---------------- Window helpers ----------------
+def _num(v) -> Optional[float]:
+    return float(v) if v is not None else None
+
+
+def _window_entry(row: Dict[str, Any]) -> Dict[str, Any]:
+    return {
+        "id": int(row["id"]),
+        "start_time": str(row["start_time"]) if row.get("start_time") is not None else None,
+        "end_time": str(row["end_time"]) if row.get("end_time") is not None else None,
+        "duration": _num(row.get("duration")),
+        "posture": _num(row.get("posture")),
+        "gait": _num(row.get("gait")),
+        "balance": _num(row.get("balance")),
+        "steps": _num(row.get("steps")),
+    }
+
+
+# The raw last-10 CTEs disagree on ordering: the overview SQL orders by
+# start_time, insights by end_time. The stored window keeps the newest n by
+# either column, sorted by start_time, so both can be answered from it.
+WINDOW_ORDERS = ("start_time", "end_time")
+
+
+def _newest(window: List[Dict[str, Any]], order: str, n: int) -> List[Dict[str, Any]]:
+    return sorted(window, key=lambda w: (w.get(order) or "", w["id"]), reverse=True)[:n]
+
+
+def _trim_window(window: List[Dict[str, Any]], n: int) -> List[Dict[str, Any]]:
+    keep = {w["id"] for order in WINDOW_ORDERS for w in _newest(window, order, n)}
+    return _newest([w for w in window if w["id"] in keep], "start_time", len(keep))
+
+
+def _merge_window(window: List[Dict[str, Any]], entry: Dict[str, Any], n: int) -> List[Dict[str, Any]]:
+    merged = [w for w in window if w.get("id") != entry["id"]] + [entry]
+    return _trim_window(merged, n)
+
+
+def _avg(values) -> Optional[float]:
+    vals = [v for v in values if v is not None]
+    return sum(vals) / len(vals) if vals else None
+
+
+def _short_sessions(window: List[Dict[str, Any]]) -> int:
+    durs = sorted(w["duration"] for w in window if w.get("duration") is not None)
+    if not durs:
+        return 0
+    n = len(durs)
+    med = (durs[(n - 1) // 2] + durs[n // 2]) / 2
+    return sum(1 for d in durs if d < med)
+
+
+def _decode_window(raw) -> List[Dict[str, Any]]:
+    if isinstance(raw, (bytes, bytearray)):
+        raw = raw.decode("utf-8")
+    if isinstance(raw, str):
+        return json.loads(raw or "[]")
+    return list(raw or [])
+
+
+def is_behind(row: Dict[str, Any]) -> bool:
+    """True when sessions exist that the stored row has not folded in (or it was deleted from)."""
+    if row.get("live_sessions") is None:
+        return False
+    if int(row["live_sessions"]) != int(row.get("total_sessions") or 0):
+        return True
+    return int(row.get("live_max_id") or 0) > int(row.get("applied_max_id") or 0)
+
+
+def summarize(row: Dict[str, Any], order: str = "start_time") -> Dict[str, Any]:
+    """
+    Store row -> the same keys the raw overview SQL returns. `order` picks the
+    last-N window the caller's raw SQL uses (start_time or end_time).
+    """
+    window = _newest(_decode_window(row.get("recent_json")), order, AGG_WINDOW_N)
+    out: Dict[str, Any] = {"total_sessions": int(row.get("total_sessions") or 0)}
+    for key, _ in METRICS:
+        if key == "duration":
+            continue
+        n = int(row.get(f"n_{key}") or 0)
+        out[f"avg_{key}_all"] = float(row[f"sum_{key}"]) / n if n else None
+    for key, _ in METRICS:
+        if key == "duration":
+            continue
+        out[f"avg_{key}_10"] = _avg(w.get(key) for w in window)
+    out["short_sessions_10"] = _short_sessions(window)
+    if "recent_alerts" in row:
+        out["recent_alerts"] = int(row.get("recent_alerts") or 0)
+        out["recent_recs"] = int(row.get("recent_recs") or 0)
+    return out
+
+
+# ---------------- Reads ----------------
+def _from_rows(user_id: int, rows, order: str) -> Optional[Dict[str, Any]]:
+    if not rows:
+        return None
+    if is_behind(rows[0]):
+        print(f"[AGG] store behind for user {user_id}, falling back to raw SQL")
+        return None
+    return summarize(rows[0], order)
+
+
+def read_user_aggregates(user_id: int, include_counts: bool = False,
+                         order: str = "start_time") -> Optional[Dict[str, Any]]:
+    """
+    Primary-key read of a user's aggregates. Returns None when the store is
+    disabled, not deployed, has no row for this user, or is missing sessions
+    that are in the raw table; callers then fall back to raw SQL.
+    """
+    if not AGG_STORE_ENABLED:
+        return None
+    try:
+        rows = run_query(_READ_WITH_COUNTS_SQL if include_counts else _READ_SQL, [user_id])
+    except Exception as e:
+        print("[AGG] read failed, falling back to raw SQL:", e)
+        return None
+    return _from_rows(user_id, rows, order)
+
+
+async def aread_user_aggregates(user_id: int, include_counts: bool = False,
+                                order: str = "start_time") -> Optional[Dict[str, Any]]:
+    """Async twin of read_user_aggregates for the ASGI app."""
+    if not AGG_STORE_ENABLED:
+        return None
+    from champ.db.aio import arun_query
+    try:
+        rows = await arun_query(_READ_WITH_COUNTS_SQL if include_counts else _READ_SQL, [user_id])
+    except Exception as e:
+        print("[AGG] read failed, falling back to raw SQL:", e)
+        return None
+    return _from_rows(user_id, rows, order)
+
+# ---------------- Writes ----------------
+def _select_dicts(cur, sql, params) -> List[Dict[str, Any]]:
+    cur.execute(sql, params)
+    cols = [d[0] for d in cur.description] if cur.description else []
+    return [dict(zip(cols, r)) for r in cur.fetchall()]
+
+
+def _rebuild_user(cur, user_id: int, window_n: int):
+    totals_sql = "SELECT COUNT(*) AS total_sessions, " + ", ".join(
+        f"COUNT({expr}) AS n_{key}, COALESCE(SUM({expr}), 0) AS sum_{key}" for key, expr in METRICS
+    ) + " FROM sessions WHERE user_id = %s"
+    totals = _select_dicts(cur, totals_sql, [user_id])[0]
+    window = [
+        _window_entry(w)
+        for order in WINDOW_ORDERS
+        for w in _select_dicts(
+            cur,
+            f"SELECT {_WINDOW_COLUMNS} FROM sessions WHERE user_id = %s ORDER BY {order} DESC LIMIT {int(window_n)}",
+            [user_id],
+        )
+    ]
+    window = _trim_window(list({w["id"]: w for w in window}.values()), window_n)
+    cols = ["total_sessions"] + [f"{p}_{key}" for key, _ in METRICS for p in ("n", "sum")]
+    cur.execute(
+        f"REPLACE INTO user_session_aggregates (user_id, {', '.join(cols)}, recent_json) "
+        f"VALUES (%s, {', '.join(['%s'] * len(cols))}, %s)",
+        [user_id] + [float(totals[c] or 0) if c.startswith("sum_") else int(totals[c] or 0) for c in cols]
+        + [json.dumps(window)],
+    )
+    cur.execute(
+        "INSERT IGNORE INTO user_session_aggregate_log (session_id, user_id) "
+        "SELECT id, user_id FROM sessions WHERE user_id = %s",
+        [user_id],
+    )
+
+
+def rebuild_user(user_id: int, window_n: int = None):
+    """Recompute one user's row from the raw sessions table."""
+    with pooled_connection() as conn:
+        conn.start_transaction()
+        cur = conn.cursor()
+        try:
+            _rebuild_user(cur, int(user_id), window_n or AGG_WINDOW_N)
+            conn.commit()
+        except Exception:
+            conn.rollback()
+            raise
+        finally:
+            cur.close()
+
+
+def rebuild_all(window_n: int = None) -> int:
+    users = run_query("SELECT DISTINCT user_id FROM sessions ORDER BY user_id", [])
+    for r in users:
+        rebuild_user(r["user_id"], window_n)
+    return len(users)
+
+
+def apply_session(session_id: int, window_n: int = None) -> Dict[str, Any]:
+    """
+    Fold one completed session into its user's aggregates.
+    Idempotent: a session already recorded in the log is skipped.
+    """
+    window_n = window_n or AGG_WINDOW_N
+    with pooled_connection() as conn:
+        conn.start_transaction()
+        cur = conn.cursor()
+        try:
+            rows = _select_dicts(
+                cur, f"SELECT user_id, {_WINDOW_COLUMNS} FROM sessions WHERE id = %s", [int(session_id)]
+            )
+            if not rows:
+                conn.rollback()
+                return {"applied": False, "reason": "session_not_found"}
+            sess = rows[0]
+            user_id = int(sess["user_id"])
+
+            existing = _select_dicts(
+                cur, "SELECT * FROM user_session_aggregates WHERE user_id = %s FOR UPDATE", [user_id]
+            )
+            if not existing:
+                # No baseline for this user yet: a full rebuild already includes this session
+                _rebuild_user(cur, user_id, window_n)
+                conn.commit()
+                return {"applied": True, "user_id": user_id, "rebuilt": True}
+
+            cur.execute(
+                "INSERT IGNORE INTO user_session_aggregate_log (session_id, user_id) VALUES (%s, %s)",
+                [int(session_id), user_id],
+            )
+            if cur.rowcount == 0:
+                conn.rollback()
+                return {"applied": False, "user_id": user_id, "reason": "already_applied"}
+
+            agg = existing[0]
+            entry = _window_entry(sess)
+            sets = ["total_sessions = total_sessions + 1"]
+            params: List[Any] = []
+            for key, _ in METRICS:
+                if entry[key] is not None:
+                    sets.append(f"n_{key} = n_{key} + 1, sum_{key} = sum_{key} + %s")
+                    params.append(entry[key])
+            window = _merge_window(_decode_window(agg.get("recent_json")), entry, window_n)
+            sets.append("recent_json = %s")
+            params.append(json.dumps(window))
+            cur.execute(
+                f"UPDATE user_session_aggregates SET {', '.join(sets)} WHERE user_id = %s",
+                params + [user_id],
+            )
+            conn.commit()
+            return {"applied": True, "user_id": user_id}
+        except Exception:
+            conn.rollback()
+            raise
+        finally:
+            cur.close()
+
+
+# ---------------- Consistency ----------------
+def check_user(user_id: int, tolerance: float = 1e-6) -> List[Dict[str, Any]]:
+    """Compare the stored aggregates with AVGs over the raw sessions table."""
+    # Read the row directly: read_user_aggregates hides a store that is behind
+    rows = run_query(_READ_SQL, [user_id])
+    stored = summarize(rows[0]) if rows else None
+    raw_sql = "SELECT COUNT(*) AS total_sessions, " + ", ".join(
+        f"AVG({expr}) AS avg_{key}_all" for key, expr in METRICS if key != "duration"
+    ) + " FROM sessions WHERE user_id = %s"
+    raw = run_query(raw_sql, [user_id])[0]
+    win = run_query(
+        f"SELECT {_WINDOW_COLUMNS} FROM sessions WHERE user_id = %s ORDER BY start_time DESC LIMIT {int(AGG_WINDOW_N)}",
+        [user_id],
+    )
+    for key, _ in METRICS:
+        if key != "duration":
+            raw[f"avg_{key}_10"] = _avg(_num(w.get(key)) for w in win)
+
+    if stored is None:
+        return [{"user_id": user_id, "field": "*", "stored": None, "raw": "missing row"}]
+    problems = []
+    for field, rv in raw.items():
+        sv = stored.get(field)
+        if rv is None and sv is None:
+            continue
+        if rv is None or sv is None or abs(float(rv) - float(sv)) > tolerance * max(1.0, abs(float(rv))):
+            problems.append({"user_id": user_id, "field": field, "stored": sv, "raw": _num(rv)})
+    return problems
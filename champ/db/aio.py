@@ -0,0 +1,168 @@
+# champ/db/aio.py
+"""
+asyncio MySQL access for the ASGI app (champ/asgi.py), on mysql.connector.aio.
+
+Mirrors the threaded pool in pool.py: bounded open connections, checkout timeout,
+max lifetime, and broken connections are discarded instead of reused. A pool belongs
+to the event loop that first used it.
+"""
+import os
+import time
+import asyncio
+from collections import deque
+from contextlib import asynccontextmanager
+from typing import Any, Awaitable, Callable, Dict, List, Optional
+
+from .connection import connection_params
+from .pool import PoolTimeoutError
+
+MYSQL_AIO_POOL_SIZE = int(os.getenv("MYSQL_AIO_POOL_SIZE", "20"))
+
+
+class _Entry:
+    __slots__ = ("conn", "created_at", "last_used")
+
+    def __init__(self, conn):
+        now = time.monotonic()
+        self.conn = conn
+        self.created_at = now
+        self.last_used = now
+
+
+async def _close_quietly(conn):
+    try:
+        await conn.close()
+    except Exception:
+        pass
+
+
+class AsyncConnectionPool:
+    def __init__(
+        self,
+        factory: Callable[[], Awaitable[Any]],
+        size: int = 20,
+        checkout_timeout: float = 10.0,
+        max_lifetime: float = 1800.0,
+        ping_after: float = 30.0,
+    ):
+        self._factory = factory
+        self.size = max(1, int(size))
+        self.checkout_timeout = float(checkout_timeout)
+        self.max_lifetime = float(max_lifetime)
+        self.ping_after = float(ping_after)
+        self._slots = asyncio.Semaphore(self.size)  # open connections, idle or in use
+        self._idle: deque = deque()
+        self._stats = {"created": 0, "closed": 0, "checkouts": 0, "timeouts": 0, "waits": 0}
+
+    async def acquire(self, timeout: Optional[float] = None) -> _Entry:
+        timeout = self.checkout_timeout if timeout is None else timeout
+        if self._slots.locked():
+            self._stats["waits"] += 1
+        try:
+            await asyncio.wait_for(self._slots.acquire(), timeout)
+        except asyncio.TimeoutError:
+            self._stats["timeouts"] += 1
+            raise PoolTimeoutError(f"No async DB connection available within {timeout:.1f}s")
+        try:
+            now = time.monotonic()
+            while self._idle:
+                entry = self._idle.pop()
+                if now - entry.created_at > self.max_lifetime:
+                    await self._discard(entry)
+                    continue
+                if now - entry.last_used > self.ping_after:
+                    try:
+                        await entry.conn.ping(reconnect=False)
+                    except Exception:
+                        await self._discard(entry)
+                        continue
+                self._stats["checkouts"] += 1
+                return entry
+            entry = _Entry(await self._factory())
+            self._stats["created"] += 1
+            self._stats["checkouts"] += 1
+            return entry
+        except BaseException:
+            self._slots.release()
+            raise
+
+    async def _discard(self, entry: _Entry):
+        self._stats["closed"] += 1
+        await _close_quietly(entry.conn)
+
+    async def release(self, entry: _Entry, broken: bool = False):
+        try:
+            if broken:
+                await self._discard(entry)
+            else:
+                entry.last_used = time.monotonic()
+                self._idle.append(entry)
+        finally:
+            self._slots.release()
+
+    @asynccontextmanager
+    async def connection(self, timeout: Optional[float] = None):
+        entry = await self.acquire(timeout)
+        broken = False
+        try:
+            yield entry.conn
+        except BaseException:
+            broken = True
+            raise
+        finally:
+            await self.release(entry, broken)
+
+    async def close_all(self):
+        while self._idle:
+            await self._discard(self._idle.pop())
+
+    def stats(self) -> Dict[str, Any]:
+        out = dict(self._stats)
+        out.update({"size": self.size, "idle": len(self._idle),
+                    "open": self._stats["created"] - self._stats["closed"]})
+        return out
+
+
+async def _connect():
+    from mysql.connector.aio import connect
+    return await connect(**connection_params())
+
+
+_pools: Dict[int, AsyncConnectionPool] = {}
+
+
+def get_async_pool() -> AsyncConnectionPool:
+    loop_id = id(asyncio.get_running_loop())
+    pool = _pools.get(loop_id)
+    if pool is None:
+        pool = _pools[loop_id] = AsyncConnectionPool(
+            _connect,
+            size=MYSQL_AIO_POOL_SIZE,
+            checkout_timeout=float(os.getenv("MYSQL_POOL_TIMEOUT", "10")),
+            max_lifetime=float(os.getenv("MYSQL_POOL_MAX_LIFETIME", "1800")),
+            ping_after=float(os.getenv("MYSQL_POOL_PING_AFTER", "30")),
+        )
+    return pool
+
+
+async def close_async_pool():
+    pool = _pools.pop(id(asyncio.get_running_loop()), None)
+    if pool is not None:
+        await pool.close_all()
+
+
+def async_pool_stats() -> Dict[str, Any]:
+    return {str(k): p.stats() for k, p in _pools.items()}
+
+
+async def arun_query(sql: str, params) -> List[Dict[str, Any]]:
+    """Async twin of fetch.run_query: list of dict rows."""
+    async with get_async_pool().connection() as conn:
+        cur = await conn.cursor()
+        try:
+            await cur.execute(sql, params)
+            cols = [d[0] for d in cur.description] if cur.description else []
+            rows = [dict(zip(cols, r)) for r in await cur.fetchall()]
+        finally:
+            await cur.close()
+    return rows
@@ -1,8 +1,12 @@
 import os
+import threading
 import mysql.connector
 
-def get_connection():
-    return mysql.connector.connect(
+from .pool import ConnectionPool
+
+def connection_params() -> dict:
+    # Shared by the threaded pool and the asyncio pool (champ/db/aio.py)
+    return dict(
         host=os.getenv("MYSQL_HOST", "physiochamp-physiochamp.b.aivencloud.com"),
         port=int(os.getenv("MYSQL_PORT", "27951")),
         database=os.getenv("MYSQL_DB", "physiochamp"),
@@ -10,3 +14,32 @@ def get_connection():
         password=os.getenv("MYSQL_PASSWORD", "AVNS_0LnHsd0Wk3utZWoZix1"),
         autocommit=True,
     )
+
+def get_connection():
+    return mysql.connector.connect(**connection_params())
+
+# --------------- Pooled connections ---------------
+_pool = None
+_pool_lock = threading.Lock()
+
+def get_pool() -> ConnectionPool:
+    global _pool
+    if _pool is None:
+        with _pool_lock:
+            if _pool is None:
+                _pool = ConnectionPool(
+                    get_connection,
+                    size=int(os.getenv("MYSQL_POOL_SIZE", "5")),
+                    checkout_timeout=float(os.getenv("MYSQL_POOL_TIMEOUT", "10")),
+                    max_lifetime=float(os.getenv("MYSQL_POOL_MAX_LIFETIME", "1800")),
+                    max_idle=float(os.getenv("MYSQL_POOL_MAX_IDLE", "300")),
+                    ping_after=float(os.getenv("MYSQL_POOL_PING_AFTER", "30")),
+                )
+    return _pool
+
+def pooled_connection(timeout: float = None):
+    """Context manager yielding a pooled connection; returns it to the pool on exit."""
+    return get_pool().connection(timeout)
+
+def pool_stats() -> dict:
+    return get_pool().stats() if _pool is not None else {"size": int(os.getenv("MYSQL_POOL_SIZE", "5")), "open": 0}
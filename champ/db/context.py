@@ -0,0 +1,103 @@
+# champ/db/context.py
+from dataclasses import dataclass, field
+from typing import Any, Dict, List, Optional
+
+from .fetch import run_query
+
+# One pass over the user's sessions: window functions carry the all-time
+# aggregates on every row, ROW_NUMBER picks the last-N window, and the
+# requested session (if any) rides along in the same result set.
+HYBRID_CONTEXT_SQL = """
+WITH ranked AS (
+  SELECT
+    s.*,
+    ROW_NUMBER() OVER (ORDER BY s.end_time DESC) AS ctx_rn,
+    COUNT(*) OVER () AS ctx_total,
+    AVG(s.posture_score) OVER () AS ctx_posture_all,
+    AVG(s.gait_symmetry) OVER () AS ctx_gait_all,
+    AVG(s.balance_score) OVER () AS ctx_balance_all,
+    AVG(s.step_count)    OVER () AS ctx_steps_all
+  FROM sessions s
+  WHERE s.user_id = %s
+)
+SELECT * FROM ranked
+WHERE ctx_rn <= %s OR id = %s
+ORDER BY ctx_rn
+"""
+
+_CTX_COLUMNS = ("ctx_rn", "ctx_total", "ctx_posture_all", "ctx_gait_all", "ctx_balance_all", "ctx_steps_all")
+
+# (session column, short name used in the avg dict keys)
+_METRICS = [
+    ("posture_score", "posture"),
+    ("gait_symmetry", "gait"),
+    ("balance_score", "balance"),
+    ("step_count", "steps"),
+]
+
+
+@dataclass
+class HybridContext:
+    last_n: int
+    total_sessions: int = 0
+    session: Dict[str, Any] = field(default_factory=dict)     # requested or latest session, {} if none
+    all_avg: Dict[str, Any] = field(default_factory=dict)     # posture_all, gait_all, balance_all, steps_all
+    last_avg: Dict[str, Any] = field(default_factory=dict)    # posture_last{N}, gait_last{N}, ...
+    last_rows: List[Dict[str, Any]] = field(default_factory=list)  # newest first, at most last_n
+
+
+def _avg(values: List[Any]) -> Optional[float]:
+    vals = [float(v) for v in values if v is not None]
+    return sum(vals) / len(vals) if vals else None
+
+
+def fetch_hybrid_context(user_id: int, last_n: int = 10, session_id: Optional[int] = None) -> HybridContext:
+    """
+    Everything the hybrid intents need in a single round trip.
+    When session_id is None, `session` is the latest session (by end_time).
+    """
+    last_n = max(1, int(last_n))
+    sid = int(session_id) if session_id is not None else None
+    rows = run_query(HYBRID_CONTEXT_SQL, [user_id, last_n, sid])
+    return build_hybrid_context(rows, last_n, sid)
+
+
+async def afetch_hybrid_context(user_id: int, last_n: int = 10, session_id: Optional[int] = None) -> HybridContext:
+    """Async twin of fetch_hybrid_context for the ASGI app."""
+    from champ.db.aio import arun_query
+    last_n = max(1, int(last_n))
+    sid = int(session_id) if session_id is not None else None
+    rows = await arun_query(HYBRID_CONTEXT_SQL, [user_id, last_n, sid])
+    return build_hybrid_context(rows, last_n, sid)
+
+
+def build_hybrid_context(rows: List[Dict[str, Any]], last_n: int, session_id: Optional[int] = None) -> HybridContext:
+    ctx = HybridContext(last_n=last_n)
+    if not rows:
+        return ctx
+
+    first = rows[0]
+    ctx.total_sessions = int(first.get("ctx_total") or 0)
+    ctx.all_avg = {
+        "posture_all": first.get("ctx_posture_all"),
+        "gait_all": first.get("ctx_gait_all"),
+        "balance_all": first.get("ctx_balance_all"),
+        "steps_all": first.get("ctx_steps_all"),
+    }
+
+    window = []
+    for r in rows:
+        clean = {k: v for k, v in r.items() if k not in _CTX_COLUMNS}
+        if int(r.get("ctx_rn") or 0) <= last_n:
+            window.append(clean)
+        if session_id is not None and r.get("id") == session_id:
+            ctx.session = dict(clean)
+    if session_id is None and window:
+        ctx.session = dict(window[0])
+
+    ctx.last_rows = window
+    ctx.last_avg = {
+        f"{short}_last{last_n}": _avg([r.get(col) for r in window])
+        for col, short in _METRICS
+    }
+    return ctx
@@ -1,9 +1,12 @@
-from .connection import get_connection
+from .connection import pooled_connection
 
 def run_query(sql, params):
-    with get_connection() as conn:
+    with pooled_connection() as conn:
         cur = conn.cursor()
-        cur.execute(sql, params)
-        cols = [d[0] for d in cur.description] if cur.description else []
-        rows = [dict(zip(cols, r)) for r in cur.fetchall()]
+        try:
+            cur.execute(sql, params)
+            cols = [d[0] for d in cur.description] if cur.description else []
+            rows = [dict(zip(cols, r)) for r in cur.fetchall()]
+        finally:
+            cur.close()
     return rows
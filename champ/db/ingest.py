@@ -0,0 +1,222 @@
+# champ/db/ingest.py
+"""
+Buffered, batched writes of insole frames into sensor_data.
+
+Request handlers validate a batch, submit() it and wait for it to be durable. One writer
+thread per process drains the queue and groups whatever batches are waiting, up to
+INGEST_GROUP_FRAMES frames, into one transaction. In that transaction, each batch claims
+its (session_id, batch_id) in sensor_ingest_batches with INSERT IGNORE. Frames of newly
+claimed batches are written with executemany, which mysql-connector sends as multi-row
+INSERTs; INGEST_INSERT_ROWS rows go in per statement. A batch that already committed
+(a retry from the phone) claims nothing and is reported as a duplicate, so retries never
+write a frame twice.
+
+Backpressure: queued plus in-flight frames are bounded by INGEST_QUEUE_FRAMES. submit() raises
+IngestBusy when a batch would not fit; the route answers 429 with Retry-After.
+"""
+import os
+import json
+import time
+import threading
+from collections import deque
+from concurrent.futures import Future
+from dataclasses import dataclass
+from typing import Callable, Dict, List, Optional
+
+import numpy as np
+from mysql.connector import errors as mysql_errors
+
+from .connection import pooled_connection
+from .fetch import run_query
+
+INGEST_QUEUE_FRAMES = int(os.getenv("INGEST_QUEUE_FRAMES", "200000"))
+INGEST_GROUP_FRAMES = int(os.getenv("INGEST_GROUP_FRAMES", "20000"))
+INGEST_INSERT_ROWS = int(os.getenv("INGEST_INSERT_ROWS", "1000"))
+INGEST_RETRY_AFTER_S = int(os.getenv("INGEST_RETRY_AFTER_S", "2"))
+
+SCHEMA_SQL = [
+    """
+CREATE TABLE IF NOT EXISTS sensor_ingest_batches (
+  session_id INT NOT NULL,
+  batch_id VARCHAR(64) NOT NULL,
+  frames INT NOT NULL,
+  received_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
+  PRIMARY KEY (session_id, batch_id)
+)""",
+]
+
+_CLAIM_SQL = "INSERT IGNORE INTO sensor_ingest_batches (session_id, batch_id, frames) VALUES (%s, %s, %s)"
+_FRAMES_SQL = "INSERT INTO sensor_data (session_id, timestamp, left_foot, right_foot) VALUES (%s, %s, %s, %s)"
+
+_FK_MISSING_PARENT = 1452
+
+
+def ensure_schema():
+    for ddl in SCHEMA_SQL:
+        run_query(ddl, [])
+
+
+class IngestBusy(Exception):
+    """The write queue is full; retry the same batch after retry_after seconds."""
+    def __init__(self, retry_after: int = INGEST_RETRY_AFTER_S):
+        super().__init__(f"ingest queue full, retry in {retry_after}s")
+        self.retry_after = retry_after
+
+
+class SessionNotFound(LookupError):
+    pass
+
+
+@dataclass
+class FrameBatch:
+    session_id: int
+    batch_id: str
+    t: np.ndarray       # float64 (n,)
+    left: np.ndarray    # float64 (n, SENSORS)
+    right: np.ndarray   # float64 (n, SENSORS)
+
+    def __len__(self) -> int:
+        return len(self.t)
+
+    def rows(self):
+        # float64 -> Python float keeps the client's decimal text (0.83 stays 0.83)
+        sid = self.session_id
+        return [(sid, ts, json.dumps(lf), json.dumps(rf))
+                for ts, lf, rf in zip(self.t.tolist(), self.left.tolist(), self.right.tolist())]
+
+
+def write_batches(batches: List[FrameBatch]) -> List[bool]:
+    """One transaction for the group; returns a duplicate flag per batch."""
+    duplicates = []
+    with pooled_connection() as conn:
+        conn.start_transaction()
+        cur = conn.cursor()
+        try:
+            rows = []
+            for b in batches:
+                cur.execute(_CLAIM_SQL, [b.session_id, b.batch_id, len(b)])
+                duplicates.append(cur.rowcount == 0)
+                if cur.rowcount:
+                    rows.extend(b.rows())
+            for i in range(0, len(rows), INGEST_INSERT_ROWS):
+                cur.executemany(_FRAMES_SQL, rows[i:i + INGEST_INSERT_ROWS])
+            conn.commit()
+        except mysql_errors.IntegrityError as e:
+            conn.rollback()
+            if e.errno == _FK_MISSING_PARENT:
+                raise SessionNotFound("Session not found") from e
+            raise
+        except Exception:
+            conn.rollback()
+            raise
+        finally:
+            cur.close()
+    return duplicates
+
+
+class BatchWriter:
+    def __init__(self, flush: Callable[[List[FrameBatch]], List[bool]] = None,
+                 capacity_frames: int = None, group_frames: int = None):
+        self._flush = flush or write_batches
+        self.capacity_frames = capacity_frames or INGEST_QUEUE_FRAMES
+        self.group_frames = group_frames or INGEST_GROUP_FRAMES
+        self._queue = deque()          # (batch, future)
+        self._queued_frames = 0
+        self._cond = threading.Condition()
+        self._stats = {"batches": 0, "frames": 0, "duplicates": 0, "rejected_busy": 0, "errors": 0,
+                       "groups": 0, "write_s": 0.0}
+        self._thread = threading.Thread(target=self._run, name="ingest-writer", daemon=True)
+        self._thread.start()
+
+    def submit(self, batch: FrameBatch) -> Future:
+        """Queue a batch; the future resolves to {"duplicate": bool} once it is committed."""
+        fut = Future()
+        with self._cond:
+            # An oversized batch is still accepted into an empty queue, so it can never starve
+            if self._queue and self._queued_frames + len(batch) > self.capacity_frames:
+                self._stats["rejected_busy"] += 1
+                raise IngestBusy()
+            self._queue.append((batch, fut))
+            self._queued_frames += len(batch)
+            self._cond.notify()
+        return fut
+
+    def _next_group(self):
+        with self._cond:
+            while not self._queue:
+                self._cond.wait()
+            group, frames = [], 0
+            while self._queue and (not group or frames + len(self._queue[0][0]) <= self.group_frames):
+                batch, fut = self._queue.popleft()
+                group.append((batch, fut))
+                frames += len(batch)
+            return group, frames
+
+    def _write(self, group) -> None:
+        t0 = time.perf_counter()
+        try:
+            duplicates = self._flush([b for b, _ in group])
+        except Exception as e:
+            if len(group) > 1:
+                # Isolate the failing batch so the rest of the group still lands
+                for item in group:
+                    self._write([item])
+                return
+            print(f"[INGEST] write failed session={group[0][0].session_id} batch={group[0][0].batch_id}: {e}")
+            with self._cond:
+                self._stats["errors"] += 1
+            group[0][1].set_exception(e)
+            return
+        elapsed = time.perf_counter() - t0
+        with self._cond:
+            self._stats["groups"] += 1
+            self._stats["write_s"] += elapsed
+            for (batch, _), dup in zip(group, duplicates):
+                self._stats["batches"] += 1
+                if dup:
+                    self._stats["duplicates"] += 1
+                else:
+                    self._stats["frames"] += len(batch)
+        for (_, fut), dup in zip(group, duplicates):
+            fut.set_result({"duplicate": dup})
+
+    def _run(self):
+        while True:
+            group, frames = self._next_group()
+            try:
+                self._write(group)
+            finally:
+                with self._cond:
+                    self._queued_frames -= frames
+
+    def stats(self) -> Dict:
+        with self._cond:
+            out = dict(self._stats)
+            out["queued_frames"] = self._queued_frames
+            out["queued_batches"] = len(self._queue)
+        write_s = out.pop("write_s")
+        out["capacity_frames"] = self.capacity_frames
+        out["frames_per_write_s"] = round(out["frames"] / write_s) if write_s else 0
+        return out
+
+
+# ---------- process-wide writer ----------
+_writer: Optional[BatchWriter] = None
+_writer_pid: Optional[int] = None
+_lock = threading.Lock()
+
+def get_writer() -> BatchWriter:
+    """Started lazily, and again in a forked worker (threads do not survive fork)."""
+    global _writer, _writer_pid
+    with _lock:
+        if _writer is None or _writer_pid != os.getpid():
+            try:
+                ensure_schema()
+            except Exception as e:
+                print(f"[INGEST] could not create sensor_ingest_batches: {e}")
+            _writer = BatchWriter()
+            _writer_pid = os.getpid()
+        return _writer
+
+def ingest_stats() -> Dict:
+    return _writer.stats() if _writer is not None and _writer_pid == os.getpid() else {"started": False}
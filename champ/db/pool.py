@@ -0,0 +1,225 @@
+# champ/db/pool.py
+import os
+import time
+import threading
+from collections import deque
+from contextlib import contextmanager
+from typing import Callable, Any, Dict, Optional
+
+
+class PoolTimeoutError(RuntimeError):
+    pass
+
+
+class _Entry:
+    __slots__ = ("conn", "created_at", "last_used")
+
+    def __init__(self, conn):
+        now = time.monotonic()
+        self.conn = conn
+        self.created_at = now
+        self.last_used = now
+
+
+def _close_quietly(conn):
+    try:
+        conn.close()
+    except Exception:
+        pass
+
+
+class ConnectionPool:
+    """
+    Small thread-safe connection pool.
+
+    - size: max open connections (in use + idle)
+    - checkout_timeout: seconds to wait for a free connection before PoolTimeoutError
+    - max_lifetime: connections older than this are closed instead of reused
+    - max_idle: idle connections unused for longer than this are reaped
+    - ping_after: connections idle longer than this are health-checked on checkout
+    """
+
+    def __init__(
+        self,
+        factory: Callable[[], Any],
+        size: int = 5,
+        checkout_timeout: float = 10.0,
+        max_lifetime: float = 1800.0,
+        max_idle: float = 300.0,
+        ping_after: float = 30.0,
+    ):
+        self._factory = factory
+        self.size = max(1, int(size))
+        self.checkout_timeout = float(checkout_timeout)
+        self.max_lifetime = float(max_lifetime)
+        self.max_idle = float(max_idle)
+        self.ping_after = float(ping_after)
+
+        self._cond = threading.Condition()
+        self._idle = deque()  # most recently used on the right
+        self._open = 0
+        self._pid = os.getpid()
+        self._stats = {
+            "created": 0,
+            "closed": 0,
+            "checkouts": 0,
+            "waits": 0,
+            "wait_time_s": 0.0,
+            "max_wait_s": 0.0,
+            "timeouts": 0,
+            "health_check_failures": 0,
+            "expired": 0,
+            "reaped": 0,
+        }
+
+    # ---------- internals (call with self._cond held) ----------
+    def _reset_after_fork(self):
+        # Sockets inherited from a parent process (e.g. gunicorn preload) must not be shared
+        if self._pid != os.getpid():
+            self._pid = os.getpid()
+            self._idle.clear()
+            self._open = 0
+
+    def _discard(self, entry: _Entry, reason: str):
+        self._open -= 1
+        self._stats["closed"] += 1
+        if reason:
+            self._stats[reason] += 1
+        _close_quietly(entry.conn)
+        self._cond.notify()
+
+    def _reap_idle(self, now: float):
+        # Oldest idle connections sit on the left
+        while self._idle and now - self._idle[0].last_used > self.max_idle:
+            self._discard(self._idle.popleft(), "reaped")
+
+    def _expired(self, entry: _Entry, now: float) -> bool:
+        return self.max_lifetime > 0 and now - entry.created_at > self.max_lifetime
+
+    # ---------- health ----------
+    def _healthy(self, entry: _Entry, now: float) -> bool:
+        if now - entry.last_used <= self.ping_after:
+            return True
+        try:
+            ping = getattr(entry.conn, "ping", None)
+            if ping is not None:
+                ping(reconnect=False)
+                return True
+            return bool(entry.conn.is_connected())
+        except Exception:
+            return False
+
+    # ---------- public ----------
+    def acquire(self, timeout: Optional[float] = None):
+        timeout = self.checkout_timeout if timeout is None else float(timeout)
+        deadline = time.monotonic() + timeout
+        waited_from = None
+
+        while True:
+            with self._cond:
+                self._reset_after_fork()
+                now = time.monotonic()
+                self._reap_idle(now)
+                entry = None
+                if self._idle:
+                    entry = self._idle.pop()
+                elif self._open < self.size:
+                    self._open += 1  # reserve a slot; connect outside the lock
+                else:
+                    if waited_from is None:
+                        waited_from = now
+                        self._stats["waits"] += 1
+                    remaining = deadline - now
+                    if remaining <= 0:
+                        self._stats["timeouts"] += 1
+                        self._record_wait(now - waited_from)
+                        raise PoolTimeoutError(
+                            f"No database connection available within {timeout:.1f}s (pool size {self.size})"
+                        )
+                    self._cond.wait(remaining)
+                    continue
+
+            if entry is None:
+                try:
+                    conn = self._factory()
+                except Exception:
+                    with self._cond:
+                        self._open -= 1
+                        self._cond.notify()
+                    raise
+                entry = _Entry(conn)
+                with self._cond:
+                    self._stats["created"] += 1
+            else:
+                now = time.monotonic()
+                if self._expired(entry, now):
+                    with self._cond:
+                        self._discard(entry, "expired")
+                    continue
+                if not self._healthy(entry, now):
+                    with self._cond:
+                        self._discard(entry, "health_check_failures")
+                    continue
+
+            with self._cond:
+                self._stats["checkouts"] += 1
+                if waited_from is not None:
+                    self._record_wait(time.monotonic() - waited_from)
+            return entry
+
+    def _record_wait(self, waited: float):
+        self._stats["wait_time_s"] += waited
+        self._stats["max_wait_s"] = max(self._stats["max_wait_s"], waited)
+
+    def release(self, entry: _Entry, broken: bool = False):
+        with self._cond:
+            if self._pid != os.getpid():
+                _close_quietly(entry.conn)
+                return
+            now = time.monotonic()
+            if broken:
+                self._discard(entry, "")
+                return
+            if self._expired(entry, now):
+                self._discard(entry, "expired")
+                return
+            entry.last_used = now
+            self._idle.append(entry)
+            self._reap_idle(now)
+            self._cond.notify()
+
+    @contextmanager
+    def connection(self, timeout: Optional[float] = None):
+        entry = self.acquire(timeout)
+        broken = False
+        try:
+            yield entry.conn
+        except Exception:
+            # Query errors leave the connection usable; dropped sockets do not
+            try:
+                broken = not entry.conn.is_connected()
+            except Exception:
+                broken = True
+            raise
+        finally:
+            self.release(entry, broken=broken)
+
+    def close_all(self):
+        with self._cond:
+            while self._idle:
+                self._discard(self._idle.popleft(), "")
+
+    def stats(self) -> Dict[str, Any]:
+        with self._cond:
+            idle = len(self._idle)
+            out = dict(self._stats)
+            out.update({
+                "size": self.size,
+                "open": self._open,
+                "idle": idle,
+                "in_use": self._open - idle,
+            })
+        out["wait_time_s"] = round(out["wait_time_s"], 4)
+        out["max_wait_s"] = round(out["max_wait_s"], 4)
+        out["avg_wait_ms"] = round(1000 * out["wait_time_s"] / out["waits"], 2) if out["waits"] else 0.0
+        return out
@@ -0,0 +1,201 @@
+# champ/llm/admission.py
+"""
+Admission control for upstream LLM requests (one instance per process).
+
+- Adaptive concurrency limit (AIMD): each success under the latency target adds
+  1/limit; a 429 or a slow response multiplies the limit by LLM_LIMIT_BACKOFF. Callers
+  over the limit wait at most LLM_ADMISSION_WAIT_S, then are rejected.
+- Circuit breaker: LLM_BREAKER_FAILURES consecutive upstream failures (429/5xx/network)
+  open the circuit for LLM_BREAKER_COOLDOWN_S; while open every attempt is rejected
+  immediately. After the cooldown one probe is let through (half-open): success closes
+  the circuit, failure re-opens it. acquire() tells the caller whether its attempt is
+  the probe, and only that attempt's release() decides; attempts admitted before the
+  circuit opened can still finish while it is half-open.
+
+provider.py asks for a slot before every attempt (not once per call), and releases it
+before any backoff sleep, so workers never hold a slot while sleeping. Rejections surface
+as ProviderError, which routes already turn into their deterministic fallbacks.
+"""
+import os
+import time
+import asyncio
+import threading
+from typing import Dict, Optional, Tuple
+
+LLM_MAX_CONCURRENCY = int(os.getenv("LLM_MAX_CONCURRENCY", "16"))
+LLM_MIN_CONCURRENCY = int(os.getenv("LLM_MIN_CONCURRENCY", "1"))
+LLM_INITIAL_CONCURRENCY = int(os.getenv("LLM_INITIAL_CONCURRENCY", "8"))
+LLM_LATENCY_TARGET_S = float(os.getenv("LLM_LATENCY_TARGET_S", "8"))
+LLM_LIMIT_BACKOFF = float(os.getenv("LLM_LIMIT_BACKOFF", "0.7"))
+LLM_ADMISSION_WAIT_S = float(os.getenv("LLM_ADMISSION_WAIT_S", "0.5"))
+LLM_BREAKER_FAILURES = int(os.getenv("LLM_BREAKER_FAILURES", "5"))
+LLM_BREAKER_COOLDOWN_S = float(os.getenv("LLM_BREAKER_COOLDOWN_S", "30"))
+
+CLOSED, OPEN, HALF_OPEN = "closed", "open", "half_open"
+
+# Attempt outcomes reported by the provider
+OK = "ok"                  # 2xx
+THROTTLED = "throttled"    # 429: failure for the breaker, backoff for the limiter
+FAILURE = "failure"        # 5xx, timeout, connection error
+NEUTRAL = "neutral"        # other 4xx (bad request/key): says nothing about upstream health
+
+class Admission:
+    def __init__(self, max_limit: int = None, min_limit: int = None, initial: int = None,
+                 latency_target_s: float = None, wait_s: float = None,
+                 failure_threshold: int = None, cooldown_s: float = None, clock=time.monotonic):
+        self.max_limit = max(1, max_limit or LLM_MAX_CONCURRENCY)
+        self.min_limit = max(1, min(self.max_limit, min_limit or LLM_MIN_CONCURRENCY))
+        self.limit = float(min(self.max_limit, max(self.min_limit, initial or LLM_INITIAL_CONCURRENCY)))
+        self.latency_target_s = latency_target_s or LLM_LATENCY_TARGET_S
+        self.wait_s = LLM_ADMISSION_WAIT_S if wait_s is None else wait_s
+        self.failure_threshold = max(1, failure_threshold or LLM_BREAKER_FAILURES)
+        self.cooldown_s = LLM_BREAKER_COOLDOWN_S if cooldown_s is None else cooldown_s
+        self.clock = clock
+        self._cond = threading.Condition()
+        self.in_flight = 0
+        self.state = CLOSED
+        self._opened_at = 0.0
+        self._probe_in_flight = False
+        self._consecutive_failures = 0
+        self._last_decrease = 0.0
+        self._stats = {"admitted": 0, "rejected_limit": 0, "rejected_open": 0, "breaker_opens": 0,
+                       "successes": 0, "throttled": 0, "failures": 0}
+
+    # ---------- breaker ----------
+    def _refresh_state(self, now: float):
+        if self.state == OPEN and now - self._opened_at >= self.cooldown_s:
+            self.state = HALF_OPEN
+            self._probe_in_flight = False
+
+    def _open(self, now: float):
+        if self.state != OPEN:
+            self._stats["breaker_opens"] += 1
+            print(f"[LLM] circuit open for {self.cooldown_s:.0f}s after {self._consecutive_failures} failures")
+        self.state = OPEN
+        self._opened_at = now
+
+    def is_open(self) -> bool:
+        with self._cond:
+            self._refresh_state(self.clock())
+            return self.state == OPEN
+
+    # ---------- slots ----------
+    def _try_admit(self, now: float) -> Tuple[Optional[str], bool]:
+        """
+        Under the lock: (None, probe) when admitted, ("open", False) when the breaker
+        rejects, ("full", False) when at the limit.
+        """
+        self._refresh_state(now)
+        if self.state == OPEN or (self.state == HALF_OPEN and self._probe_in_flight):
+            return "open", False
+        if self.in_flight >= int(self.limit):
+            return "full", False
+        probe = self.state == HALF_OPEN
+        if probe:
+            self._probe_in_flight = True
+        self.in_flight += 1
+        self._stats["admitted"] += 1
+        return None, probe
+
+    def _reject(self, why: str) -> str:
+        if why == "open":
+            self._stats["rejected_open"] += 1
+            return "circuit open"
+        self._stats["rejected_limit"] += 1
+        return f"concurrency limit {int(self.limit)} reached"
+
+    def acquire(self, max_wait: float = None) -> Tuple[Optional[str], bool]:
+        """
+        Take a slot for one upstream attempt. Returns (None, probe) when admitted, else
+        (rejection reason, False). Pass probe back to release().
+        """
+        deadline = self.clock() + (self.wait_s if max_wait is None else max_wait)
+        with self._cond:
+            while True:
+                now = self.clock()
+                why, probe = self._try_admit(now)
+                if why is None:
+                    return None, probe
+                if why == "open" or deadline - now <= 0:
+                    return self._reject(why), False
+                self._cond.wait(deadline - now)
+
+    async def aacquire(self, max_wait: float = None, poll_s: float = 0.01) -> Tuple[Optional[str], bool]:
+        """acquire() for event-loop callers (champ/llm/aio.py): polls instead of blocking the loop."""
+        deadline = self.clock() + (self.wait_s if max_wait is None else max_wait)
+        while True:
+            with self._cond:
+                now = self.clock()
+                why, probe = self._try_admit(now)
+                if why is None:
+                    return None, probe
+                if why == "open" or deadline - now <= 0:
+                    return self._reject(why), False
+            await asyncio.sleep(min(poll_s, deadline - now))
+
+    def release(self, started: float, outcome: str, probe: bool = False):
+        """Return the slot and feed the attempt's latency and outcome to the limiter and breaker."""
+        now = self.clock()
+        latency = now - started
+        with self._cond:
+            self.in_flight = max(0, self.in_flight - 1)
+            half_open_probe = probe and self.state == HALF_OPEN
+            if probe:
+                self._probe_in_flight = False
+
+            if outcome == OK:
+                self._stats["successes"] += 1
+                self._consecutive_failures = 0
+                if half_open_probe:
+                    self.state = CLOSED
+                    print("[LLM] circuit closed")
+                if latency <= self.latency_target_s:
+                    self.limit = min(self.max_limit, self.limit + 1.0 / self.limit)
+                else:
+                    self._decrease(now)
+            elif outcome in (THROTTLED, FAILURE):
+                self._stats["throttled" if outcome == THROTTLED else "failures"] += 1
+                self._consecutive_failures += 1
+                if outcome == THROTTLED:
+                    self._decrease(now)
+                if half_open_probe or self._consecutive_failures >= self.failure_threshold:
+                    self._open(now)
+            self._cond.notify_all()
+
+    def _decrease(self, now: float):
+        # At most one multiplicative decrease per second, so a burst of 429s from
+        # requests that were all in flight together counts once
+        if now - self._last_decrease >= min(1.0, self.latency_target_s):
+            self.limit = max(self.min_limit, self.limit * LLM_LIMIT_BACKOFF)
+            self._last_decrease = now
+
+    def stats(self) -> Dict:
+        with self._cond:
+            self._refresh_state(self.clock())
+            out = dict(self._stats)
+            out.update({
+                "state": self.state,
+                "limit": round(self.limit, 2),
+                "in_flight": self.in_flight,
+                "consecutive_failures": self._consecutive_failures,
+                "open_for_s": round(max(0.0, self.cooldown_s - (self.clock() - self._opened_at)), 1)
+                if self.state == OPEN else 0.0,
+            })
+        return out
+
+def outcome_for_status(status: int) -> str:
+    if status == 429:
+        return THROTTLED
+    if status >= 500:
+        return FAILURE
+    if status >= 400:
+        return NEUTRAL
+    return OK
+
+_admission = Admission()
+
+def get_admission() -> Admission:
+    return _admission
+
+def admission_stats() -> Dict:
+    return _admission.stats()
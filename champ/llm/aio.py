@@ -0,0 +1,171 @@
+# champ/llm/aio.py
+"""
+asyncio twin of provider.call_llm_text for the ASGI app (champ/asgi.py).
+
+Same request body, retry statuses, admission control, coalescing and latency budget as
+provider.py, on one pooled httpx.AsyncClient per event loop, so hundreds of in-flight
+calls cost sockets rather than threads. Hedging, streaming and the dns/connect/tls
+breakdown remain features of the threaded provider.
+"""
+import os
+import json
+import time
+import asyncio
+from typing import Dict
+
+import httpx
+
+from champ.llm.admission import get_admission, outcome_for_status, FAILURE
+from champ.llm.deadline import remaining, bounded, record_latency
+from champ.llm import provider
+from champ.llm.provider import (
+    ProviderError, RETRY_STATUS,
+    _resolved_model, _make_body, _flight_key, _answer_of, _attempt_timeouts, _backoff_delay, _deadline_exceeded,
+)
+
+LLM_AIO_POOL_SIZE = int(os.getenv("LLM_AIO_POOL_SIZE", "100"))
+
+_clients: Dict[int, httpx.AsyncClient] = {}
+_flights: Dict[int, Dict[str, asyncio.Future]] = {}
+_stats = {"calls": 0, "upstream": 0, "coalesced": 0, "attempts": 0, "in_flight": 0, "max_in_flight": 0}
+
+def get_client() -> httpx.AsyncClient:
+    """Keep-alive client for the running event loop."""
+    loop_id = id(asyncio.get_running_loop())
+    client = _clients.get(loop_id)
+    if client is None:
+        client = _clients[loop_id] = httpx.AsyncClient(
+            limits=httpx.Limits(max_connections=LLM_AIO_POOL_SIZE, max_keepalive_connections=LLM_AIO_POOL_SIZE),
+        )
+    return client
+
+async def close_client():
+    client = _clients.pop(id(asyncio.get_running_loop()), None)
+    if client is not None:
+        await client.aclose()
+
+def aio_stats() -> dict:
+    out = dict(_stats)
+    out["dedup_rate"] = round(out["coalesced"] / out["calls"], 4) if out["calls"] else 0.0
+    out["clients"] = len(_clients)
+    return out
+
+async def _attempt(client: httpx.AsyncClient, url: str, model_name: str, **kwargs) -> httpx.Response:
+    connect, read = _attempt_timeouts()
+    admission = get_admission()
+    reason, probe = await admission.aacquire(max_wait=bounded(admission.wait_s))
+    if reason:
+        raise ProviderError(f"LLM call rejected: {reason}")
+    outcome = FAILURE
+    started = admission.clock()
+    t0 = time.perf_counter()
+    _stats["attempts"] += 1
+    _stats["in_flight"] += 1
+    _stats["max_in_flight"] = max(_stats["max_in_flight"], _stats["in_flight"])
+    try:
+        resp = await client.post(url, timeout=httpx.Timeout(read, connect=connect), **kwargs)
+        outcome = outcome_for_status(resp.status_code)
+    finally:
+        _stats["in_flight"] -= 1
+        admission.release(started, outcome, probe)
+    elapsed = time.perf_counter() - t0
+    print(f"[LLM] model={model_name} status={resp.status_code} async=1 total_ms={elapsed * 1000:.1f}")
+    if resp.is_success:
+        record_latency(elapsed)
+    return resp
+
+async def acall_llm_text(system_prompt: str, user_prompt: str, model: str | None = None) -> str:
+    """
+    Async call_llm_text. Identical concurrent calls on the same loop share one upstream
+    request (followers wait at most until the request deadline).
+    """
+    model_name = _resolved_model(model)
+    _stats["calls"] += 1
+    if not provider.LLM_COALESCE_ENABLED:
+        _stats["upstream"] += 1
+        return await _acall_llm_text(system_prompt, user_prompt, model_name)
+
+    loop = asyncio.get_running_loop()
+    flights = _flights.setdefault(id(loop), {})
+    key = _flight_key(model_name, system_prompt, user_prompt)
+    flight = flights.get(key)
+    if flight is not None:
+        _stats["coalesced"] += 1
+        left = remaining()
+        try:
+            return await asyncio.wait_for(asyncio.shield(flight), None if left is None else max(0.0, left))
+        except asyncio.TimeoutError:
+            _deadline_exceeded()
+
+    flight = flights[key] = loop.create_future()
+    _stats["upstream"] += 1
+    try:
+        result = await _acall_llm_text(system_prompt, user_prompt, model_name)
+        flight.set_result(result)
+        return result
+    except BaseException as e:
+        flight.set_exception(e if isinstance(e, ProviderError) else ProviderError(str(e) or type(e).__name__))
+        flight.exception()  # retrieved: no "never retrieved" warning when nobody was waiting
+        raise
+    finally:
+        flights.pop(key, None)
+
+async def _acall_llm_text(system_prompt: str, user_prompt: str, model_name: str) -> str:
+    api_key = os.getenv("GEMINI_API_KEY")
+    if not api_key:
+        raise ProviderError("Missing GEMINI_API_KEY")
+
+    url = f"{provider.LLM_API_BASE}/v1beta/models/{model_name}:generateContent"
+    headers = {"Content-Type": "application/json"}
+    params = {"key": api_key}
+    body = _make_body(system_prompt, user_prompt)
+
+    attempts = int(os.getenv("LLM_RETRIES", "4"))
+    base = float(os.getenv("LLM_BACKOFF_BASE", "0.5"))
+
+    last_err_text = None
+    last_status = None
+
+    client = get_client()
+    for i in range(attempts):
+        try:
+            resp = await _attempt(
+                client,
+                url,
+                model_name,
+                headers=headers,
+                params=params,
+                content=json.dumps(body, ensure_ascii=False).encode("utf-8"),
+            )
+            last_status = resp.status_code
+
+            if resp.status_code in RETRY_STATUS:
+                last_err_text = resp.text
+                if i < attempts - 1:
+                    await asyncio.sleep(_backoff_delay(i, base))
+                    continue
+
+            resp.raise_for_status()
+            return _answer_of(resp.json(), last_status)
+
+        except httpx.HTTPError as e:
+            response = getattr(e, "response", None) if isinstance(e, httpx.HTTPStatusError) else None
+            last_err_text = response.text if response is not None else last_err_text
+            if i < attempts - 1:
+                await asyncio.sleep(_backoff_delay(i, base))
+                continue
+
+            msg = f"{e}"
+            if last_status is not None:
+                msg = f"HTTP {last_status}: {msg}"
+            if last_err_text:
+                msg += f" | body: {last_err_text}"
+            raise ProviderError(f"LLM call failed: {msg}")
+
+async def asafe_call_llm(system_prompt: str, user_prompt: str, model: str | None = None):
+    """Async safe_call_llm: never raises; returns (text, unavailable_flag)."""
+    try:
+        return await acall_llm_text(system_prompt, user_prompt, model=model), False
+    except ProviderError as e:
+        print("LLM ProviderError:", e)
+        return None, True
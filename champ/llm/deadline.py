@@ -0,0 +1,86 @@
+# champ/llm/deadline.py
+"""
+Request-scoped latency budget.
+
+A route opens a deadline_scope(seconds); everything below it in the same request
+(provider retries, backoff sleeps, admission waits, coalesced waits) reads remaining()
+and never plans past the deadline. Code outside any scope has no deadline (None).
+"""
+import os
+import time
+import functools
+import threading
+import contextvars
+from collections import deque
+from contextlib import contextmanager
+from typing import Optional
+
+CHAT_SLO_S = float(os.getenv("CHAT_SLO_S", "12"))
+INSIGHTS_SLO_S = float(os.getenv("INSIGHTS_SLO_S", "10"))
+# Hedging: when an attempt is still pending after the hedge delay, send a second identical
+# request and take whichever answers first. The delay is LLM_HEDGE_AFTER_S when set,
+# otherwise the observed p95 attempt latency (once LLM_HEDGE_MIN_SAMPLES are recorded).
+LLM_HEDGE_ENABLED = os.getenv("LLM_HEDGE_ENABLED", "0") == "1"
+LLM_HEDGE_AFTER_S = float(os.getenv("LLM_HEDGE_AFTER_S", "0"))
+LLM_HEDGE_MIN_SAMPLES = int(os.getenv("LLM_HEDGE_MIN_SAMPLES", "20"))
+
+_deadline: contextvars.ContextVar = contextvars.ContextVar("llm_deadline", default=None)
+
+@contextmanager
+def deadline_scope(seconds: Optional[float] = None, at: Optional[float] = None):
+    """Budget of `seconds` from now (or an absolute time.monotonic() `at`); nested scopes only tighten it."""
+    new = at if at is not None else (time.monotonic() + seconds if seconds is not None else None)
+    current = _deadline.get()
+    if current is not None and (new is None or current < new):
+        new = current
+    token = _deadline.set(new)
+    try:
+        yield new
+    finally:
+        try:
+            _deadline.reset(token)
+        except ValueError:
+            # A streaming generator closed from another context: nothing to restore there
+            pass
+
+def with_deadline(seconds: float):
+    """Route decorator: run the view under a budget of `seconds`."""
+    def decorator(fn):
+        @functools.wraps(fn)
+        def wrapper(*args, **kwargs):
+            with deadline_scope(seconds):
+                return fn(*args, **kwargs)
+        return wrapper
+    return decorator
+
+def current_deadline() -> Optional[float]:
+    return _deadline.get()
+
+def remaining() -> Optional[float]:
+    """Seconds left in the current budget (may be <= 0), or None without a deadline."""
+    d = _deadline.get()
+    return None if d is None else d - time.monotonic()
+
+def bounded(seconds: float) -> float:
+    """`seconds` capped by the remaining budget."""
+    left = remaining()
+    return seconds if left is None else max(0.0, min(seconds, left))
+
+# ---------- attempt latency window (for the hedge delay) ----------
+_latencies = deque(maxlen=200)
+_lat_lock = threading.Lock()
+
+def record_latency(seconds: float):
+    with _lat_lock:
+        _latencies.append(seconds)
+
+def hedge_delay() -> Optional[float]:
+    if not LLM_HEDGE_ENABLED:
+        return None
+    if LLM_HEDGE_AFTER_S > 0:
+        return LLM_HEDGE_AFTER_S
+    with _lat_lock:
+        if len(_latencies) < LLM_HEDGE_MIN_SAMPLES:
+            return None
+        ordered = sorted(_latencies)
+    return ordered[min(len(ordered) - 1, int(0.95 * len(ordered)))]
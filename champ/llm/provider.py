@@ -2,15 +2,27 @@
 import os
 import json
 import time
+import contextvars
 import random
+import hashlib
+import threading
 import requests
-import certifi
+from concurrent.futures import ThreadPoolExecutor, TimeoutError as FutureTimeout, wait, FIRST_COMPLETED
+from contextlib import contextmanager
+from champ.llm.session import get_session, timeouts, start_call, finish_call
+from champ.llm.admission import get_admission, outcome_for_status, FAILURE, LLM_MAX_CONCURRENCY
+from champ.llm.deadline import remaining, bounded, record_latency, hedge_delay
 
 class ProviderError(RuntimeError):
     pass
 
 # Retry on rate limit / transient server errors
 RETRY_STATUS = {429, 500, 502, 503, 504}
+LLM_API_BASE = os.getenv("LLM_API_BASE", "https://generativelanguage.googleapis.com").rstrip("/")
+# Identical concurrent calls (same model + prompts) share one upstream request
+LLM_COALESCE_ENABLED = os.getenv("LLM_COALESCE_ENABLED", "1") == "1"
+# An attempt is not started with less budget than this left
+LLM_MIN_ATTEMPT_S = float(os.getenv("LLM_MIN_ATTEMPT_S", "0.25"))
 
 def _resolved_model(explicit_model: str | None) -> str:
     """
@@ -21,6 +33,122 @@ def _resolved_model(explicit_model: str | None) -> str:
     """
     return (explicit_model or os.getenv("LLM_MODEL") or "gemini-2.0-flash").strip()
 
+def _log_timing(model_name: str, resp, t0: float):
+    t = finish_call(resp, t0)
+    print(f"[LLM] model={model_name} status={resp.status_code} reused={int(t['reused_connection'])} "
+          f"dns_ms={t['dns_ms']} connect_ms={t['connect_ms']} tls_ms={t['tls_ms']} "
+          f"server_ms={t['server_ms']} total_ms={t['total_ms']}")
+
+@contextmanager
+def _admitted():
+    """
+    One upstream attempt under the adaptive concurrency limit and circuit breaker.
+    Set ticket["outcome"] from the response; an exception counts as a failure.
+    """
+    admission = get_admission()
+    reason, probe = admission.acquire(max_wait=bounded(admission.wait_s))
+    if reason:
+        raise ProviderError(f"LLM call rejected: {reason}")
+    ticket = {"outcome": FAILURE}
+    started = admission.clock()
+    try:
+        yield ticket
+    finally:
+        admission.release(started, ticket["outcome"], probe)
+
+def _backoff_delay(i: int, base: float) -> float:
+    # Sleep outside any admission slot, and not at all once the breaker has opened
+    if get_admission().is_open():
+        raise ProviderError("LLM circuit open; not retrying")
+    sleep = base * (2 ** i) * (0.8 + 0.4 * random.random())
+    left = remaining()
+    if left is not None and left - sleep < LLM_MIN_ATTEMPT_S:
+        _deadline_exceeded()
+    return sleep
+
+def _backoff(i: int, base: float):
+    time.sleep(_backoff_delay(i, base))
+
+# ---------- latency budget / hedging ----------
+_budget_lock = threading.Lock()
+_budget_stats = {"deadline_exceeded": 0, "hedges_sent": 0, "hedge_wins": 0}
+# Every admitted call may have a first attempt and a hedge running at once, so the pool never
+# becomes a tighter cap than the admission limit
+LLM_HEDGE_WORKERS = int(os.getenv("LLM_HEDGE_WORKERS", str(LLM_MAX_CONCURRENCY * 2)))
+_hedge_pool = ThreadPoolExecutor(max_workers=max(2, LLM_HEDGE_WORKERS), thread_name_prefix="llm-hedge")
+
+def _count(key: str):
+    with _budget_lock:
+        _budget_stats[key] += 1
+
+def _deadline_exceeded():
+    _count("deadline_exceeded")
+    raise ProviderError("LLM deadline exceeded")
+
+def budget_stats() -> dict:
+    with _budget_lock:
+        out = dict(_budget_stats)
+    out["hedge_after_s"] = hedge_delay()
+    return out
+
+def _attempt_timeouts():
+    """(connect, read) timeouts for the next attempt, capped by the remaining budget."""
+    connect, read = timeouts()
+    left = remaining()
+    if left is None:
+        return connect, read
+    if left < LLM_MIN_ATTEMPT_S:
+        _deadline_exceeded()
+    return min(connect, left), min(read, left)
+
+def _single_attempt(session, url: str, model_name: str, kwargs: dict):
+    with _admitted() as ticket:
+        start_call()
+        t0 = time.perf_counter()
+        # Pooled keep-alive session: retries reuse the open TLS connection
+        resp = session.post(url, **kwargs)
+        ticket["outcome"] = outcome_for_status(resp.status_code)
+    _log_timing(model_name, resp, t0)
+    if resp.ok:
+        record_latency(time.perf_counter() - t0)
+    return resp
+
+def _post_attempt(session, url: str, model_name: str, **kwargs):
+    """
+    One attempt within the budget. When hedging is on and the attempt is still pending after
+    the hedge delay, an identical second request is sent and the first usable response wins
+    (the loser finishes in the background and is discarded).
+    """
+    kwargs["timeout"] = _attempt_timeouts()
+    delay = hedge_delay()
+    left = remaining()
+    if delay is None or (left is not None and left <= delay + LLM_MIN_ATTEMPT_S):
+        return _single_attempt(session, url, model_name, kwargs)
+
+    # Each attempt runs in a copy of this context, so the request deadline reaches the pool thread
+    first = _hedge_pool.submit(contextvars.copy_context().run, _single_attempt, session, url, model_name, kwargs)
+    try:
+        return first.result(timeout=delay)
+    except FutureTimeout:
+        pass
+    _count("hedges_sent")
+    hedge_kwargs = dict(kwargs, timeout=_attempt_timeouts())
+    second = _hedge_pool.submit(contextvars.copy_context().run, _single_attempt, session, url, model_name,
+                                hedge_kwargs)
+    pending = {first, second}
+    last = None
+    while pending:
+        done, pending = wait(pending, timeout=remaining(), return_when=FIRST_COMPLETED)
+        if not done:
+            _deadline_exceeded()
+        for f in done:
+            last = f
+            if f.exception() is None and f.result().status_code not in RETRY_STATUS:
+                if f is second:
+                    _count("hedge_wins")
+                return f.result()
+    return last.result()  # both failed: surface the last outcome to the retry loop
+
 def _make_body(system_prompt: str, user_prompt: str):
     # Keep the payload small and JSON-safe
     return {
@@ -35,16 +163,79 @@ def _make_body(system_prompt: str, user_prompt: str):
         ]
     }
 
+# ---------- single-flight coalescing ----------
+class _Flight:
+    __slots__ = ("done", "result", "error", "waiters")
+
+    def __init__(self):
+        self.done = threading.Event()
+        self.result = None
+        self.error = None
+        self.waiters = 0
+
+_inflight: dict = {}
+_inflight_lock = threading.Lock()
+_coalesce_stats = {"calls": 0, "upstream": 0, "coalesced": 0, "max_waiters": 0}
+
+def _flight_key(model_name: str, system_prompt: str, user_prompt: str) -> str:
+    raw = f"{model_name}\x00{system_prompt or ''}\x00{user_prompt or ''}".encode("utf-8")
+    return hashlib.sha256(raw).hexdigest()
+
+def coalescing_stats() -> dict:
+    with _inflight_lock:
+        out = dict(_coalesce_stats)
+        out["in_flight"] = len(_inflight)
+    out["dedup_rate"] = round(out["coalesced"] / out["calls"], 4) if out["calls"] else 0.0
+    return out
+
 def call_llm_text(system_prompt: str, user_prompt: str, model: str | None = None) -> str:
     """
     Synchronous text call to Gemini API with robust retries and clear error messages.
+    Concurrent calls with the same model and prompts are coalesced: the first one calls
+    upstream, the others wait for and share its result (or its error).
     """
+    model_name = _resolved_model(model)
+    if not LLM_COALESCE_ENABLED:
+        return _call_llm_text(system_prompt, user_prompt, model_name)
+
+    key = _flight_key(model_name, system_prompt, user_prompt)
+    with _inflight_lock:
+        _coalesce_stats["calls"] += 1
+        flight = _inflight.get(key)
+        leader = flight is None
+        if leader:
+            flight = _inflight[key] = _Flight()
+            _coalesce_stats["upstream"] += 1
+        else:
+            flight.waiters += 1
+            _coalesce_stats["coalesced"] += 1
+            _coalesce_stats["max_waiters"] = max(_coalesce_stats["max_waiters"], flight.waiters)
+
+    if not leader:
+        left = remaining()
+        if not flight.done.wait(timeout=None if left is None else max(0.0, left)):
+            _deadline_exceeded()
+        if flight.error is not None:
+            raise ProviderError(str(flight.error))
+        return flight.result
+
+    try:
+        flight.result = _call_llm_text(system_prompt, user_prompt, model_name)
+        return flight.result
+    except BaseException as e:
+        flight.error = e
+        raise
+    finally:
+        with _inflight_lock:
+            _inflight.pop(key, None)
+        flight.done.set()
+
+def _call_llm_text(system_prompt: str, user_prompt: str, model_name: str) -> str:
     api_key = os.getenv("GEMINI_API_KEY")
     if not api_key:
         raise ProviderError("Missing GEMINI_API_KEY")
 
-    model_name = _resolved_model(model)
-    url = f"https://generativelanguage.googleapis.com/v1beta/models/{model_name}:generateContent"
+    url = f"{LLM_API_BASE}/v1beta/models/{model_name}:generateContent"
     headers = {"Content-Type": "application/json"}
     params = {"key": api_key}
     body = _make_body(system_prompt, user_prompt)
@@ -55,15 +246,16 @@ def call_llm_text(system_prompt: str, user_prompt: str, model: str | None = None
     last_err_text = None
     last_status = None
 
+    session = get_session()
     for i in range(attempts):
         try:
-            resp = requests.post(
+            resp = _post_attempt(
+                session,
                 url,
+                model_name,
                 headers=headers,
                 params=params,
                 data=json.dumps(body, ensure_ascii=False),
-                timeout=30,
-                verify=certifi.where(),
             )
             last_status = resp.status_code
 
@@ -71,33 +263,18 @@ def call_llm_text(system_prompt: str, user_prompt: str, model: str | None = None
             if resp.status_code in RETRY_STATUS:
                 last_err_text = resp.text
                 if i < attempts - 1:
-                    sleep = base * (2 ** i) * (0.8 + 0.4 * random.random())
-                    time.sleep(sleep)
+                    _backoff(i, base)
                     continue
 
             resp.raise_for_status()
-            data = resp.json()
-
-            # Defensive parsing
-            candidates = data.get("candidates") or []
-            if not candidates:
-                raise ProviderError(f"Empty or malformed response (no candidates). status={last_status}, body={data}")
-
-            parts = (candidates[0].get("content") or {}).get("parts") or []
-            for p in parts:
-                if isinstance(p, dict) and "text" in p:
-                    return p["text"]
-
-            # Fallback to raw JSON if no 'text' field found
-            return json.dumps(data)
+            return _answer_of(resp.json(), last_status)
 
         except requests.exceptions.RequestException as e:
             # Network or HTTP error path
             # Retry if allowed; otherwise surface a clear provider error
             last_err_text = getattr(getattr(e, "response", None), "text", last_err_text)
             if i < attempts - 1:
-                sleep = base * (2 ** i) * (0.8 + 0.4 * random.random())
-                time.sleep(sleep)
+                _backoff(i, base)
                 continue
 
             # Compose informative error with last known status/body
@@ -108,6 +285,113 @@ def call_llm_text(system_prompt: str, user_prompt: str, model: str | None = None
                 msg += f" | body: {last_err_text}"
             raise ProviderError(f"LLM call failed: {msg}")
 
+def _answer_of(data: dict, status: int) -> str:
+    # Defensive parsing
+    candidates = data.get("candidates") or []
+    if not candidates:
+        raise ProviderError(f"Empty or malformed response (no candidates). status={status}, body={data}")
+
+    parts = (candidates[0].get("content") or {}).get("parts") or []
+    for p in parts:
+        if isinstance(p, dict) and "text" in p:
+            return p["text"]
+
+    # Fallback to raw JSON if no 'text' field found
+    return json.dumps(data)
+
+def _text_of(data: dict) -> str:
+    candidates = data.get("candidates") or []
+    if not candidates:
+        return ""
+    parts = (candidates[0].get("content") or {}).get("parts") or []
+    return "".join(p["text"] for p in parts if isinstance(p, dict) and isinstance(p.get("text"), str))
+
+def stream_llm_text(system_prompt: str, user_prompt: str, model: str | None = None):
+    """
+    Streaming variant of call_llm_text (streamGenerateContent with alt=sse).
+    Yields text deltas as Gemini produces them. Transient failures are retried only
+    until the first delta arrives; after that a failure raises ProviderError mid-stream.
+    """
+    api_key = os.getenv("GEMINI_API_KEY")
+    if not api_key:
+        raise ProviderError("Missing GEMINI_API_KEY")
+
+    model_name = _resolved_model(model)
+    url = f"{LLM_API_BASE}/v1beta/models/{model_name}:streamGenerateContent"
+    headers = {"Content-Type": "application/json", "Accept": "text/event-stream"}
+    params = {"key": api_key, "alt": "sse"}
+    body = _make_body(system_prompt, user_prompt)
+
+    attempts = int(os.getenv("LLM_RETRIES", "4"))
+    base = float(os.getenv("LLM_BACKOFF_BASE", "0.5"))
+
+    last_err_text = None
+    last_status = None
+
+    session = get_session()
+    for i in range(attempts):
+        yielded = False
+        retry = False
+        try:
+            start_call()
+            t0 = time.perf_counter()
+            # The slot is held for the whole stream, not just until the headers
+            # For streams the budget bounds the time to the first token; the read
+            # timeout then applies per chunk
+            attempt_timeouts = _attempt_timeouts()
+            with _admitted() as ticket, session.post(
+                url,
+                headers=headers,
+                params=params,
+                data=json.dumps(body, ensure_ascii=False),
+                timeout=attempt_timeouts,
+                stream=True,
+            ) as resp:
+                ticket["outcome"] = outcome_for_status(resp.status_code)
+                last_status = resp.status_code
+                if resp.status_code in RETRY_STATUS and i < attempts - 1:
+                    last_err_text = resp.text
+                    retry = True
+                else:
+                    resp.raise_for_status()
+                    for line in resp.iter_lines(decode_unicode=True):
+                        # SSE frames: "data: {json}" lines separated by blank lines
+                        if not line or not line.startswith("data:"):
+                            continue
+                        payload = line[5:].strip()
+                        if not payload:
+                            continue
+                        try:
+                            chunk = json.loads(payload)
+                        except ValueError:
+                            continue
+                        if chunk.get("error"):
+                            raise ProviderError(f"LLM stream error: {chunk['error']}")
+                        text = _text_of(chunk)
+                        if text:
+                            yielded = True
+                            yield text
+                    _log_timing(model_name, resp, t0)
+            if retry:
+                _backoff(i, base)
+                continue
+            if not yielded:
+                raise ProviderError(f"Empty streamed response. status={last_status}")
+            return
+
+        except requests.exceptions.RequestException as e:
+            last_err_text = getattr(getattr(e, "response", None), "text", last_err_text)
+            if not yielded and i < attempts - 1:
+                _backoff(i, base)
+                continue
+
+            msg = f"{e}"
+            if last_status is not None:
+                msg = f"HTTP {last_status}: {msg}"
+            if last_err_text:
+                msg += f" | body: {last_err_text}"
+            raise ProviderError(f"LLM stream failed: {msg}")
+
 def safe_call_llm(system_prompt: str, user_prompt: str, model: str | None = None):
     """
     Wrapper that never raises; returns (text, unavailable_flag).
@@ -0,0 +1,245 @@
+# champ/llm/response_cache.py
+"""
+Cache for LLM answers generated from a user's own data (insights, hybrid analyses, plans).
+
+Key = (prompt template + version, model, sha256 of the data block and user prompt), so an
+answer is reused only while the data it was generated from is byte-identical. Bump a
+template's version when its prompt text changes. Entries are stored per user so that
+invalidate_user() can drop them when a new session lands; TTL bounds everything else.
+
+Backends: "memory" (per-process LRU) or "disk" (JSON files under LLM_CACHE_DIR/u<user_id>/,
+shared by all workers on the host).
+"""
+import os
+import json
+import time
+import shutil
+import hashlib
+import threading
+from collections import OrderedDict
+from typing import Dict, Optional, Tuple
+
+from champ.llm.provider import safe_call_llm
+
+LLM_CACHE_ENABLED = os.getenv("LLM_CACHE_ENABLED", "1") == "1"
+LLM_CACHE_BACKEND = os.getenv("LLM_CACHE_BACKEND", "memory")
+LLM_CACHE_DIR = os.getenv("LLM_CACHE_DIR", ".llm_cache")
+LLM_CACHE_TTL_S = float(os.getenv("LLM_CACHE_TTL_S", "86400"))
+LLM_CACHE_MAX_ITEMS = int(os.getenv("LLM_CACHE_MAX_ITEMS", "5000"))
+
+def make_key(template: str, model: str, data_block: str, user_prompt: str = "") -> str:
+    digest = hashlib.sha256(f"{data_block}\x00{user_prompt}".encode("utf-8")).hexdigest()
+    return hashlib.sha256(f"{template}\x00{model}\x00{digest}".encode("utf-8")).hexdigest()
+
+class _MemoryBackend:
+    def __init__(self, max_items: int):
+        self.max_items = max(1, max_items)
+        # Keyed by (user, key): two users with byte-identical data blocks share a key
+        self._items: "OrderedDict[Tuple[str, str], Tuple[float, str]]" = OrderedDict()  # -> (created, text)
+        self._by_user: Dict[str, set] = {}
+
+    def get(self, user: str, key: str) -> Optional[Tuple[float, str]]:
+        item = self._items.get((user, key))
+        if item is None:
+            return None
+        self._items.move_to_end((user, key))
+        return item
+
+    def put(self, user: str, key: str, text: str):
+        self._items[(user, key)] = (time.time(), text)
+        self._items.move_to_end((user, key))
+        self._by_user.setdefault(user, set()).add(key)
+        while len(self._items) > self.max_items:
+            (old_user, old_key), _ = self._items.popitem(last=False)
+            self._by_user.get(old_user, set()).discard(old_key)
+
+    def delete(self, user: str, key: str):
+        if self._items.pop((user, key), None) is not None:
+            self._by_user.get(user, set()).discard(key)
+
+    def invalidate_user(self, user: str) -> int:
+        keys = self._by_user.pop(user, set())
+        for k in keys:
+            self._items.pop((user, k), None)
+        return len(keys)
+
+    def size(self) -> int:
+        return len(self._items)
+
+class _DiskBackend:
+    def __init__(self, cache_dir: str):
+        self.cache_dir = cache_dir
+        os.makedirs(cache_dir, exist_ok=True)
+
+    def _user_dir(self, user: str) -> str:
+        return os.path.join(self.cache_dir, f"u{user}")
+
+    def get(self, user: str, key: str) -> Optional[Tuple[float, str]]:
+        try:
+            with open(os.path.join(self._user_dir(user), f"{key}.json"), "r", encoding="utf-8") as f:
+                obj = json.load(f)
+            return float(obj["created"]), obj["text"]
+        except (OSError, ValueError, KeyError):
+            return None
+
+    def put(self, user: str, key: str, text: str):
+        d = self._user_dir(user)
+        os.makedirs(d, exist_ok=True)
+        path = os.path.join(d, f"{key}.json")
+        tmp = f"{path}.{os.getpid()}.tmp"
+        with open(tmp, "w", encoding="utf-8") as f:
+            json.dump({"created": time.time(), "text": text}, f, ensure_ascii=False)
+        os.replace(tmp, path)
+
+    def delete(self, user: str, key: str):
+        try:
+            os.remove(os.path.join(self._user_dir(user), f"{key}.json"))
+        except OSError:
+            pass
+
+    def invalidate_user(self, user: str) -> int:
+        d = self._user_dir(user)
+        try:
+            n = len(os.listdir(d))
+        except OSError:
+            return 0
+        # Rename first so concurrent writers start a fresh directory
+        trash = f"{d}.{os.getpid()}.{time.time_ns()}.del"
+        try:
+            os.replace(d, trash)
+        except OSError:
+            return 0
+        shutil.rmtree(trash, ignore_errors=True)
+        return n
+
+    def size(self) -> int:
+        total = 0
+        for _, _, files in os.walk(self.cache_dir):
+            total += sum(1 for f in files if f.endswith(".json"))
+        return total
+
+class ResponseCache:
+    def __init__(self, backend: str = None, ttl_s: float = None, cache_dir: str = None, max_items: int = None):
+        self.backend_name = backend or LLM_CACHE_BACKEND
+        if self.backend_name == "disk":
+            self._backend = _DiskBackend(cache_dir or LLM_CACHE_DIR)
+        elif self.backend_name == "memory":
+            self._backend = _MemoryBackend(max_items or LLM_CACHE_MAX_ITEMS)
+        else:
+            raise ValueError(f"Unknown LLM_CACHE_BACKEND: {self.backend_name} (expected memory or disk)")
+        self.ttl_s = LLM_CACHE_TTL_S if ttl_s is None else ttl_s
+        self._lock = threading.Lock()
+        self._stats = {"hits": 0, "misses": 0, "expired": 0, "puts": 0, "invalidated": 0,
+                       "hit_ms": 0.0, "miss_ms": 0.0}
+
+    def get(self, user_id, key: str) -> Optional[str]:
+        user = str(user_id)
+        with self._lock:
+            found = self._backend.get(user, key)
+            if found is not None and time.time() - found[0] > self.ttl_s:
+                self._backend.delete(user, key)
+                self._stats["expired"] += 1
+                found = None
+            self._stats["hits" if found is not None else "misses"] += 1
+        return found[1] if found is not None else None
+
+    def put(self, user_id, key: str, text: str):
+        with self._lock:
+            self._backend.put(str(user_id), key, text)
+            self._stats["puts"] += 1
+
+    def invalidate_user(self, user_id) -> int:
+        with self._lock:
+            n = self._backend.invalidate_user(str(user_id))
+            self._stats["invalidated"] += n
+        return n
+
+    def record_latency(self, hit: bool, ms: float):
+        with self._lock:
+            self._stats["hit_ms" if hit else "miss_ms"] += ms
+
+    def stats(self) -> Dict:
+        with self._lock:
+            out = dict(self._stats)
+            size = self._backend.size()
+        lookups = out["hits"] + out["misses"]
+        hit_ms, miss_ms = out.pop("hit_ms"), out.pop("miss_ms")
+        out.update({
+            "backend": self.backend_name,
+            "ttl_s": self.ttl_s,
+            "items": size,
+            "hit_rate": round(out["hits"] / lookups, 4) if lookups else 0.0,
+            "avg_hit_ms": round(hit_ms / out["hits"], 2) if out["hits"] else 0.0,
+            "avg_miss_ms": round(miss_ms / out["misses"], 2) if out["misses"] else 0.0,
+        })
+        return out
+
+# ---------- process-wide instance ----------
+_cache: Optional[ResponseCache] = None
+_cache_lock = threading.Lock()
+
+def get_response_cache() -> Optional[ResponseCache]:
+    global _cache
+    if not LLM_CACHE_ENABLED:
+        return None
+    with _cache_lock:
+        if _cache is None:
+            _cache = ResponseCache()
+        return _cache
+
+def invalidate_user(user_id) -> int:
+    cache = get_response_cache()
+    return cache.invalidate_user(user_id) if cache is not None else 0
+
+def response_cache_stats() -> Dict:
+    cache = get_response_cache()
+    return cache.stats() if cache is not None else {"enabled": False}
+
+def lookup(template: str, user_id, model: str, data_block: str, user_prompt: str = "") -> Tuple[Optional[str], str]:
+    """(cached text or None, key) for callers that produce the answer themselves (e.g. streaming)."""
+    key = make_key(template, model, data_block, user_prompt)
+    cache = get_response_cache()
+    if cache is None:
+        return None, key
+    return cache.get(user_id, key), key
+
+def store(user_id, key: str, text: str):
+    cache = get_response_cache()
+    if cache is not None and text:
+        cache.put(user_id, key, text)
+
+def cached_llm(template: str, user_id, system_prompt: str, user_prompt: str, data_block: str,
+               model: str) -> Tuple[Optional[str], bool, bool]:
+    """
+    safe_call_llm behind the cache. Returns (text, unavailable_flag, cache_hit).
+    Fallback (unavailable) results are never cached.
+    """
+    t0 = time.perf_counter()
+    cached, key = lookup(template, user_id, model, data_block, user_prompt)
+    cache = get_response_cache()
+    if cached is not None:
+        cache.record_latency(True, (time.perf_counter() - t0) * 1000)
+        return cached, False, True
+    text, unavail = safe_call_llm(system_prompt, user_prompt, model=model)
+    if not unavail and text:
+        store(user_id, key, text)
+    if cache is not None:
+        cache.record_latency(False, (time.perf_counter() - t0) * 1000)
+    return text, unavail, False
+
+async def acached_llm(template: str, user_id, system_prompt: str, user_prompt: str, data_block: str,
+                      model: str) -> Tuple[Optional[str], bool, bool]:
+    """cached_llm for the ASGI app: same cache and key, the LLM call is awaited."""
+    from champ.llm.aio import asafe_call_llm  # httpx is only needed by the async path
+    t0 = time.perf_counter()
+    cached, key = lookup(template, user_id, model, data_block, user_prompt)
+    cache = get_response_cache()
+    if cached is not None:
+        cache.record_latency(True, (time.perf_counter() - t0) * 1000)
+        return cached, False, True
+    text, unavail = await asafe_call_llm(system_prompt, user_prompt, model=model)
+    if not unavail and text:
+        store(user_id, key, text)
+    if cache is not None:
+        cache.record_latency(False, (time.perf_counter() - t0) * 1000)
+    return text, unavail, False
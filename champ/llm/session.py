@@ -0,0 +1,165 @@
+# champ/llm/session.py
+"""
+Shared keep-alive HTTP session for LLM calls.
+
+One requests.Session per process with a pooled HTTPAdapter, so calls (and retries)
+reuse open TLS connections to the Gemini API instead of handshaking every time.
+Connections are instrumented: each new connection records its DNS, TCP connect and
+TLS handshake time, which provider.py combines with the response time into a
+per-call breakdown (see last_call_timing / http_stats).
+"""
+import os
+import socket
+import threading
+import time
+from typing import Dict, Optional
+
+import certifi
+import requests
+from requests.adapters import HTTPAdapter
+from urllib3.connection import HTTPConnection, HTTPSConnection
+from urllib3.connectionpool import HTTPConnectionPool, HTTPSConnectionPool
+
+LLM_HTTP_POOL_SIZE = int(os.getenv("LLM_HTTP_POOL_SIZE", "10"))
+LLM_CONNECT_TIMEOUT = float(os.getenv("LLM_CONNECT_TIMEOUT", "3.05"))
+LLM_READ_TIMEOUT = float(os.getenv("LLM_READ_TIMEOUT", "30"))
+# Resolved once instead of per request
+CA_BUNDLE = certifi.where()
+
+_local = threading.local()
+
+def _conn_timing() -> Optional[Dict[str, float]]:
+    return getattr(_local, "conn", None)
+
+class _TimedConnectionMixin:
+    """Records DNS / connect / TLS time of new connections into the calling thread's slot."""
+
+    def _new_conn(self):
+        t0 = time.perf_counter()
+        host = self._dns_host
+        try:
+            family = socket.AF_UNSPEC
+            info = socket.getaddrinfo(host, self.port, family, socket.SOCK_STREAM)
+            resolved = info[0][4][0] if info else host
+        except OSError:
+            resolved = host  # let urllib3 raise its usual error
+        t1 = time.perf_counter()
+        # Connect to the address we just resolved; SNI and cert checks still use self.host
+        self._dns_host = resolved
+        try:
+            sock = super()._new_conn()
+        finally:
+            self._dns_host = host
+        t2 = time.perf_counter()
+        _local.conn = {"dns_ms": (t1 - t0) * 1000, "connect_ms": (t2 - t1) * 1000, "tls_ms": 0.0}
+        return sock
+
+    def connect(self):
+        t0 = time.perf_counter()
+        super().connect()
+        timing = _conn_timing()
+        if timing is not None:
+            total = (time.perf_counter() - t0) * 1000
+            timing["tls_ms"] = max(0.0, total - timing["dns_ms"] - timing["connect_ms"])
+
+class TimedHTTPConnection(_TimedConnectionMixin, HTTPConnection):
+    pass
+
+class TimedHTTPSConnection(_TimedConnectionMixin, HTTPSConnection):
+    pass
+
+class _TimedHTTPPool(HTTPConnectionPool):
+    ConnectionCls = TimedHTTPConnection
+
+class _TimedHTTPSPool(HTTPSConnectionPool):
+    ConnectionCls = TimedHTTPSConnection
+
+class TimedAdapter(HTTPAdapter):
+    def init_poolmanager(self, *args, **kwargs):
+        super().init_poolmanager(*args, **kwargs)
+        self.poolmanager.pool_classes_by_scheme = {"http": _TimedHTTPPool, "https": _TimedHTTPSPool}
+
+# ---------- process-wide session ----------
+_session: Optional[requests.Session] = None
+_session_lock = threading.Lock()
+_stats_lock = threading.Lock()
+_stats = {"calls": 0, "new_connections": 0, "reused_connections": 0,
+          "dns_ms": 0.0, "connect_ms": 0.0, "tls_ms": 0.0, "server_ms": 0.0, "total_ms": 0.0}
+
+def _build_session() -> requests.Session:
+    s = requests.Session()
+    # Our own retry loop handles 429/5xx; the adapter must not retry underneath it
+    adapter = TimedAdapter(pool_connections=4, pool_maxsize=LLM_HTTP_POOL_SIZE, max_retries=0, pool_block=False)
+    s.mount("https://", adapter)
+    s.mount("http://", adapter)
+    s.verify = CA_BUNDLE
+    return s
+
+def get_session() -> requests.Session:
+    """Thread-safe: requests.Session + urllib3 pools may be shared across request threads."""
+    global _session
+    if _session is None:
+        with _session_lock:
+            if _session is None:
+                _session = _build_session()
+    return _session
+
+def _reset_after_fork():
+    # Sockets must not be shared with the parent (gunicorn preload)
+    global _session, _session_lock, _stats_lock
+    _session = None
+    _session_lock = threading.Lock()
+    _stats_lock = threading.Lock()
+
+if hasattr(os, "register_at_fork"):
+    os.register_at_fork(after_in_child=_reset_after_fork)
+
+def timeouts():
+    return (LLM_CONNECT_TIMEOUT, LLM_READ_TIMEOUT)
+
+# ---------- per-call timing ----------
+def start_call():
+    """Clear the thread's connection timing before sending a request."""
+    _local.conn = None
+
+def finish_call(resp: Optional[requests.Response], t_start: float) -> Dict[str, float]:
+    """
+    Breakdown of the request just made on this thread:
+    dns/connect/tls are 0 when a pooled connection was reused; server_ms is the
+    remaining time until response headers (request upload + Gemini processing);
+    total_ms includes reading the body.
+    """
+    conn = _conn_timing()
+    total = (time.perf_counter() - t_start) * 1000
+    headers_ms = resp.elapsed.total_seconds() * 1000 if resp is not None else total
+    setup = conn or {"dns_ms": 0.0, "connect_ms": 0.0, "tls_ms": 0.0}
+    timing = {
+        "reused_connection": conn is None,
+        "dns_ms": round(setup["dns_ms"], 2),
+        "connect_ms": round(setup["connect_ms"], 2),
+        "tls_ms": round(setup["tls_ms"], 2),
+        "server_ms": round(max(0.0, headers_ms - setup["dns_ms"] - setup["connect_ms"] - setup["tls_ms"]), 2),
+        "total_ms": round(total, 2),
+    }
+    _local.last = timing
+    with _stats_lock:
+        _stats["calls"] += 1
+        _stats["reused_connections" if conn is None else "new_connections"] += 1
+        for k in ("dns_ms", "connect_ms", "tls_ms", "server_ms", "total_ms"):
+            _stats[k] += timing[k]
+    return timing
+
+def last_call_timing() -> Optional[Dict[str, float]]:
+    """Timing of the most recent LLM HTTP call made by this thread."""
+    return getattr(_local, "last", None)
+
+def http_stats() -> Dict[str, float]:
+    with _stats_lock:
+        out = dict(_stats)
+    calls = out["calls"]
+    for k in ("dns_ms", "connect_ms", "tls_ms", "server_ms", "total_ms"):
+        out[f"avg_{k}"] = round(out.pop(k) / calls, 2) if calls else 0.0
+    out["pool_size"] = LLM_HTTP_POOL_SIZE
+    out["connect_timeout_s"] = LLM_CONNECT_TIMEOUT
+    out["read_timeout_s"] = LLM_READ_TIMEOUT
+    return out
@@ -0,0 +1,245 @@
+# champ/rag/embed_cache.py
+"""
+Two-tier embedding cache keyed by (model, normalized text).
+
+- In-process LRU of recent vectors.
+- On-disk ring of `capacity` float32 rows in an mmap'd matrix (vectors.f32), with
+  the owning key digest per slot (digests.bin) and an append-only key log
+  (keys.log, "slot<TAB>digest" lines). When the ring is full the oldest slot is reused.
+
+Several worker processes can share one directory: writers serialize on a file lock,
+and readers verify the slot digest before trusting a row.
+"""
+import os
+import re
+import hashlib
+import threading
+from collections import OrderedDict
+from contextlib import contextmanager
+from typing import Dict, List, Optional
+
+import numpy as np
+
+try:
+    import fcntl
+except ImportError:  # non-POSIX: single-process use only
+    fcntl = None
+
+EMBED_CACHE_ENABLED = os.environ.get("EMBED_CACHE_ENABLED", "1") == "1"
+EMBED_CACHE_DIR = os.environ.get("EMBED_CACHE_DIR", ".embed_cache")
+EMBED_CACHE_DISK_ROWS = int(os.environ.get("EMBED_CACHE_DISK_ROWS", "20000"))
+EMBED_CACHE_MEM_ITEMS = int(os.environ.get("EMBED_CACHE_MEM_ITEMS", "2048"))
+
+_WS = re.compile(r"\s+")
+_DIGEST = 32
+
+def normalize_text(text: str) -> str:
+    return _WS.sub(" ", text or "").strip()
+
+def cache_key(model: str, text: str) -> bytes:
+    return hashlib.sha256(f"{model}\x00{normalize_text(text)}".encode("utf-8")).digest()
+
+class EmbeddingCache:
+    def __init__(self, cache_dir: str, dim: int, capacity: int = None, mem_items: int = None):
+        self.cache_dir = cache_dir
+        self.dim = int(dim)
+        self.capacity = max(1, capacity or EMBED_CACHE_DISK_ROWS)
+        self.mem_items = max(0, EMBED_CACHE_MEM_ITEMS if mem_items is None else mem_items)
+        os.makedirs(cache_dir, exist_ok=True)
+        self.vec_path = os.path.join(cache_dir, "vectors.f32")
+        self.digest_path = os.path.join(cache_dir, "digests.bin")
+        self.log_path = os.path.join(cache_dir, "keys.log")
+        self.lock_path = os.path.join(cache_dir, ".lock")
+
+        self._lock = threading.RLock()
+        self._mem: "OrderedDict[bytes, np.ndarray]" = OrderedDict()
+        self._slots: Dict[bytes, int] = {}
+        self._next_slot = 0
+        self._log_pos = 0
+        self._log_lines = 0
+        self._log_ino = None
+        self._stats = {"mem_hits": 0, "disk_hits": 0, "misses": 0, "puts": 0, "evictions": 0}
+
+        with self._file_lock():
+            self._vectors = self._open_matrix(self.vec_path, np.float32, (self.capacity, self.dim))
+            self._digests = self._open_matrix(self.digest_path, np.uint8, (self.capacity, _DIGEST))
+            self._sync()
+
+    # ---------- files ----------
+    @staticmethod
+    def _open_matrix(path: str, dtype, shape):
+        nbytes = int(np.prod(shape)) * np.dtype(dtype).itemsize
+        if not os.path.exists(path) or os.path.getsize(path) != nbytes:
+            # New or resized cache: start from an empty (sparse) file
+            with open(path, "wb") as f:
+                f.truncate(nbytes)
+        return np.memmap(path, dtype=dtype, mode="r+", shape=shape)
+
+    @contextmanager
+    def _file_lock(self):
+        """Thread lock plus an exclusive flock on the lock file (other processes)."""
+        with self._lock:
+            with open(self.lock_path, "a") as f:
+                if fcntl is not None:
+                    fcntl.flock(f, fcntl.LOCK_EX)
+                try:
+                    yield
+                finally:
+                    if fcntl is not None:
+                        fcntl.flock(f, fcntl.LOCK_UN)
+
+    def _sync(self):
+        """Replay key log lines appended since our last read (by us or other processes)."""
+        if not os.path.exists(self.log_path):
+            open(self.log_path, "ab").close()
+        st = os.stat(self.log_path)
+        if st.st_ino != self._log_ino or st.st_size < self._log_pos:
+            # Log was compacted by another process: replay from scratch
+            self._slots.clear()
+            self._log_pos = 0
+            self._log_lines = 0
+            self._log_ino = st.st_ino
+        if st.st_size == self._log_pos:
+            return
+        with open(self.log_path, "rb") as f:
+            f.seek(self._log_pos)
+            data = f.read()
+        end = data.rfind(b"\n") + 1  # ignore a partially written trailing line
+        slot_owner = {}
+        for line in data[:end].splitlines():
+            try:
+                slot_s, hex_key = line.split(b"\t")
+                slot, key = int(slot_s), bytes.fromhex(hex_key.decode())
+            except ValueError:
+                continue
+            if slot >= self.capacity:
+                continue
+            slot_owner[slot] = key
+            self._next_slot = (slot + 1) % self.capacity
+            self._log_lines += 1
+        if slot_owner:
+            for key in [k for k, s in self._slots.items() if s in slot_owner]:
+                del self._slots[key]
+            for slot, key in slot_owner.items():
+                self._slots[key] = slot
+        self._log_pos += end
+
+    def _compact_log(self):
+        tmp = self.log_path + ".tmp"
+        with open(tmp, "wb") as f:
+            for key, slot in sorted(self._slots.items(), key=lambda kv: (kv[1] - self._next_slot) % self.capacity):
+                f.write(f"{slot}\t{key.hex()}\n".encode())
+        os.replace(tmp, self.log_path)
+        st = os.stat(self.log_path)
+        self._log_ino, self._log_pos, self._log_lines = st.st_ino, st.st_size, len(self._slots)
+
+    # ---------- memory tier ----------
+    def _remember(self, key: bytes, vec: np.ndarray):
+        if not self.mem_items:
+            return
+        self._mem[key] = vec
+        self._mem.move_to_end(key)
+        while len(self._mem) > self.mem_items:
+            self._mem.popitem(last=False)
+
+    def _read_slot(self, key: bytes, slot: int) -> Optional[np.ndarray]:
+        if bytes(self._digests[slot]) != key:
+            return None
+        vec = np.array(self._vectors[slot], dtype=np.float32)
+        # Re-check: another process may have reused the slot while we copied
+        return vec if bytes(self._digests[slot]) == key else None
+
+    # ---------- public ----------
+    def get_many(self, model: str, texts: List[str]) -> List[Optional[List[float]]]:
+        out: List[Optional[List[float]]] = []
+        synced = False
+        with self._lock:
+            for text in texts:
+                key = cache_key(model, text)
+                vec = self._mem.get(key)
+                if vec is not None:
+                    self._mem.move_to_end(key)
+                    self._stats["mem_hits"] += 1
+                    out.append(vec.tolist())
+                    continue
+                slot = self._slots.get(key)
+                if slot is None and not synced:
+                    self._sync()
+                    synced = True
+                    slot = self._slots.get(key)
+                vec = self._read_slot(key, slot) if slot is not None else None
+                if vec is None:
+                    self._stats["misses"] += 1
+                    out.append(None)
+                    continue
+                self._stats["disk_hits"] += 1
+                self._remember(key, vec)
+                out.append(vec.tolist())
+        return out
+
+    def put_many(self, model: str, texts: List[str], vectors: List[List[float]]):
+        items = [(cache_key(model, t), np.asarray(v, dtype=np.float32)) for t, v in zip(texts, vectors) if v is not None]
+        if not items:
+            return
+        with self._file_lock():
+            self._sync()
+            lines = []
+            for key, vec in items:
+                if vec.shape != (self.dim,):
+                    continue
+                self._remember(key, vec)
+                if key in self._slots:
+                    continue
+                slot = self._next_slot
+                old = bytes(self._digests[slot])
+                if any(old) and self._slots.get(old) == slot:
+                    del self._slots[old]
+                    self._stats["evictions"] += 1
+                # Invalidate, write the vector, then publish the new digest: a reader that
+                # still maps the old key to this slot never sees the old digest over a new row
+                self._digests[slot] = 0
+                self._vectors[slot] = vec
+                self._digests[slot] = np.frombuffer(key, dtype=np.uint8)
+                self._slots[key] = slot
+                self._next_slot = (slot + 1) % self.capacity
+                lines.append(f"{slot}\t{key.hex()}\n")
+                self._stats["puts"] += 1
+            if not lines:
+                return
+            self._vectors.flush()
+            self._digests.flush()
+            with open(self.log_path, "ab") as f:
+                f.write("".join(lines).encode())
+                self._log_pos = f.tell()
+            self._log_lines += len(lines)
+            if self._log_lines > 4 * self.capacity:
+                self._compact_log()
+
+    def stats(self) -> Dict[str, int]:
+        with self._lock:
+            out = dict(self._stats)
+            lookups = out["mem_hits"] + out["disk_hits"] + out["misses"]
+            out.update({
+                "mem_items": len(self._mem),
+                "disk_items": len(self._slots),
+                "capacity": self.capacity,
+                "hit_rate": round((out["mem_hits"] + out["disk_hits"]) / lookups, 4) if lookups else 0.0,
+            })
+        return out
+
+# ---------- process-wide instances ----------
+_caches: Dict[str, EmbeddingCache] = {}
+_caches_lock = threading.Lock()
+
+def get_embedding_cache(dim: int, cache_dir: str = None) -> Optional[EmbeddingCache]:
+    if not EMBED_CACHE_ENABLED:
+        return None
+    path = cache_dir or EMBED_CACHE_DIR
+    with _caches_lock:
+        if path not in _caches:
+            _caches[path] = EmbeddingCache(path, dim)
+        return _caches[path]
+
+def embed_cache_stats() -> Dict[str, Dict[str, int]]:
+    with _caches_lock:
+        return {path: c.stats() for path, c in _caches.items()}
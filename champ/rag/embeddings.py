@@ -1,35 +1,115 @@
 # champ/rag/embeddings.py
 import os
+import time
+import random
 import google.generativeai as genai
-from typing import List
+from concurrent.futures import ThreadPoolExecutor
+from typing import List, Optional, Tuple
+from champ.rag.embed_cache import get_embedding_cache
 
 GEMINI_EMBED_MODEL = os.environ.get("GEMINI_EMBED_MODEL", "text-embedding-004")
+# batchEmbedContents accepts at most 100 texts per request
+EMBED_BATCH_SIZE = min(100, int(os.environ.get("EMBED_BATCH_SIZE", "100")))
+EMBED_CONCURRENCY = int(os.environ.get("EMBED_CONCURRENCY", "4"))
+EMBED_RETRIES = int(os.environ.get("EMBED_RETRIES", "4"))
+EMBED_BACKOFF_BASE = float(os.environ.get("EMBED_BACKOFF_BASE", "0.5"))
+# Optional override, e.g. http://localhost:8089 for a local stub server
+GEMINI_API_ENDPOINT = os.environ.get("GEMINI_API_ENDPOINT", "")
+
+class EmbeddingBatchError(RuntimeError):
+    """
+    Raised when some batches still fail after retries.
+    vectors is aligned with the input (None where a text failed); failed lists those indices.
+    """
+    def __init__(self, message: str, vectors: List[Optional[List[float]]], failed: List[int]):
+        super().__init__(message)
+        self.vectors = vectors
+        self.failed = failed
 
 class GeminiEmbedder:
-    def __init__(self):
+    def __init__(self, batch_size: int = None, concurrency: int = None, use_cache: bool = True):
         api_key = os.environ.get("GEMINI_API_KEY")
         if not api_key:
             raise RuntimeError("GEMINI_API_KEY env var required")
-        genai.configure(api_key=api_key)
+        if GEMINI_API_ENDPOINT:
+            genai.configure(api_key=api_key, transport="rest", client_options={"api_endpoint": GEMINI_API_ENDPOINT})
+        else:
+            genai.configure(api_key=api_key)
         self.model = GEMINI_EMBED_MODEL
+        self.batch_size = max(1, min(100, batch_size or EMBED_BATCH_SIZE))
+        self.concurrency = max(1, concurrency or EMBED_CONCURRENCY)
+        self.cache = get_embedding_cache(self.dim()) if use_cache else None
 
     def dim(self) -> int:
         # As of Gemini text-embedding-004, dimension is 768
         return 768
 
+    def _embed_batch(self, texts: List[str]) -> List[List[float]]:
+        # One batchEmbedContents request; retried with jittered exponential backoff
+        attempts = max(1, EMBED_RETRIES)   # EMBED_RETRIES=0 still means one attempt
+        last_err = None
+        for i in range(attempts):
+            try:
+                resp = genai.embed_content(model=self.model, content=[t or " " for t in texts])
+                vecs = resp["embedding"]
+                if len(vecs) != len(texts):
+                    raise RuntimeError(f"Expected {len(texts)} embeddings, got {len(vecs)}")
+                return vecs
+            except Exception as e:
+                last_err = e
+                if i < attempts - 1:
+                    time.sleep(EMBED_BACKOFF_BASE * (2 ** i) * (0.8 + 0.4 * random.random()))
+        raise last_err
+
+    def embed_texts_partial(self, texts: List[str]) -> Tuple[List[Optional[List[float]]], List[int]]:
+        """
+        Cache lookups first; the misses are embedded in batches of batch_size with up to
+        `concurrency` requests in flight.
+        Returns (vectors aligned with texts, indices that failed); never raises for batch errors.
+        """
+        if self.cache is None:
+            return self._embed_uncached(texts)
+        out = self.cache.get_many(self.model, texts)
+        missing = [i for i, v in enumerate(out) if v is None]
+        if not missing:
+            return out, []
+        vecs, failed_local = self._embed_uncached([texts[i] for i in missing])
+        self.cache.put_many(self.model, [texts[i] for i in missing], vecs)
+        for i, v in zip(missing, vecs):
+            out[i] = v
+        return out, [missing[j] for j in failed_local]
+
+    def _embed_uncached(self, texts: List[str]) -> Tuple[List[Optional[List[float]]], List[int]]:
+        spans = [(s, min(s + self.batch_size, len(texts))) for s in range(0, len(texts), self.batch_size)]
+        out: List[Optional[List[float]]] = [None] * len(texts)
+        failed: List[int] = []
+
+        def run(span):
+            s, e = span
+            try:
+                return span, self._embed_batch(texts[s:e]), None
+            except Exception as err:
+                return span, None, err
+
+        if len(spans) <= 1 or self.concurrency == 1:
+            results = [run(sp) for sp in spans]
+        else:
+            with ThreadPoolExecutor(max_workers=min(self.concurrency, len(spans))) as pool:
+                results = list(pool.map(run, spans))
+
+        for (s, e), vecs, err in results:
+            if err is not None:
+                print(f"[EMBED] batch {s}:{e} failed after {EMBED_RETRIES} attempts: {err}")
+                failed.extend(range(s, e))
+                continue
+            out[s:e] = vecs
+        return out, failed
+
     def embed_texts(self, texts: List[str]) -> List[List[float]]:
-        # Batch embed via embed_content
-        # Ensure non-empty strings
-        payload = [{"model": self.model, "content": t if t else " " } for t in texts]
-        # Gemini API supports batch embedding with embed_content for one-by-one;
-        # we'll do a simple loop to avoid hitting undocumented batch limits.
-        out = []
-        for item in texts:
-            resp = genai.embed_content(model=self.model, content=item or " ")
-            vec = resp["embedding"]
-            out.append(vec)
-        return out
+        vectors, failed = self.embed_texts_partial(texts)
+        if failed:
+            raise EmbeddingBatchError(f"{len(failed)} of {len(texts)} texts failed to embed", vectors, failed)
+        return vectors
 
     def embed_text(self, text: str) -> List[float]:
         return self.embed_texts([text])[0]
-    
\ No newline at end of file
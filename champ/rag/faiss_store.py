@@ -1,91 +1,345 @@
 # champ/rag/faiss_store.py
 import os
 import json
+import math
+import threading
 import faiss
 import numpy as np
-from typing import List, Dict, Tuple
+from typing import List, Dict, Tuple, Optional
+
+# Index type used when a store is first created; an existing index.faiss keeps its own type.
+FAISS_INDEX_TYPE = os.environ.get("FAISS_INDEX_TYPE", "flat")
+FAISS_NLIST = int(os.environ.get("FAISS_NLIST", "1024"))
+FAISS_PQ_M = int(os.environ.get("FAISS_PQ_M", "16"))
+FAISS_PQ_NBITS = int(os.environ.get("FAISS_PQ_NBITS", "8"))
+FAISS_HNSW_M = int(os.environ.get("FAISS_HNSW_M", "32"))
+FAISS_NPROBE = int(os.environ.get("FAISS_NPROBE", "16"))
+FAISS_EF_SEARCH = int(os.environ.get("FAISS_EF_SEARCH", "64"))
+# HNSW cannot remove vectors: deleted ones stay in the graph until the index is rebuilt
+FAISS_HNSW_MAX_DEAD = int(os.environ.get("FAISS_HNSW_MAX_DEAD", "256"))
+INDEX_TYPES = ("flat", "ivf_flat", "ivf_pq", "hnsw")
+
+def _normalized(vectors) -> np.ndarray:
+    arr = np.array(vectors, dtype="float32")
+    return arr / (np.linalg.norm(arr, axis=1, keepdims=True) + 1e-12)
+
+def build_index(index_type: str, dim: int, n_train: Optional[int] = None):
+    """
+    Inner-product index of the given type. IVF sizes are clamped to the training set
+    (FAISS needs at least nlist points for k-means and 2**nbits for PQ codebooks).
+    """
+    if index_type == "flat":
+        return faiss.IndexFlatIP(dim)
+    if index_type == "hnsw":
+        idx = faiss.IndexHNSWFlat(dim, FAISS_HNSW_M, faiss.METRIC_INNER_PRODUCT)
+        idx.hnsw.efConstruction = max(40, 2 * FAISS_HNSW_M)
+        return idx
+    nlist = FAISS_NLIST
+    if n_train:
+        nlist = max(1, min(nlist, n_train // 39 or 1))
+    quantizer = faiss.IndexFlatIP(dim)
+    if index_type == "ivf_flat":
+        return faiss.IndexIVFFlat(quantizer, dim, nlist, faiss.METRIC_INNER_PRODUCT)
+    if index_type == "ivf_pq":
+        m = FAISS_PQ_M if dim % FAISS_PQ_M == 0 else math.gcd(dim, FAISS_PQ_M)
+        nbits = FAISS_PQ_NBITS
+        if n_train:
+            nbits = max(1, min(nbits, int(math.log2(n_train))))
+        return faiss.IndexIVFPQ(quantizer, dim, nlist, m, nbits, faiss.METRIC_INNER_PRODUCT)
+    raise ValueError(f"Unknown FAISS index type: {index_type} (expected one of {', '.join(INDEX_TYPES)})")
+
+def index_type_of(index) -> str:
+    inner = faiss.downcast_index(index.index) if isinstance(index, (faiss.IndexIDMap, faiss.IndexIDMap2)) else index
+    if isinstance(inner, faiss.IndexHNSW):
+        return "hnsw"
+    if isinstance(inner, faiss.IndexIVFPQ):
+        return "ivf_pq"
+    if isinstance(inner, faiss.IndexIVF):
+        return "ivf_flat"
+    return "flat"
 
 class FaissStore:
-    def __init__(self, index_dir: str, dim: int):
+    def __init__(self, index_dir: str, dim: int, index_type: str = None):
         self.index_dir = index_dir
         self.dim = dim
+        self.index_type = index_type or FAISS_INDEX_TYPE
+        self.nprobe = FAISS_NPROBE
+        self.ef_search = FAISS_EF_SEARCH
         self.index_path = os.path.join(index_dir, "index.faiss")
         self.meta_path = os.path.join(index_dir, "meta.jsonl")
         self.text_path = os.path.join(index_dir, "texts.jsonl")
         self._index = None
-        self._ids = []  # parallel to meta/text lines
+        # Vectors carry int64 labels (IndexIDMap2) so chunks can be removed individually
+        self._id_to_label: Dict[str, int] = {}
+        self._label_to_id: Dict[int, str] = {}
+        self._next_label = 0
+        # id -> byte offset of its latest line in meta.jsonl / texts.jsonl
+        self._meta_offsets: Dict[str, int] = {}
+        self._text_offsets: Dict[str, int] = {}
+        self._dead_lines = 0  # superseded or deleted jsonl lines, reclaimed by compact()
+        self._lock = threading.RLock()
 
         if os.path.exists(self.index_path) and os.path.exists(self.meta_path) and os.path.exists(self.text_path):
             self._load()
+            self.index_type = index_type_of(self._index)
         else:
             os.makedirs(index_dir, exist_ok=True)
-            self._index = faiss.IndexFlatIP(dim)  # cosine-like if vectors normalized
-            self._ids = []
+            self._index = self._new_index()
+        self.set_search_params()
+
+    def _new_index(self, index_type: str = None, n_train: Optional[int] = None):
+        # cosine-like if vectors normalized
+        return faiss.IndexIDMap2(build_index(index_type or self.index_type, self.dim, n_train))
+
+    # ---------- ANN training / tuning ----------
+    @property
+    def is_trained(self) -> bool:
+        return bool(self._index.is_trained)
 
+    def train(self, vectors: List[List[float]]):
+        """
+        Train an empty IVF index on representative vectors (usually the first ingest batch).
+        Flat and HNSW indexes need no training.
+        """
+        with self._lock:
+            if self._index.ntotal:
+                raise RuntimeError("train() needs an empty index; rebuild the store to change its training")
+            arr = _normalized(vectors)
+            self._index = self._new_index(self.index_type, n_train=len(arr))
+            if not self._index.is_trained:
+                self._index.train(arr)
+            self.set_search_params()
+
+    def set_search_params(self, nprobe: int = None, ef_search: int = None):
+        self.nprobe = nprobe or self.nprobe
+        self.ef_search = ef_search or self.ef_search
+        inner = faiss.downcast_index(self._index.index)
+        if isinstance(inner, faiss.IndexIVF):
+            inner.nprobe = min(self.nprobe, inner.nlist)
+        if isinstance(inner, faiss.IndexHNSW):
+            inner.hnsw.efSearch = self.ef_search
+
+    # ---------- load / persist ----------
     def _load(self):
-        self._index = faiss.read_index(self.index_path)
-        self._ids = []
-        with open(self.meta_path, "r", encoding="utf-8") as f:
+        index = faiss.read_index(self.index_path)
+        legacy = not isinstance(index, (faiss.IndexIDMap, faiss.IndexIDMap2))
+        stale = []  # labels of duplicate rows written by older append-only ingests
+
+        with open(self.meta_path, "rb") as f:
+            pos = 0
+            ordinal = 0
             for line in f:
-                obj = json.loads(line)
-                self._ids.append(obj["id"])
+                if line.strip():
+                    obj = json.loads(line)
+                    _id = obj["id"]
+                    if obj.get("deleted"):
+                        self._meta_offsets.pop(_id, None)
+                        label = self._id_to_label.pop(_id, None)
+                        if label is not None:
+                            self._label_to_id.pop(label, None)
+                        self._dead_lines += 2
+                    else:
+                        # Legacy rows have no label: their label is the row position in the flat index
+                        label = int(obj["label"]) if "label" in obj else ordinal
+                        ordinal += 1
+                        prev = self._id_to_label.get(_id)
+                        if prev is not None:
+                            stale.append(prev)
+                            self._label_to_id.pop(prev, None)
+                            self._dead_lines += 2
+                        self._id_to_label[_id] = label
+                        self._label_to_id[label] = _id
+                        self._meta_offsets[_id] = pos
+                        self._next_label = max(self._next_label, label + 1)
+                pos += len(line)
+
+        with open(self.text_path, "rb") as f:
+            pos = 0
+            for line in f:
+                if line.strip():
+                    _id = json.loads(line)["id"]
+                    if _id in self._id_to_label:
+                        self._text_offsets[_id] = pos
+                pos += len(line)
+
+        if legacy:
+            # Migrate a plain flat index into an id-mapped one, keeping row order as labels
+            migrated = self._new_index("flat")
+            if index.ntotal:
+                migrated.add_with_ids(index.reconstruct_n(0, index.ntotal), np.arange(index.ntotal, dtype="int64"))
+            index = migrated
+            self._next_label = max(self._next_label, index.ntotal)
+        self._index = index
+        if stale:
+            try:
+                self._index.remove_ids(np.array(stale, dtype="int64"))
+            except RuntimeError:
+                self._rebuild_index()  # HNSW cannot remove vectors
+
+    def reset(self, index_type: str = None):
+        """Drop every vector and row, e.g. to rebuild the store with a different index type."""
+        with self._lock:
+            self.index_type = index_type or self.index_type
+            self._index = self._new_index()
+            self._id_to_label.clear()
+            self._label_to_id.clear()
+            self._meta_offsets.clear()
+            self._text_offsets.clear()
+            self._next_label = 0
+            self._dead_lines = 0
+            for path in (self.meta_path, self.text_path):
+                open(path, "wb").close()
+            self.set_search_params()
 
     def save(self):
-        faiss.write_index(self._index, self.index_path)
+        with self._lock:
+            if self._dead_lines > max(1000, 2 * len(self._id_to_label)):
+                self.compact()
+            faiss.write_index(self._index, self.index_path)
 
-    def _append_jsonl(self, path: str, rows: List[Dict]):
-        with open(path, "a", encoding="utf-8") as f:
+    @staticmethod
+    def _append_jsonl(path: str, rows: List[Dict], offsets: Dict[str, int] = None):
+        with open(path, "ab") as f:
+            pos = f.tell()
             for r in rows:
-                f.write(json.dumps(r, ensure_ascii=False) + "\n")
+                line = (json.dumps(r, ensure_ascii=False) + "\n").encode("utf-8")
+                f.write(line)
+                if offsets is not None:
+                    offsets[r["id"]] = pos
+                pos += len(line)
+
+    def _rebuild_index(self):
+        """Fresh index from the live vectors, dropping deleted ones still in an HNSW graph."""
+        with self._lock:
+            labels = np.array(list(self._label_to_id.keys()), dtype="int64")
+            index = self._new_index()
+            if len(labels):
+                vectors = np.vstack([self._index.reconstruct(int(l)) for l in labels])
+                index.add_with_ids(vectors, labels)
+            self._index = index
+            self.set_search_params()
+
+    def compact(self):
+        """Rewrite meta/texts jsonl with live rows only, and rebuild an HNSW index holding dead vectors."""
+        with self._lock:
+            if self._dead_vectors:
+                self._rebuild_index()
+            live = self.ids()
+            records = self.fetch_by_ids(live)
+            for path in (self.meta_path, self.text_path):
+                if os.path.exists(path + ".tmp"):
+                    os.remove(path + ".tmp")
+            meta_offsets: Dict[str, int] = {}
+            text_offsets: Dict[str, int] = {}
+            self._append_jsonl(self.meta_path + ".tmp",
+                               [{"id": r["id"], "label": self._id_to_label[r["id"]], "meta": r["meta"]} for r in records],
+                               meta_offsets)
+            self._append_jsonl(self.text_path + ".tmp", [{"id": r["id"], "text": r["text"]} for r in records], text_offsets)
+            os.replace(self.meta_path + ".tmp", self.meta_path)
+            os.replace(self.text_path + ".tmp", self.text_path)
+            self._meta_offsets, self._text_offsets = meta_offsets, text_offsets
+            self._dead_lines = 0
 
+    # ---------- mutations ----------
     def upsert(self, ids: List[str], vectors: List[List[float]], texts: List[str], metas: List[Dict]):
         # Normalize vectors for inner product similarity
-        arr = np.array(vectors, dtype="float32")
-        norms = np.linalg.norm(arr, axis=1, keepdims=True) + 1e-12
-        arr = arr / norms
+        arr = _normalized(vectors)
+
+        with self._lock:
+            if not self._index.is_trained:
+                self.train(arr)
+            # Replacing an id drops its previous vector first
+            self.delete([_id for _id in ids if _id in self._id_to_label])
+
+            labels = np.arange(self._next_label, self._next_label + len(ids), dtype="int64")
+            self._next_label += len(ids)
+            self._index.add_with_ids(arr, labels)
+
+            # Persist aligned metadata and texts
+            meta_rows = []
+            text_rows = []
+            for i, _id in enumerate(ids):
+                label = int(labels[i])
+                meta_rows.append({"id": _id, "label": label, "meta": metas[i]})
+                text_rows.append({"id": _id, "text": texts[i]})
+                self._id_to_label[_id] = label
+                self._label_to_id[label] = _id
 
-        # Add to index
-        self._index.add(arr)
+            self._append_jsonl(self.meta_path, meta_rows, self._meta_offsets)
+            self._append_jsonl(self.text_path, text_rows, self._text_offsets)
 
-        # Persist aligned metadata and texts
-        meta_rows = []
-        text_rows = []
-        for i, _id in enumerate(ids):
-            meta_rows.append({"id": _id, "meta": metas[i]})
-            text_rows.append({"id": _id, "text": texts[i]})
-            self._ids.append(_id)
+    def delete(self, ids: List[str]) -> int:
+        with self._lock:
+            present = [_id for _id in dict.fromkeys(ids) if _id in self._id_to_label]
+            if not present:
+                return 0
+            labels = [self._id_to_label.pop(_id) for _id in present]
+            for label in labels:
+                self._label_to_id.pop(label, None)
+            try:
+                self._index.remove_ids(np.array(labels, dtype="int64"))
+            except RuntimeError:
+                # HNSW cannot remove vectors: the labels stay in the graph unmapped and
+                # query() skips them (see _dead_vectors) until the graph is rebuilt
+                if self._dead_vectors > max(FAISS_HNSW_MAX_DEAD, len(self._id_to_label) // 10):
+                    self._rebuild_index()
+            for _id in present:
+                self._meta_offsets.pop(_id, None)
+                self._text_offsets.pop(_id, None)
+            self._append_jsonl(self.meta_path, [{"id": _id, "deleted": True} for _id in present])
+            self._dead_lines += 2 * len(present)
+            return len(present)
 
-        self._append_jsonl(self.meta_path, meta_rows)
-        self._append_jsonl(self.text_path, text_rows)
+    # ---------- reads ----------
+    def ids(self) -> List[str]:
+        with self._lock:
+            return list(self._id_to_label.keys())
+
+    def __contains__(self, _id: str) -> bool:
+        return _id in self._id_to_label
+
+    def __len__(self) -> int:
+        return len(self._id_to_label)
+
+    @property
+    def _dead_vectors(self) -> int:
+        return max(0, self._index.ntotal - len(self._id_to_label))
 
     def query(self, vector: List[float], top_k: int = 5) -> List[Tuple[str, float]]:
-        v = np.array([vector], dtype="float32")
-        v = v / (np.linalg.norm(v, axis=1, keepdims=True) + 1e-12)
-        D, I = self._index.search(v, top_k)
-        out = []
-        for score, idx in zip(D[0], I):
-            if idx < 0 or idx >= len(self._ids):
-                continue
-            out.append((self._ids[idx], float(score)))
-        return out
+        v = _normalized([vector])
+        # Locked: writers (e.g. the semantic cache) mutate the index and label maps while serving
+        with self._lock:
+            # Over-fetch by the number of unmapped vectors so deleted HNSW entries cannot crowd out hits;
+            # delete() keeps that number bounded by rebuilding the graph
+            D, I = self._index.search(v, top_k + self._dead_vectors)
+            out = []
+            for score, label in zip(D[0], I[0]):
+                _id = self._label_to_id.get(int(label))
+                if label < 0 or _id is None:
+                    continue
+                out.append((_id, float(score)))
+        return out[:top_k]
+
+    @staticmethod
+    def _read_at(f, offset) -> Dict:
+        if offset is None:
+            return {}
+        f.seek(offset)
+        return json.loads(f.readline())
 
     def fetch_by_ids(self, ids: List[str]) -> List[Dict]:
-        # Read meta and text jsonl quickly by scanning — fine for small corpora
-        meta_map = {}
-        with open(self.meta_path, "r", encoding="utf-8") as f:
-            for line in f:
-                obj = json.loads(line)
-                meta_map[obj["id"]] = obj["meta"]
-        text_map = {}
-        with open(self.text_path, "r", encoding="utf-8") as f:
-            for line in f:
-                obj = json.loads(line)
-                text_map[obj["id"]] = obj["text"]
-        results = []
-        for _id in ids:
-            results.append({
-                "id": _id,
-                "meta": meta_map.get(_id, {}),
-                "text": text_map.get(_id, "")
-            })
+        # O(k): seek straight to each record via the in-memory offset index
+        if not ids:
+            return []
+        with self._lock:
+            meta_offs = [self._meta_offsets.get(_id) for _id in ids]
+            text_offs = [self._text_offsets.get(_id) for _id in ids]
+            results = []
+            with open(self.meta_path, "rb") as mf, open(self.text_path, "rb") as tf:
+                for _id, mo, to in zip(ids, meta_offs, text_offs):
+                    results.append({
+                        "id": _id,
+                        "meta": self._read_at(mf, mo).get("meta", {}),
+                        "text": self._read_at(tf, to).get("text", "")
+                    })
         return results
@@ -0,0 +1,251 @@
+# champ/rag/semantic_cache.py
+"""
+Semantic answer cache for non-personal questions (RAG knowledge answers and freehand LLM).
+
+Questions are embedded and looked up in a small FaissStore of previously answered
+questions; a neighbour above SEMANTIC_CACHE_THRESHOLD with the same scope and version
+returns its stored answer, skipping retrieval and generation.
+
+- Scope: only "rag" and "llm" modes, and questions that reference the user's own data
+  (my session/score/progress, ids, dates) are never cached or served.
+- Versioning: every entry records the version it was produced under. RAG answers use
+  the content corpus version (hash of the ingestion manifest), so re-ingesting docs
+  retires old answers; freehand answers use the prompt template version.
+- Eviction: TTL plus a max entry count, least recently used first.
+
+FaissStore is single-writer, so every process gets its own directory under
+SEMANTIC_CACHE_DIR (worker_<pid>); workers never share entries. A new process adopts the
+directory of a process that is no longer running, so the cache survives restarts.
+"""
+import os
+import re
+import json
+import time
+import hashlib
+import threading
+from typing import Dict, List, Optional, Tuple
+
+from champ.rag.faiss_store import FaissStore
+
+SEMANTIC_CACHE_ENABLED = os.environ.get("SEMANTIC_CACHE_ENABLED", "1") == "1"
+SEMANTIC_CACHE_DIR = os.environ.get("SEMANTIC_CACHE_DIR", ".semantic_cache")
+SEMANTIC_CACHE_THRESHOLD = float(os.environ.get("SEMANTIC_CACHE_THRESHOLD", "0.92"))
+SEMANTIC_CACHE_MAX_ENTRIES = int(os.environ.get("SEMANTIC_CACHE_MAX_ENTRIES", "5000"))
+SEMANTIC_CACHE_TTL_S = float(os.environ.get("SEMANTIC_CACHE_TTL_S", str(7 * 86400)))
+# The index file is rewritten every N inserts (metadata rows are appended immediately)
+SEMANTIC_CACHE_SAVE_EVERY = int(os.environ.get("SEMANTIC_CACHE_SAVE_EVERY", "20"))
+CACHEABLE_SCOPES = ("rag", "llm")
+
+_WS = re.compile(r"\s+")
+_PERSONAL = re.compile(
+    r"\b(my|mine|our)\s+(last|latest|recent|previous|current|today'?s|weekly)?\s*"
+    r"(session|sessions|data|score|scores|result|results|posture|gait|balance|steps?|cadence|stride|"
+    r"progress|stats|statistics|history|report|plan|trend|trends|metrics|numbers|readings)\b"
+    r"|\b(how\s+am\s+i|how\s+did\s+i|am\s+i\s+improving|did\s+i)\b"
+    r"|\d"
+)
+
+def normalize_question(question: str) -> str:
+    return _WS.sub(" ", (question or "").strip().lower()).rstrip(" ?!.")
+
+def is_personal(question: str) -> bool:
+    """Questions about the user's own data (or with ids/dates/numbers) must not be shared."""
+    return bool(_PERSONAL.search(normalize_question(question)))
+
+def corpus_version(index_dir: str = None) -> str:
+    """Hash of the RAG ingestion manifest (settings + document hashes); "none" before ingestion."""
+    path = os.path.join(index_dir or os.environ.get("FAISS_INDEX_DIR", ".faiss_index"), "manifest.json")
+    try:
+        mtime = os.path.getmtime(path)
+    except OSError:
+        return "none"
+    cached = _corpus_versions.get(path)
+    if cached and cached[0] == mtime:
+        return cached[1]
+    with open(path, "rb") as f:
+        version = hashlib.sha256(f.read()).hexdigest()[:16]
+    _corpus_versions[path] = (mtime, version)
+    return version
+
+_corpus_versions: Dict[str, Tuple[float, str]] = {}
+
+def _pid_alive(pid: int) -> bool:
+    try:
+        os.kill(pid, 0)
+    except ProcessLookupError:
+        return False
+    except PermissionError:
+        return True
+    return True
+
+def process_dir(root: str) -> str:
+    """This process's cache directory; adopts a dead process's one when there is one."""
+    mine = os.path.join(root, f"worker_{os.getpid()}")
+    if os.path.isdir(mine):
+        return mine
+    os.makedirs(root, exist_ok=True)
+    for name in sorted(os.listdir(root)):
+        pid = name[len("worker_"):]
+        if not name.startswith("worker_") or not pid.isdigit() or _pid_alive(int(pid)):
+            continue
+        try:
+            os.rename(os.path.join(root, name), mine)  # atomic: one process wins
+            return mine
+        except OSError:
+            continue
+    return mine
+
+class SemanticCache:
+    def __init__(self, cache_dir: str, dim: int, threshold: float = None, max_entries: int = None,
+                 ttl_s: float = None):
+        self.store = FaissStore(index_dir=cache_dir, dim=dim, index_type="flat")
+        self.threshold = SEMANTIC_CACHE_THRESHOLD if threshold is None else threshold
+        self.max_entries = max(1, max_entries or SEMANTIC_CACHE_MAX_ENTRIES)
+        self.ttl_s = SEMANTIC_CACHE_TTL_S if ttl_s is None else ttl_s
+        self._lock = threading.Lock()
+        self._unsaved = 0
+        self._stats = {"hits": 0, "misses": 0, "bypassed": 0, "stale": 0, "puts": 0, "evicted": 0}
+        # id -> last use (creation or last hit), for LRU eviction
+        self._last_used: Dict[str, float] = {
+            r["id"]: float(r["meta"].get("created", 0)) for r in self.store.fetch_by_ids(self.store.ids())
+        }
+
+    @staticmethod
+    def entry_id(scope: str, question: str) -> str:
+        return f"{scope}:" + hashlib.sha256(normalize_question(question).encode("utf-8")).hexdigest()[:24]
+
+    def _cacheable(self, scope: str, question: str) -> bool:
+        return scope in CACHEABLE_SCOPES and not is_personal(question)
+
+    def lookup(self, scope: str, question: str, version: str, vector: List[float]) -> Optional[Dict]:
+        """Best matching fresh entry {answer, question, score} or None."""
+        if not self._cacheable(scope, question):
+            with self._lock:
+                self._stats["bypassed"] += 1
+            return None
+        hits = [(i, s) for i, s in self.store.query(vector, top_k=3) if s >= self.threshold]
+        now = time.time()
+        found = None
+        stale = []
+        for row, (_id, score) in zip(self.store.fetch_by_ids([h[0] for h in hits]), hits):
+            meta = row["meta"]
+            if meta.get("scope") != scope:
+                continue
+            if meta.get("version") != version or now - float(meta.get("created", 0)) > self.ttl_s:
+                stale.append(_id)
+                continue
+            found = {"answer": row["text"], "question": meta.get("question"), "score": round(score, 4), "id": _id}
+            break
+        with self._lock:
+            if stale:
+                self._stats["stale"] += len(stale)
+                self._drop(stale)
+            if found:
+                self._stats["hits"] += 1
+                self._last_used[found["id"]] = now
+            else:
+                self._stats["misses"] += 1
+        return found
+
+    def put(self, scope: str, question: str, version: str, vector: List[float], answer: str):
+        if not answer or not self._cacheable(scope, question):
+            return
+        _id = self.entry_id(scope, question)
+        now = time.time()
+        meta = {"scope": scope, "version": version, "question": question.strip(), "created": now}
+        with self._lock:
+            # Under the cache lock so an eviction cannot interleave with the insert
+            self.store.upsert([_id], [vector], [answer], [meta])
+            self._stats["puts"] += 1
+            self._last_used[_id] = now
+            over = len(self._last_used) - self.max_entries
+            if over > 0:
+                # Evict a batch (10%) so we do not evict on every insert once full
+                n = max(over, self.max_entries // 10)
+                victims = sorted(self._last_used, key=self._last_used.get)[:n]
+                self._stats["evicted"] += len(victims)
+                self._drop(victims)
+            self._unsaved += 1
+            if self._unsaved >= SEMANTIC_CACHE_SAVE_EVERY:
+                self.store.save()
+                self._unsaved = 0
+
+    def _drop(self, ids: List[str]):
+        self.store.delete(ids)
+        for _id in ids:
+            self._last_used.pop(_id, None)
+
+    def save(self):
+        with self._lock:
+            self.store.save()
+            self._unsaved = 0
+
+    def stats(self) -> Dict:
+        with self._lock:
+            out = dict(self._stats)
+        lookups = out["hits"] + out["misses"]
+        out.update({
+            "entries": len(self.store),
+            "threshold": self.threshold,
+            "hit_rate": round(out["hits"] / lookups, 4) if lookups else 0.0,
+        })
+        return out
+
+# ---------- process-wide instance ----------
+_cache: Optional[SemanticCache] = None
+_embedder = None
+_cache_pid: Optional[int] = None
+_init_failed = False
+_cache_lock = threading.Lock()
+
+def _get() -> Tuple[Optional[SemanticCache], object]:
+    """Created lazily, and again in a forked worker (each process owns its directory)."""
+    global _cache, _embedder, _init_failed, _cache_pid
+    if not SEMANTIC_CACHE_ENABLED or _init_failed:
+        return None, None
+    with _cache_lock:
+        if (_cache is None or _cache_pid != os.getpid()) and not _init_failed:
+            try:
+                from champ.rag.embeddings import GeminiEmbedder
+                _embedder = GeminiEmbedder()
+                _cache = SemanticCache(process_dir(SEMANTIC_CACHE_DIR), _embedder.dim())
+                _cache_pid = os.getpid()
+            except Exception as e:
+                print(f"[SEMCACHE] disabled: {e}")
+                _init_failed = True
+        return _cache, _embedder
+
+def lookup(scope: str, question: str, version: str) -> Tuple[Optional[Dict], Optional[List[float]]]:
+    """
+    (hit or None, question vector or None). The vector is returned so the caller can reuse
+    it for retrieval and for put(); it is None when the question is not cacheable.
+    Never raises: cache problems degrade to a miss.
+    """
+    cache, embedder = _get()
+    if cache is None or scope not in CACHEABLE_SCOPES:
+        return None, None
+    if is_personal(question):
+        cache.lookup(scope, question, version, [])  # counts the bypass
+        return None, None
+    try:
+        t0 = time.perf_counter()
+        vec = embedder.embed_text(question)
+        hit = cache.lookup(scope, question, version, vec)
+        if hit:
+            print(f"[SEMCACHE] hit scope={scope} score={hit['score']} ms={(time.perf_counter() - t0) * 1000:.1f}")
+        return hit, vec
+    except Exception as e:
+        print(f"[SEMCACHE] lookup failed: {e}")
+        return None, None
+
+def store(scope: str, question: str, version: str, vector: Optional[List[float]], answer: str):
+    cache, _ = _get()
+    if cache is None or vector is None:
+        return
+    try:
+        cache.put(scope, question, version, vector, answer)
+    except Exception as e:
+        print(f"[SEMCACHE] store failed: {e}")
+
+def semantic_cache_stats() -> Dict:
+    return _cache.stats() if _cache is not None and _cache_pid == os.getpid() else {"enabled": SEMANTIC_CACHE_ENABLED and not _init_failed}
@@ -1,6 +1,6 @@
 # champ/rag/service.py
 import os
-from typing import List, Dict
+from typing import List, Dict, Optional
 from champ.rag.embeddings import GeminiEmbedder
 from champ.rag.faiss_store import FaissStore
 
@@ -10,11 +10,13 @@ class RAGService:
         index_dir = os.environ.get("FAISS_INDEX_DIR", ".faiss_index")
         self.store = FaissStore(index_dir=index_dir, dim=self.embedder.dim())
 
-    def search(self, query: str, top_k: int = 5, min_score: float = 0.6) -> List[Dict]:
-        qvec = self.embedder.embed_text(query)
+    def search(self, query: str, top_k: int = 5, min_score: float = 0.6, qvec: Optional[List[float]] = None) -> List[Dict]:
+        # qvec: the query embedding when the caller already has it (e.g. from the semantic cache)
+        if qvec is None:
+            qvec = self.embedder.embed_text(query)
         hits = self.store.query(qvec, top_k=top_k)
         # fetch texts and meta for hits
-        ids = [h for h in hits]
+        ids = [h[0] for h in hits]
         scores = [h[1] for h in hits]
         rows = self.store.fetch_by_ids(ids)
         results = []
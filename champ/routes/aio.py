@@ -0,0 +1,199 @@
+# champ/routes/aio.py
+"""
+Async handlers for the ASGI app (champ/asgi.py): /api/champ/chat and the insights routes.
+
+Same routing, prompts, caches and fallbacks as the Flask views in chat.py and insights.py;
+only the I/O differs: MySQL through champ.db.aio and Gemini through champ.llm.aio. The
+steps that are still synchronous (question embedding for the semantic cache, RAG
+retrieval) run in the default thread pool. Handlers take the parsed JSON body and return
+(payload, status).
+"""
+import json
+import time
+import asyncio
+
+from champ.agents.router import route
+from champ.agents.intent_classifier import refine
+from champ.brand.fast_path import brand_route
+from champ.agents.sql_agent import generate_db_sql_for_intent
+from champ.db.aio import arun_query
+from champ.db.aggregates import aread_user_aggregates
+from champ.db.context import afetch_hybrid_context
+from champ.llm import response_cache
+from champ.llm.aio import asafe_call_llm
+from champ.llm.deadline import deadline_scope, CHAT_SLO_S, INSIGHTS_SLO_S
+from champ.routes import chat, insights
+
+PREFERRED_MODEL = chat.PREFERRED_MODEL
+
+# --------------- LLM calls ---------------
+async def _acomplete(call: dict) -> str:
+    if call.get("cache"):
+        template, user_id, data_block = call["cache"]
+        answer, unavail, _ = await response_cache.acached_llm(template, user_id, call["system"], call["user"],
+                                                              data_block, PREFERRED_MODEL)
+    else:
+        answer, unavail = await asafe_call_llm(call["system"], call["user"], model=PREFERRED_MODEL)
+    if unavail or not answer:
+        return call["fallback"]
+    if call.get("semantic"):
+        await asyncio.to_thread(chat._store_semantic, call, answer)
+    return answer
+
+async def _finish(call) -> str:
+    return call if isinstance(call, str) else await _acomplete(call)
+
+# --------------- DB ---------------
+async def db_data_answer(intent: str, meta: dict, user_id: int) -> str:
+    try:
+        sql, params = generate_db_sql_for_intent(intent, meta, user_id)
+    except Exception as e:
+        return f"Hi! I can fetch your data and analyze it too. Try asking for insights or trends. ({str(e)})"
+    return chat.format_db_answer(intent, await arun_query(sql, params))
+
+# --------------- Hybrid ---------------
+async def _context(intent: str, user_id: int, meta: dict, last_n: int):
+    t0 = time.perf_counter()
+    session_id = int(meta["session_id"]) if meta.get("session_id") is not None else None
+    hc = await afetch_hybrid_context(user_id, last_n=last_n, session_id=session_id)
+    print(f"[HYBRID] intent={intent} context_ms={(time.perf_counter() - t0) * 1000:.1f} async=1")
+    return hc
+
+async def _hybrid_analysis_call(intent: str, meta: dict, user_id: int, question: str):
+    if intent == "open_personal_analysis":
+        ctx = chat._session_context_from(await _context(intent, user_id, meta, last_n=1))
+        if not ctx.get("session"):
+            return "Hi! I couldn’t retrieve the session needed for analysis."
+        context_text = chat._compact_context_text(ctx)
+        return chat._llm_call(chat._analysis_prompt(context_text, mode="session"), question,
+                              "Hi! I fetched your data, but AI analysis is momentarily unavailable. Please try again shortly.",
+                              cache=(chat.ANALYSIS_SESSION_TEMPLATE, user_id, context_text))
+
+    ctx = chat._trends_context_from(await _context(intent, user_id, {}, int(meta.get("last_n", 10))))
+    if not ctx.get("last_avg") and not ctx.get("all_avg"):
+        return "Hi! I couldn’t retrieve enough data to summarize your health."
+    context_text = chat._compact_context_text(ctx)
+    return chat._llm_call(chat._analysis_prompt(context_text, mode="trends"), question,
+                          "Hi! I summarized your data, but AI analysis is momentarily unavailable. Please try again shortly.",
+                          cache=(chat.ANALYSIS_TRENDS_TEMPLATE, user_id, context_text))
+
+async def _plan_answer(intent: str, meta: dict, user_id: int) -> str:
+    ctx = chat._plan_context_from(await _context(intent, user_id, {}, int(meta.get("last_n", 10))), meta)
+    prompt = chat._plan_prompt(ctx)
+    cached, cache_key = response_cache.lookup(chat.PLAN_TEMPLATE, user_id, PREFERRED_MODEL,
+                                              json.dumps(ctx, sort_keys=True, default=str))
+    if cached:
+        return cached
+
+    answer, unavail = await asafe_call_llm(prompt, chat.PLAN_ASK, model=PREFERRED_MODEL)
+    if unavail or not answer:
+        return chat._plan_fallback_json()
+
+    parsed = chat._try_parse_json(answer)
+    if not chat._valid_plan(parsed):
+        fixed, unavail2 = await asafe_call_llm(prompt + "\n\n" + chat.PLAN_FIX_PROMPT, chat.PLAN_FIX_ASK,
+                                               model=PREFERRED_MODEL)
+        parsed = chat._try_parse_json(fixed)
+        if unavail2 or not chat._valid_plan(parsed):
+            return chat._plan_fallback_json()
+
+    plan_json = json.dumps(parsed)
+    response_cache.store(user_id, cache_key, plan_json)
+    return plan_json
+
+async def hybrid_db_llm_answer(intent: str, meta: dict, user_id: int, question: str) -> str:
+    if intent in chat.ANALYSIS_INTENTS:
+        return await _finish(await _hybrid_analysis_call(intent, meta, user_id, question))
+    if intent == "generate_personal_plan":
+        return await _plan_answer(intent, meta, user_id)
+    return "Hi! I’m not sure which analysis to run. Could you try rephrasing?"
+
+# --------------- Route: /api/champ/chat ---------------
+async def chat_handler(data: dict):
+    user_id = data.get("user_id")
+    question = (data.get("question") or "").strip()
+    if not user_id or not question:
+        return {"error": "Missing user_id or question"}, 400
+
+    with deadline_scope(CHAT_SLO_S):
+        decision = brand_route(question) or await asyncio.to_thread(refine, question, route(question))
+        mode, intent, meta = decision["mode"], decision["intent"], decision["meta"]
+        print(f"[ROUTER] mode={mode} intent={intent} meta={meta} async=1")
+
+        if mode == "brand":
+            answer = decision["answer"]
+        elif mode == "llm":
+            answer = await _finish(await asyncio.to_thread(chat._freehand_prepare, question))
+        elif mode == "db":
+            answer = await db_data_answer(intent, meta, int(user_id))
+        elif mode == "hybrid":
+            answer = await hybrid_db_llm_answer(intent, meta, int(user_id), question)
+        elif mode == "rag":
+            answer = await _finish(await asyncio.to_thread(chat._rag_call, question))
+        else:
+            answer = "Hi! I’m not sure I understood that—could you rephrase your question?"
+
+    if mode == "hybrid" and intent == "generate_personal_plan" and isinstance(answer, str):
+        parsed = chat._try_parse_json(answer)
+        if parsed:
+            return {"plan": parsed}, 200
+
+    return {"answer": answer}, 200
+
+# --------------- Routes: /api/insights/* ---------------
+async def _aggregates(user_id: int):
+    stored = await aread_user_aggregates(user_id, order="end_time")
+    if stored is not None:
+        return {k: stored.get(k) for k in insights._AGG_KEYS}
+    rows = await arun_query(insights.AGGREGATES_SQL, [user_id] * 6)
+    return rows[0] if rows else {}
+
+async def insights_start_handler(body: dict):
+    user_id = body.get("user_id")
+    if not user_id:
+        return {"ok": False, "error": "Missing user_id"}, 400
+
+    with deadline_scope(INSIGHTS_SLO_S):
+        # Both reads are independent: run them concurrently on separate pooled connections
+        last10, aggs = await asyncio.gather(
+            arun_query(insights._last_n_sessions_sql(10), [int(user_id)]),
+            _aggregates(int(user_id)),
+        )
+        if not last10:
+            return insights._package_response(insights.START_NO_DATA, {"type": "start", "rows": 0}), 200
+
+        data_block = insights._start_data_block(aggs, last10)
+        answer, unavail, cached = await response_cache.acached_llm(
+            insights.INSIGHTS_START_TEMPLATE, user_id, insights._insights_prompt_start(data_block),
+            insights.START_ASK, data_block, insights.PREFERRED_MODEL)
+    if unavail or not answer:
+        return insights._package_response(insights.START_FALLBACK, {"type": "start", "rows": len(last10)}), 200
+    return insights._package_response(
+        answer, {"type": "start", "rows": len(last10), "aggregates": aggs, "cached": cached}), 200
+
+async def insights_end_handler(body: dict):
+    user_id = body.get("user_id")
+    session_id = body.get("session_id")
+    if not user_id or not session_id:
+        return {"ok": False, "error": "Missing user_id or session_id"}, 400
+
+    with deadline_scope(INSIGHTS_SLO_S):
+        rows = await arun_query(insights.THIS_SESSION_SQL, [int(user_id), int(session_id)])
+        if not rows:
+            return {"ok": False, "error": "Session not found"}, 404
+
+        session_block = insights._stringify_rows(rows[0])
+        answer, unavail, cached = await response_cache.acached_llm(
+            insights.INSIGHTS_END_TEMPLATE, user_id, insights._insights_prompt_end(session_block),
+            insights.END_ASK, session_block, insights.PREFERRED_MODEL)
+    if unavail or not answer:
+        return insights._package_response(insights.END_FALLBACK, {"type": "end", "session_id": session_id}), 200
+    return insights._package_response(answer, {"type": "end", "session_id": session_id, "cached": cached}), 200
+
+# (method, path) -> handler, at the paths the Flask app serves: insights_bp is mounted at
+# /api and its rules already start with /api/insights
+ROUTES = {
+    ("POST", "/api/champ/chat"): chat_handler,
+    ("POST", "/api/api/insights/start"): insights_start_handler,
+    ("POST", "/api/api/insights/end"): insights_end_handler,
+}
@@ -1,19 +1,33 @@
-from flask import Blueprint, request
+from flask import Blueprint, request, Response, stream_with_context
 from champ.agents.router import route
+from champ.agents.intent_classifier import refine
 from champ.agents.sql_agent import generate_db_sql_for_intent
 from champ.db.fetch import run_query
-from champ.llm.provider import safe_call_llm
+from champ.db.context import HybridContext, fetch_hybrid_context
+from champ.llm.provider import safe_call_llm, stream_llm_text, ProviderError
+from champ.llm import response_cache
+from champ.llm.deadline import with_deadline, deadline_scope, CHAT_SLO_S
 from champ.brand.context import BRAND_CONTEXT
+from champ.brand.fast_path import brand_route
+from champ.analytics.pressure_map import pressure_context
 
 # RAG imports
 from champ.rag.service import RAGService
 from champ.rag.prompt import build_cited_context, system_prompt as rag_system_prompt
+from champ.rag import semantic_cache
 
 import json
+import time
 from decimal import Decimal
 
 champ_bp = Blueprint("champ", __name__)
 PREFERRED_MODEL = "gemini-2.0-flash"
+# Response cache template ids: bump the version whenever a prompt's wording changes
+ANALYSIS_SESSION_TEMPLATE = "analysis_session:v2"
+ANALYSIS_TRENDS_TEMPLATE = "analysis_trends:v1"
+PLAN_TEMPLATE = "plan:v1"
+FREEHAND_TEMPLATE = "freehand:v1"
+RAG_TEMPLATE = "rag:v1"
 
 # --------------- Brand/context helpers ---------------
 def _bc():
@@ -41,18 +55,61 @@ def _to_serializable(x):
         pass
     return x
 
+# --------------- LLM calls ---------------
+# Handlers first build an "LLM call" dict {system, user, fallback[, cache]}; /chat completes it
+# in one request, /chat/stream streams it. Handlers that need no LLM return the answer string.
+# cache = (template, user_id, data_block) for answers derived from the user's own data.
+# semantic = (scope, question, version, vector) for shareable answers (semantic cache).
+def _llm_call(system_prompt: str, user_prompt: str, fallback: str, cache: tuple = None,
+              semantic: tuple = None) -> dict:
+    call = {"system": system_prompt, "user": user_prompt, "fallback": fallback}
+    if cache:
+        call["cache"] = cache
+    if semantic:
+        call["semantic"] = semantic
+    return call
+
+def _store_semantic(call: dict, answer: str):
+    if call.get("semantic"):
+        semantic_cache.store(*call["semantic"], answer)
+
+def _complete(call: dict) -> str:
+    if call.get("cache"):
+        template, user_id, data_block = call["cache"]
+        answer, unavail, _ = response_cache.cached_llm(template, user_id, call["system"], call["user"],
+                                                       data_block, PREFERRED_MODEL)
+    else:
+        answer, unavail = safe_call_llm(call["system"], call["user"], model=PREFERRED_MODEL)
+    if unavail or not answer:
+        return call["fallback"]
+    _store_semantic(call, answer)
+    return answer
+
+def _semantic_lookup(scope: str, question: str, version: str):
+    """Cached answer string on a hit, else the semantic tuple to attach to the LLM call."""
+    hit, vec = semantic_cache.lookup(scope, question, version)
+    if hit:
+        return hit["answer"], None
+    return None, ((scope, question, version, vec) if vec is not None else None)
+
 # --------------- LLM freehand ---------------
-def llm_freehand_answer(question: str) -> str:
+def _freehand_call(question: str, semantic: tuple = None) -> dict:
     system_prompt = (
         f"{_bc()}\n"
         "You are Champ, the energetic and caring AI assistant for PhysioChamp. "
         "Greet and acknowledge the user’s question, then answer clearly and helpfully. "
         "Offer practical suggestions when asked; keep the tone friendly and confident."
     )
-    answer, unavail = safe_call_llm(system_prompt, question, model=PREFERRED_MODEL)
-    if unavail or not answer:
-        return "Hi! I’m Champ. I couldn’t reach AI just now—please try again in a moment."
-    return answer
+    return _llm_call(system_prompt, question, "Hi! I’m Champ. I couldn’t reach AI just now—please try again in a moment.",
+                     semantic=semantic)
+
+def _freehand_prepare(question: str):
+    cached, semantic = _semantic_lookup("llm", question, FREEHAND_TEMPLATE)
+    return cached if cached is not None else _freehand_call(question, semantic)
+
+def llm_freehand_answer(question: str) -> str:
+    call = _freehand_prepare(question)
+    return call if isinstance(call, str) else _complete(call)
 
 # --------------- DB helpers/formatters ---------------
 def _format_session_detail(row: dict) -> str:
@@ -92,7 +149,9 @@ def db_data_answer(intent: str, meta: dict, user_id: int) -> str:
     except Exception as e:
         return f"Hi! I can fetch your data and analyze it too. Try asking for insights or trends. ({str(e)})"
 
-    rows = run_query(sql, params)
+    return format_db_answer(intent, run_query(sql, params))
+
+def format_db_answer(intent: str, rows) -> str:
     if not rows:
         return "Hi! I couldn’t find matching records for that request."
 
@@ -110,58 +169,9 @@ def db_data_answer(intent: str, meta: dict, user_id: int) -> str:
     return f"Hi! I fetched {len(rows)} rows."
 
 # --------------- Hybrid DB helpers ---------------
-def _fetch_session(user_id: int, session_id: int = None, latest: bool = False):
-    if session_id is not None:
-        sql = "SELECT * FROM sessions WHERE user_id = %s AND id = %s"
-        params = [user_id, int(session_id)]
-    else:
-        sql = "SELECT * FROM sessions WHERE user_id = %s ORDER BY end_time DESC LIMIT 1"
-        params = [user_id]
-    rows = run_query(sql, params)
-    if isinstance(rows, list) and rows:
-        return rows[0]
-    if isinstance(rows, dict):
-        return rows
-    return None
-
-def _fetch_all_avg(user_id: int):
-    sql = """
-      SELECT
-        AVG(posture_score) AS posture_all,
-        AVG(gait_symmetry) AS gait_all,
-        AVG(balance_score) AS balance_all,
-        AVG(step_count)    AS steps_all
-      FROM sessions
-      WHERE user_id = %s
-    """
-    rows = run_query(sql, [user_id])
-    if isinstance(rows, dict):
-        return rows
-    if isinstance(rows, list) and rows:
-        return rows[0] if isinstance(rows, dict) else {}
-    return {}
-
-def _fetch_last10_avg(user_id: int, last_n: int = 10):
-    sql = f"""
-      SELECT
-        AVG(posture_score) AS posture_last{last_n},
-        AVG(gait_symmetry) AS gait_last{last_n},
-        AVG(balance_score) AS balance_last{last_n},
-        AVG(step_count)    AS steps_last{last_n}
-      FROM (
-        SELECT posture_score, gait_symmetry, balance_score, step_count
-        FROM sessions
-        WHERE user_id = %s
-        ORDER BY end_time DESC
-        LIMIT {last_n}
-      ) t
-    """
-    rows = run_query(sql, [user_id])
-    if isinstance(rows, dict):
-        return rows
-    if isinstance(rows, list) and rows:
-        return rows[0] if isinstance(rows, dict) else {}
-    return {}
+def _fetch_context(user_id: int, meta: dict, last_n: int = 10) -> HybridContext:
+    session_id = int(meta["session_id"]) if meta.get("session_id") is not None else None
+    return fetch_hybrid_context(user_id, last_n=last_n, session_id=session_id)
 
 def _compute_deltas(a: dict, b: dict, keys: list) -> dict:
     deltas = {}
@@ -197,6 +207,10 @@ def _compact_context_text(ctx: dict) -> str:
         for k, v in l.items():
             if v is not None:
                 lines.append(f"  {k}: {_round(v,2)}")
+    if "pressure" in ctx and ctx["pressure"]:
+        lines.append("Pressure distribution and standing sway (this session):")
+        for k, v in ctx["pressure"].items():
+            lines.append(f"  {k}: {_round(v,2)}")
     if "deltas" in ctx and ctx["deltas"]:
         d = ctx["deltas"]
         lines.append("Deltas (A - B as noted):")
@@ -217,27 +231,22 @@ def _analysis_prompt(context_text: str, mode: str) -> str:
     )
     if mode == "session":
         header += "Focus on this single session and its relation to all-time averages if available.\n"
+        header += "If pressure distribution or sway data is given, use it to explain posture and balance.\n"
     else:
         header += "Focus on last-N trends vs all-time averages.\n"
     return f"{header}\nData:\n{context_text}\n"
 
 def _build_session_context(user_id: int, meta: dict) -> dict:
-    if meta.get("session_id") is not None:
-        session = _fetch_session(user_id, session_id=int(meta["session_id"]))
-    else:
-        session = _fetch_session(user_id, latest=True)
-    all_avg = _fetch_all_avg(user_id)
+    # Only the session itself and the all-time averages are needed here
+    return _session_context_from(_fetch_context(user_id, meta, last_n=1))
+
+def _session_context_from(hc: HybridContext) -> dict:
+    session = hc.session
+    all_avg = {k: _round(v, 2) for k, v in hc.all_avg.items() if v is not None}
     if session:
         for k in ["posture_score","gait_symmetry","balance_score","step_count","cadence_spm","stride_time_s","contact_time_s"]:
             if k in session and session[k] is not None:
                 session[k] = _round(session[k], 2)
-    if all_avg:
-        if not isinstance(all_avg, dict):
-            all_avg = {}
-        else:
-            for k in list(all_avg.keys()):
-                if all_avg[k] is not None:
-                    all_avg[k] = _round(all_avg[k], 2)
     deltas = {}
     if session and all_avg:
         mapping = {"posture_score": "posture_all", "gait_symmetry": "gait_all", "balance_score": "balance_all", "step_count": "steps_all"}
@@ -249,22 +258,25 @@ def _build_session_context(user_id: int, meta: dict) -> dict:
             if all_avg.get(ak) is not None:
                 b[sk] = all_avg.get(ak)
         deltas = _compute_deltas(a, b, list(a.keys()))
-    return {"session": session or {}, "all_avg": all_avg or {}, "deltas": deltas or {}}
+    ctx = {"session": session or {}, "all_avg": all_avg or {}, "deltas": deltas or {}}
+    if session:
+        # Precomputed heatmap/COP summary (champ/analytics/pressure_map.py); absent until the batch job ran
+        pressure = pressure_context(session.get("id"))
+        if pressure:
+            ctx["pressure"] = pressure
+    return ctx
 
 def _build_trends_context(user_id: int, meta: dict) -> dict:
-    last_n = int(meta.get("last_n", 10))
-    all_avg = _fetch_all_avg(user_id)
-    last_avg = _fetch_last10_avg(user_id, last_n)
-    if not isinstance(all_avg, dict):
-        all_avg = {}
-    if not isinstance(last_avg, dict):
-        last_avg = {}
+    return _trends_context_from(_fetch_context(user_id, {}, int(meta.get("last_n", 10))))
+
+def _trends_context_from(hc: HybridContext) -> dict:
+    last_n = hc.last_n
+    all_avg = {k: v for k, v in hc.all_avg.items() if v is not None}
     a = {}
     b = {}
-    if last_avg:
-        for k, v in list(last_avg.items()):
-            if v is not None:
-                a[k] = _round(v, 2)
+    for k, v in hc.last_avg.items():
+        if v is not None:
+            a[k] = _round(v, 2)
     if all_avg:
         mapping = {"posture_last10": "posture_all", "gait_last10": "gait_all", "balance_last10": "balance_all", "steps_last10": "steps_all"}
         if str(last_n) != "10":
@@ -276,36 +288,22 @@ def _build_trends_context(user_id: int, meta: dict) -> dict:
     return {"all_avg": all_avg or {}, "last_avg": a or {}, "deltas": deltas or {}}
 
 # --------------- Plan helpers ---------------
-def _fetch_last10_rows(user_id: int, last_n: int = 10):
-    sql = f"""
-      SELECT id, start_time, end_time, status,
-             posture_score, gait_symmetry, balance_score, step_count,
-             stride_time_s, contact_time_s, cadence_spm
-      FROM sessions
-      WHERE user_id = %s
-      ORDER BY end_time DESC
-      LIMIT {last_n}
-    """
-    rows = run_query(sql, [user_id])
-    if isinstance(rows, dict):
-        return [rows]
-    return rows or []
-
 def _build_plan_context(user_id: int, meta: dict) -> dict:
-    last_n = int(meta.get("last_n", 10))
-    goal = (meta.get("goal") or "core strength").strip().lower()
+    return _plan_context_from(_fetch_context(user_id, {}, int(meta.get("last_n", 10))), meta)
 
-    all_avg = _fetch_all_avg(user_id) or {}
-    last_avg = _fetch_last10_avg(user_id, last_n) or {}
-    last_rows = _fetch_last10_rows(user_id, last_n) or []
+def _plan_context_from(hc: HybridContext, meta: dict) -> dict:
+    goal = (meta.get("goal") or "core strength").strip().lower()
+    all_avg = hc.all_avg
+    last_avg = hc.last_avg
+    last_rows = hc.last_rows
 
     all_avg_clean = {}
-    for k, v in (all_avg.items() if isinstance(all_avg, dict) else []):
+    for k, v in all_avg.items():
         if v is not None:
             all_avg_clean[k] = _round(_to_serializable(v), 2)
 
     last_avg_clean = {}
-    for k, v in (last_avg.items() if isinstance(last_avg, dict) else []):
+    for k, v in last_avg.items():
         if v is not None:
             last_avg_clean[k] = _round(_to_serializable(v), 2)
 
@@ -363,6 +361,19 @@ def _plan_prompt(context: dict) -> str:
     spec += f"Counts: recent={context.get('count_recent')}\n"
     return spec
 
+PLAN_ASK = "Return only the JSON object. No extra text."
+PLAN_FIX_ASK = "Return only the corrected JSON. No extra text."
+PLAN_FIX_PROMPT = (
+    "You returned an invalid or empty plan. "
+    "Fix it and return ONLY valid JSON with the required keys: "
+    'summary, weekly_plan (14 entries), safety, progression, measures. '
+    "Ensure weekly_plan has 14 day objects (day 1..14), "
+    'each with focus and at least 1 exercise with name, sets, reps, notes.'
+)
+
+def _valid_plan(parsed) -> bool:
+    return bool(parsed) and isinstance(parsed, dict) and bool(parsed.get("weekly_plan"))
+
 def _try_parse_json(text: str):
     try:
         return json.loads(text)
@@ -394,63 +405,63 @@ def _plan_fallback_json():
     })
 
 # --------------- HYBRID dispatcher ---------------
-def hybrid_db_llm_answer(intent: str, meta: dict, user_id: int, question: str) -> str:
+def _timed_context(builder, intent: str, user_id: int, meta: dict) -> dict:
+    t0 = time.perf_counter()
+    ctx = builder(user_id, meta)
+    print(f"[HYBRID] intent={intent} context_ms={(time.perf_counter() - t0) * 1000:.1f}")
+    return ctx
+
+ANALYSIS_INTENTS = ("open_personal_analysis", "health_summary")
+
+def _hybrid_analysis_call(intent: str, meta: dict, user_id: int, question: str):
+    """LLM call for the analysis intents, or the final answer when the data is missing."""
     if intent == "open_personal_analysis":
-        ctx = _build_session_context(user_id, meta)
+        ctx = _timed_context(_build_session_context, intent, user_id, meta)
         if not ctx.get("session"):
             return "Hi! I couldn’t retrieve the session needed for analysis."
         context_text = _compact_context_text(ctx)
-        system_prompt = _analysis_prompt(context_text, mode="session")
-        answer, unavail = safe_call_llm(system_prompt, question, model=PREFERRED_MODEL)
-        if unavail or not answer:
-            return "Hi! I fetched your data, but AI analysis is momentarily unavailable. Please try again shortly."
-        return answer
+        return _llm_call(_analysis_prompt(context_text, mode="session"), question,
+                         "Hi! I fetched your data, but AI analysis is momentarily unavailable. Please try again shortly.",
+                         cache=(ANALYSIS_SESSION_TEMPLATE, user_id, context_text))
+
+    ctx = _timed_context(_build_trends_context, intent, user_id, meta)
+    if not ctx.get("last_avg") and not ctx.get("all_avg"):
+        return "Hi! I couldn’t retrieve enough data to summarize your health."
+    context_text = _compact_context_text(ctx)
+    return _llm_call(_analysis_prompt(context_text, mode="trends"), question,
+                     "Hi! I summarized your data, but AI analysis is momentarily unavailable. Please try again shortly.",
+                     cache=(ANALYSIS_TRENDS_TEMPLATE, user_id, context_text))
 
-    if intent == "health_summary":
-        ctx = _build_trends_context(user_id, meta)
-        if not ctx.get("last_avg") and not ctx.get("all_avg"):
-            return "Hi! I couldn’t retrieve enough data to summarize your health."
-        context_text = _compact_context_text(ctx)
-        system_prompt = _analysis_prompt(context_text, mode="trends")
-        answer, unavail = safe_call_llm(system_prompt, question, model=PREFERRED_MODEL)
-        if unavail or not answer:
-            return "Hi! I summarized your data, but AI analysis is momentarily unavailable. Please try again shortly."
-        return answer
+def hybrid_db_llm_answer(intent: str, meta: dict, user_id: int, question: str) -> str:
+    if intent in ANALYSIS_INTENTS:
+        call = _hybrid_analysis_call(intent, meta, user_id, question)
+        return call if isinstance(call, str) else _complete(call)
 
     if intent == "generate_personal_plan":
-        ctx = _build_plan_context(user_id, meta)
+        ctx = _timed_context(_build_plan_context, intent, user_id, meta)
         prompt = _plan_prompt(ctx)
+        cached, cache_key = response_cache.lookup(PLAN_TEMPLATE, user_id, PREFERRED_MODEL,
+                                                  json.dumps(ctx, sort_keys=True, default=str))
+        if cached:
+            return cached
 
         # Step 1: ask for JSON
-        answer, unavail = safe_call_llm(
-            prompt,
-            "Return only the JSON object. No extra text.",
-            model=PREFERRED_MODEL
-        )
+        answer, unavail = safe_call_llm(prompt, PLAN_ASK, model=PREFERRED_MODEL)
         if unavail or not answer:
             return _plan_fallback_json()
 
         parsed = _try_parse_json(answer)
 
         # Step 2: fix if invalid or empty
-        if not parsed or not isinstance(parsed, dict) or "weekly_plan" not in parsed or not parsed.get("weekly_plan"):
-            fix_prompt = (
-                "You returned an invalid or empty plan. "
-                "Fix it and return ONLY valid JSON with the required keys: "
-                'summary, weekly_plan (14 entries), safety, progression, measures. '
-                "Ensure weekly_plan has 14 day objects (day 1..14), "
-                'each with focus and at least 1 exercise with name, sets, reps, notes.'
-            )
-            fixed, unavail2 = safe_call_llm(
-                prompt + "\n\n" + fix_prompt,
-                "Return only the corrected JSON. No extra text.",
-                model=PREFERRED_MODEL
-            )
+        if not _valid_plan(parsed):
+            fixed, unavail2 = safe_call_llm(prompt + "\n\n" + PLAN_FIX_PROMPT, PLAN_FIX_ASK, model=PREFERRED_MODEL)
             parsed = _try_parse_json(fixed)
-            if unavail2 or not parsed or not isinstance(parsed, dict) or not parsed.get("weekly_plan"):
+            if unavail2 or not _valid_plan(parsed):
                 return _plan_fallback_json()
 
-        return json.dumps(parsed)
+        plan_json = json.dumps(parsed)
+        response_cache.store(user_id, cache_key, plan_json)
+        return plan_json
 
     return "Hi! I’m not sure which analysis to run. Could you try rephrasing?"
 
@@ -463,23 +474,31 @@ def _get_rag() -> RAGService:
         _rag_service = RAGService()
     return _rag_service
 
-def rag_answer(question: str) -> str:
+def _rag_call(question: str):
+    # Versioned by the ingested corpus: re-ingesting docs retires cached answers
+    version = f"{RAG_TEMPLATE}:{semantic_cache.corpus_version()}"
+    cached, semantic = _semantic_lookup("rag", question, version)
+    if cached is not None:
+        return cached
+
     svc = _get_rag()
-    results = svc.search(question, top_k=5, min_score=0.6)
+    results = svc.search(question, top_k=5, min_score=0.6, qvec=semantic[3] if semantic else None)
     if not results:
         return "I couldn’t find this in our docs. Would you like a general overview?"
 
     context = build_cited_context(results)
     sys = rag_system_prompt(_bc())
     user = f"Question: {question}\n\nContext:\n{context}\n\nRemember: cite facts with [1], ."
+    return _llm_call(sys, user, "I couldn’t reach the knowledge service right now. Please try again shortly.",
+                     semantic=semantic)
 
-    answer, unavail = safe_call_llm(sys, user, model=PREFERRED_MODEL)
-    if unavail or not answer:
-        return "I couldn’t reach the knowledge service right now. Please try again shortly."
-    return answer
+def rag_answer(question: str) -> str:
+    call = _rag_call(question)
+    return call if isinstance(call, str) else _complete(call)
 
 # --------------- Route ---------------
 @champ_bp.route("/chat", methods=["POST"])
+@with_deadline(CHAT_SLO_S)
 def chat():
     data = request.get_json(force=True)
     user_id = data.get("user_id")
@@ -487,11 +506,13 @@ def chat():
     if not user_id or not question:
         return {"error": "Missing user_id or question"}, 400
 
-    decision = route(question)
+    decision = brand_route(question) or refine(question, route(question))
     mode, intent, meta = decision["mode"], decision["intent"], decision["meta"]
     print(f"[ROUTER] mode={mode} intent={intent} meta={meta}")
 
-    if mode == "llm":
+    if mode == "brand":
+        answer = decision["answer"]
+    elif mode == "llm":
         answer = llm_freehand_answer(question)
     elif mode == "db":
         answer = db_data_answer(intent, meta, int(user_id))
@@ -509,3 +530,107 @@ def chat():
             return {"plan": parsed}
 
     return {"answer": answer}
+
+
+# --------------- Streaming route (SSE) ---------------
+def _prepare(mode: str, intent: str, meta: dict, user_id: int, question: str):
+    """
+    Same routing as /chat, stopping short of the LLM request for streamable answers.
+    Returns an LLM call dict, a final answer string, or {"plan": ...}.
+    """
+    if mode == "llm":
+        return _freehand_prepare(question)
+    if mode == "db":
+        return db_data_answer(intent, meta, user_id)
+    if mode == "hybrid":
+        if intent in ANALYSIS_INTENTS:
+            return _hybrid_analysis_call(intent, meta, user_id, question)
+        # Plans are validated/repaired as a whole, so they are sent as one event
+        answer = hybrid_db_llm_answer(intent, meta, user_id, question)
+        parsed = _try_parse_json(answer) if intent == "generate_personal_plan" else None
+        return {"plan": parsed} if parsed else answer
+    if mode == "rag":
+        return _rag_call(question)
+    return "Hi! I’m not sure I understood that—could you rephrase your question?"
+
+def _sse(event: str, data: dict) -> str:
+    return f"event: {event}\ndata: {json.dumps(data, ensure_ascii=False, default=str)}\n\n"
+
+@champ_bp.route("/chat/stream", methods=["POST"])
+def chat_stream():
+    """
+    Server-Sent Events variant of /chat. Events:
+      meta  {mode, intent}            sent immediately after routing
+      token {text}                    answer deltas (a whole non-LLM answer is a single token)
+      plan  {plan}                    generate_personal_plan result
+      error {error}                   the LLM stream broke after partial output
+      done  {ttfb_ms, total_ms, ...}  ttfb_ms = request start to first token/plan event
+    """
+    data = request.get_json(force=True)
+    user_id = data.get("user_id")
+    question = (data.get("question") or "").strip()
+    if not user_id or not question:
+        return {"error": "Missing user_id or question"}, 400
+
+    t0 = time.perf_counter()
+    # The generator runs after this view returns, so the budget is re-opened inside it
+    deadline_at = time.monotonic() + CHAT_SLO_S
+    decision = brand_route(question) or refine(question, route(question))
+    mode, intent, meta = decision["mode"], decision["intent"], decision["meta"]
+    print(f"[ROUTER] mode={mode} intent={intent} meta={meta} stream=1")
+
+    def events():
+        with deadline_scope(at=deadline_at):
+            yield from _events()
+
+    def _events():
+        first = None
+        streamed = False
+        fallback = False
+        yield _sse("meta", {"mode": mode, "intent": intent})
+
+        prepared = decision["answer"] if mode == "brand" else _prepare(mode, intent, meta, int(user_id), question)
+        if isinstance(prepared, dict) and "plan" in prepared:
+            first = time.perf_counter()
+            yield _sse("plan", {"plan": prepared["plan"]})
+        elif isinstance(prepared, dict):
+            cached, cache_key = None, None
+            if prepared.get("cache"):
+                template, uid, data_block = prepared["cache"]
+                cached, cache_key = response_cache.lookup(template, uid, PREFERRED_MODEL, data_block, prepared["user"])
+            parts = []
+            try:
+                if cached is not None:
+                    first = time.perf_counter()
+                    yield _sse("token", {"text": cached})
+                else:
+                    for delta in stream_llm_text(prepared["system"], prepared["user"], model=PREFERRED_MODEL):
+                        if first is None:
+                            first = time.perf_counter()
+                        streamed = True
+                        parts.append(delta)
+                        yield _sse("token", {"text": delta})
+                    if cache_key:
+                        response_cache.store(uid, cache_key, "".join(parts))
+                    _store_semantic(prepared, "".join(parts))
+            except ProviderError as e:
+                print("LLM ProviderError (stream):", e)
+                if streamed:
+                    yield _sse("error", {"error": "The answer was cut off. Please try again."})
+                else:
+                    # Same deterministic fallback text as /chat
+                    fallback = True
+                    first = time.perf_counter()
+                    yield _sse("token", {"text": prepared["fallback"]})
+        else:
+            first = time.perf_counter()
+            yield _sse("token", {"text": prepared})
+
+        end = time.perf_counter()
+        ttfb_ms = round(((first or end) - t0) * 1000, 1)
+        total_ms = round((end - t0) * 1000, 1)
+        print(f"[STREAM] mode={mode} intent={intent} ttfb_ms={ttfb_ms} total_ms={total_ms} llm_fallback={fallback}")
+        yield _sse("done", {"ttfb_ms": ttfb_ms, "total_ms": total_ms, "streamed": streamed, "llm_unavailable": fallback})
+
+    return Response(stream_with_context(events()), mimetype="text/event-stream",
+                    headers={"Cache-Control": "no-cache", "X-Accel-Buffering": "no"})
@@ -0,0 +1,124 @@
+# champ/routes/ingest.py
+import os
+import re
+import json
+import time
+from concurrent.futures import TimeoutError as FutureTimeout
+
+import numpy as np
+from flask import Blueprint, request
+
+from champ.analytics.gait import SENSORS
+from champ.db.ingest import FrameBatch, IngestBusy, SessionNotFound, get_writer
+
+INGEST_MAX_BATCH_FRAMES = int(os.getenv("INGEST_MAX_BATCH_FRAMES", "20000"))
+INGEST_WRITE_TIMEOUT_S = float(os.getenv("INGEST_WRITE_TIMEOUT_S", "10"))
+
+ingest_bp = Blueprint("ingest", __name__)
+
+_BATCH_ID = re.compile(r"^[A-Za-z0-9._:-]{1,64}$")
+
+def parse_frames(lines):
+    """
+    NDJSON frames -> (t float64 (n,), left, right float64 (n, SENSORS)).
+    A frame is {"t": 1752929422.0, "l": [...], "r": [...]} (or timestamp/left_foot/right_foot),
+    or the compact form [t, [...], [...]]. Raises ValueError naming the first bad line.
+    """
+    lines = [ln for ln in (l.strip() for l in lines) if ln]
+    if not lines:
+        raise ValueError("no frames")
+    try:
+        # One parse for the whole batch; only a failure pays for the per-line pass
+        frames = json.loads("[" + ",".join(lines) + "]")
+    except ValueError:
+        for i, ln in enumerate(lines, 1):
+            try:
+                json.loads(ln)
+            except ValueError:
+                raise ValueError(f"line {i}: invalid JSON") from None
+        raise ValueError("invalid JSON")
+
+    try:
+        if all(isinstance(f, list) and len(f) == 3 for f in frames):
+            ts, left, right = zip(*frames)
+        elif all(isinstance(f, dict) for f in frames):
+            ts = [f.get("t", f.get("timestamp")) for f in frames]
+            left = [f.get("l", f.get("left_foot")) for f in frames]
+            right = [f.get("r", f.get("right_foot")) for f in frames]
+        else:
+            raise ValueError("frames must all be objects or all be [t, left, right] arrays")
+        t = np.asarray(ts, dtype=np.float64)
+        left = np.asarray(left, dtype=np.float64)
+        right = np.asarray(right, dtype=np.float64)
+    except (TypeError, ValueError) as e:
+        raise ValueError(f"malformed frame: {e}") from None
+
+    n = len(frames)
+    for name, m in (("left", left), ("right", right)):
+        if m.shape != (n, SENSORS):
+            raise ValueError(f"each frame needs {SENSORS} {name} readings")
+    bad = ~(np.isfinite(t) & np.isfinite(left).all(axis=1) & np.isfinite(right).all(axis=1))
+    if bad.any():
+        raise ValueError(f"line {int(np.argmax(bad)) + 1}: missing or non-finite values")
+    return t, left, right
+
+def _read_lines(stream, limit: int, chunk: int = 1 << 16):
+    """Up to limit + 1 lines from the (possibly chunked) body, so oversized batches stop early."""
+    lines, tail = [], b""
+    while len(lines) <= limit:
+        data = stream.read(chunk)
+        if not data:
+            break
+        parts = (tail + data).split(b"\n")
+        tail = parts.pop()
+        lines.extend(parts)
+    if tail:
+        lines.append(tail)
+    out = []
+    for i, ln in enumerate(lines):
+        try:
+            out.append(ln.decode("utf-8"))
+        except UnicodeDecodeError:
+            raise ValueError(f"line {i + 1}: not valid UTF-8") from None
+    return out
+
+@ingest_bp.route("/frames", methods=["POST"])
+def ingest_frames():
+    """
+    POST /api/ingest/frames?session_id=42&batch_id=<client id>
+    Body: NDJSON, one frame per line (chunked transfer is fine).
+    batch_id is the retry key: re-sending a batch that already committed returns duplicate=true
+    and writes nothing. 429 + Retry-After when the write queue is full; retry with the same batch_id.
+    """
+    session_id = request.args.get("session_id", type=int)
+    batch_id = request.args.get("batch_id", "")
+    if not session_id or not _BATCH_ID.match(batch_id):
+        return {"ok": False, "error": "Missing session_id or batch_id (1-64 chars of A-Z a-z 0-9 . _ : -)"}, 400
+
+    t0 = time.perf_counter()
+    try:
+        lines = _read_lines(request.stream, INGEST_MAX_BATCH_FRAMES)
+        if len(lines) > INGEST_MAX_BATCH_FRAMES:
+            return {"ok": False, "error": f"Batch larger than {INGEST_MAX_BATCH_FRAMES} frames; split it"}, 413
+        t, left, right = parse_frames(lines)
+    except ValueError as e:
+        return {"ok": False, "error": str(e)}, 400
+    parse_ms = (time.perf_counter() - t0) * 1000
+
+    try:
+        fut = get_writer().submit(FrameBatch(session_id, batch_id, t, left, right))
+    except IngestBusy as e:
+        return {"ok": False, "error": str(e)}, 429, {"Retry-After": str(e.retry_after)}
+    try:
+        result = fut.result(timeout=INGEST_WRITE_TIMEOUT_S)
+    except FutureTimeout:
+        # Still queued or writing; the same batch_id is safe to resend
+        return {"ok": False, "error": "Write still pending; retry with the same batch_id"}, 503
+    except SessionNotFound:
+        return {"ok": False, "error": "Session not found"}, 404
+    except Exception as e:
+        return {"ok": False, "error": str(e)}, 500
+
+    return {"ok": True, "session_id": session_id, "batch_id": batch_id, "frames": len(t),
+            "duplicate": result["duplicate"], "parse_ms": round(parse_ms, 2),
+            "total_ms": round((time.perf_counter() - t0) * 1000, 2)}
@@ -2,11 +2,16 @@
 
 from flask import Blueprint, request
 from champ.db.fetch import run_query
-from champ.llm.provider import safe_call_llm
+from champ.db.aggregates import read_user_aggregates
+from champ.llm.response_cache import cached_llm
+from champ.llm.deadline import with_deadline, INSIGHTS_SLO_S
 from champ.brand.context import BRAND_CONTEXT
 
 insights_bp = Blueprint("insights", __name__)
 PREFERRED_MODEL = "gemini-2.0-flash"
+# Response cache template ids: bump the version whenever a prompt's wording changes
+INSIGHTS_START_TEMPLATE = "insights_start:v1"
+INSIGHTS_END_TEMPLATE = "insights_end:v1"
 
 def _bc():
     return (BRAND_CONTEXT or "").strip()
@@ -25,20 +30,19 @@ def _stringify_rows(rows, limit=10):
         lines.append(", ".join(parts))
     return "\n".join(lines)
 
-def _fetch_last_n_sessions(user_id: int, n: int = 10):
-    sql = f"""
+# SQL is shared with the async handlers in routes/aio.py
+def _last_n_sessions_sql(n: int) -> str:
+    return f"""
       SELECT id, start_time, end_time, status,
              posture_score, gait_symmetry, balance_score, step_count,
              stride_time_s, contact_time_s, cadence_spm
       FROM sessions
       WHERE user_id = %s
       ORDER BY end_time DESC
-      LIMIT {n}
+      LIMIT {int(n)}
     """
-    return run_query(sql, [user_id])
 
-def _fetch_this_session(user_id: int, session_id: int):
-    sql = """
+THIS_SESSION_SQL = """
       SELECT id, user_id, start_time, end_time, status,
              posture_score, gait_symmetry, balance_score, step_count,
              stride_time_s, contact_time_s, cadence_spm, swing_stance_ratio
@@ -46,12 +50,22 @@ def _fetch_this_session(user_id: int, session_id: int):
       WHERE user_id = %s AND id = %s
       LIMIT 1
     """
-    rows = run_query(sql, [user_id, session_id])
+
+def _fetch_last_n_sessions(user_id: int, n: int = 10):
+    return run_query(_last_n_sessions_sql(n), [user_id])
+
+def _fetch_this_session(user_id: int, session_id: int):
+    rows = run_query(THIS_SESSION_SQL, [user_id, session_id])
     return rows[0] if rows else None
 
-def _fetch_aggregates(user_id: int):
-    # Simple aggregates: all vs last10
-    sql = """
+_AGG_KEYS = [
+    "total_sessions",
+    "avg_posture_all", "avg_gait_all", "avg_balance_all", "avg_steps_all",
+    "avg_posture_10", "avg_gait_10", "avg_balance_10", "avg_steps_10",
+]
+
+# Simple aggregates: all vs last10
+AGGREGATES_SQL = """
     WITH last10 AS (
       SELECT posture_score, gait_symmetry, balance_score, step_count
       FROM sessions
@@ -70,8 +84,13 @@ def _fetch_aggregates(user_id: int):
       (SELECT AVG(balance_score) FROM last10) AS avg_balance_10,
       (SELECT AVG(step_count) FROM last10) AS avg_steps_10
     """
-    params = [user_id, user_id, user_id, user_id, user_id, user_id]
-    rows = run_query(sql, params)
+
+def _fetch_aggregates(user_id: int):
+    stored = read_user_aggregates(user_id, order="end_time")
+    if stored is not None:
+        return {k: stored.get(k) for k in _AGG_KEYS}
+
+    rows = run_query(AGGREGATES_SQL, [user_id] * 6)
     return rows[0] if rows else {}
 
 def _insights_prompt_start(data_block: str) -> str:
@@ -103,6 +122,15 @@ def _insights_prompt_end(session_block: str) -> str:
         f"{session_block}\n"
     )
 
+def _start_data_block(aggs, last10) -> str:
+    return "Aggregates:\n" + _stringify_rows(aggs) + "\n\nRecent sessions:\n" + _stringify_rows(last10)
+
+START_ASK = "Generate start-of-session insights."
+END_ASK = "Generate end-of-session insights."
+START_NO_DATA = "No recent sessions found. Try a gentle warm-up and maintain comfortable pacing."
+START_FALLBACK = "Insights temporarily unavailable. Consider gentle warm-up, posture checks, and even pacing."
+END_FALLBACK = "Insights temporarily unavailable. For next time: keep a steady cadence, check posture alignment, and hydrate."
+
 def _package_response(text: str, used: dict):
     # Simple JSON suited for Flutter
     return {
@@ -112,6 +140,7 @@ def _package_response(text: str, used: dict):
     }
 
 @insights_bp.route("/api/insights/start", methods=["POST"])
+@with_deadline(INSIGHTS_SLO_S)
 def insights_start():
     """
     Input JSON: { "user_id": 123 }
@@ -125,26 +154,22 @@ def insights_start():
     last10 = _fetch_last_n_sessions(int(user_id), 10)
     aggs = _fetch_aggregates(int(user_id))
 
-    data_block = "Aggregates:\n" + _stringify_rows(aggs) + "\n\nRecent sessions:\n" + _stringify_rows(last10)
+    data_block = _start_data_block(aggs, last10)
     system_prompt = _insights_prompt_start(data_block)
 
     # Safety: If no sessions, short response without LLM
     if not last10:
-        return _package_response(
-            "No recent sessions found. Try a gentle warm-up and maintain comfortable pacing.",
-            {"type": "start", "rows": 0}
-        )
+        return _package_response(START_NO_DATA, {"type": "start", "rows": 0})
 
-    answer, unavail = safe_call_llm(system_prompt, "Generate start-of-session insights.", model=PREFERRED_MODEL)
+    answer, unavail, cached = cached_llm(INSIGHTS_START_TEMPLATE, user_id, system_prompt,
+                                         START_ASK, data_block, PREFERRED_MODEL)
     if unavail or not answer:
-        return _package_response(
-            "Insights temporarily unavailable. Consider gentle warm-up, posture checks, and even pacing.",
-            {"type": "start", "rows": len(last10)}
-        )
+        return _package_response(START_FALLBACK, {"type": "start", "rows": len(last10)})
 
-    return _package_response(answer, {"type": "start", "rows": len(last10), "aggregates": aggs})
+    return _package_response(answer, {"type": "start", "rows": len(last10), "aggregates": aggs, "cached": cached})
 
 @insights_bp.route("/api/insights/end", methods=["POST"])
+@with_deadline(INSIGHTS_SLO_S)
 def insights_end():
     """
     Input JSON: { "user_id": 123, "session_id": 456 }
@@ -163,11 +188,9 @@ def insights_end():
     session_block = _stringify_rows(session_row)
     system_prompt = _insights_prompt_end(session_block)
 
-    answer, unavail = safe_call_llm(system_prompt, "Generate end-of-session insights.", model=PREFERRED_MODEL)
+    answer, unavail, cached = cached_llm(INSIGHTS_END_TEMPLATE, user_id, system_prompt,
+                                         END_ASK, session_block, PREFERRED_MODEL)
     if unavail or not answer:
-        return _package_response(
-            "Insights temporarily unavailable. For next time: keep a steady cadence, check posture alignment, and hydrate.",
-            {"type": "end", "session_id": session_id}
-        )
+        return _package_response(END_FALLBACK, {"type": "end", "session_id": session_id})
 
-    return _package_response(answer, {"type": "end", "session_id": session_id})
+    return _package_response(answer, {"type": "end", "session_id": session_id, "cached": cached})
@@ -1,6 +1,26 @@
 # champ/routes/metrics.py
+import os
+import time
 from flask import Blueprint, request
 from champ.db.fetch import run_query
+from champ.db.connection import pool_stats
+from champ.db.aggregates import read_user_aggregates, apply_session
+from champ.rag.embed_cache import embed_cache_stats
+from champ.llm.session import http_stats
+from champ.llm.provider import coalescing_stats, budget_stats
+from champ.llm.admission import admission_stats
+from champ.llm.response_cache import invalidate_user, response_cache_stats
+from champ.rag.semantic_cache import semantic_cache_stats
+from champ.db.aio import async_pool_stats
+from champ.db.ingest import ingest_stats
+from champ.agents.intent_classifier import classifier_stats
+from champ.analytics.pyramid import session_pyramid, pyramid_stats
+from champ.analytics.pressure_map import session_pressure, pressure_map_stats
+from champ.brand.fast_path import brand_fast_path_stats
+try:
+    from champ.llm.aio import aio_stats  # needs httpx, which only the ASGI mode installs
+except ImportError:
+    aio_stats = None
 
 metrics_bp = Blueprint("metrics", __name__)
 
@@ -73,6 +93,10 @@ def overview_aggregates():
     if not user_id:
         return {"error": "Missing user_id"}, 400
 
+    aggs = read_user_aggregates(int(user_id), include_counts=True)
+    if aggs is not None:
+        return {"aggregates": aggs}
+
     sql = """
     WITH last10 AS (
       SELECT id, start_time, end_time, posture_score, gait_symmetry, balance_score, step_count
@@ -142,3 +166,93 @@ def overview_aggregates():
     """
     rows = run_query(sql, [user_id, user_id])
     return {"aggregates": rows[0] if rows else {}}
+
+@metrics_bp.route("/session_completed", methods=["POST"])
+def session_completed():
+    """
+    Called by the session writer once a session is finalized.
+    Input JSON: { "session_id": 456 }
+    """
+    body = request.get_json(force=True)
+    session_id = body.get("session_id")
+    if not session_id:
+        return {"ok": False, "error": "Missing session_id"}, 400
+    try:
+        result = apply_session(int(session_id))
+    except Exception as e:
+        return {"ok": False, "error": str(e)}, 500
+    if result.get("reason") == "session_not_found":
+        return {"ok": False, "error": "Session not found"}, 404
+    # Cached insights/analyses for this user were generated from older data
+    invalidated = invalidate_user(result["user_id"]) if result.get("user_id") is not None else 0
+    return {"ok": True, **result, "llm_cache_invalidated": invalidated}
+
+@metrics_bp.route("/pressure_series", methods=["GET"])
+def pressure_series():
+    """
+    Min/max downsampled pressure for charting a session window.
+    Query: session_id, start/end (seconds from the session's first frame, optional),
+    width (buckets, default 800), channels (comma-separated, default "left,right").
+    """
+    session_id = request.args.get("session_id", type=int)
+    if not session_id:
+        return {"error": "Missing session_id"}, 400
+    start = request.args.get("start", type=float)
+    end = request.args.get("end", type=float)
+    width = request.args.get("width", default=800, type=int)
+    channels = [c for c in request.args.get("channels", "left,right").split(",") if c]
+
+    t0 = time.perf_counter()
+    try:
+        pyr = session_pyramid(session_id)
+        if pyr is None:
+            return {"error": "No sensor data for this session"}, 404
+        series = pyr.query(start, end, width, channels)
+    except ValueError as e:
+        return {"error": str(e)}, 400
+    return {"session_id": session_id, "frames": len(pyr), "width": width, **series,
+            "ms": round((time.perf_counter() - t0) * 1000, 2)}
+
+@metrics_bp.route("/pressure_map", methods=["GET"])
+def pressure_map():
+    """
+    Pressure heatmaps (per-sensor mean/peak/share per foot), COP trajectories and sway stats.
+    Query: session_id, points (trajectory samples, default 500).
+    """
+    session_id = request.args.get("session_id", type=int)
+    if not session_id:
+        return {"error": "Missing session_id"}, 400
+    points = request.args.get("points", default=500, type=int)
+
+    t0 = time.perf_counter()
+    try:
+        pm = session_pressure(session_id)
+    except ValueError as e:
+        return {"error": str(e)}, 400
+    if pm is None:
+        return {"error": "No sensor data for this session"}, 404
+    return {"session_id": session_id, "frames": pm.header["frames"], "sensors": pm.header["sensors"],
+            "layout_mm": pm.header["layout_mm"], "summary": pm.summary, "heatmap": pm.heatmap(),
+            "cop": pm.trajectory(points), "ms": round((time.perf_counter() - t0) * 1000, 2)}
+
+@metrics_bp.route("/runtime", methods=["GET"])
+def runtime_stats():
+    # Process-local counters, useful for sizing pools against the worker count
+    return {
+        "pid": os.getpid(),
+        "db_pool": pool_stats(),
+        "embed_cache": embed_cache_stats(),
+        "llm_http": http_stats(),
+        "llm_coalescing": coalescing_stats(),
+        "llm_admission": admission_stats(),
+        "llm_budget": budget_stats(),
+        "llm_cache": response_cache_stats(),
+        "semantic_cache": semantic_cache_stats(),
+        "intent_classifier": classifier_stats(),
+        "brand_fast_path": brand_fast_path_stats(),
+        "db_aio_pool": async_pool_stats(),
+        "ingest": ingest_stats(),
+        "pyramids": pyramid_stats(),
+        "pressure_maps": pressure_map_stats(),
+        "llm_aio": aio_stats() if aio_stats else {"enabled": False},
+    }
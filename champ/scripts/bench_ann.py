@@ -0,0 +1,97 @@
+# scripts/bench_ann.py
+"""
+Recall@k vs query latency for the FaissStore index types, measured against exact
+(flat) search on the same corpus.
+
+  python -m champ.scripts.bench_ann --n 100000 --dim 768
+  python -m champ.scripts.bench_ann --index-dir .faiss_index   # real chunk vectors
+
+Synthetic corpora are clustered (like chunk embeddings of a few hundred docs), since
+uniform random vectors make every ANN index look worse than it is in practice.
+"""
+import argparse
+import json
+import os
+import time
+import numpy as np
+import faiss
+from champ.rag.faiss_store import build_index, FAISS_NLIST
+
+def _synthetic(n: int, dim: int, rng) -> np.ndarray:
+    centers = rng.standard_normal((max(8, n // 200), dim)).astype("float32")
+    x = centers[rng.integers(0, len(centers), n)] + 0.35 * rng.standard_normal((n, dim)).astype("float32")
+    return x
+
+def _from_store(index_dir: str) -> np.ndarray:
+    index = faiss.read_index(os.path.join(index_dir, "index.faiss"))
+    inner = faiss.downcast_index(index.index) if isinstance(index, (faiss.IndexIDMap, faiss.IndexIDMap2)) else index
+    return inner.reconstruct_n(0, inner.ntotal)
+
+def _normalize(x: np.ndarray) -> np.ndarray:
+    return (x / (np.linalg.norm(x, axis=1, keepdims=True) + 1e-12)).astype("float32")
+
+def _search_ms(index, queries: np.ndarray, k: int):
+    t0 = time.perf_counter()
+    _, I = index.search(queries, k)
+    return I, (time.perf_counter() - t0) * 1000 / len(queries)
+
+def _recall(found: np.ndarray, truth: np.ndarray) -> float:
+    hits = sum(len(set(f) & set(t)) for f, t in zip(found, truth))
+    return hits / truth.size
+
+def main():
+    ap = argparse.ArgumentParser()
+    ap.add_argument("--n", type=int, default=100_000)
+    ap.add_argument("--dim", type=int, default=768)
+    ap.add_argument("--index-dir", default=None, help="benchmark the vectors of an existing store instead")
+    ap.add_argument("--types", default="ivf_flat,ivf_pq,hnsw")
+    ap.add_argument("--top-k", type=int, default=5)
+    ap.add_argument("--queries", type=int, default=200)
+    ap.add_argument("--nprobe", default="1,4,16,64")
+    ap.add_argument("--ef-search", default="16,64,256")
+    args = ap.parse_args()
+
+    rng = np.random.default_rng(0)
+    xb = _from_store(args.index_dir) if args.index_dir else _synthetic(args.n, args.dim, rng)
+    xb = _normalize(xb)
+    n, dim = xb.shape
+    # Queries are perturbed corpus vectors, the way a question lands near its answer chunk
+    picks = rng.integers(0, n, args.queries)
+    xq = _normalize(xb[picks] + 0.1 * rng.standard_normal((args.queries, dim)).astype("float32"))
+
+    flat = build_index("flat", dim)
+    flat.add(xb)
+    truth, flat_ms = _search_ms(flat, xq, args.top_k)
+    report = [{"index": "flat", "param": None, "recall": 1.0, "query_ms": round(flat_ms, 3)}]
+
+    for index_type in [t.strip() for t in args.types.split(",") if t.strip()]:
+        index = build_index(index_type, dim, n_train=n)
+        t0 = time.perf_counter()
+        if not index.is_trained:
+            index.train(xb[rng.permutation(n)[: max(39 * min(FAISS_NLIST, n), 10_000)]])
+        index.add(xb)
+        build_s = time.perf_counter() - t0
+        inner = faiss.downcast_index(index)
+        if isinstance(inner, faiss.IndexHNSW):
+            sweep = [("ef_search", int(v)) for v in args.ef_search.split(",")]
+        else:
+            sweep = [("nprobe", int(v)) for v in args.nprobe.split(",")]
+        for name, value in sweep:
+            if name == "nprobe":
+                inner.nprobe = min(value, inner.nlist)
+            else:
+                inner.hnsw.efSearch = value
+            found, ms = _search_ms(inner, xq, args.top_k)
+            report.append({
+                "index": index_type,
+                "param": f"{name}={value}",
+                "recall": round(_recall(found, truth), 4),
+                "query_ms": round(ms, 3),
+                "speedup": round(flat_ms / ms, 1) if ms > 0 else None,
+                "build_s": round(build_s, 2),
+            })
+
+    print(json.dumps({"n": n, "dim": dim, "top_k": args.top_k, "results": report}, indent=2))
+
+if __name__ == "__main__":
+    main()
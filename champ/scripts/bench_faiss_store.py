@@ -0,0 +1,87 @@
+# scripts/bench_faiss_store.py
+"""
+RAG retrieval latency (query + fetch_by_ids) at different corpus sizes,
+comparing the offset index with the old full jsonl scan.
+
+  python -m champ.scripts.bench_faiss_store --sizes 1000,100000,1000000 --dim 32
+"""
+import argparse
+import json
+import shutil
+import tempfile
+import time
+import numpy as np
+from champ.rag.faiss_store import FaissStore
+
+def _full_scan_fetch(store: FaissStore, ids):
+    # Previous fetch_by_ids behaviour: parse both files on every call
+    meta_map, text_map = {}, {}
+    with open(store.meta_path, "r", encoding="utf-8") as f:
+        for line in f:
+            obj = json.loads(line)
+            meta_map[obj["id"]] = obj["meta"]
+    with open(store.text_path, "r", encoding="utf-8") as f:
+        for line in f:
+            obj = json.loads(line)
+            text_map[obj["id"]] = obj["text"]
+    return [{"id": i, "meta": meta_map.get(i, {}), "text": text_map.get(i, "")} for i in ids]
+
+def _build(index_dir: str, n: int, dim: int, rng) -> FaissStore:
+    store = FaissStore(index_dir=index_dir, dim=dim)
+    batch = 50_000
+    for start in range(0, n, batch):
+        m = min(batch, n - start)
+        ids = [f"doc{(start + i) // 20}.md#chunk={(start + i) % 20}" for i in range(m)]
+        vecs = rng.standard_normal((m, dim)).astype("float32")
+        texts = [f"chunk text {start + i} " * 20 for i in range(m)]
+        metas = [{"doc_id": f"doc{(start + i) // 20}.md", "title": "Bench", "chunk_index": (start + i) % 20} for i in range(m)]
+        store.upsert(ids, vecs, texts, metas)
+    store.save()
+    return store
+
+def _time_ms(fn, repeats: int) -> float:
+    samples = []
+    for _ in range(repeats):
+        t0 = time.perf_counter()
+        fn()
+        samples.append((time.perf_counter() - t0) * 1000)
+    return float(np.median(samples))
+
+def main():
+    ap = argparse.ArgumentParser()
+    ap.add_argument("--sizes", default="1000,100000,1000000")
+    ap.add_argument("--dim", type=int, default=32)
+    ap.add_argument("--top-k", type=int, default=5)
+    ap.add_argument("--queries", type=int, default=20)
+    ap.add_argument("--scan-queries", type=int, default=3, help="repeats for the slow full-scan baseline")
+    args = ap.parse_args()
+
+    rng = np.random.default_rng(0)
+    report = []
+    for n in [int(x) for x in args.sizes.split(",")]:
+        tmp = tempfile.mkdtemp(prefix="faiss_bench_")
+        try:
+            t0 = time.perf_counter()
+            _build(tmp, n, args.dim, rng)
+            build_s = time.perf_counter() - t0
+
+            t0 = time.perf_counter()
+            store = FaissStore(index_dir=tmp, dim=args.dim)  # cold load builds the offset index
+            load_s = time.perf_counter() - t0
+
+            q = rng.standard_normal(args.dim).astype("float32")
+            ids = [h[0] for h in store.query(q, top_k=args.top_k)]
+            report.append({
+                "chunks": n,
+                "build_s": round(build_s, 2),
+                "load_s": round(load_s, 2),
+                "search_ms": round(_time_ms(lambda: store.query(q, top_k=args.top_k), args.queries), 3),
+                "fetch_indexed_ms": round(_time_ms(lambda: store.fetch_by_ids(ids), args.queries), 3),
+                "fetch_full_scan_ms": round(_time_ms(lambda: _full_scan_fetch(store, ids), args.scan_queries), 3),
+            })
+            print(json.dumps(report[-1]))
+        finally:
+            shutil.rmtree(tmp, ignore_errors=True)
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,77 @@
+# scripts/bench_frame_store.py
+"""
+Storage size and decode speed of binary frame files against the JSON rows of sensor_data.
+
+  python -m champ.scripts.bench_frame_store                 # 1 h synthetic walk at 100 Hz
+  python -m champ.scripts.bench_frame_store --seconds 600 --keep /tmp/frames
+
+Readings are rounded to 2 decimals, as in sensor_data. JSON size counts the left/right
+text plus an 8-byte timestamp per row; JSON decode is gait.frames_from_rows (one
+json.loads per column). "raw_open" is the memory map alone; "raw_scan" also reads every
+value once (the per-foot load sums).
+"""
+import argparse
+import json
+import os
+import shutil
+import tempfile
+import time
+
+import numpy as np
+
+from champ.analytics.frame_store import open_frames, write_frames
+from champ.analytics.gait import SessionFrames, frames_from_rows
+from champ.scripts.bench_gait import synthetic_walk
+
+def _best(fn, repeat):
+    best, out = float("inf"), None
+    for _ in range(repeat):
+        t0 = time.perf_counter()
+        out = fn()
+        best = min(best, time.perf_counter() - t0)
+    return best, out
+
+def main():
+    ap = argparse.ArgumentParser()
+    ap.add_argument("--seconds", type=float, default=3600)
+    ap.add_argument("--repeat", type=int, default=3)
+    ap.add_argument("--keep", default=None, help="write the files here instead of a temp dir")
+    args = ap.parse_args()
+
+    synth, _ = synthetic_walk(args.seconds, hz=100)
+    frames = SessionFrames(synth.t, synth.left.astype(float).round(2).astype(np.float32),
+                           synth.right.astype(float).round(2).astype(np.float32))
+    n = len(frames)
+    rows = [(t, json.dumps(l), json.dumps(r)) for t, l, r in
+            zip(frames.t.tolist(), frames.left.astype(float).round(2).tolist(), frames.right.astype(float).round(2).tolist())]
+    json_bytes = sum(len(l) + len(r) + 8 for _, l, r in rows)
+    report = {"frames": n, "json": {"bytes": json_bytes, "bytes_per_frame": round(json_bytes / n, 1)}}
+    s, _ = _best(lambda: frames_from_rows(rows), args.repeat)
+    report["json"].update({"decode_s": round(s, 4), "frames_per_sec": round(n / s)})
+
+    root = args.keep or tempfile.mkdtemp(prefix="frames_")
+    try:
+        for encoding in ("raw", "packed"):
+            path = os.path.join(root, f"bench_{encoding}.chf")
+            s_write, header = _best(lambda: write_frames(path, frames, encoding=encoding), 1)
+            size = os.path.getsize(path)
+            entry = {"codec": header["codec"], "bytes": size, "bytes_per_frame": round(size / n, 1),
+                     "vs_json": round(json_bytes / size, 1), "write_s": round(s_write, 4)}
+            s_open, _ = _best(lambda: open_frames(path), args.repeat)
+            s_scan, _ = _best(lambda: (lambda f: (f.left.sum(axis=1), f.right.sum(axis=1)))(open_frames(path)),
+                              args.repeat)
+            if encoding == "raw":
+                entry.update({"raw_open_s": round(s_open, 6), "raw_scan_s": round(s_scan, 4),
+                              "frames_per_sec": round(n / s_scan)})
+            else:
+                err = float(np.abs(open_frames(path).left - frames.left).max())
+                entry.update({"decode_s": round(s_open, 4), "frames_per_sec": round(n / s_open),
+                              "max_abs_error": round(err, 6)})
+            report[encoding] = entry
+    finally:
+        if not args.keep:
+            shutil.rmtree(root, ignore_errors=True)
+    print(json.dumps(report, indent=2))
+
+if __name__ == "__main__":
+    main()
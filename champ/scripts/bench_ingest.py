@@ -0,0 +1,88 @@
+# scripts/bench_ingest.py
+"""
+Ingestion throughput in frames/sec, stage by stage.
+
+  python -m champ.scripts.bench_ingest                            # parse+validate, row encoding, queue, HTTP (no DB)
+  python -m champ.scripts.bench_ingest --db --session-id 42       # also real multi-row INSERTs
+
+Frames come from the synthetic walk in scripts/bench_gait.py (100 Hz, both feet), sent
+as NDJSON batches of --batch frames. Without --db the writer's flush is a no-op, so the
+HTTP number is the request path (read, parse, validate, queue, ack) on its own.
+"""
+import argparse
+import json
+import time
+import uuid
+
+from flask import Flask
+
+from champ.db.ingest import BatchWriter, FrameBatch, ensure_schema, write_batches
+from champ.routes import ingest as ingest_routes
+from champ.scripts.bench_gait import synthetic_walk
+
+def ndjson_batches(frames, batch: int):
+    lines = [json.dumps({"t": t, "l": l, "r": r}) for t, l, r in
+             zip(frames.t.tolist(), frames.left.astype(float).round(2).tolist(), frames.right.astype(float).round(2).tolist())]
+    return ["\n".join(lines[i:i + batch]) + "\n" for i in range(0, len(lines), batch)]
+
+def _rate(n, seconds):
+    return round(n / seconds) if seconds else None
+
+def main():
+    ap = argparse.ArgumentParser()
+    ap.add_argument("--seconds", type=float, default=600, help="synthetic session length (100 Hz)")
+    ap.add_argument("--batch", type=int, default=2000, help="frames per request")
+    ap.add_argument("--db", action="store_true", help="write to MySQL (needs --session-id)")
+    ap.add_argument("--session-id", type=int, default=None)
+    args = ap.parse_args()
+
+    frames, _ = synthetic_walk(args.seconds, hz=100)
+    bodies = ndjson_batches(frames, args.batch)
+    n = len(frames)
+    out = {"frames": n, "batch_frames": args.batch, "ndjson_bytes": sum(len(b) for b in bodies)}
+
+    t0 = time.perf_counter()
+    parsed = [ingest_routes.parse_frames(b.splitlines()) for b in bodies]
+    out["parse_validate_fps"] = _rate(n, time.perf_counter() - t0)
+
+    t0 = time.perf_counter()
+    for p in parsed:
+        FrameBatch(1, "b", *p).rows()
+    out["insert_rows_fps"] = _rate(n, time.perf_counter() - t0)
+
+    writer = BatchWriter(flush=lambda batches: [False] * len(batches))
+    t0 = time.perf_counter()
+    futures = [writer.submit(FrameBatch(1, uuid.uuid4().hex, *p)) for p in parsed]
+    for f in futures:
+        f.result()
+    out["queue_fps"] = _rate(n, time.perf_counter() - t0)
+
+    ingest_routes.get_writer = lambda: writer
+    app = Flask(__name__)
+    app.register_blueprint(ingest_routes.ingest_bp, url_prefix="/api/ingest")
+    client = app.test_client()
+    t0 = time.perf_counter()
+    for body in bodies:
+        resp = client.post(f"/api/ingest/frames?session_id=1&batch_id={uuid.uuid4().hex}", data=body,
+                           content_type="application/x-ndjson")
+        assert resp.status_code == 200, resp.get_json()
+    out["http_fps"] = _rate(n, time.perf_counter() - t0)
+
+    if args.db:
+        if not args.session_id:
+            raise SystemExit("--db needs --session-id of an existing session")
+        ensure_schema()
+        batches = [FrameBatch(args.session_id, uuid.uuid4().hex, *p) for p in parsed]
+        t0 = time.perf_counter()
+        for b in batches:
+            write_batches([b])
+        out["db_insert_fps"] = _rate(n, time.perf_counter() - t0)
+        t0 = time.perf_counter()
+        dups = write_batches(batches)
+        out["db_retry_all_duplicates"] = all(dups)
+        out["db_retry_s"] = round(time.perf_counter() - t0, 3)
+
+    print(json.dumps(out, indent=2))
+
+if __name__ == "__main__":
+    main()
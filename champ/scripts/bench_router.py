@@ -0,0 +1,94 @@
+# scripts/bench_router.py
+"""
+Routing cost per question, over the golden corpus used by tests/test_router_golden.py.
+
+  python -m champ.scripts.bench_router
+  python -m champ.scripts.bench_router --record   # rewrite the golden file (only for intended rule changes)
+
+The corpus is generated deterministically from the router's trigger phrases, numeric
+forms and filler text, alone and in random combinations, so rule interactions and
+priorities are covered, not just single keywords.
+"""
+import argparse
+import json
+import os
+import random
+import time
+
+from champ.agents.router import route
+
+GOLDEN_PATH = os.path.join(os.path.dirname(__file__), "..", "tests", "data", "router_golden.jsonl")
+
+PHRASES = [
+    # session ids and latest
+    "session 12", "session id 7", "session id: 42", "session #5", "session:9", "session12", "sessions 3",
+    "session id abc", "get my session 8", "show session 15", "give me data of session 4", "data of session 21",
+    "session 5x", "mysession 3", "last session", "previous session", "most recent session", "recent session",
+    "my last session", "the last session", "previous one", "last  session", "previous sessions",
+    # listings
+    "list sessions", "show sessions", "sessions list", "session list", "show my sessions", "display sessions",
+    "view sessions", "last 10 sessions", "last 5 sessions", "last 1 session", "last 03 sessions", "last 7 sessionsx",
+    "last five sessions",
+    # health
+    "describe my health", "health overview", "health summary", "overall health", "summarize my health",
+    "summarise my health", "health status", "my health summary", "health report", "health analysis", "describe",
+    # plans and goals
+    "exercise plan", "personalized exercise plan", "personalised exercise plan", "create my exercise plan",
+    "workout plan", "training plan", "plan for core", "plan for balance", "plan for posture", "plan for gait",
+    "core", "balance", "posture", "gait",
+    # knowledge / help
+    "what is", "how to", "how do i", "benefits of", "exercises for", "tips for", "explain cadence", "stride time",
+    "wear insoles", "care for insoles", "help", "guide", "instructions", "steps to", "best way to", "why does",
+    "how can i use", "how to use", "what is physiochamp", "who are you", "explain",
+    # analysis
+    "insight", "insights", "analyze", "analyse", "analysis", "interpret", "comment", "opinion", "recommendation",
+    "recommendations", "tips", "advice", "coach", "trend", "trends", "compare", "comparison", "improvement",
+    "improvements", "my session", "my sessions", "my data", "from my",
+    # filler
+    "hello", "thanks", "walking", "today", "last", "recent", "previous", "sessions", "session", "data", "steps",
+    "cadence", "my feet hurt", "insoles", "pressure", "123", "id",
+]
+PREFIXES = ["", "hey champ, ", "please ", "can you ", "  ", "PLEASE "]
+SUFFIXES = ["", "?", " please", ".", " now!"]
+
+def corpus(seed: int = 7, combos: int = 3000):
+    rng = random.Random(seed)
+    out = []
+    for p in PHRASES:
+        for pre in PREFIXES[:3]:
+            out.append(f"{pre}{p}")
+        out.append(p.upper())
+    for _ in range(combos):
+        words = rng.sample(PHRASES, rng.choice([2, 2, 3, 4]))
+        joiner = rng.choice([" ", " and ", ", ", " of my ", " "])
+        out.append(rng.choice(PREFIXES) + joiner.join(words) + rng.choice(SUFFIXES))
+    out += ["", "   ", "?", "session", "last 0 sessions", "session id 0012", "SESSION ID 99 and session 3",
+            "session 3 and session id 99", "last 2 sessions and last 4 sessions"]
+    seen = set()
+    return [q for q in out if not (q in seen or seen.add(q))]
+
+def record(path: str = GOLDEN_PATH):
+    with open(path, "w", encoding="utf-8") as f:
+        for q in corpus():
+            f.write(json.dumps({"q": q, "decision": route(q)}, ensure_ascii=False) + "\n")
+
+def main():
+    ap = argparse.ArgumentParser()
+    ap.add_argument("--record", action="store_true")
+    ap.add_argument("--repeat", type=int, default=20)
+    args = ap.parse_args()
+    if args.record:
+        record()
+    questions = corpus()
+    for q in questions[:200]:
+        route(q)  # warm-up
+    t0 = time.perf_counter()
+    for _ in range(args.repeat):
+        for q in questions:
+            route(q)
+    elapsed = time.perf_counter() - t0
+    n = args.repeat * len(questions)
+    print(json.dumps({"questions": len(questions), "routes": n, "us_per_question": round(elapsed / n * 1e6, 2)}))
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,47 @@
+# scripts/build_pyramids.py
+"""
+Precompute min/max chart pyramids (champ/analytics/pyramid.py) so /api/metrics/pressure_series
+never builds one inside a request.
+
+  python -m champ.scripts.build_pyramids --session-id 42
+  python -m champ.scripts.build_pyramids --all --skip-existing
+"""
+import argparse
+import json
+import os
+import time
+
+from champ.analytics.frame_store import file_is_current
+from champ.analytics.gait import source_state
+from champ.analytics.pyramid import build_session_pyramid, pyramid_path
+from champ.db.fetch import run_query
+
+def main():
+    ap = argparse.ArgumentParser(description="Build pressure chart pyramids")
+    ap.add_argument("--session-id", type=int, help="only this session")
+    ap.add_argument("--all", action="store_true", help="every session with frames")
+    ap.add_argument("--skip-existing", action="store_true", help="skip pyramids that still match sensor_data")
+    args = ap.parse_args()
+    if args.session_id is None and not args.all:
+        ap.error("give --session-id or --all")
+
+    if args.session_id is not None:
+        sessions = [args.session_id]
+    else:
+        sessions = [r["session_id"] for r in run_query(
+            "SELECT DISTINCT session_id FROM sensor_data ORDER BY session_id", [])]
+
+    t0 = time.perf_counter()
+    out = []
+    for sid in sessions:
+        path = pyramid_path(sid)
+        if args.skip_existing and os.path.exists(path) and file_is_current(path, source_state(sid)):
+            continue
+        info = build_session_pyramid(sid)
+        if info is None:
+            continue  # no frames yet
+        out.append({"session_id": sid, "frames": info["frames"], "levels": info["levels"], "bytes": info["bytes"]})
+    print(json.dumps({"built": out, "seconds": round(time.perf_counter() - t0, 2)}, indent=2))
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,31 @@
+# scripts/compute_gait.py
+"""
+Recompute a session's gait summary columns from its sensor_data frames.
+
+  python -m champ.scripts.compute_gait --session-id 42            # print metrics, no writes
+  python -m champ.scripts.compute_gait --session-id 42 --write    # also update the sessions row
+"""
+import argparse
+import json
+import time
+
+from champ.analytics.gait import load_session_frames, compute_metrics, write_session_metrics
+
+def main():
+    ap = argparse.ArgumentParser(description="Compute gait metrics from sensor_data")
+    ap.add_argument("--session-id", type=int, required=True)
+    ap.add_argument("--write", action="store_true", help="store the summary columns on the sessions row")
+    args = ap.parse_args()
+
+    t0 = time.perf_counter()
+    frames = load_session_frames(args.session_id)
+    t1 = time.perf_counter()
+    metrics = compute_metrics(frames)
+    t2 = time.perf_counter()
+    out = {"session_id": args.session_id, "load_s": round(t1 - t0, 3), "compute_s": round(t2 - t1, 4), "metrics": metrics}
+    if args.write:
+        out["rows_updated"] = write_session_metrics(args.session_id, metrics)
+    print(json.dumps(out, indent=2))
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,48 @@
+# scripts/compute_pressure_maps.py
+"""
+Precompute pressure heatmaps, COP trajectories and sway stats (champ/analytics/pressure_map.py)
+for /api/metrics/pressure_map and the session analysis prompt.
+
+  python -m champ.scripts.compute_pressure_maps --session-id 42
+  python -m champ.scripts.compute_pressure_maps --all --skip-existing
+"""
+import argparse
+import json
+import os
+import time
+
+from champ.analytics.frame_store import file_is_current
+from champ.analytics.gait import source_state
+from champ.analytics.pressure_map import build_session_pressure, pressure_path
+from champ.db.fetch import run_query
+
+def main():
+    ap = argparse.ArgumentParser(description="Compute pressure heatmaps and COP trajectories")
+    ap.add_argument("--session-id", type=int, help="only this session")
+    ap.add_argument("--all", action="store_true", help="every session with frames")
+    ap.add_argument("--skip-existing", action="store_true", help="skip maps that still match sensor_data")
+    args = ap.parse_args()
+    if args.session_id is None and not args.all:
+        ap.error("give --session-id or --all")
+
+    if args.session_id is not None:
+        sessions = [args.session_id]
+    else:
+        sessions = [r["session_id"] for r in run_query(
+            "SELECT DISTINCT session_id FROM sensor_data ORDER BY session_id", [])]
+
+    t0 = time.perf_counter()
+    out = []
+    for sid in sessions:
+        path = pressure_path(sid)
+        if args.skip_existing and os.path.exists(path) and file_is_current(path, source_state(sid)):
+            continue
+        info = build_session_pressure(sid)
+        if info is None:
+            continue  # no frames yet
+        out.append({"session_id": sid, "frames": info["frames"], "bytes": info["bytes"],
+                    "sway": info["summary"]["sway"]})
+    print(json.dumps({"computed": out, "seconds": round(time.perf_counter() - t0, 2)}, indent=2))
+
+if __name__ == "__main__":
+    main()
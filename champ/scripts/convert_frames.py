@@ -0,0 +1,49 @@
+# scripts/convert_frames.py
+"""
+Convert sessions' JSON frames (sensor_data) into binary frame files (champ/analytics/frame_store.py).
+
+  python -m champ.scripts.convert_frames --session-id 42                 # raw (memory-mappable)
+  python -m champ.scripts.convert_frames --all --encoding packed         # every session, compressed
+  FRAME_STORE_DIR=/data/frames python -m champ.scripts.convert_frames --all --skip-existing
+
+The JSON rows are left in place. --all only converts finished sessions (end_time set); analytics
+reads a file only while it matches sensor_data, so converting a live session just wastes work.
+"""
+import argparse
+import json
+import os
+import time
+
+from champ.analytics.frame_store import convert_session, file_is_current, session_path
+from champ.analytics.gait import source_state
+from champ.db.fetch import run_query
+
+def main():
+    ap = argparse.ArgumentParser(description="Convert sensor_data JSON frames to binary frame files")
+    ap.add_argument("--session-id", type=int, help="only this session")
+    ap.add_argument("--all", action="store_true", help="every finished session with frames")
+    ap.add_argument("--encoding", choices=["raw", "packed"], default="raw")
+    ap.add_argument("--skip-existing", action="store_true", help="skip files that still match sensor_data")
+    args = ap.parse_args()
+    if args.session_id is None and not args.all:
+        ap.error("give --session-id or --all")
+
+    if args.session_id is not None:
+        sessions = [args.session_id]
+    else:
+        sessions = [r["session_id"] for r in run_query(
+            "SELECT DISTINCT d.session_id FROM sensor_data d JOIN sessions s ON s.id = d.session_id "
+            "WHERE s.end_time IS NOT NULL ORDER BY d.session_id", [])]
+
+    t0 = time.perf_counter()
+    out = []
+    for sid in sessions:
+        path = session_path(sid)
+        if args.skip_existing and os.path.exists(path) and file_is_current(path, source_state(sid)):
+            continue
+        info = convert_session(sid, encoding=args.encoding)
+        out.append({"session_id": sid, "frames": info["frames"], "bytes": info["bytes"], "path": info["path"]})
+    print(json.dumps({"converted": out, "seconds": round(time.perf_counter() - t0, 2)}, indent=2))
+
+if __name__ == "__main__":
+    main()
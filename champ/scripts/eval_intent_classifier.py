@@ -0,0 +1,79 @@
+# scripts/eval_intent_classifier.py
+"""
+Accuracy and latency of the router with and without the embedding intent classifier,
+on the labelled set in champ/data/intent_eval.jsonl ({q, mode, intent} per line).
+
+  GEMINI_API_KEY=... python -m champ.scripts.eval_intent_classifier
+  python -m champ.scripts.eval_intent_classifier --threshold 0.7 --margin 0.03
+
+Reported per run: keyword-router accuracy, two-stage accuracy, how many fallbacks were
+promoted and how many of those were right, per-intent recall, and the classification
+latency (after the query embedding) in microseconds.
+"""
+import argparse
+import json
+import os
+import time
+from collections import Counter
+
+from champ.agents.router import route, make_decision
+from champ.agents.intent_classifier import IntentClassifier
+
+EVAL_PATH = os.path.join(os.path.dirname(__file__), "..", "data", "intent_eval.jsonl")
+
+def load_eval(path: str = EVAL_PATH):
+    with open(path, "r", encoding="utf-8") as f:
+        return [json.loads(line) for line in f if line.strip()]
+
+def evaluate(classifier: IntentClassifier, rows, vectors) -> dict:
+    router_ok = two_stage_ok = promoted = promoted_ok = 0
+    per_intent = Counter()
+    per_intent_ok = Counter()
+    latencies = []
+    for row, vec in zip(rows, vectors):
+        decision = route(row["q"])
+        router_ok += decision["intent"] == row["intent"]
+        if decision["mode"] == "llm" and decision["intent"] == "general":
+            t0 = time.perf_counter()
+            match = classifier.classify(vec)
+            latencies.append((time.perf_counter() - t0) * 1e6)
+            if match and match["intent"] != "general":
+                decision = make_decision(match["mode"], match["intent"], row["q"])
+                promoted += 1
+                promoted_ok += decision["intent"] == row["intent"]
+        per_intent[row["intent"]] += 1
+        if decision["intent"] == row["intent"]:
+            two_stage_ok += 1
+            per_intent_ok[row["intent"]] += 1
+    latencies.sort()
+    n = len(rows)
+    return {
+        "questions": n,
+        "router_accuracy": round(router_ok / n, 4),
+        "two_stage_accuracy": round(two_stage_ok / n, 4),
+        "promoted": promoted,
+        "promotion_precision": round(promoted_ok / promoted, 4) if promoted else None,
+        "recall_by_intent": {k: round(per_intent_ok[k] / v, 4) for k, v in sorted(per_intent.items())},
+        "classify_us_p50": round(latencies[len(latencies) // 2], 1) if latencies else None,
+        "classify_us_p99": round(latencies[min(len(latencies) - 1, int(0.99 * len(latencies)))], 1) if latencies else None,
+    }
+
+def main():
+    ap = argparse.ArgumentParser()
+    ap.add_argument("--eval", default=EVAL_PATH)
+    ap.add_argument("--exemplars", default=None)
+    ap.add_argument("--threshold", type=float, default=None)
+    ap.add_argument("--margin", type=float, default=None)
+    args = ap.parse_args()
+
+    from champ.rag.embeddings import GeminiEmbedder
+    embedder = GeminiEmbedder()
+    classifier = IntentClassifier.from_exemplars(embedder, args.exemplars, threshold=args.threshold, margin=args.margin)
+    rows = load_eval(args.eval)
+    vectors = embedder.embed_texts([r["q"] for r in rows])
+    report = evaluate(classifier, rows, vectors)
+    report.update({"threshold": classifier.threshold, "margin": classifier.margin, "exemplars": len(classifier.matrix)})
+    print(json.dumps(report, indent=2))
+
+if __name__ == "__main__":
+    main()
@@ -2,19 +2,53 @@
 import os
 import glob
 import json
+import time
+import hashlib
 from typing import List, Dict
 from champ.rag.chunker import load_markdown_file, chunk_text
 from champ.rag.embeddings import GeminiEmbedder
-from champ.rag.faiss_store import FaissStore
+from champ.rag.faiss_store import FaissStore, FAISS_INDEX_TYPE
+
+MANIFEST_NAME = "manifest.json"
+
+def _sha(text: str) -> str:
+    return hashlib.sha256(text.encode("utf-8")).hexdigest()
 
 def collect_docs(content_dir: str) -> List[Dict]:
     files = sorted(glob.glob(os.path.join(content_dir, "*.md")))
     docs = []
     for fp in files:
         title, text = load_markdown_file(fp)
-        docs.append({"id": os.path.basename(fp), "title": title, "path": fp, "text": text})
+        docs.append({"id": os.path.basename(fp), "title": title, "path": fp, "text": text, "hash": _sha(text)})
     return docs
 
+def load_manifest(index_dir: str) -> Dict:
+    path = os.path.join(index_dir, MANIFEST_NAME)
+    if not os.path.exists(path):
+        return {}
+    with open(path, "r", encoding="utf-8") as f:
+        return json.load(f)
+
+def save_manifest(index_dir: str, manifest: Dict):
+    path = os.path.join(index_dir, MANIFEST_NAME)
+    with open(path + ".tmp", "w", encoding="utf-8") as f:
+        json.dump(manifest, f, ensure_ascii=False, indent=2)
+    os.replace(path + ".tmp", path)
+
+def doc_chunks(doc: Dict, chunk_size: int, chunk_overlap: int) -> List[Dict]:
+    # Chunk ids are content-addressed, so unchanged chunks keep their id when a doc is edited
+    out = []
+    seen = set()
+    for i, ch in enumerate(chunk_text(doc["text"], chunk_size=chunk_size, overlap=chunk_overlap)):
+        h = _sha(ch)[:16]
+        cid = f"{doc['id']}#{h}"
+        if cid in seen:
+            continue
+        seen.add(cid)
+        meta = {"doc_id": doc["id"], "title": doc["title"], "path": doc["path"], "chunk_index": i, "chunk_hash": h}
+        out.append({"id": cid, "text": ch, "meta": meta})
+    return out
+
 def main():
     content_dir = os.environ.get("CONTENT_DIR", "content")
     index_dir = os.environ.get("FAISS_INDEX_DIR", ".faiss_index")
@@ -28,33 +62,82 @@ def main():
     embedder = GeminiEmbedder()
     store = FaissStore(index_dir=index_dir, dim=embedder.dim())
 
-    all_vectors = []
-    all_texts = []
-    all_meta = []
-    all_ids = []
-
     chunk_size = int(os.environ.get("CHUNK_SIZE_TOKENS", "10"))
     chunk_overlap = int(os.environ.get("CHUNK_OVERLAP_TOKENS", "5"))
+    settings = {"model": embedder.model, "chunk_size": chunk_size, "chunk_overlap": chunk_overlap,
+                "index_type": FAISS_INDEX_TYPE}
+
+    manifest = load_manifest(index_dir)
+    removed_ids: List[str] = []
+    if manifest.get("settings") != settings:
+        # First incremental run, or chunking/model/index type changed: nothing in the store can be trusted
+        store.reset(FAISS_INDEX_TYPE)
+        manifest = {"settings": settings, "docs": {}}
+    known = manifest["docs"]
 
+    on_disk = {d["id"] for d in docs}
+    for doc_id in [k for k in known if k not in on_disk]:
+        removed_ids.extend(known.pop(doc_id).get("chunks", []))
+
+    stale = set(removed_ids)  # ids that must be (re-)embedded even if present
+    pending: List[Dict] = []
+    unchanged_docs = 0
     for d in docs:
-        chunks = chunk_text(d["text"], chunk_size=chunk_size, overlap=chunk_overlap)
-        for i, ch in enumerate(chunks):
-            cid = f"{d['id']}#chunk={i}"
-            meta = {"doc_id": d["id"], "title": d["title"], "path": d["path"], "chunk_index": i}
-            all_ids.append(cid)
-            all_texts.append(ch)
-            all_meta.append(meta)
-
-    # Batch embed for efficiency
-    vectors = embedder.embed_texts(all_texts)
-    all_vectors.extend(vectors)
-
-    store.upsert(all_ids, all_vectors, all_texts, all_meta)
+        prev = known.get(d["id"])
+        if prev and prev.get("hash") == d["hash"]:
+            unchanged_docs += 1
+            continue
+        chunks = doc_chunks(d, chunk_size, chunk_overlap)
+        new_ids = {c["id"] for c in chunks}
+        removed_ids.extend(c for c in (prev or {}).get("chunks", []) if c not in new_ids)
+        todo = [c for c in chunks if c["id"] not in store or c["id"] in stale]
+        pending.extend(todo)
+        # hash is only recorded once every chunk is embedded; see below
+        known[d["id"]] = {"hash": None, "chunks": [c["id"] for c in chunks], "title": d["title"]}
+
+    if not pending and not removed_ids:
+        print(json.dumps({"indexed_docs": len(docs), "unchanged_docs": unchanged_docs, "embedded_chunks": 0,
+                          "removed_chunks": 0, "index_dir": index_dir}, indent=2))
+        if any(v.get("hash") is None for v in known.values()):
+            for d in docs:
+                known[d["id"]]["hash"] = d["hash"]
+            save_manifest(index_dir, manifest)
+        return
+
+    # Batched, concurrent embedding; failed batches are reported, not fatal
+    t0 = time.perf_counter()
+    vectors, failed = embedder.embed_texts_partial([c["text"] for c in pending])
+    embed_s = time.perf_counter() - t0
+
+    removed = store.delete(removed_ids)
+    failed_set = set(failed)
+    keep = [i for i in range(len(pending)) if i not in failed_set]
+    if keep and not store.is_trained:
+        # IVF indexes are trained once, on the full first batch rather than the first upsert
+        store.train([vectors[i] for i in keep])
+    if keep:
+        store.upsert([pending[i]["id"] for i in keep], [vectors[i] for i in keep],
+                     [pending[i]["text"] for i in keep], [pending[i]["meta"] for i in keep])
     store.save()
 
+    failed_docs = {pending[i]["meta"]["doc_id"] for i in failed}
+    for d in docs:
+        if d["id"] not in failed_docs:
+            known[d["id"]]["hash"] = d["hash"]
+    save_manifest(index_dir, manifest)
+
     print(json.dumps({
         "indexed_docs": len(docs),
-        "chunks": len(all_ids),
+        "unchanged_docs": unchanged_docs,
+        "embedded_chunks": len(keep),
+        "removed_chunks": removed,
+        "failed_chunks": len(failed),
+        "total_chunks": len(store),
+        "embed_seconds": round(embed_s, 2),
+        "chunks_per_sec": round(len(keep) / embed_s, 1) if embed_s > 0 else None,
+        "batch_size": embedder.batch_size,
+        "concurrency": embedder.concurrency,
+        "index_type": store.index_type,
         "index_dir": index_dir
     }, indent=2))
 
@@ -0,0 +1,88 @@
+# scripts/load_test.py
+"""
+Concurrent-request capacity of the chat endpoint: threaded Flask vs the ASGI mode.
+
+Start the stub Gemini server and both servers with the same settings, then point the
+load test at each. Every request asks a distinct freehand question, so neither the
+semantic cache nor coalescing can absorb the load:
+
+  python -m champ.scripts.stub_embed_server --port 8089 --latency-ms 800
+  export LLM_API_BASE=http://127.0.0.1:8089 GEMINI_API_KEY=stub SEMANTIC_CACHE_ENABLED=0 LLM_MAX_CONCURRENCY=1000
+  gunicorn -w 1 --threads 32 -b 127.0.0.1:8081 'champ.app:create_app()'     # threaded baseline
+  uvicorn champ.asgi:app --port 8082                                        # async mode
+
+  python -m champ.scripts.load_test --target threaded=http://127.0.0.1:8081 \\
+      --target asgi=http://127.0.0.1:8082 --concurrency 16,64,256
+
+Per target and concurrency level it reports throughput, p50/p95 latency and errors.
+Capacity shows as the level at which throughput stops growing and latency climbs.
+"""
+import argparse
+import json
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+import requests
+
+_local = threading.local()
+
+def _session() -> requests.Session:
+    s = getattr(_local, "session", None)
+    if s is None:
+        s = _local.session = requests.Session()
+        s.mount("http://", requests.adapters.HTTPAdapter(pool_maxsize=4))
+    return s
+
+def _one(url: str, i: int, timeout: float):
+    body = {"user_id": 1, "question": f"hello champ, give me a quick warm-up tip (request {i})"}
+    t0 = time.perf_counter()
+    try:
+        resp = _session().post(url, json=body, timeout=timeout)
+        ok = resp.status_code == 200 and "answer" in resp.json()
+    except (requests.RequestException, ValueError):
+        ok = False
+    return ok, (time.perf_counter() - t0) * 1000
+
+def _pct(sorted_ms, p: float) -> float:
+    if not sorted_ms:
+        return 0.0
+    return round(sorted_ms[min(len(sorted_ms) - 1, int(p * len(sorted_ms)))], 1)
+
+def run_level(base_url: str, concurrency: int, requests_per_worker: int, timeout: float) -> dict:
+    url = base_url.rstrip("/") + "/api/champ/chat"
+    total = concurrency * requests_per_worker
+    t0 = time.perf_counter()
+    with ThreadPoolExecutor(max_workers=concurrency) as pool:
+        results = list(pool.map(lambda i: _one(url, i, timeout), range(total)))
+    wall = time.perf_counter() - t0
+    ok_ms = sorted(ms for ok, ms in results if ok)
+    return {
+        "concurrency": concurrency,
+        "requests": total,
+        "errors": total - len(ok_ms),
+        "throughput_rps": round(len(ok_ms) / wall, 1),
+        "p50_ms": _pct(ok_ms, 0.50),
+        "p95_ms": _pct(ok_ms, 0.95),
+        "wall_s": round(wall, 2),
+    }
+
+def main():
+    ap = argparse.ArgumentParser()
+    ap.add_argument("--target", action="append", required=True, help="name=base_url, repeatable")
+    ap.add_argument("--concurrency", default="16,64,256")
+    ap.add_argument("--requests-per-worker", type=int, default=4)
+    ap.add_argument("--timeout", type=float, default=30.0)
+    args = ap.parse_args()
+
+    levels = [int(c) for c in args.concurrency.split(",") if c.strip()]
+    report = {}
+    for target in args.target:
+        name, _, base_url = target.partition("=")
+        # Warm up connections and lazily built singletons before measuring
+        run_level(base_url, 4, 1, args.timeout)
+        report[name] = [run_level(base_url, c, args.requests_per_worker, args.timeout) for c in levels]
+    print(json.dumps(report, indent=2))
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,42 @@
+# scripts/rebuild_aggregates.py
+"""
+Backfill / rebuild the per-user aggregate store and check it against the raw sessions table.
+
+  python -m champ.scripts.rebuild_aggregates                 # create tables, rebuild every user
+  python -m champ.scripts.rebuild_aggregates --user-id 1     # rebuild one user
+  python -m champ.scripts.rebuild_aggregates --check         # report drift only, no writes
+"""
+import argparse
+import json
+import time
+from champ.db.aggregates import ensure_schema, rebuild_all, rebuild_user, check_user
+from champ.db.fetch import run_query
+
+def main():
+    ap = argparse.ArgumentParser(description="Rebuild or check user_session_aggregates")
+    ap.add_argument("--user-id", type=int, help="only this user")
+    ap.add_argument("--check", action="store_true", help="compare stored aggregates with raw AVGs; no writes")
+    args = ap.parse_args()
+
+    if args.check:
+        if args.user_id is not None:
+            users = [args.user_id]
+        else:
+            users = [r["user_id"] for r in run_query("SELECT DISTINCT user_id FROM sessions ORDER BY user_id", [])]
+        problems = []
+        for uid in users:
+            problems.extend(check_user(uid))
+        print(json.dumps({"users_checked": len(users), "mismatches": problems}, indent=2, default=str))
+        raise SystemExit(1 if problems else 0)
+
+    t0 = time.perf_counter()
+    ensure_schema()
+    if args.user_id is not None:
+        rebuild_user(args.user_id)
+        n = 1
+    else:
+        n = rebuild_all()
+    print(json.dumps({"users_rebuilt": n, "seconds": round(time.perf_counter() - t0, 2)}, indent=2))
+
+if __name__ == "__main__":
+    main()
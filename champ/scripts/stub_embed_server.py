@@ -0,0 +1,75 @@
+# scripts/stub_embed_server.py
+"""
+Local stand-in for the Gemini embedding API (and generateContent), for ingestion throughput,
+load and failure testing.
+
+  python -m champ.scripts.stub_embed_server --port 8089 --latency-ms 80 --fail-rate 0.1
+  GEMINI_API_ENDPOINT=http://localhost:8089 GEMINI_API_KEY=stub python -m champ.scripts.ingest_docs
+  LLM_API_BASE=http://localhost:8089 GEMINI_API_KEY=stub uvicorn champ.asgi:app
+"""
+import argparse
+import hashlib
+import json
+import random
+import time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+DIM = 768
+
+def _vector(text: str):
+    # Deterministic pseudo-embedding so repeated runs give identical indexes
+    seed = int.from_bytes(hashlib.sha256(text.encode("utf-8")).digest()[:8], "big")
+    rng = random.Random(seed)
+    return [rng.uniform(-1.0, 1.0) for _ in range(DIM)]
+
+def _text_of(req: dict) -> str:
+    parts = (req.get("content") or {}).get("parts") or []
+    return "".join(p.get("text", "") for p in parts)
+
+def _generated(req: dict) -> str:
+    contents = req.get("contents") or []
+    text = _text_of(contents[0]) if contents else ""
+    return f"Stub answer ({hashlib.sha256(text.encode('utf-8')).hexdigest()[:8]}): keep a steady pace and good posture."
+
+def make_handler(latency_s: float, fail_rate: float):
+    class Handler(BaseHTTPRequestHandler):
+        def log_message(self, fmt, *args):
+            pass
+
+        def _send(self, status: int, obj: dict):
+            body = json.dumps(obj).encode("utf-8")
+            self.send_response(status)
+            self.send_header("Content-Type", "application/json")
+            self.send_header("Content-Length", str(len(body)))
+            self.end_headers()
+            self.wfile.write(body)
+
+        def do_POST(self):
+            length = int(self.headers.get("Content-Length") or 0)
+            payload = json.loads(self.rfile.read(length) or b"{}")
+            time.sleep(latency_s)
+            if fail_rate and random.random() < fail_rate:
+                return self._send(503, {"error": {"code": 503, "message": "stub: simulated overload", "status": "UNAVAILABLE"}})
+            if self.path.split("?")[0].endswith(":batchEmbedContents"):
+                reqs = payload.get("requests") or []
+                return self._send(200, {"embeddings": [{"values": _vector(_text_of(r))} for r in reqs]})
+            if self.path.split("?")[0].endswith(":embedContent"):
+                return self._send(200, {"embedding": {"values": _vector(_text_of(payload))}})
+            if self.path.split("?")[0].endswith(":generateContent"):
+                return self._send(200, {"candidates": [{"content": {"role": "model", "parts": [{"text": _generated(payload)}]}}]})
+            return self._send(404, {"error": {"code": 404, "message": f"stub: unknown path {self.path}"}})
+
+    return Handler
+
+def main():
+    ap = argparse.ArgumentParser()
+    ap.add_argument("--port", type=int, default=8089)
+    ap.add_argument("--latency-ms", type=float, default=50.0)
+    ap.add_argument("--fail-rate", type=float, default=0.0)
+    args = ap.parse_args()
+    server = ThreadingHTTPServer(("127.0.0.1", args.port), make_handler(args.latency_ms / 1000.0, args.fail_rate))
+    print(f"Stub Gemini server on http://127.0.0.1:{args.port}")
+    server.serve_forever()
+
+if __name__ == "__main__":
+    main()
@@ -18,6 +18,38 @@ const api = {
     return res.json();
   },
 
+  // Streams /api/champ/chat/stream (SSE over fetch); onEvent(name, data) per event
+  chatStream: async (userId, question, onEvent) => {
+    const res = await fetch("/api/champ/chat/stream", {
+      method: "POST",
+      headers: { "Content-Type": "application/json", "Accept": "text/event-stream" },
+      body: JSON.stringify({ user_id: String(userId || "1"), question })
+    });
+    if (!res.ok || !res.body) {
+      const err = await res.json().catch(() => ({}));
+      throw Object.assign(new Error("Request failed"), { details: err });
+    }
+    const reader = res.body.getReader();
+    const decoder = new TextDecoder();
+    let buf = "";
+    for (;;) {
+      const { value, done } = await reader.read();
+      if (done) break;
+      buf += decoder.decode(value, { stream: true });
+      let idx;
+      while ((idx = buf.indexOf("\n\n")) >= 0) {
+        const frame = buf.slice(0, idx);
+        buf = buf.slice(idx + 2);
+        let name = "message", data = "";
+        frame.split("\n").forEach((line) => {
+          if (line.startsWith("event:")) name = line.slice(6).trim();
+          else if (line.startsWith("data:")) data += line.slice(5).trim();
+        });
+        if (data) onEvent(name, JSON.parse(data));
+      }
+    }
+  },
+
   // UPDATED: fetch aggregates directly from metrics endpoint (decoupled from chat)
   overview: async (userId) => {
     const res = await fetch(`/api/metrics/overview_aggregates?user_id=${encodeURIComponent(userId)}`);
@@ -109,6 +141,15 @@ function addMessage(role, text) {
     box.appendChild(wrap);
     box.scrollTop = box.scrollHeight;
   }
+  return bubble;
+}
+
+// Re-render an assistant bubble while its answer streams in
+function updateMessage(bubble, text) {
+  if (!bubble) return;
+  bubble.innerHTML = renderMinimalMarkdownToHTML(formatAssistantText(text ?? ""));
+  const box = document.getElementById("messages");
+  if (box) box.scrollTop = box.scrollHeight;
 }
 
 
@@ -179,6 +220,29 @@ async function sendMessage() {
   if (!q) return;
   addMessage("user", q);
   if (input) input.value = "";
+  let bubble = null;
+  let text = "";
+  try {
+    await api.chatStream(userId, q, (name, data) => {
+      if (name === "token") {
+        text += data.text || "";
+        if (!bubble) bubble = addMessage("assistant", text);
+        else updateMessage(bubble, text);
+      } else if (name === "plan") {
+        text = JSON.stringify({ plan: data.plan }, null, 2);
+        bubble = addMessage("assistant", text);
+      } else if (name === "error") {
+        text += `\n\n${data.error}`;
+        if (bubble) updateMessage(bubble, text);
+      } else if (name === "done") {
+        console.debug("chat stream", data);
+      }
+    });
+    if (bubble) return;
+  } catch (e) {
+    if (bubble) return;  // partial answer already shown
+  }
+  // Streaming unavailable (old proxy, error before any output): fall back to /chat
   try {
     const data = await api.chat(userId, q);
 
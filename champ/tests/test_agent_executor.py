@@ -0,0 +1,76 @@
+import time
+
+import pytest
+
+from champ.agents import agent_controller, tools
+from champ.agents.executor import Step, run_steps
+
+
+def _sleepy(seconds, value="x"):
+    def fn(deps):
+        time.sleep(seconds)
+        return tools.resp(True, {"value": value, "deps": sorted(deps)})
+    return fn
+
+
+def test_independent_steps_overlap_and_dependents_wait():
+    trace = []
+    t0 = time.perf_counter()
+    results = run_steps([
+        Step("a", _sleepy(0.2)),
+        Step("b", _sleepy(0.2)),
+        Step("c", _sleepy(0.2)),
+        Step("d", _sleepy(0.0), deps=["a", "b"]),
+    ], trace)
+    wall = time.perf_counter() - t0
+
+    assert wall < 0.45  # ~ longest chain (0.2s), not the sum (0.6s)
+    assert results["d"]["data"]["deps"] == ["a", "b"]
+    assert trace == [{"tool": n, "ok": True} for n in "abcd"]
+
+
+def test_failures_timeouts_and_skipped_dependents():
+    def boom(_):
+        raise RuntimeError("db down")
+
+    trace = []
+    results = run_steps([
+        Step("slow", _sleepy(1.0), timeout_s=0.05),
+        Step("bad", boom, tool="get_overview"),
+        Step("after_bad", _sleepy(0), deps=["bad"]),
+        Step("ok", _sleepy(0)),
+    ], trace)
+
+    assert "timeout" in results["slow"]["error"]
+    assert results["bad"] == tools.resp(False, error="db down")
+    assert results["after_bad"]["error"] == "skipped: bad failed"
+    assert trace == [{"tool": "slow", "ok": False}, {"tool": "get_overview", "ok": False}, {"tool": "ok", "ok": True}]
+
+
+def test_invalid_graphs_are_rejected():
+    with pytest.raises(ValueError):
+        run_steps([Step("a", _sleepy(0), deps=["b"]), Step("b", _sleepy(0), deps=["a"])])
+    with pytest.raises(ValueError):
+        run_steps([Step("a", _sleepy(0), deps=["missing"])])
+
+
+def test_controller_runs_recommendations_and_retrieval_concurrently(monkeypatch):
+    overview = {"avg_balance_10": 60, "avg_balance_all": 70, "short_sessions_10": 0}
+    monkeypatch.setattr(tools, "get_overview", lambda uid: tools.resp(True, {"rows": [overview]}))
+    monkeypatch.setattr(tools, "recommend_exercises",
+                        lambda profile: (time.sleep(0.2), tools.resp(True, {"exercises": profile["declines"]}))[1])
+    monkeypatch.setattr(tools, "retrieve_knowledge",
+                        lambda q, k, tags: (time.sleep(0.2), tools.resp(True, {"docs": [q]}))[1])
+    seen = {}
+    monkeypatch.setattr(agent_controller, "_fmt_answer", lambda ctx, q: seen.setdefault("ctx", ctx) and "answer")
+
+    t0 = time.perf_counter()
+    out = agent_controller.run("1", "how am I doing?", "health_summary", {})
+    assert time.perf_counter() - t0 < 0.35
+    assert out["ok"] and out["trace"] == [
+        {"tool": "get_overview", "ok": True},
+        {"tool": "recommend_exercises", "ok": True},
+        {"tool": "retrieve_knowledge", "ok": True},
+    ]
+    assert seen["ctx"]["exercise_recs"] == ["balance"]
+    assert seen["ctx"]["docs"] == ["beginner balance drills"]
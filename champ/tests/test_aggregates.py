@@ -0,0 +1,62 @@
+import json
+
+from champ.db.aggregates import _merge_window, is_behind, summarize
+
+
+def _w(sid, start, posture=None, duration=None, steps=None, end=None):
+    return {"id": sid, "start_time": start, "end_time": end, "duration": duration,
+            "posture": posture, "gait": None, "balance": None, "steps": steps}
+
+
+def test_merge_window_keeps_newest_n_and_replaces_same_id():
+    window = [_w(3, "2025-07-03 10:00:00"), _w(2, "2025-07-02 10:00:00"), _w(1, "2025-07-01 10:00:00")]
+    merged = _merge_window(window, _w(4, "2025-07-04 10:00:00"), 3)
+    assert [w["id"] for w in merged] == [4, 3, 2]
+
+    merged = _merge_window(merged, _w(3, "2025-07-03 10:00:00", posture=80.0), 3)
+    assert [w["id"] for w in merged] == [4, 3, 2]
+    assert merged[1]["posture"] == 80.0
+
+
+def test_summarize_matches_raw_sql_shape():
+    window = [_w(3, "c", 60.0, 100, 500), _w(2, "b", None, 300, 700), _w(1, "a", 70.0, 200, None)]
+    row = {
+        "total_sessions": 12,
+        "n_posture": 10, "sum_posture": 650.0,
+        "n_gait": 0, "sum_gait": 0.0,
+        "n_balance": 4, "sum_balance": 280.0,
+        "n_steps": 8, "sum_steps": 4800.0,
+        "n_duration": 12, "sum_duration": 2400.0,
+        "recent_json": json.dumps(window),
+        "recent_alerts": 2, "recent_recs": 0,
+    }
+    out = summarize(row)
+    assert out["total_sessions"] == 12
+    assert out["avg_posture_all"] == 65.0 and out["avg_gait_all"] is None
+    assert out["avg_steps_all"] == 600.0
+    assert out["avg_posture_10"] == 65.0 and out["avg_steps_10"] == 600.0
+    assert out["short_sessions_10"] == 1
+    assert out["recent_alerts"] == 2 and out["recent_recs"] == 0
+
+
+def test_window_keeps_newest_by_start_and_by_end_time(monkeypatch):
+    from champ.db import aggregates
+    monkeypatch.setattr(aggregates, "AGG_WINDOW_N", 2)
+    # Session 1 started first but finished last: it is in the end_time window only
+    window = [_w(1, "2025-07-01 10:00:00", 10.0, end="2025-07-09 10:00:00")]
+    for sid in (2, 3, 4):
+        window = _merge_window(window, _w(sid, f"2025-07-0{sid} 10:00:00", 50.0, end=f"2025-07-0{sid} 11:00:00"), 2)
+    assert [w["id"] for w in window] == [4, 3, 1]
+    row = {"total_sessions": 4, "recent_json": json.dumps(window)}
+    assert summarize(row)["avg_posture_10"] == 50.0
+    assert summarize(row, order="end_time")["avg_posture_10"] == 30.0
+
+
+def test_is_behind_detects_unfolded_sessions():
+    row = {"total_sessions": 5, "live_sessions": 5, "live_max_id": 40, "applied_max_id": 40}
+    assert not is_behind(row)
+    assert is_behind({**row, "live_sessions": 6, "live_max_id": 41})
+    # Same count, but one session replaced by a newer one that was never folded in
+    assert is_behind({**row, "live_max_id": 41})
+    assert is_behind({**row, "live_sessions": 4})
+    assert not is_behind({"total_sessions": 5})
@@ -0,0 +1,91 @@
+import asyncio
+import json
+
+import pytest
+from flask import Flask, Response
+
+from champ.asgi import ChampASGI
+
+
+def _call(app, method, path, body=b""):
+    sent = []
+    received = [{"type": "http.request", "body": body, "more_body": False}]
+
+    async def receive():
+        return received.pop(0) if received else {"type": "http.disconnect"}
+
+    async def send(message):
+        sent.append(message)
+
+    scope = {"type": "http", "method": method, "path": path, "query_string": b"", "http_version": "1.1",
+             "headers": [(b"content-type", b"application/json")], "server": ("test", 80), "client": ("127.0.0.1", 1)}
+    asyncio.run(app(scope, receive, send))
+    start = sent[0]
+    assert start["type"] == "http.response.start"
+    chunks = [m["body"] for m in sent[1:] if m.get("body")]
+    assert sent[-1].get("more_body", False) is False
+    return start["status"], chunks
+
+
+def _app():
+    flask_app = Flask(__name__)
+
+    @flask_app.route("/stream")
+    def stream():
+        return Response((f"chunk{i};" for i in range(3)), mimetype="text/plain")
+
+    calls = []
+
+    async def handler(data):
+        calls.append(data)
+        await asyncio.sleep(0)
+        if data.get("boom"):
+            raise RuntimeError("boom")
+        return {"answer": data.get("question")}, 200
+
+    return ChampASGI(flask_app=flask_app, routes={("POST", "/api/champ/chat"): handler}), calls
+
+
+def test_async_routes_are_served_as_coroutines():
+    app, calls = _app()
+    status, chunks = _call(app, "POST", "/api/champ/chat", b'{"user_id": 1, "question": "hi"}')
+    assert status == 200 and json.loads(b"".join(chunks)) == {"answer": "hi"}
+    assert calls == [{"user_id": 1, "question": "hi"}]
+
+    assert _call(app, "POST", "/api/champ/chat", b"not json")[0] == 400
+    assert _call(app, "POST", "/api/champ/chat", b'{"boom": true}')[0] == 500
+
+
+def test_other_routes_fall_back_to_flask_and_stream_chunk_by_chunk():
+    app, calls = _app()
+    status, chunks = _call(app, "GET", "/stream")
+    assert status == 200
+    assert chunks == [b"chunk0;", b"chunk1;", b"chunk2;"]
+    assert _call(app, "GET", "/missing")[0] == 404
+    assert calls == []
+
+
+def test_chat_handler_uses_async_llm_path(monkeypatch):
+    pytest.importorskip("httpx")
+    from champ.routes import aio
+
+    async def fake_llm(system, user, model=None):
+        return f"async answer to {user}", False
+
+    monkeypatch.setattr(aio, "asafe_call_llm", fake_llm)
+    monkeypatch.setattr(aio.chat.semantic_cache, "lookup", lambda *a: (None, None))
+    payload, status = asyncio.run(aio.chat_handler({"user_id": 1, "question": "hello champ"}))
+    assert status == 200 and payload == {"answer": "async answer to hello champ"}
+
+
+def test_async_routes_match_the_flask_url_map(monkeypatch):
+    pytest.importorskip("httpx")
+    from champ.agents import intent_classifier
+    from champ.app import create_app
+    from champ.routes import aio
+
+    monkeypatch.setattr(intent_classifier, "start", lambda: None)
+    adapter = create_app().url_map.bind("test")
+    for method, path in aio.ROUTES:
+        # Raises NotFound/MethodNotAllowed when Flask does not serve this route
+        adapter.match(path, method=method)
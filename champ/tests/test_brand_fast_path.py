@@ -0,0 +1,71 @@
+import json
+import os
+import time
+
+from flask import Flask
+
+from champ.brand import fast_path
+from champ.brand.fast_path import brand_route, brand_fast_path_stats
+from champ.brand.profile import detect_brand_intent, reply_for_intent
+from champ.routes import chat as chat_mod
+from champ.scripts.bench_router import GOLDEN_PATH
+
+CORPUS_PATH = os.path.join(os.path.dirname(__file__), "data", "brand_questions.jsonl")
+
+
+def _load(path):
+    with open(path, encoding="utf-8") as f:
+        return [json.loads(line) for line in f if line.strip()]
+
+
+def test_brand_corpus_matches_and_personal_questions_never_do():
+    rows = _load(CORPUS_PATH)
+    assert sum(r["brand"] is None for r in rows) >= 40
+    mismatches = [(r["q"], r["brand"], detect_brand_intent(r["q"])) for r in rows
+                  if detect_brand_intent(r["q"]) != r["brand"]]
+    assert mismatches == []
+
+
+def test_data_questions_in_router_corpus_are_left_to_the_router():
+    for g in _load(GOLDEN_PATH):
+        if g["decision"]["mode"] in ("db", "hybrid"):
+            assert brand_route(g["q"]) is None, g["q"]
+
+
+def test_brand_route_answers_from_profile_in_microseconds():
+    decision = brand_route("What is PhysioChamp?")
+    assert decision["mode"] == "brand" and decision["intent"] == "about"
+    assert decision["answer"] == reply_for_intent("about")
+
+    samples = []
+    for _ in range(200):
+        t0 = time.perf_counter()
+        brand_route("how much does premium cost? pricing please")
+        samples.append(time.perf_counter() - t0)
+    assert sorted(samples)[100] < 0.001
+
+
+def test_chat_skips_the_llm_and_counts_the_avoided_call(monkeypatch):
+    def no_llm(*a, **k):
+        raise AssertionError("LLM called for a brand question")
+
+    monkeypatch.setattr(chat_mod, "safe_call_llm", no_llm)
+    monkeypatch.setattr(chat_mod, "stream_llm_text", no_llm)
+    app = Flask(__name__)
+    app.register_blueprint(chat_mod.champ_bp, url_prefix="/api/champ")
+    client = app.test_client()
+    before = brand_fast_path_stats()
+
+    resp = client.post("/api/champ/chat", json={"user_id": 1, "question": "How do I contact you?"})
+    assert resp.get_json() == {"answer": reply_for_intent("contact")}
+    stream = client.post("/api/champ/chat/stream", json={"user_id": 1, "question": "what is the tech stack"})
+    assert json.dumps(reply_for_intent("tech"))[1:-1] in stream.get_data(as_text=True)
+
+    after = brand_fast_path_stats()
+    assert after["llm_calls_avoided"] - before["llm_calls_avoided"] == 2
+    assert after["by_intent"]["contact"] >= 1 and after["by_intent"]["tech"] >= 1
+
+
+def test_disabled_fast_path_routes_normally(monkeypatch):
+    monkeypatch.setattr(fast_path, "BRAND_FAST_PATH_ENABLED", False)
+    assert brand_route("What is PhysioChamp?") is None
@@ -1,3 +1,90 @@
 # Placeholder for chat tests
 def test_example():
     assert True
+
+
+# --------------- /chat/stream ---------------
+import json
+
+import pytest
+from flask import Flask
+
+from champ.llm.provider import ProviderError
+from champ.routes import chat as chat_mod
+
+
+@pytest.fixture
+def client():
+    app = Flask(__name__)
+    app.register_blueprint(chat_mod.champ_bp, url_prefix="/api/champ")
+    return app.test_client()
+
+
+def _events(resp):
+    out = []
+    for frame in resp.get_data(as_text=True).strip().split("\n\n"):
+        lines = dict(line.split(": ", 1) for line in frame.splitlines())
+        out.append((lines["event"], json.loads(lines["data"])))
+    return out
+
+
+def _route_to(monkeypatch, mode, intent=None, meta=None):
+    monkeypatch.setattr(chat_mod, "route", lambda q: {"mode": mode, "intent": intent, "meta": meta or {}})
+
+
+def test_stream_emits_tokens_then_done_with_timings(client, monkeypatch):
+    _route_to(monkeypatch, "llm")
+    monkeypatch.setattr(chat_mod, "stream_llm_text", lambda s, u, model=None: iter(["Hi", " there"]))
+    events = _events(client.post("/api/champ/chat/stream", json={"user_id": 1, "question": "hello"}))
+
+    assert events[0] == ("meta", {"mode": "llm", "intent": None})
+    assert [d["text"] for e, d in events if e == "token"] == ["Hi", " there"]
+    name, done = events[-1]
+    assert name == "done" and done["streamed"] is True
+    assert 0 <= done["ttfb_ms"] <= done["total_ms"]
+
+
+def test_stream_uses_chat_fallback_when_llm_fails_before_first_token(client, monkeypatch):
+    _route_to(monkeypatch, "llm")
+
+    def broken(*a, **k):
+        raise ProviderError("down")
+        yield  # pragma: no cover
+
+    monkeypatch.setattr(chat_mod, "stream_llm_text", broken)
+    events = _events(client.post("/api/champ/chat/stream", json={"user_id": 1, "question": "hello"}))
+    tokens = [d["text"] for e, d in events if e == "token"]
+    assert tokens == [chat_mod._freehand_call("hello")["fallback"]]
+    assert events[-1][1]["llm_unavailable"] is True
+
+
+def test_stream_sends_plan_as_single_event(client, monkeypatch):
+    _route_to(monkeypatch, "hybrid", "generate_personal_plan")
+    monkeypatch.setattr(chat_mod, "hybrid_db_llm_answer", lambda *a: chat_mod._plan_fallback_json())
+    events = _events(client.post("/api/champ/chat/stream", json={"user_id": 1, "question": "plan"}))
+    assert [e for e, _ in events] == ["meta", "plan", "done"]
+    assert len(events[1][1]["plan"]["weekly_plan"]) == 14
+
+
+def test_stream_llm_text_parses_sse_frames(monkeypatch):
+    from champ.llm import provider
+
+    frames = [
+        'data: {"candidates":[{"content":{"parts":[{"text":"Hel"}]}}]}',
+        "",
+        'data: {"candidates":[{"content":{"parts":[{"text":"lo"}]}}]}',
+        "",
+    ]
+
+    class FakeResp:
+        status_code = 200
+        text = ""
+        def __enter__(self): return self
+        def __exit__(self, *exc): return False
+        def raise_for_status(self): pass
+        def iter_lines(self, decode_unicode=False): return iter(frames)
+
+    monkeypatch.setenv("GEMINI_API_KEY", "k")
+    monkeypatch.setattr(provider, "get_session", lambda: type("S", (), {"post": lambda self, *a, **k: FakeResp()})())
+    monkeypatch.setattr(provider, "_log_timing", lambda *a: None)
+    assert list(provider.stream_llm_text("sys", "user")) == ["Hel", "lo"]
@@ -0,0 +1,139 @@
+import threading
+import time
+
+import pytest
+
+from champ.db.pool import ConnectionPool, PoolTimeoutError
+
+
+class FakeConn:
+    def __init__(self):
+        self.closed = False
+        self.alive = True
+
+    def ping(self, reconnect=False):
+        if not self.alive:
+            raise RuntimeError("gone away")
+
+    def is_connected(self):
+        return self.alive and not self.closed
+
+    def close(self):
+        self.closed = True
+
+
+def _pool(**kw):
+    made = []
+
+    def factory():
+        c = FakeConn()
+        made.append(c)
+        return c
+
+    return ConnectionPool(factory, **kw), made
+
+
+def test_reuses_connections():
+    pool, made = _pool(size=2)
+    for _ in range(5):
+        with pool.connection() as conn:
+            assert isinstance(conn, FakeConn)
+    assert len(made) == 1
+    st = pool.stats()
+    assert st["checkouts"] == 5 and st["in_use"] == 0 and st["idle"] == 1
+
+
+def test_checkout_timeout_and_wait_stats():
+    pool, _ = _pool(size=1, checkout_timeout=0.05)
+    entry = pool.acquire()
+    with pytest.raises(PoolTimeoutError):
+        pool.acquire()
+    pool.release(entry)
+
+    held = pool.acquire()
+    threading.Timer(0.05, pool.release, args=(held,)).start()
+    with pool.connection(timeout=1.0):
+        pass
+    st = pool.stats()
+    assert st["timeouts"] == 1
+    assert st["waits"] == 2
+    assert st["wait_time_s"] > 0
+
+
+def test_health_check_and_lifetime():
+    pool, made = _pool(size=1, ping_after=0, max_lifetime=3600)
+    with pool.connection():
+        pass
+    made[0].alive = False
+    time.sleep(0.01)
+    with pool.connection() as conn:
+        assert conn is made[1]
+    assert made[0].closed
+    assert pool.stats()["health_check_failures"] == 1
+
+    pool.max_lifetime = 0.001
+    time.sleep(0.01)
+    with pool.connection() as conn:
+        assert conn is made[2]
+    assert pool.stats()["expired"] >= 1
+
+
+def test_idle_reaping_and_broken_connections():
+    pool, made = _pool(size=2, max_idle=0.01)
+    with pool.connection():
+        pass
+    time.sleep(0.02)
+    assert pool.stats()["idle"] == 1
+    with pool.connection():
+        pass
+    assert made[0].closed and pool.stats()["reaped"] == 1
+
+    with pytest.raises(ValueError):
+        with pool.connection() as conn:
+            conn.alive = False
+            raise ValueError("query failed")
+    assert pool.stats()["open"] == 0
+
+
+def test_async_pool_bounds_connections_and_discards_broken_ones():
+    import asyncio
+    from champ.db.aio import AsyncConnectionPool
+
+    class AsyncConn:
+        def __init__(self):
+            self.closed = False
+
+        async def ping(self, reconnect=False):
+            pass
+
+        async def close(self):
+            self.closed = True
+
+    made = []
+
+    async def factory():
+        made.append(AsyncConn())
+        return made[-1]
+
+    async def scenario():
+        pool = AsyncConnectionPool(factory, size=2, checkout_timeout=0.05)
+
+        async def use():
+            async with pool.connection():
+                await asyncio.sleep(0.01)
+
+        await asyncio.gather(*(use() for _ in range(10)))
+        assert len(made) == 2
+
+        async with pool.connection():
+            async with pool.connection():
+                with pytest.raises(PoolTimeoutError):
+                    await pool.acquire()
+
+        with pytest.raises(RuntimeError):
+            async with pool.connection():
+                raise RuntimeError("query failed")
+        assert sum(c.closed for c in made) == 1
+        assert pool.stats()["open"] == 1
+
+    asyncio.run(scenario())
@@ -0,0 +1,35 @@
+from champ.rag.embed_cache import EmbeddingCache
+
+
+def _vec(i, dim=4):
+    return [float(i)] * dim
+
+
+def test_hits_survive_restart_and_normalize_whitespace(tmp_path):
+    cache = EmbeddingCache(str(tmp_path), dim=4, capacity=8, mem_items=2)
+    assert cache.get_many("m", ["a b"]) == [None]
+    cache.put_many("m", ["a b", "c"], [_vec(1), _vec(2)])
+
+    assert cache.get_many("m", ["  a   b ", "c", "other"]) == [_vec(1), _vec(2), None]
+    assert cache.get_many("other-model", ["c"]) == [None]
+
+    reopened = EmbeddingCache(str(tmp_path), dim=4, capacity=8, mem_items=2)
+    assert reopened.get_many("m", ["c"]) == [_vec(2)]
+    st = reopened.stats()
+    assert st["disk_hits"] == 1 and st["disk_items"] == 2
+
+
+def test_ring_eviction_and_cross_instance_visibility(tmp_path):
+    writer = EmbeddingCache(str(tmp_path), dim=4, capacity=3, mem_items=0)
+    reader = EmbeddingCache(str(tmp_path), dim=4, capacity=3, mem_items=0)
+    texts = [f"t{i}" for i in range(5)]
+    writer.put_many("m", texts, [_vec(i) for i in range(5)])
+
+    # Oldest two were overwritten; the other instance picks up the new log lines
+    assert reader.get_many("m", texts) == [None, None, _vec(2), _vec(3), _vec(4)]
+    assert writer.stats()["evictions"] == 2
+
+    writer._compact_log()
+    writer.put_many("m", ["t5"], [_vec(5)])
+    assert reader.get_many("m", ["t2", "t5"]) == [None, _vec(5)]
+    assert reader.stats()["hit_rate"] == round(4 / 7, 4)
@@ -0,0 +1,55 @@
+import pytest
+
+from champ.rag import embeddings
+from champ.rag.embeddings import EmbeddingBatchError, GeminiEmbedder
+
+
+@pytest.fixture
+def embedder(monkeypatch):
+    monkeypatch.setenv("GEMINI_API_KEY", "test")
+    monkeypatch.setattr(embeddings, "EMBED_BACKOFF_BASE", 0.0)
+    monkeypatch.setattr(embeddings.genai, "configure", lambda **kw: None)
+    return GeminiEmbedder(batch_size=3, concurrency=2, use_cache=False)
+
+
+def test_batches_preserve_order_and_retry(embedder, monkeypatch):
+    calls = []
+    flaky = {"left": 1}
+
+    def fake_embed(model, content):
+        calls.append(list(content))
+        if "t4" in content and flaky["left"]:
+            flaky["left"] -= 1
+            raise RuntimeError("503")
+        return {"embedding": [[float(t[1:])] for t in content]}
+
+    monkeypatch.setattr(embeddings.genai, "embed_content", fake_embed)
+    texts = [f"t{i}" for i in range(8)]
+    assert embedder.embed_texts(texts) == [[float(i)] for i in range(8)]
+    assert sorted(len(c) for c in calls) == [2, 3, 3, 3]
+
+
+def test_partial_failure_is_recoverable(embedder, monkeypatch):
+    def fake_embed(model, content):
+        if "t1" in content:
+            raise RuntimeError("permanent")
+        return {"embedding": [[1.0] for _ in content]}
+
+    monkeypatch.setattr(embeddings.genai, "embed_content", fake_embed)
+    with pytest.raises(EmbeddingBatchError) as exc:
+        embedder.embed_texts([f"t{i}" for i in range(5)])
+    assert exc.value.failed == [0, 1, 2]
+    assert exc.value.vectors[:3] == [None, None, None]
+    assert exc.value.vectors[3:] == [[1.0], [1.0]]
+
+
+def test_zero_retries_still_makes_one_attempt(embedder, monkeypatch):
+    monkeypatch.setattr(embeddings, "EMBED_RETRIES", 0)
+    monkeypatch.setattr(embeddings.genai, "embed_content", lambda model, content: {"embedding": [[1.0] for _ in content]})
+    assert embedder.embed_texts(["a", "b"]) == [[1.0], [1.0]]
+
+    def failing(model, content):
+        raise RuntimeError("down")
+    monkeypatch.setattr(embeddings.genai, "embed_content", failing)
+    with pytest.raises(EmbeddingBatchError):
+        embedder.embed_texts(["a"])
@@ -0,0 +1,121 @@
+import numpy as np
+
+from champ.rag.faiss_store import FaissStore
+
+
+def _vecs(n, dim=8, seed=0):
+    return np.random.default_rng(seed).standard_normal((n, dim)).astype("float32")
+
+
+def test_fetch_by_ids_uses_offsets_across_upserts_and_reload(tmp_path):
+    store = FaissStore(index_dir=str(tmp_path), dim=8)
+    v = _vecs(4)
+    store.upsert(["a", "b"], v[:2], ["text a", "text ü b"], [{"title": "A"}, {"title": "B"}])
+    store.upsert(["c", "d"], v[2:], ["text c", "text d"], [{"title": "C"}, {"title": "D"}])
+    store.save()
+
+    rows = store.fetch_by_ids(["d", "a", "missing"])
+    assert [r["text"] for r in rows] == ["text d", "text a", ""]
+    assert rows[2]["meta"] == {}
+
+    reloaded = FaissStore(index_dir=str(tmp_path), dim=8)
+    assert reloaded.fetch_by_ids(["b"])[0] == {"id": "b", "meta": {"title": "B"}, "text": "text ü b"}
+
+    hits = reloaded.query(v[2], top_k=3)
+    assert hits[0][0] == "c" and len(hits) == 3
+
+
+def test_upsert_replaces_and_delete_survives_reload(tmp_path):
+    store = FaissStore(index_dir=str(tmp_path), dim=8)
+    v = _vecs(3)
+    store.upsert(["a", "b", "c"], v, ["a1", "b1", "c1"], [{}, {}, {}])
+    store.upsert(["a"], v[1:2], ["a2"], [{"v": 2}])
+    assert store.delete(["b", "nope"]) == 1
+    store.save()
+
+    for s in (store, FaissStore(index_dir=str(tmp_path), dim=8)):
+        assert sorted(s.ids()) == ["a", "c"]
+        assert s._index.ntotal == 2
+        assert s.fetch_by_ids(["a"])[0]["text"] == "a2"
+        assert s.query(v[1], top_k=1)[0][0] == "a"
+
+
+def test_legacy_flat_index_is_migrated_and_deduplicated(tmp_path):
+    import faiss
+    import json
+
+    v = _vecs(3)
+    v /= np.linalg.norm(v, axis=1, keepdims=True)
+    flat = faiss.IndexFlatIP(8)
+    flat.add(v)
+    faiss.write_index(flat, str(tmp_path / "index.faiss"))
+    # Old append-only ingests wrote the same id twice
+    with open(tmp_path / "meta.jsonl", "w") as f:
+        for _id in ["x", "y", "x"]:
+            f.write(json.dumps({"id": _id, "meta": {}}) + "\n")
+    with open(tmp_path / "texts.jsonl", "w") as f:
+        for _id, t in [("x", "old"), ("y", "y"), ("x", "new")]:
+            f.write(json.dumps({"id": _id, "text": t}) + "\n")
+
+    store = FaissStore(index_dir=str(tmp_path), dim=8)
+    assert sorted(store.ids()) == ["x", "y"]
+    assert store._index.ntotal == 2
+    assert store.query(v[2], top_k=1)[0][0] == "x"
+    assert store.fetch_by_ids(["x"])[0]["text"] == "new"
+
+    store.compact()
+    store.upsert(["z"], v[:1], ["z"], [{}])
+    store.save()
+    reloaded = FaissStore(index_dir=str(tmp_path), dim=8)
+    assert sorted(reloaded.ids()) == ["x", "y", "z"]
+    assert reloaded._index.ntotal == 3
+
+
+def test_ivf_store_trains_on_first_batch_and_reloads_with_its_type(tmp_path):
+    v = _vecs(200, dim=16)
+    store = FaissStore(index_dir=str(tmp_path), dim=16, index_type="ivf_flat")
+    assert not store.is_trained
+    ids = [f"c{i}" for i in range(200)]
+    store.upsert(ids, v, ids, [{}] * 200)
+    store.save()
+    assert store.is_trained
+
+    reloaded = FaissStore(index_dir=str(tmp_path), dim=16)
+    assert reloaded.index_type == "ivf_flat"
+    reloaded.set_search_params(nprobe=1024)  # clamped to nlist: exhaustive, so exact
+    assert reloaded.query(v[7], top_k=1)[0][0] == "c7"
+
+
+def test_hnsw_delete_leaves_vector_unmapped_and_query_skips_it(tmp_path):
+    v = _vecs(20, dim=8)
+    store = FaissStore(index_dir=str(tmp_path), dim=8, index_type="hnsw")
+    ids = [f"c{i}" for i in range(20)]
+    store.upsert(ids, v, ids, [{}] * 20)
+    assert store.delete(["c3"]) == 1
+    hits = store.query(v[3], top_k=5)
+    assert len(hits) == 5 and "c3" not in [h[0] for h in hits]
+
+    store.reset("flat")
+    assert len(store) == 0 and store.index_type == "flat" and store._index.ntotal == 0
+
+
+def test_hnsw_churn_rebuilds_the_graph_and_keeps_live_hits(tmp_path, monkeypatch):
+    from champ.rag import faiss_store
+    monkeypatch.setattr(faiss_store, "FAISS_HNSW_MAX_DEAD", 16)
+    v = _vecs(200, dim=8, seed=1)
+    store = FaissStore(index_dir=str(tmp_path), dim=8, index_type="hnsw")
+    ids = [f"c{i}" for i in range(200)]
+    store.upsert(ids, v, ids, [{}] * 200)
+    for i in range(0, 150, 5):
+        store.delete(ids[i:i + 5])
+        assert store._dead_vectors <= 20
+    assert len(store) == 50 and store._index.ntotal - 50 <= 16
+    for i in range(150, 200, 7):
+        assert store.query(v[i], top_k=3)[0][0] == f"c{i}"
+
+    store.delete(["c150"])
+    store.compact()
+    assert store._dead_vectors == 0 and store.index_type == "hnsw"
+    store.save()
+    reloaded = FaissStore(index_dir=str(tmp_path), dim=8)
+    assert reloaded._index.ntotal == 49 and reloaded.query(v[160], top_k=1)[0][0] == "c160"
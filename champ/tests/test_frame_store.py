@@ -0,0 +1,125 @@
+import json
+
+import numpy as np
+import pytest
+
+from champ.analytics import frame_store, gait
+from champ.analytics.frame_store import open_frames, write_frames
+from champ.analytics.gait import SessionFrames, compute_metrics, frames_from_rows
+from champ.scripts.bench_gait import synthetic_walk
+
+
+@pytest.fixture
+def walk():
+    frames, _ = synthetic_walk(120, hz=100)
+    return frames
+
+
+def test_raw_files_are_exact_memory_mapped_views(tmp_path, walk):
+    path = str(tmp_path / "s.chf")
+    write_frames(path, walk, encoding="raw", session_id=5)
+    back = open_frames(path)
+
+    np.testing.assert_array_equal(back.t, walk.t)
+    np.testing.assert_array_equal(back.left, walk.left)
+    np.testing.assert_array_equal(back.right, walk.right)
+    # Views into the map: nothing owned, nothing writable, one contiguous block per sensor channel
+    assert not back.left.flags.owndata and not back.left.flags.writeable
+    assert back.left.T.flags["C_CONTIGUOUS"]
+    assert compute_metrics(back) == compute_metrics(walk)
+
+
+def test_packed_files_round_trip_within_the_quantization_step(tmp_path, walk):
+    path = str(tmp_path / "s.chf")
+    header = write_frames(path, walk, encoding="packed", codec="zlib")
+    back = open_frames(path)
+
+    assert header["codec"] == "zlib" and len(back) == len(walk)
+    assert np.abs(back.t - walk.t).max() <= 1e-6
+    assert np.abs(back.left - walk.left).max() <= frame_store.FRAME_STORE_SCALE / 2 + 1e-6
+    raw_size = len(walk) * (8 + 2 * 4 * gait.SENSORS)
+    assert (tmp_path / "s.chf").stat().st_size < raw_size / 3
+
+    loud = SessionFrames(walk.t, walk.left * 1000, walk.right)
+    with pytest.raises(ValueError):
+        write_frames(str(tmp_path / "loud.chf"), loud, encoding="packed")
+    assert not (tmp_path / "loud.chf").exists()
+
+
+def test_files_are_much_smaller_than_json_rows(tmp_path):
+    rows = [(1752929422.0 + i * 0.2, json.dumps([round(0.01 * ((i + k) % 100), 2) for k in range(10)]),
+             json.dumps([0.04, 0.05, 0.03, 0.29, 0.57, 0.78, 0.95, 0.87, 0.84, 0.54])) for i in range(2000)]
+    frames = frames_from_rows(rows)
+    json_bytes = sum(len(l) + len(r) + 8 for _, l, r in rows)
+    write_frames(str(tmp_path / "p.chf"), frames, encoding="packed")
+    write_frames(str(tmp_path / "r.chf"), frames, encoding="raw")
+    assert (tmp_path / "r.chf").stat().st_size < json_bytes
+    assert (tmp_path / "p.chf").stat().st_size * 5 < json_bytes
+    np.testing.assert_allclose(open_frames(str(tmp_path / "p.chf")).left, frames.left, atol=1e-3)
+
+
+def test_empty_sessions_and_bad_files(tmp_path):
+    empty = SessionFrames(np.empty(0), np.empty((0, gait.SENSORS), np.float32), np.empty((0, gait.SENSORS), np.float32))
+    for encoding in ("raw", "packed"):
+        write_frames(str(tmp_path / f"{encoding}.chf"), empty, encoding=encoding)
+        assert len(open_frames(str(tmp_path / f"{encoding}.chf"))) == 0
+
+    (tmp_path / "junk.chf").write_bytes(b"not frames at all")
+    with pytest.raises(ValueError):
+        open_frames(str(tmp_path / "junk.chf"))
+    with pytest.raises(ValueError):
+        write_frames(str(tmp_path / "x.chf"), empty, encoding="parquet")
+
+
+def test_analytics_prefers_the_frame_file(tmp_path, monkeypatch, walk):
+    monkeypatch.setattr(frame_store, "FRAME_STORE_DIR", str(tmp_path))
+    monkeypatch.setattr(gait, "source_state", lambda sid: (len(walk), len(walk)))
+    monkeypatch.setattr(gait, "load_json_frames", lambda sid: pytest.fail("read JSON rows"))
+    write_frames(frame_store.session_path(9), walk)
+    assert gait.session_metrics(9)["step_count"] == compute_metrics(walk)["step_count"]
+
+
+def test_files_behind_sensor_data_are_ignored(tmp_path, monkeypatch, walk):
+    monkeypatch.setattr(frame_store, "FRAME_STORE_DIR", str(tmp_path))
+    head = SessionFrames(walk.t[:5000], walk.left[:5000], walk.right[:5000])
+    write_frames(frame_store.session_path(9), head)   # converted while the session was still ingesting
+    monkeypatch.setattr(gait, "source_state", lambda sid: (len(walk), len(walk)))
+    monkeypatch.setattr(gait, "load_json_frames", lambda sid: walk)
+    assert len(gait.load_session_frames(9)) == len(walk)
+
+    walk.last_id = 123
+    write_frames(frame_store.session_path(9), walk, encoding="packed")
+    assert open_frames(frame_store.session_path(9)).last_id == 123
+    assert frame_store.file_is_current(frame_store.session_path(9), (len(walk), 123))
+    assert frame_store.is_current({"frames": 10, "last_id": 50}, (10, 50))
+    assert not frame_store.is_current({"frames": 10, "last_id": 50}, (10, 60))   # rows replaced
+    assert frame_store.is_current({"frames": 10}, (10, 60))   # files from before last_id was recorded
+
+
+def test_frame_file_is_used_when_sensor_data_is_unreachable(tmp_path, monkeypatch, walk):
+    monkeypatch.setattr(frame_store, "FRAME_STORE_DIR", str(tmp_path))
+    write_frames(frame_store.session_path(9), walk)
+
+    def down(sid):
+        raise RuntimeError("db down")
+    monkeypatch.setattr(gait, "source_state", down)
+    assert len(gait.load_session_frames(9)) == len(walk)
+
+
+def test_concurrent_writers_of_one_file_do_not_collide(tmp_path, walk):
+    import threading
+    path = str(tmp_path / "s.chf")
+    errors = []
+
+    def write():
+        try:
+            write_frames(path, walk)
+        except Exception as e:
+            errors.append(e)
+    threads = [threading.Thread(target=write) for _ in range(6)]
+    for t in threads:
+        t.start()
+    for t in threads:
+        t.join()
+    assert not errors and len(open_frames(path)) == len(walk)
+    assert [p.name for p in tmp_path.iterdir()] == ["s.chf"]
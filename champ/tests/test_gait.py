@@ -0,0 +1,88 @@
+import json
+import time
+
+import numpy as np
+import pytest
+
+from champ.analytics.gait import SENSORS, SessionFrames, compute_metrics, detect_events, frames_from_rows
+from champ.scripts.bench_gait import synthetic_walk
+
+
+def test_metrics_recover_the_synthetic_walk():
+    frames, truth = synthetic_walk(900, hz=100)
+    m = compute_metrics(frames)
+
+    assert m["stride_time_s"] == pytest.approx(truth["stride_time_s"], rel=0.01)
+    assert m["cadence_spm"] == pytest.approx(truth["cadence_spm"], rel=0.01)
+    assert m["contact_time_s"] == pytest.approx(truth["contact_time_s_left"], rel=0.03)
+    assert m["gait_symmetry"] > 99
+    # 900 s with a 20 s pause every 5 minutes: ~840 s of walking, one strike per foot per stride
+    assert m["step_count"] == pytest.approx(2 * 840 / truth["stride_time_s"], rel=0.02)
+    assert 0 < m["heel_toe_timing"]["left_s"] < truth["contact_time_s_left"]
+
+
+def test_asymmetry_and_low_sample_rate():
+    frames, truth = synthetic_walk(600, hz=5, asymmetry=0.15)
+    m = compute_metrics(frames)
+    assert m["stride_time_s"] == pytest.approx(truth["stride_time_s"], rel=0.02)
+    assert m["feet"]["right"]["contact_time_s"] > m["feet"]["left"]["contact_time_s"]
+    assert 80 < m["gait_symmetry"] < 95
+
+
+def test_events_ignore_blips_and_partial_contacts():
+    t = np.arange(0, 4, 0.01)
+    load = np.zeros_like(t)
+    load[:50] = 5.0                      # already in contact when recording starts
+    load[100:160] = 5.0                  # real contact, 0.6 s
+    load[163:220] = 5.0                  # 30 ms dropout inside the same contact
+    load[300:305] = 5.0                  # 50 ms blip
+    load[380:] = 5.0                     # still in contact when recording stops
+    ev = detect_events(t, np.repeat(load[:, None] / SENSORS, SENSORS, axis=1))
+    assert len(ev.strike_t) == 1
+    assert ev.strike_t[0] == pytest.approx(1.0, abs=0.01)
+    assert ev.toe_off_t[0] == pytest.approx(2.2, abs=0.01)
+
+
+def test_sessions_without_a_complete_contact():
+    t = np.arange(500) / 100.0
+    standing = np.ones((500, SENSORS), dtype=np.float32)
+    open_at_end = np.zeros((500, SENSORS), dtype=np.float32)
+    open_at_end[300:] = 1.0
+    for p in (standing, open_at_end):
+        assert len(detect_events(t, p).strike_t) == 0
+        m = compute_metrics(SessionFrames(t, p, p))
+        assert m["step_count"] == 0 and m["cadence_spm"] is None and m["gait_symmetry"] is None
+
+
+def test_frames_from_rows_parses_json_columns():
+    rows = [{"timestamp": 1.0 + i * 0.2, "left_foot": json.dumps([i] * SENSORS),
+             "right_foot": json.dumps([0.5] * SENSORS).encode()} for i in range(4)]
+    frames = frames_from_rows(rows)
+    assert frames.left.dtype == np.float32 and frames.left.shape == (4, SENSORS)
+    assert frames.left.flags["C_CONTIGUOUS"] and frames.left[3, 0] == 3
+    assert frames.right[0, 0] == 0.5 and frames.t[-1] == pytest.approx(1.6)
+    with pytest.raises(ValueError):
+        frames_from_rows([(0.0, "[1, 2]", "[1, 2]")])
+
+
+def test_rows_with_null_columns_are_skipped_but_counted(tmp_path):
+    from champ.analytics import frame_store
+    row = json.dumps([1.0] * SENSORS)
+    rows = [(0.0, row, row), (0.1, None, row), (None, row, row), (0.3, row, row)]
+    frames = frames_from_rows(rows)
+    assert len(frames) == 2 and frames.skipped == 2 and not np.isnan(frames.t).any()
+    assert len(frames_from_rows([(0.0, None, None)])) == 0
+
+    path = str(tmp_path / "s.chf")
+    frame_store.write_frames(path, frames)
+    # source_state counts all 4 rows in sensor_data: the file is still current
+    assert frame_store.file_is_current(path, (4, None))
+    assert not frame_store.file_is_current(path, (5, None))
+
+
+def test_throughput_is_well_over_100k_frames_per_second():
+    frames, _ = synthetic_walk(3600, hz=100)   # one hour, 360k frames
+    compute_metrics(frames)
+    t0 = time.perf_counter()
+    compute_metrics(frames)
+    assert len(frames) / (time.perf_counter() - t0) > 500_000
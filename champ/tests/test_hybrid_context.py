@@ -0,0 +1,29 @@
+from champ.db.context import build_hybrid_context
+
+
+def _row(rn, sid, posture, steps):
+    return {
+        "id": sid, "user_id": 1, "posture_score": posture, "gait_symmetry": None,
+        "balance_score": 70.0, "step_count": steps,
+        "ctx_rn": rn, "ctx_total": 40, "ctx_posture_all": 61.5, "ctx_gait_all": None,
+        "ctx_balance_all": 70.0, "ctx_steps_all": 900,
+    }
+
+
+def test_window_and_requested_session_in_one_result():
+    rows = [_row(1, 40, 60.0, 1000), _row(2, 39, None, 800), _row(3, 38, 64.0, 600), _row(25, 7, 50.0, 100)]
+    ctx = build_hybrid_context(rows, last_n=3, session_id=7)
+
+    assert ctx.total_sessions == 40
+    assert ctx.session["id"] == 7 and "ctx_rn" not in ctx.session
+    assert [r["id"] for r in ctx.last_rows] == [40, 39, 38]
+    assert ctx.last_avg == {"posture_last3": 62.0, "gait_last3": None, "balance_last3": 70.0, "steps_last3": 800.0}
+    assert ctx.all_avg["posture_all"] == 61.5
+
+
+def test_latest_session_and_empty_history():
+    ctx = build_hybrid_context([_row(1, 40, 60.0, 1000)], last_n=1)
+    assert ctx.session["id"] == 40
+
+    empty = build_hybrid_context([], last_n=10)
+    assert empty.session == {} and empty.all_avg == {} and empty.last_rows == []
@@ -0,0 +1,129 @@
+import json
+import threading
+import time
+
+import numpy as np
+import pytest
+from flask import Flask
+
+from champ.db.ingest import BatchWriter, FrameBatch, IngestBusy, SessionNotFound
+from champ.routes import ingest as ingest_mod
+
+
+def _ndjson(n, t0=1000.0, **extra):
+    return "\n".join(json.dumps({"t": t0 + i * 0.01, "l": [0.5] * 10, "r": [0.25] * 10, **extra})
+                     for i in range(n)) + "\n"
+
+
+def _batch(n, batch_id="b", session_id=1):
+    return FrameBatch(session_id, batch_id, np.arange(n, dtype=float), np.zeros((n, 10)), np.zeros((n, 10)))
+
+
+class FakeStore:
+    """In-memory stand-in for write_batches: claims (session_id, batch_id) once, like INSERT IGNORE."""
+    def __init__(self):
+        self.claimed, self.frames, self.groups = set(), 0, []
+
+    def __call__(self, batches):
+        self.groups.append(len(batches))
+        if any(b.session_id == 404 for b in batches):
+            raise SessionNotFound("Session not found")  # the whole transaction rolls back
+        dups = []
+        for b in batches:
+            key = (b.session_id, b.batch_id)
+            dups.append(key in self.claimed)
+            if key not in self.claimed:
+                self.claimed.add(key)
+                self.frames += len(b)
+        return dups
+
+
+@pytest.fixture
+def store(monkeypatch):
+    store = FakeStore()
+    writer = BatchWriter(flush=store)
+    monkeypatch.setattr(ingest_mod, "get_writer", lambda: writer)
+    app = Flask(__name__)
+    app.register_blueprint(ingest_mod.ingest_bp, url_prefix="/api/ingest")
+    store.client = app.test_client()
+    return store
+
+
+def test_parse_frames_accepts_both_shapes_and_names_bad_lines():
+    t, left, right = ingest_mod.parse_frames(_ndjson(3).splitlines())
+    assert left.shape == (3, 10) and right[0, 0] == 0.25 and t[2] == pytest.approx(1000.02)
+    compact = ingest_mod.parse_frames([json.dumps([1.0, [1] * 10, [2] * 10])])
+    assert compact[2][0, 9] == 2
+
+    lines = _ndjson(3).splitlines()
+    with pytest.raises(ValueError, match="line 2: invalid JSON"):
+        ingest_mod.parse_frames([lines[0], "{oops", lines[2]])
+    with pytest.raises(ValueError, match="10 left readings"):
+        ingest_mod.parse_frames([json.dumps({"t": 1, "l": [1] * 9, "r": [1] * 10})])
+    with pytest.raises(ValueError, match="line 2: missing"):
+        ingest_mod.parse_frames([lines[0], json.dumps({"t": None, "l": [1] * 10, "r": [1] * 10})])
+
+
+def test_frame_rows_keep_the_client_decimals():
+    rows = FrameBatch(7, "b", np.array([1.5]), np.array([[0.83] * 10]), np.array([[-0.03] * 10])).rows()
+    assert rows == [(7, 1.5, json.dumps([0.83] * 10), json.dumps([-0.03] * 10))]
+
+
+def test_retried_batch_is_written_once(store):
+    body = _ndjson(50)
+    first = store.client.post("/api/ingest/frames?session_id=3&batch_id=phone-1:0007", data=body)
+    retry = store.client.post("/api/ingest/frames?session_id=3&batch_id=phone-1:0007", data=body)
+    assert first.status_code == retry.status_code == 200
+    assert first.get_json()["duplicate"] is False and retry.get_json()["duplicate"] is True
+    assert store.frames == 50
+
+
+def test_route_rejects_bad_requests(store, monkeypatch):
+    assert store.client.post("/api/ingest/frames?session_id=3", data=_ndjson(1)).status_code == 400
+    assert store.client.post("/api/ingest/frames?session_id=3&batch_id=a", data="{bad\n").status_code == 400
+    resp = store.client.post("/api/ingest/frames?session_id=3&batch_id=a", data=_ndjson(1).encode() + b"\xff\xfe\n")
+    assert resp.status_code == 400 and "line 2" in resp.get_json()["error"]
+    monkeypatch.setattr(ingest_mod, "INGEST_MAX_BATCH_FRAMES", 10)
+    assert store.client.post("/api/ingest/frames?session_id=3&batch_id=a", data=_ndjson(11)).status_code == 413
+    assert store.client.post("/api/ingest/frames?session_id=404&batch_id=a", data=_ndjson(1)).status_code == 404
+
+
+def test_full_queue_answers_429_with_retry_after(monkeypatch):
+    release = threading.Event()
+    writer = BatchWriter(flush=lambda batches: (release.wait(), [False] * len(batches))[1], capacity_frames=200)
+    writer.submit(_batch(80, "in-flight"))     # picked up by the writer thread, blocks in flush
+    queued = writer.submit(_batch(80, "queued"))
+    with pytest.raises(IngestBusy):
+        writer.submit(_batch(50, "overflow"))
+
+    monkeypatch.setattr(ingest_mod, "get_writer", lambda: writer)
+    app = Flask(__name__)
+    app.register_blueprint(ingest_mod.ingest_bp, url_prefix="/api/ingest")
+    resp = app.test_client().post("/api/ingest/frames?session_id=1&batch_id=late", data=_ndjson(50))
+    assert resp.status_code == 429 and int(resp.headers["Retry-After"]) >= 1
+
+    release.set()
+    assert queued.result(timeout=2) == {"duplicate": False}
+    assert writer.stats()["rejected_busy"] == 2
+
+
+def test_writer_groups_waiting_batches_and_isolates_failures():
+    release = threading.Event()
+    store = FakeStore()
+
+    def gated(batches):
+        release.wait()
+        return store(batches)
+
+    writer = BatchWriter(flush=gated, group_frames=1000)
+    futures = [writer.submit(_batch(10, "first"))]
+    while writer.stats()["queued_batches"]:   # let the writer take "first" on its own
+        time.sleep(0.001)
+    futures += [writer.submit(_batch(10, f"b{i}", session_id=404 if i == 2 else 1)) for i in range(5)]
+    release.set()
+
+    with pytest.raises(SessionNotFound):
+        futures[3].result(timeout=2)
+    assert all(f.result(timeout=2) == {"duplicate": False} for i, f in enumerate(futures) if i != 3)
+    # first alone, then the five waiting batches as one group, which fails and is retried one by one
+    assert store.groups[:2] == [1, 5] and store.frames == 50
@@ -0,0 +1,121 @@
+import hashlib
+import re
+import time
+
+import numpy as np
+import pytest
+
+from champ.agents import intent_classifier as ic
+from champ.agents.intent_classifier import IntentClassifier, load_exemplars
+from champ.agents.router import make_decision
+from champ.scripts.eval_intent_classifier import evaluate, load_eval
+
+
+class BagOfWords:
+    """Deterministic stand-in for the embedding API: hashed word counts."""
+    dim = 768
+
+    def embed_text(self, text):
+        v = np.zeros(self.dim, dtype="float32")
+        for w in re.findall(r"[a-z']+", text.lower()):
+            v[int(hashlib.md5(w.encode()).hexdigest()[:8], 16) % self.dim] += 1.0
+        return v.tolist()
+
+    def embed_texts(self, texts):
+        return [self.embed_text(t) for t in texts]
+
+
+@pytest.fixture
+def classifier():
+    return IntentClassifier.from_exemplars(BagOfWords(), threshold=0.3, margin=0.0)
+
+
+def test_exemplars_and_eval_set_cover_the_same_intents():
+    exemplar_intents = {(m, i) for m, i, _ in load_exemplars()}
+    eval_intents = {(r["mode"], r["intent"]) for r in load_eval()}
+    assert eval_intents == exemplar_intents
+    assert ("llm", "general") in exemplar_intents
+
+
+def test_classify_picks_the_nearest_intent_and_respects_threshold(classifier):
+    emb = BagOfWords()
+    match = classifier.classify(emb.embed_text("list my past walks"))
+    assert match["mode"] == "db" and match["intent"] == "session_listing" and match["score"] == pytest.approx(1.0)
+
+    strict = IntentClassifier.from_exemplars(emb, threshold=0.99, margin=0.0)
+    assert strict.classify(emb.embed_text("completely unrelated words here")) is None
+    wide_margin = IntentClassifier.from_exemplars(emb, threshold=0.0, margin=2.0)
+    assert wide_margin.classify(emb.embed_text("list my past walks")) is None
+
+
+def test_classification_runs_well_under_a_millisecond(classifier):
+    vec = BagOfWords().embed_text("is my walking getting better")
+    classifier.classify(vec)
+    samples = []
+    for _ in range(200):
+        t0 = time.perf_counter()
+        classifier.classify(vec)
+        samples.append(time.perf_counter() - t0)
+    assert sorted(samples)[100] < 0.001
+
+
+def test_evaluation_reports_accuracy_and_latency(classifier):
+    rows = load_eval()
+    report = evaluate(classifier, rows, BagOfWords().embed_texts([r["q"] for r in rows]))
+    assert report["questions"] == len(rows)
+    assert report["two_stage_accuracy"] > report["router_accuracy"]
+    assert report["promoted"] > 0 and report["classify_us_p50"] < 1000
+
+
+def test_refine_only_promotes_general_fallbacks(monkeypatch, classifier):
+    monkeypatch.setattr(ic, "_get", lambda: (classifier, BagOfWords()))
+    db = {"mode": "db", "intent": "session_listing", "meta": {}}
+    assert ic.refine("list my past walks", db) is db
+
+    promoted = ic.refine("what have I done over the past few weeks",
+                         {"mode": "llm", "intent": "general", "meta": {}})
+    assert (promoted["mode"], promoted["intent"]) == ("db", "session_listing")
+    assert "score" in promoted["classifier"]
+
+    kept = ic.refine("tell me a joke", {"mode": "llm", "intent": "general", "meta": {}})
+    assert kept["intent"] == "general"
+
+
+def test_promoted_decisions_carry_rule_meta():
+    assert make_decision("db", "session_detail", "how did my walk go")["meta"] == {"latest": True}
+    assert make_decision("hybrid", "generate_personal_plan", "a routine for my balance")["meta"] == {"goal": "balance"}
+    assert make_decision("db", "session_listing", "my last 4 sessions of walking")["meta"] == {"last_n": 4}
+
+
+def test_failed_build_retries_after_cooldown_without_blocking(monkeypatch):
+    from champ.rag import embeddings
+
+    monkeypatch.setattr(ic, "INTENT_CLASSIFIER_ENABLED", True)
+    monkeypatch.setattr(ic, "INTENT_CLASSIFIER_RETRY_S", 0.2)
+    monkeypatch.setattr(ic, "_classifier", None)
+    monkeypatch.setattr(ic, "_failed_at", None)
+    monkeypatch.setattr(ic, "_building_pid", None)
+    monkeypatch.setattr(embeddings, "GeminiEmbedder", BagOfWords)
+    attempts = []
+
+    def from_exemplars(embedder, path=None, **kw):
+        attempts.append(1)
+        if len(attempts) == 1:
+            raise RuntimeError("transient embedding error")
+        return IntentClassifier([("llm", "general")], [[1.0, 0.0]])
+    monkeypatch.setattr(IntentClassifier, "from_exemplars", staticmethod(from_exemplars))
+
+    general = {"mode": "llm", "intent": "general", "meta": {}}
+
+    def wait_for(cond):
+        deadline = time.monotonic() + 2
+        while not cond() and time.monotonic() < deadline:
+            time.sleep(0.01)
+
+    assert ic.refine("hello", general) is general          # starts the build, does not wait for it
+    wait_for(lambda: ic._failed_at is not None)
+    assert ic._get() == (None, None) and len(attempts) == 1  # cooling down
+    time.sleep(0.25)
+    ic._get()
+    wait_for(lambda: ic._classifier is not None)
+    assert len(attempts) == 2 and ic.classifier_stats()["ready"]
@@ -0,0 +1,121 @@
+import pytest
+
+from champ.llm import admission as adm
+from champ.llm import provider
+from champ.llm.admission import Admission, OK, THROTTLED, FAILURE, NEUTRAL
+
+
+class Clock:
+    def __init__(self):
+        self.t = 100.0
+
+    def __call__(self):
+        return self.t
+
+
+def _make(**kw):
+    clock = Clock()
+    opts = dict(max_limit=8, min_limit=1, initial=4, latency_target_s=2, wait_s=0,
+                failure_threshold=3, cooldown_s=30, clock=clock)
+    opts.update(kw)
+    return Admission(**opts), clock
+
+
+def test_limit_rejects_when_full_and_adapts_aimd():
+    a, clock = _make(initial=2)
+    assert a.acquire() == (None, False) and a.acquire() == (None, False)
+    assert "limit" in a.acquire()[0]
+
+    a.release(clock(), OK)          # fast success: additive increase
+    assert a.limit == pytest.approx(2.5)
+    clock.t += 5
+    a.release(clock() - 3, OK)      # slower than target: multiplicative decrease
+    assert a.limit == pytest.approx(1.75)
+    assert a.stats()["in_flight"] == 0
+
+
+def test_throttling_shrinks_limit_once_per_burst():
+    a, clock = _make(initial=8)
+    for _ in range(4):
+        a.acquire()
+    for _ in range(2):
+        a.release(clock(), THROTTLED)
+    assert a.limit == pytest.approx(8 * adm.LLM_LIMIT_BACKOFF)
+
+
+def test_breaker_opens_fails_fast_and_recovers_through_one_probe():
+    a, clock = _make()
+    for _ in range(3):
+        a.acquire()
+        a.release(clock(), FAILURE)
+    assert a.stats()["state"] == "open"
+    assert a.acquire() == ("circuit open", False)
+
+    clock.t += 31                    # cooldown over: one probe allowed
+    assert a.acquire() == (None, True)
+    assert a.acquire() == ("circuit open", False)
+    a.release(clock(), FAILURE, probe=True)  # probe failed: open again
+    assert a.is_open()
+
+    clock.t += 31
+    _, probe = a.acquire()
+    a.release(clock(), OK, probe)
+    s = a.stats()
+    assert s["state"] == "closed" and s["breaker_opens"] == 2
+
+
+def test_only_the_probe_release_decides_a_half_open_circuit():
+    a, clock = _make(failure_threshold=2)
+    a.acquire()                      # admitted while closed, still in flight below
+    for _ in range(2):
+        a.acquire()
+        a.release(clock(), FAILURE)
+    clock.t += 31
+    _, probe = a.acquire()
+    assert probe
+    a.release(clock(), OK)           # the old attempt finishing is not the probe
+    assert a.stats()["state"] == "half_open"
+    assert a.acquire() == ("circuit open", False)
+    a.release(clock(), OK, probe)
+    assert a.stats()["state"] == "closed"
+
+
+def test_client_errors_do_not_trip_the_breaker():
+    a, clock = _make()
+    for _ in range(5):
+        a.acquire()
+        a.release(clock(), NEUTRAL)
+    assert a.stats()["state"] == "closed"
+    assert adm.outcome_for_status(400) == NEUTRAL and adm.outcome_for_status(503) == FAILURE
+
+
+def test_open_circuit_makes_safe_call_llm_fall_back_without_upstream(monkeypatch):
+    a, clock = _make(failure_threshold=1)
+    a.acquire()
+    a.release(clock(), FAILURE)
+    monkeypatch.setattr(provider, "get_admission", lambda: a)
+    monkeypatch.setenv("GEMINI_API_KEY", "k")
+
+    class NoUpstream:
+        def post(self, *a, **k):
+            raise AssertionError("upstream must not be called while the circuit is open")
+
+    monkeypatch.setattr(provider, "get_session", NoUpstream)
+    assert provider.safe_call_llm("sys", "q") == (None, True)
+
+
+def test_async_acquire_waits_for_a_released_slot():
+    import asyncio
+
+    a = Admission(max_limit=1, min_limit=1, initial=1, wait_s=1.0)
+
+    async def scenario():
+        assert await a.aacquire() == (None, False)
+        waiter = asyncio.create_task(a.aacquire())
+        await asyncio.sleep(0.05)
+        assert not waiter.done()          # over the limit: polling, not blocking the loop
+        a.release(a.clock(), OK)
+        assert await waiter == (None, False)
+        assert "limit" in (await a.aacquire(max_wait=0))[0]
+
+    asyncio.run(scenario())
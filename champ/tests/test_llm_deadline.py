@@ -0,0 +1,106 @@
+import time
+import threading
+
+import pytest
+
+from champ.llm import deadline, provider
+from champ.llm.admission import Admission
+from champ.llm.deadline import deadline_scope, remaining
+
+
+class FakeResp:
+    def __init__(self, status, text="ok"):
+        self.status_code = status
+        self.ok = status < 400
+        self.text = text
+
+    def json(self):
+        return {"candidates": [{"content": {"parts": [{"text": self.text}]}}]}
+
+    def raise_for_status(self):
+        if not self.ok:
+            raise provider.requests.exceptions.HTTPError(f"{self.status_code}", response=self)
+
+
+@pytest.fixture
+def fake_upstream(monkeypatch):
+    monkeypatch.setenv("GEMINI_API_KEY", "k")
+    monkeypatch.setattr(provider, "get_admission", lambda: Admission(wait_s=0, failure_threshold=100))
+    monkeypatch.setattr(provider, "_log_timing", lambda *a: None)
+    monkeypatch.setattr(provider, "LLM_COALESCE_ENABLED", False)
+
+    def install(post):
+        monkeypatch.setattr(provider, "get_session", lambda: type("S", (), {"post": lambda self, url, **k: post(**k)})())
+    return install
+
+
+def test_nested_scopes_only_tighten_the_budget():
+    assert remaining() is None
+    with deadline_scope(10):
+        with deadline_scope(1):
+            assert 0 < remaining() <= 1
+        with deadline_scope(100):
+            assert remaining() <= 10
+    assert remaining() is None
+
+
+def test_retries_stop_at_the_budget(fake_upstream, monkeypatch):
+    monkeypatch.setenv("LLM_BACKOFF_BASE", "0.2")
+    timeouts = []
+
+    def post(timeout, **k):
+        timeouts.append(timeout)
+        time.sleep(0.1)
+        return FakeResp(503)
+
+    fake_upstream(post)
+    before = provider.budget_stats()["deadline_exceeded"]
+    t0 = time.monotonic()
+    with deadline_scope(0.8):
+        assert provider.safe_call_llm("sys", "q") == (None, True)
+    assert time.monotonic() - t0 < 0.9
+    assert provider.budget_stats()["deadline_exceeded"] == before + 1
+    assert all(read <= 0.8 for _, read in timeouts)
+
+
+def test_slow_attempt_is_hedged_and_fast_response_wins(fake_upstream, monkeypatch):
+    monkeypatch.setattr(deadline, "LLM_HEDGE_ENABLED", True)
+    monkeypatch.setattr(deadline, "LLM_HEDGE_AFTER_S", 0.05)
+    calls = []
+    lock = threading.Lock()
+
+    def post(**k):
+        with lock:
+            calls.append(1)
+            n = len(calls)
+        if n == 1:
+            time.sleep(1.0)
+            return FakeResp(200, "slow")
+        return FakeResp(200, "fast")
+
+    fake_upstream(post)
+    before = provider.budget_stats()
+    t0 = time.monotonic()
+    with deadline_scope(5):
+        assert provider.call_llm_text("sys", "q") == "fast"
+    assert time.monotonic() - t0 < 0.5
+    after = provider.budget_stats()
+    assert after["hedges_sent"] == before["hedges_sent"] + 1
+    assert after["hedge_wins"] == before["hedge_wins"] + 1
+
+
+def test_hedged_attempts_see_the_request_budget(fake_upstream, monkeypatch):
+    monkeypatch.setattr(deadline, "LLM_HEDGE_ENABLED", True)
+    monkeypatch.setattr(deadline, "LLM_HEDGE_AFTER_S", 0.05)
+    seen = []
+
+    def post(**k):
+        seen.append(remaining())
+        if len(seen) == 1:
+            time.sleep(0.3)
+        return FakeResp(200, "ok")
+
+    fake_upstream(post)
+    with deadline_scope(5):
+        assert provider.call_llm_text("sys", "q") == "ok"
+    assert len(seen) == 2 and all(r is not None and 0 < r <= 5 for r in seen)
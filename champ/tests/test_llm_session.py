@@ -0,0 +1,142 @@
+import json
+import threading
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+import pytest
+
+from champ.llm import provider, session
+
+
+class _Gemini(BaseHTTPRequestHandler):
+    protocol_version = "HTTP/1.1"  # keep-alive
+    statuses = []
+
+    def do_POST(self):
+        self.rfile.read(int(self.headers.get("Content-Length", 0)))
+        status = self.statuses.pop(0) if self.statuses else 200
+        body = json.dumps({"candidates": [{"content": {"parts": [{"text": "ok"}]}}]}).encode()
+        self.send_response(status)
+        self.send_header("Content-Type", "application/json")
+        self.send_header("Content-Length", str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+    def log_message(self, *a):
+        pass
+
+
+@pytest.fixture
+def server(monkeypatch):
+    srv = ThreadingHTTPServer(("127.0.0.1", 0), _Gemini)
+    threading.Thread(target=srv.serve_forever, daemon=True).start()
+    monkeypatch.setattr(provider, "LLM_API_BASE", f"http://127.0.0.1:{srv.server_address[1]}")
+    monkeypatch.setenv("GEMINI_API_KEY", "k")
+    monkeypatch.setenv("LLM_BACKOFF_BASE", "0")
+    monkeypatch.setattr(session, "_session", None)
+    yield srv
+    srv.shutdown()
+
+
+def test_calls_and_retries_reuse_one_pooled_connection(server):
+    _Gemini.statuses = [503]
+    before = session.http_stats()
+
+    assert provider.call_llm_text("sys", "hi") == "ok"  # 503 then 200 on the same connection
+    first = session.last_call_timing()
+    assert provider.call_llm_text("sys", "again") == "ok"
+    second = session.last_call_timing()
+
+    after = session.http_stats()
+    assert after["calls"] - before["calls"] == 3
+    assert after["new_connections"] - before["new_connections"] == 1
+    assert first["reused_connection"] and second["reused_connection"]
+    assert second["dns_ms"] == second["connect_ms"] == second["tls_ms"] == 0
+    assert 0 <= second["server_ms"] <= second["total_ms"]
+
+
+def test_new_connection_timing_is_broken_down(server):
+    _Gemini.statuses = []
+    provider.call_llm_text("sys", "hi")
+    t = session.last_call_timing()
+    assert t["reused_connection"] is False
+    assert t["connect_ms"] > 0 and t["dns_ms"] >= 0 and t["tls_ms"] >= 0  # plain http: no handshake
+    assert t["dns_ms"] + t["connect_ms"] + t["server_ms"] <= t["total_ms"] + 1
+
+
+def test_identical_concurrent_calls_share_one_upstream_request(monkeypatch):
+    release = threading.Event()
+    upstream = []
+
+    def slow_call(system_prompt, user_prompt, model_name):
+        upstream.append(user_prompt)
+        release.wait(5)
+        return f"answer to {user_prompt}"
+
+    monkeypatch.setattr(provider, "_call_llm_text", slow_call)
+    before = provider.coalescing_stats()
+    results = []
+    threads = [threading.Thread(target=lambda q=q: results.append(provider.call_llm_text("sys", q)))
+               for q in ["same"] * 5 + ["other"]]
+    for t in threads:
+        t.start()
+    while provider.coalescing_stats()["calls"] - before["calls"] < 6:
+        pass
+    release.set()
+    for t in threads:
+        t.join()
+
+    assert sorted(upstream) == ["other", "same"]
+    assert results.count("answer to same") == 5
+    after = provider.coalescing_stats()
+    assert after["coalesced"] - before["coalesced"] == 4
+    assert after["in_flight"] == 0
+
+
+def test_coalesced_callers_all_see_the_upstream_error(monkeypatch):
+    release = threading.Event()
+
+    def failing(*a):
+        release.wait(5)
+        raise provider.ProviderError("HTTP 503")
+
+    monkeypatch.setattr(provider, "_call_llm_text", failing)
+    errors = []
+
+    def call():
+        try:
+            provider.call_llm_text("sys", "x")
+        except provider.ProviderError as e:
+            errors.append(str(e))
+
+    before = provider.coalescing_stats()["calls"]
+    threads = [threading.Thread(target=call) for _ in range(3)]
+    for t in threads:
+        t.start()
+    while provider.coalescing_stats()["calls"] - before < 3:
+        pass
+    release.set()
+    for t in threads:
+        t.join()
+    assert errors == ["HTTP 503"] * 3
+
+
+def test_async_provider_retries_and_coalesces(server):
+    pytest.importorskip("httpx")
+    import asyncio
+    from champ.llm import aio
+
+    _Gemini.statuses = [503]
+
+    async def scenario():
+        try:
+            first = await aio.acall_llm_text("sys", "hi")  # 503 then 200
+            before = aio.aio_stats()
+            same = await asyncio.gather(*(aio.acall_llm_text("sys", "same") for _ in range(5)))
+            return first, same, before, aio.aio_stats()
+        finally:
+            await aio.close_client()
+
+    first, same, before, after = asyncio.run(scenario())
+    assert first == "ok" and same == ["ok"] * 5
+    assert after["upstream"] - before["upstream"] == 1
+    assert after["coalesced"] - before["coalesced"] == 4
@@ -0,0 +1,154 @@
+import json
+import os
+
+import numpy as np
+import pytest
+from flask import Flask
+
+from champ.analytics import frame_store, pressure_map
+from champ.analytics.gait import SENSORS, SessionFrames
+from champ.analytics.pressure_map import (SENSOR_LAYOUT, PressureMap, compute_pressure, pressure_context,
+                                          write_pressure)
+from champ.routes import chat
+from champ.scripts.bench_gait import synthetic_walk
+
+
+def _standing(seconds=30.0, hz=100, ml_mm=4.0, ap_mm=6.0, right_share=0.5):
+    """Both feet loaded; pressure shifted so the COP of each foot moves by known amounts."""
+    t = np.arange(int(seconds * hz)) / hz
+    base = np.full(SENSORS, 1.0)
+    # Weights tilted along x and y move the COP linearly (small tilts, all weights stay positive)
+    x, y = SENSOR_LAYOUT[:, 0], SENSOR_LAYOUT[:, 1] - SENSOR_LAYOUT[:, 1].mean()
+    sx, sy = np.sin(2 * np.pi * 0.25 * t)[:, None], np.cos(2 * np.pi * 0.4 * t)[:, None]
+    foot = base + 0.002 * ml_mm * sx * x + 0.0002 * ap_mm * sy * y
+    left = (foot * 2 * (1 - right_share)).astype(np.float32)
+    right = (foot * 2 * right_share).astype(np.float32)
+    return SessionFrames(t, left, right)
+
+
+def test_heatmaps_and_shares():
+    frames = _standing(right_share=0.6)
+    res = compute_pressure(frames)
+    s = res["summary"]
+    assert s["load_left_pct"] == pytest.approx(40.0, abs=0.1)
+    for side in ("left", "right"):
+        foot = res[side]
+        np.testing.assert_allclose(foot["share"].sum(), 1.0, atol=1e-6)
+        assert np.all(foot["peak"] >= foot["mean"])
+        f = s["feet"][side]
+        assert f["heel_pct"] + f["mid_pct"] + f["toe_pct"] == pytest.approx(100.0, abs=0.2)
+        assert f["loaded_s"] == pytest.approx(30.0, abs=0.1)
+    np.testing.assert_allclose(res["left"]["mean"], frames.left.mean(axis=0), rtol=1e-5)
+
+
+def test_cop_matches_a_per_frame_weighted_mean():
+    frames = _standing()
+    res = compute_pressure(frames)
+    i = 123
+    p = frames.right[i].astype(np.float64)
+    np.testing.assert_allclose(res["right"]["cop"][i], p @ SENSOR_LAYOUT / p.sum(), rtol=1e-9)
+    # Equal feet: the two-foot COP sits midway in ML; its AP equals either foot's
+    body = res["cop_body"][i]
+    assert body[0] == pytest.approx(0.0, abs=1e-6)
+    assert body[1] == pytest.approx(res["left"]["cop"][i][1], rel=1e-9)
+
+
+def test_sway_tracks_the_imposed_motion():
+    quiet = compute_pressure(_standing(ml_mm=1.0, ap_mm=1.0))["summary"]["sway"]
+    loose = compute_pressure(_standing(ml_mm=4.0, ap_mm=4.0))["summary"]["sway"]
+    assert quiet["duration_s"] == pytest.approx(30.0, abs=0.1)
+    assert loose["rms_ap_mm"] > 2 * quiet["rms_ap_mm"]
+    assert loose["velocity_mm_s"] > 2 * quiet["velocity_mm_s"]
+    assert loose["ellipse95_mm2"] >= quiet["ellipse95_mm2"]
+
+    # Shifting weight between feet is ML sway of the two-foot COP
+    frames = _standing(ml_mm=0.0, ap_mm=0.0)
+    shift = 1 + 0.1 * np.sin(2 * np.pi * 0.2 * frames.t)[:, None]
+    frames = SessionFrames(frames.t, (frames.left * shift).astype(np.float32),
+                           (frames.right * (2 - shift)).astype(np.float32))
+    sway = compute_pressure(frames)["summary"]["sway"]
+    assert sway["rms_ml_mm"] == pytest.approx(100 * 0.1 / np.sqrt(2), rel=0.05)
+    assert sway["rms_ap_mm"] < 0.5
+
+
+def test_walking_double_support_is_not_counted_as_standing():
+    walk, _ = synthetic_walk(120, hz=100, pause_every_s=1000)
+    assert compute_pressure(walk)["summary"]["sway"] is None
+
+
+def test_stored_map_round_trip(tmp_path):
+    frames, _ = synthetic_walk(300, hz=100)
+    path = str(tmp_path / "s.pmap")
+    header = write_pressure(path, frames, session_id=4)
+    pm = PressureMap(path)
+
+    assert header["kind"] == "pressure" and pm.summary["load_left_pct"] is not None
+    # ~10 Hz float16 tracks instead of 100 Hz float32 frames
+    assert (tmp_path / "s.pmap").stat().st_size < len(frames) * 2 * 4 * SENSORS / 10
+    heat = pm.heatmap()
+    assert len(heat["left"]["mean"]) == SENSORS and len(heat["right"]["peak"]) == SENSORS
+    tr = pm.trajectory(200)
+    assert len(tr["t"]) <= 200 and len(tr["body"]["x"]) == len(tr["t"])
+    json.dumps(tr, allow_nan=False)   # unloaded buckets come back as null, not NaN
+
+
+def test_endpoint_and_analysis_context(tmp_path, monkeypatch):
+    from champ.routes.metrics import metrics_bp
+
+    frames = _standing(right_share=0.55)
+    monkeypatch.setattr(frame_store, "FRAME_STORE_DIR", str(tmp_path))
+    monkeypatch.setattr(pressure_map, "source_state", lambda sid: (len(frames), len(frames)))
+    monkeypatch.setattr(pressure_map, "load_session_frames", lambda sid: pytest.fail("computed on request"))
+    assert pressure_context(8) == {}
+    write_pressure(pressure_map.pressure_path(8), frames, session_id=8)
+
+    app = Flask(__name__)
+    app.register_blueprint(metrics_bp, url_prefix="/api/metrics")
+    client = app.test_client()
+    res = client.get("/api/metrics/pressure_map?session_id=8&points=100")
+    assert res.status_code == 200
+    body = res.get_json()
+    assert body["summary"]["sway"]["frames"] == 3000 and len(body["cop"]["t"]) <= 100
+    assert set(body["heatmap"]) == {"left", "right"}
+    assert client.get("/api/metrics/pressure_map").status_code == 400
+
+    ctx = pressure_context(8)
+    assert ctx["load_left_pct"] == pytest.approx(45.0, abs=0.1) and "standing_sway_rms_ap_mm" in ctx
+    text = chat._compact_context_text({"session": {"id": 8, "posture_score": 71.0}, "pressure": ctx})
+    assert "Pressure distribution" in text and "load_left_pct: 45.0" in text
+
+
+def test_live_sessions_are_recomputed_and_empty_ones_never_stored(tmp_path, monkeypatch):
+    frames = _standing()
+    monkeypatch.setattr(frame_store, "FRAME_STORE_DIR", str(tmp_path))
+    monkeypatch.setattr(pressure_map, "PRESSURE_RECHECK_S", 0.0)
+    live = {"n": 0}
+    monkeypatch.setattr(pressure_map, "source_state",
+                        lambda sid: (live["n"], live["n"] or None))
+    monkeypatch.setattr(pressure_map, "load_session_frames",
+                        lambda sid: SessionFrames(frames.t[:live["n"]], frames.left[:live["n"]], frames.right[:live["n"]]))
+
+    assert pressure_map.session_pressure(5) is None
+    assert not os.path.exists(pressure_map.pressure_path(5))
+
+    live["n"] = 1000
+    assert pressure_map.session_pressure(5).header["frames"] == 1000
+    live["n"] = 3000
+    assert pressure_context(5) == {}                       # stale map: left out of the prompt, not rebuilt
+    assert pressure_map.session_pressure(5).header["frames"] == 3000
+    assert pressure_context(5)["standing_sway_duration_s"] == pytest.approx(30.0, abs=0.1)
+
+
+def test_context_reads_skip_the_build_lock_and_recheck_sparingly(tmp_path, monkeypatch):
+    frames = _standing()
+    monkeypatch.setattr(frame_store, "FRAME_STORE_DIR", str(tmp_path))
+    checks = []
+    monkeypatch.setattr(pressure_map, "source_state", lambda sid: checks.append(sid) or (len(frames), None))
+    write_pressure(pressure_map.pressure_path(6), frames, session_id=6)
+
+    # A build of this session holds its lock: chat context must not wait for it
+    with frame_store.session_lock(6):
+        assert pressure_context(6)["load_left_pct"] == pytest.approx(50.0, abs=0.1)
+        pressure_context(6)
+    assert pressure_map.session_pressure(6) is not None
+    assert checks == [6]                                  # later reads within PRESSURE_RECHECK_S
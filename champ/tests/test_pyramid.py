@@ -0,0 +1,167 @@
+import os
+import threading
+import time
+
+import numpy as np
+import pytest
+from flask import Flask
+
+from champ.analytics import frame_store, pyramid
+from champ.analytics.gait import SessionFrames
+from champ.analytics.pyramid import CHANNELS, Pyramid, channel_values, write_pyramid
+from champ.scripts.bench_gait import synthetic_walk
+
+
+@pytest.fixture(scope="module")
+def walk():
+    frames, _ = synthetic_walk(1800, hz=100)
+    return frames
+
+
+@pytest.fixture(scope="module")
+def pyr(walk, tmp_path_factory):
+    path = str(tmp_path_factory.mktemp("pyr") / "s.pyr")
+    write_pyramid(path, walk, session_id=3)
+    return Pyramid(path)
+
+
+def _brute(walk, res, row):
+    """Min/max of the raw channel per returned bucket but the last, found from the bucket start times."""
+    v = channel_values(walk)[row].astype(np.float16).astype(np.float64)
+    rel = walk.t - walk.t[0]
+    starts = np.searchsorted(rel, np.array(res["t"]) - 5e-5)   # labels are rounded to 0.1 ms
+    return (np.array([v[a:b].min() for a, b in zip(starts[:-1], starts[1:])]),
+            np.array([v[a:b].max() for a, b in zip(starts[:-1], starts[1:])]))
+
+
+def test_buckets_bound_the_raw_signal(walk, pyr):
+    res = pyr.query(100.0, 1300.0, width=500, channels=["left", "right_toe"])
+    assert res["level"] >= 1 and 0 < len(res["t"]) <= 500
+    lo, hi = np.array(res["series"]["left"]["min"]), np.array(res["series"]["left"]["max"])
+    assert np.all(lo <= hi)
+
+    # Buckets cover whole level blocks, so their extremes must match a pass over the raw frames
+    bl, bh = _brute(walk, res, CHANNELS.index("left"))
+    np.testing.assert_allclose(lo[:-1], bl, atol=1e-3)
+    np.testing.assert_allclose(hi[:-1], bh, atol=1e-3)
+
+    # The window's global extremes survive downsampling
+    t = np.array(res["t"])
+    v = channel_values(walk)[CHANNELS.index("left")]
+    rel = walk.t - walk.t[0]
+    inside = (rel >= t[0]) & (rel < t[-1])
+    assert hi.max() >= float(v[inside].max()) - 0.01
+    assert lo.min() <= float(v[inside].min()) + 0.01
+
+
+def test_short_windows_return_the_frames_themselves(walk, pyr):
+    res = pyr.query(10.0, 14.0, width=800, channels=["left_heel"])
+    assert res["level"] == 0 and res["bucket_frames"] == 1
+    assert len(res["t"]) == 401
+    s = res["series"]["left_heel"]
+    assert s["min"] == s["max"]
+    i0 = int(np.searchsorted(walk.t - walk.t[0], 10.0 - 1e-9))
+    np.testing.assert_allclose(s["min"][:5], walk.left[i0:i0 + 5, 0:3].sum(axis=1), atol=5e-3)
+
+
+def test_sessions_too_short_for_a_level_are_folded_from_the_frames(walk, tmp_path):
+    short = SessionFrames(walk.t[:600], walk.left[:600], walk.right[:600])
+    path = str(tmp_path / "short.pyr")
+    write_pyramid(path, short)
+    pyr = Pyramid(path)
+    assert pyr.header["levels"] == 0
+
+    res = pyr.query(width=100, channels=["left"])
+    assert res["level"] == 0 and len(res["t"]) == 100
+    bl, bh = _brute(short, res, CHANNELS.index("left"))
+    np.testing.assert_allclose(res["series"]["left"]["min"][:-1], bl, atol=1e-3)
+    np.testing.assert_allclose(res["series"]["left"]["max"][:-1], bh, atol=1e-3)
+    assert len(pyr.query(2.0, 5.5, width=50)["t"]) == 50
+
+
+def test_width_is_bounded_and_channels_checked(pyr):
+    assert len(pyr.query(width=10 ** 6)["t"]) <= pyramid.MAX_WIDTH
+    assert len(pyr.query(width=300)["t"]) <= 300
+    assert set(pyr.query(width=50)["series"]) == set(CHANNELS)
+    with pytest.raises(ValueError):
+        pyr.query(channels=["left", "nose"])
+
+
+def test_queries_are_fast_regardless_of_window(pyr):
+    pyr.query(width=800, channels=["left", "right"])   # page in
+    for start, end in ((None, None), (0.0, 60.0), (500.0, 1500.0)):
+        t0 = time.perf_counter()
+        for _ in range(20):
+            pyr.query(start, end, width=800, channels=["left", "right"])
+        assert (time.perf_counter() - t0) / 20 < 0.05
+
+
+def test_pressure_series_endpoint(tmp_path, monkeypatch, walk):
+    from champ.routes.metrics import metrics_bp
+
+    monkeypatch.setattr(frame_store, "FRAME_STORE_DIR", str(tmp_path))
+    monkeypatch.setattr(pyramid, "source_state", lambda sid: (len(walk), len(walk)))
+    monkeypatch.setattr(pyramid, "load_session_frames", lambda sid: pytest.fail("built on request"))
+    write_pyramid(pyramid.pyramid_path(11), walk, session_id=11)
+
+    app = Flask(__name__)
+    app.register_blueprint(metrics_bp, url_prefix="/api/metrics")
+    client = app.test_client()
+
+    res = client.get("/api/metrics/pressure_series?session_id=11&width=400")
+    assert res.status_code == 200
+    body = res.get_json()
+    assert body["frames"] == len(walk) and set(body["series"]) == {"left", "right"}
+    assert len(body["t"]) <= 400 and "ms" in body
+
+    assert client.get("/api/metrics/pressure_series?session_id=11&channels=elbow").status_code == 400
+    assert client.get("/api/metrics/pressure_series").status_code == 400
+    assert pyramid.pyramid_stats()["open"] >= 1
+
+
+def _head(frames, n):
+    return SessionFrames(frames.t[:n], frames.left[:n], frames.right[:n])
+
+
+def test_live_sessions_are_rebuilt_and_empty_ones_never_stored(tmp_path, monkeypatch, walk):
+    monkeypatch.setattr(frame_store, "FRAME_STORE_DIR", str(tmp_path))
+    monkeypatch.setattr(pyramid, "PYRAMID_RECHECK_S", 0.0)
+    live = {"n": 0}
+    monkeypatch.setattr(pyramid, "source_state", lambda sid: (live["n"], live["n"] or None))
+    monkeypatch.setattr(pyramid, "load_session_frames", lambda sid: _head(walk, live["n"]))
+
+    assert pyramid.session_pyramid(21) is None
+    assert not os.path.exists(pyramid.pyramid_path(21))
+
+    live["n"] = 5000
+    assert len(pyramid.session_pyramid(21)) == 5000
+    live["n"] = 20000                                   # more frames arrived
+    assert len(pyramid.session_pyramid(21)) == 20000
+    assert len(pyramid.session_pyramid(21)) == 20000    # current: reused, not rebuilt
+
+
+def test_concurrent_first_requests_build_once(tmp_path, monkeypatch, walk):
+    monkeypatch.setattr(frame_store, "FRAME_STORE_DIR", str(tmp_path))
+    monkeypatch.setattr(pyramid, "source_state", lambda sid: (len(walk), len(walk)))
+    loads = []
+
+    def load(sid):
+        loads.append(sid)
+        time.sleep(0.05)
+        return walk
+    monkeypatch.setattr(pyramid, "load_session_frames", load)
+
+    errors, sizes = [], []
+
+    def request():
+        try:
+            sizes.append(len(pyramid.session_pyramid(31)))
+        except Exception as e:
+            errors.append(e)
+    threads = [threading.Thread(target=request) for _ in range(6)]
+    for t in threads:
+        t.start()
+    for t in threads:
+        t.join()
+    assert not errors and sizes == [len(walk)] * 6 and loads == [31]
+    assert [p.name for p in tmp_path.iterdir()] == ["session_31.pyr"]   # no temp files left behind
@@ -0,0 +1,62 @@
+import pytest
+
+from champ.llm import response_cache
+from champ.llm.response_cache import ResponseCache, make_key
+
+
+@pytest.fixture(params=["memory", "disk"])
+def cache(request, tmp_path):
+    return ResponseCache(backend=request.param, ttl_s=60, cache_dir=str(tmp_path), max_items=10)
+
+
+def test_key_depends_on_template_model_and_data():
+    base = make_key("insights_start:v1", "m", "posture:60")
+    assert base == make_key("insights_start:v1", "m", "posture:60")
+    assert base != make_key("insights_start:v2", "m", "posture:60")
+    assert base != make_key("insights_start:v1", "m2", "posture:60")
+    assert base != make_key("insights_start:v1", "m", "posture:61")
+
+
+def test_get_put_ttl_and_user_invalidation(cache, monkeypatch):
+    cache.put(1, "k1", "answer one")
+    cache.put(1, "k2", "answer two")
+    cache.put(2, "k3", "other user")
+    assert cache.get(1, "k1") == "answer one"
+    assert cache.get(2, "k1") is None  # entries are scoped to their user
+
+    assert cache.invalidate_user(1) == 2
+    assert cache.get(1, "k2") is None and cache.get(2, "k3") == "other user"
+
+    now = response_cache.time.time()
+    monkeypatch.setattr(response_cache.time, "time", lambda: now + 61)
+    assert cache.get(2, "k3") is None
+    s = cache.stats()
+    assert s["hits"] == 2 and s["expired"] == 1 and s["invalidated"] == 2
+
+
+def test_same_key_is_kept_per_user(cache):
+    cache.put(1, "k", "answer for one")
+    cache.put(2, "k", "answer for two")
+    assert cache.get(1, "k") == "answer for one"
+    assert cache.get(2, "k") == "answer for two"
+    assert cache.invalidate_user(2) == 1
+    assert cache.get(1, "k") == "answer for one" and cache.get(2, "k") is None
+
+
+def test_cached_llm_calls_provider_once_and_skips_failures(monkeypatch):
+    monkeypatch.setattr(response_cache, "_cache", ResponseCache(backend="memory", ttl_s=60))
+    monkeypatch.setattr(response_cache, "LLM_CACHE_ENABLED", True)
+    calls = []
+
+    def fake_llm(system, user, model=None):
+        calls.append(user)
+        return (None, True) if user == "down" else ("insight", False)
+
+    monkeypatch.setattr(response_cache, "safe_call_llm", fake_llm)
+    args = ("insights_start:v1", 7, "sys")
+    assert response_cache.cached_llm(*args, "go", "data", "m") == ("insight", False, False)
+    assert response_cache.cached_llm(*args, "go", "data", "m") == ("insight", False, True)
+    assert response_cache.cached_llm(*args, "go", "new data", "m")[2] is False
+    response_cache.cached_llm(*args, "down", "data", "m")
+    response_cache.cached_llm(*args, "down", "data", "m")
+    assert calls == ["go", "go", "down", "down"]
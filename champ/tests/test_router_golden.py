@@ -0,0 +1,29 @@
+import json
+
+from champ.agents.router import route
+from champ.scripts.bench_router import GOLDEN_PATH, corpus
+
+
+def _golden():
+    with open(GOLDEN_PATH, encoding="utf-8") as f:
+        return [json.loads(line) for line in f]
+
+
+def test_router_matches_recorded_decisions():
+    golden = _golden()
+    assert len(golden) > 3000
+    mismatches = [(g["q"], g["decision"], route(g["q"])) for g in golden if route(g["q"]) != g["decision"]]
+    assert mismatches == []
+
+
+def test_golden_file_covers_the_generated_corpus():
+    assert [g["q"] for g in _golden()] == corpus()
+    intents = {g["decision"]["intent"] for g in _golden()}
+    assert intents == {"session_detail", "session_listing", "health_summary", "generate_personal_plan",
+                       "knowledge_answer", "open_personal_analysis", "general_help", "general"}
+
+
+def test_session_id_rules_keep_their_priority():
+    assert route("session 3 and session id 99")["meta"] == {"session_id": 99}
+    assert route("last 5 session 3")["meta"] == {"session_id": 3}
+    assert route("last 2 sessions and last 4 sessions")["meta"] == {"last_n": 2}
@@ -0,0 +1,79 @@
+import numpy as np
+
+from champ.rag.semantic_cache import SemanticCache, is_personal, normalize_question
+
+
+def _vec(seed, dim=8):
+    return np.random.default_rng(seed).standard_normal(dim).astype("float32").tolist()
+
+
+def _near(v, eps=0.01):
+    return (np.array(v) + eps).tolist()
+
+
+def test_personal_questions_are_not_cacheable():
+    assert not is_personal("How do I care for my insoles?")
+    assert not is_personal("what is gait symmetry")
+    assert is_personal("How was my last session?")
+    assert is_personal("show my posture scores")
+    assert is_personal("what happened in session 42")
+    assert normalize_question("  How do I  wash insoles?? ") == "how do i wash insoles"
+
+
+def test_near_duplicate_hits_within_scope_and_version(tmp_path):
+    cache = SemanticCache(str(tmp_path), dim=8, threshold=0.95, max_entries=10)
+    v = _vec(1)
+    cache.put("rag", "How do I care for my insoles?", "c1", v, "Wipe them with a damp cloth [1].")
+
+    hit = cache.lookup("rag", "how should i clean my insoles", "c1", _near(v))
+    assert hit["answer"].startswith("Wipe") and hit["score"] >= 0.95
+    assert cache.lookup("llm", "how should i clean my insoles", "c1", _near(v)) is None  # other scope
+    assert cache.lookup("rag", "unrelated", "c1", _vec(2)) is None                      # below threshold
+    # Corpus re-ingested: the old answer is stale and dropped
+    assert cache.lookup("rag", "how should i clean my insoles", "c2", _near(v)) is None
+    assert len(cache.store) == 0
+    s = cache.stats()
+    assert (s["hits"], s["misses"], s["stale"]) == (1, 3, 1)
+
+
+def test_personal_and_non_cacheable_modes_are_bypassed(tmp_path):
+    cache = SemanticCache(str(tmp_path), dim=8)
+    cache.put("hybrid", "summarize my health", "v", _vec(1), "x")
+    cache.put("rag", "what were my steps yesterday", "v", _vec(2), "x")
+    assert len(cache.store) == 0
+    assert cache.lookup("rag", "how was my last session", "v", _vec(3)) is None
+    assert cache.stats()["bypassed"] == 1
+
+
+def test_lru_eviction_and_persistence(tmp_path):
+    cache = SemanticCache(str(tmp_path), dim=8, threshold=0.99, max_entries=3)
+    vecs = [_vec(i) for i in range(4)]
+    for i in range(3):
+        cache.put("llm", f"question {chr(97 + i)}", "v", vecs[i], f"answer {i}")
+    assert cache.lookup("llm", "question a", "v", vecs[0])  # refreshes entry 0
+    cache.put("llm", "question d", "v", vecs[3], "answer 3")
+    assert cache.stats()["evicted"] == 1
+    assert cache.lookup("llm", "question b", "v", vecs[1]) is None
+    cache.save()
+
+    reloaded = SemanticCache(str(tmp_path), dim=8, threshold=0.99, max_entries=3)
+    assert reloaded.lookup("llm", "question d", "v", vecs[3])["answer"] == "answer 3"
+
+
+def test_each_process_owns_a_directory_and_adopts_dead_ones(tmp_path):
+    import os
+    import subprocess
+    import sys
+    from champ.rag.semantic_cache import process_dir
+
+    dead = subprocess.Popen([sys.executable, "-c", "pass"])
+    dead.wait()
+    (tmp_path / f"worker_{os.getppid()}").mkdir()         # a live process keeps its directory
+    (tmp_path / f"worker_{dead.pid}").mkdir()
+    (tmp_path / f"worker_{dead.pid}" / "meta.jsonl").write_text("")
+
+    mine = process_dir(str(tmp_path))
+    assert mine == str(tmp_path / f"worker_{os.getpid()}")
+    assert os.path.exists(os.path.join(mine, "meta.jsonl"))
+    assert (tmp_path / f"worker_{os.getppid()}").is_dir() and not (tmp_path / f"worker_{dead.pid}").exists()
+    assert process_dir(str(tmp_path)) == mine